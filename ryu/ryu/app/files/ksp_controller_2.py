@@ -13,11 +13,15 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto.ofproto_parser import MsgTemplate
 from ryu.lib import hub
 from ryu.lib.packet import packet, ethernet, ether_types, ipv4, udp, tcp, arp
-from ryu.topology import event, api
-from ryu.topology.api import get_switch, get_link
-import networkx as nx
+from ryu.lib.packet import flow_key
+from ryu.lib.packet import packet_template
+from ryu.topology import event
+from ryu.topology.api import get_topology
+from ryu.topology.paths import KShortestPaths
+from ryu.topology.link_load import LinkLoad
 import psycopg2
 from datetime import datetime, timedelta
 import threading
@@ -59,6 +63,12 @@ STATE_FILE = '/tmp/controller_state.json'
 # ==========================================
 # HELPER FUNCTIONS
 # ==========================================
+def headroom_cost(rate, capacity):
+    """Cost = 100 / sisa kapasitas (Mbps), minimal 1 Mbps"""
+    available = max((capacity - rate) / 1e6, 1)
+    return round(100 / available, 2)
+
+
 def write_state_file(state_data):
     """Write controller state to file for external monitoring"""
     try:
@@ -89,6 +99,8 @@ class VoIPForecastController(app_manager.RyuApp):
         #     (6, 2): 100, (2, 6): 10,
         # }
         
+        # Kapasitas (Mbps) link yang dibatasi tc di testbed, tidak
+        # terlihat di curr_speed port. Link lain memakai curr_speed.
         self.link_capacity = {
 
             (4,1):20,
@@ -122,6 +134,9 @@ class VoIPForecastController(app_manager.RyuApp):
         }
 
         self.link_costs = {}
+        # Rate tiap link diukur dari port stats (EWMA + percentile)
+        self.link_load = LinkLoad(poll_interval=1,
+                                  cost_func=headroom_cost, capacity=100e6)
         # Thread safety
         self.lock = threading.RLock()
         
@@ -154,8 +169,21 @@ class VoIPForecastController(app_manager.RyuApp):
         # Network topology
         self.datapaths = {}
         self.mac_to_port = {}
+        self.ksp = KShortestPaths()
+        self.topo_version = None
+        # ip -> mac dari packet-in, tidak pernah expire
         self.ip_to_mac = {}
-        self.net = nx.DiGraph()
+        # Host table dari EventHostAdd/Move/Delete ryu.topology:
+        # mac -> Host, ip -> mac
+        self.hosts = {}
+        self.host_ip_to_mac = {}
+        
+        # Pre-serialized H1->H2 reroute FlowMod per datapath, only the
+        # output port is patched when rerouting
+        self.reroute_templates = {}
+        self.arp_reply_template = packet_template.PacketTemplate(
+            ethernet.ethernet(ethertype=ether_types.ETH_TYPE_ARP) /
+            arp.arp(opcode=arp.ARP_REPLY))
         
         # Database
         self.db_pool = None
@@ -171,6 +199,7 @@ class VoIPForecastController(app_manager.RyuApp):
         
         # Threads
         self.monitor_thread = hub.spawn(self._monitor_traffic)
+        self.port_monitor_thread = hub.spawn(self._monitor_ports)
         hub.spawn_after(15, self._start_forecast)  # Tunggu lebih lama, pastikan default flows selesai
         # self.topology_thread = hub.spawn(self._discover_topology)
         hub.spawn_after(3, self._discover_topology)
@@ -568,6 +597,46 @@ class VoIPForecastController(app_manager.RyuApp):
             dp.send_msg(mod)
             self.logger.info(f"Deleted low-priority H1->H2 flows on Leaf 1")
     
+    def _send_h1_h2_reroute_flow(self, dp, out_port):
+        """Send the H1->H2 reroute flow forwarding to out_port.
+
+        The FlowMod is serialized once per datapath; later calls only
+        patch the output port into a copy of its bytes.
+        """
+        template = self.reroute_templates.get(dp.id)
+        if template is None or template.datapath is not dp:
+            parser = dp.ofproto_parser
+            ofproto = dp.ofproto
+            
+            match = parser.OFPMatch(
+                eth_type=0x0800,
+                ip_proto=17,
+                ipv4_src='10.0.0.1',
+                ipv4_dst='10.0.0.2',
+                udp_dst=9000
+            )
+            
+            actions = [
+                #parser.OFPActionSetQueue(1),   # queue 1 = VoIP high priority
+                parser.OFPActionOutput(out_port)
+            ]
+
+            inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+            
+            mod = parser.OFPFlowMod(
+                datapath=dp,
+                priority=PRIORITY_REROUTE,
+                match=match,
+                instructions=inst,
+                cookie=COOKIE_REROUTE,
+                idle_timeout=0,
+                hard_timeout=0
+            )
+            template = MsgTemplate(mod)
+            self.reroute_templates[dp.id] = template
+        
+        dp.send_msg(template(output_port=out_port))
+
     def _install_h1_h2_flow_on_spine(self, spine_dpid):
         """Install H1->H2 flow on specified spine"""
         if spine_dpid not in self.datapaths:
@@ -575,38 +644,11 @@ class VoIPForecastController(app_manager.RyuApp):
             return False
         
         dp = self.datapaths[spine_dpid]
-        parser = dp.ofproto_parser
-        ofproto = dp.ofproto
         
         # Output port to Leaf 2 (where H2 is)
         out_port = 2
         
-        match = parser.OFPMatch(
-            eth_type=0x0800,
-            ip_proto=17,
-            ipv4_src='10.0.0.1',
-            ipv4_dst='10.0.0.2',   
-            udp_dst=9000
-        )
-        
-        actions = [
-            #parser.OFPActionSetQueue(1),   # queue 1 = VoIP high priority
-            parser.OFPActionOutput(out_port)
-        ]
-
-        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        
-        mod = parser.OFPFlowMod(
-            datapath=dp,
-            priority=PRIORITY_REROUTE,
-            match=match,
-            instructions=inst,
-            cookie=COOKIE_REROUTE,
-            idle_timeout=0,
-            hard_timeout=0
-        )
-        
-        dp.send_msg(mod)
+        self._send_h1_h2_reroute_flow(dp, out_port)
         self.logger.info(f"âœ… Spine {spine_dpid}: Installed H1->H2 flow (port {out_port})")
         return True
     
@@ -621,58 +663,22 @@ class VoIPForecastController(app_manager.RyuApp):
     
     
     def calculate_cost(self, src, dst):
-
-        capacity = self.link_capacity.get(
-            (src,dst),
-            100
-        )
-
-        if src in [1,2,3]:
-            usage = self.spine_traffic.get(src,0)
-        else:
-            usage = 0
-        
-        self.logger.info(
-            f"src={src} usage_raw={usage}"
-        )
-
-        usage = usage / 1000000
-
-        available = max(
-            capacity - usage,
-            1
-        )
-
-        return round(
-            100 / available,
-            2
-        )
+        """Cost link dari rate terukur, O(1)"""
+        try:
+            return self.link_load.cost(src, dst)
+        except KeyError:
+            # link belum terdeteksi
+            return headroom_cost(0, self.link_load.default_capacity)
         
     def update_link_costs(self):
-
-        for src,dst in self.link_capacity:
-
-            self.link_costs[(src,dst)] = \
-                self.calculate_cost(
-                    src,
-                    dst
-                )
+        self.link_costs = self.link_load.link_costs()
         
     def _get_k_shortest_paths(self, src_dpid, dst_dpid, k=3):
         self.update_link_costs()
-        try:
-            for src,dst in self.net.edges():
-
-                self.net[src][dst]['weight'] = \
-                    self.link_costs.get(
-                        (src,dst),
-                        1
-                    )
-            # UBAH BARIS INI: Tambahkan weight='weight'
-            paths = list(nx.shortest_simple_paths(self.net, src_dpid, dst_dpid, weight='weight'))
-            return paths[:k]
-        except nx.NetworkXNoPath:
-            return []
+        # Hanya cache jalur yang terpengaruh perubahan cost yang dihitung ulang
+        self.ksp.set_costs(self.link_costs)
+        return [list(path) for path in
+                self.ksp.k_shortest_paths(src_dpid, dst_dpid, k)]
 
     def _get_best_path_spine(self, avoid_spine=None):
         """Pilih spine terbaik dari KSP Leaf1(4) -> Leaf2(5)"""
@@ -695,39 +701,12 @@ class VoIPForecastController(app_manager.RyuApp):
             return False
         
         dp = self.datapaths[4]
-        parser = dp.ofproto_parser
-        ofproto = dp.ofproto
         
         # Port mapping: 1->Spine1, 2->Spine2, 3->Spine3
         spine_to_port = {1: 1, 2: 2, 3: 3}
         out_port = spine_to_port.get(target_spine, 2)
         
-        match = parser.OFPMatch(
-            eth_type=0x0800,
-            ip_proto=17,
-            ipv4_src='10.0.0.1',
-            ipv4_dst='10.0.0.2',
-            udp_dst=9000
-        )
-        
-        actions = [
-            #parser.OFPActionSetQueue(1),   # queue 1 = VoIP high priority
-            parser.OFPActionOutput(out_port)
-        ]
-
-        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
-        
-        mod = parser.OFPFlowMod(
-            datapath=dp,
-            priority=PRIORITY_REROUTE,
-            match=match,
-            instructions=inst,
-            cookie=COOKIE_REROUTE,
-            idle_timeout=0,
-            hard_timeout=0
-        )
-        
-        dp.send_msg(mod)
+        self._send_h1_h2_reroute_flow(dp, out_port)
         self.logger.info(f"Leaf 1: Routing H1->H2 via Spine {target_spine} (port {out_port})")
         return True
 
@@ -1107,44 +1086,64 @@ class VoIPForecastController(app_manager.RyuApp):
         while True:
             hub.sleep(5)
             try:
-                switches = get_switch(self)
-                links = get_link(self)
-                
-                self.net.clear()
-                for switch in switches:
-                    self.net.add_node(switch.dp.id)
-                
-                # for link in links:
-                #     self.net.add_edge(link.src.dpid, link.dst.dpid, port=link.src.port_no)
-                #     self.net.add_edge(link.dst.dpid, link.src.dpid, port=link.dst.port_no)
-                for link in links:
-                    # 1. Ambil dpid asal dan tujuan
-                    src = link.src.dpid
-                    dst = link.dst.dpid
-                    
-                    # 2. Cari bobotnya di hardcoded_weights, kalau gak ada beri default 1
-                    # weight_src_dst = self.hardcoded_weights.get((src, dst), 1)
-                    # weight_dst_src = self.hardcoded_weights.get((dst, src), 1)
-                    self.update_link_costs()
-                    
-                    weight_src_dst = \
-                        self.link_costs.get(
-                            (src,dst),
-                            1
-                        )
-
-                    weight_dst_src = \
-                        self.link_costs.get(
-                            (dst,src),
-                            1
-                        )
-                    
-                    # 3. Masukkan ke NetworkX lengkap dengan port DAN weight
-                    self.net.add_edge(src, dst, port=link.src.port_no, weight=weight_src_dst)
-                    self.net.add_edge(dst, src, port=link.dst.port_no, weight=weight_dst_src)
+                # Cache KSP direset hanya jika topologi berubah
+                topo = get_topology(self)
+                if topo.version == self.topo_version:
+                    continue
+                self.link_load.update_topology(topo)
+                for (src, dst), mbps in self.link_capacity.items():
+                    port_no = topo.port(src, dst)
+                    if port_no is not None:
+                        self.link_load.set_capacity(src, port_no, mbps * 1e6)
+                self.update_link_costs()
+                self.ksp.set_costs(self.link_costs)
+                self.ksp.update_topology(topo)
+                self.topo_version = topo.version
             except:
                 pass
 
+    def _ip_to_mac(self, ip):
+        """Resolve MAC dari host table lokal, lalu dari packet-in"""
+        mac = self.host_ip_to_mac.get(ip)
+        host = self.hosts.get(mac)
+        if host is not None and (ip in host.ipv4 or ip in host.ipv6):
+            return mac
+        # The Host objects are shared with the switches app, which adds
+        # the addresses learned after the host event to them
+        for host in self.hosts.values():
+            if ip in host.ipv4 or ip in host.ipv6:
+                self.host_ip_to_mac[ip] = host.mac
+                return host.mac
+        self.host_ip_to_mac.pop(ip, None)
+        # Hosts deleted by the switches app (e.g. by --host-timeout)
+        # are still known by their packet-ins
+        return self.ip_to_mac.get(ip)
+
+    def _add_host(self, host):
+        self.hosts[host.mac] = host
+        for ip in host.ipv4 + host.ipv6:
+            self.host_ip_to_mac[ip] = host.mac
+
+    def _remove_host(self, host):
+        if self.hosts.get(host.mac) is host:
+            del self.hosts[host.mac]
+        for ip in host.ipv4 + host.ipv6:
+            if self.host_ip_to_mac.get(ip) == host.mac:
+                del self.host_ip_to_mac[ip]
+
+    @set_ev_cls(event.EventHostAdd)
+    def _host_add_handler(self, ev):
+        self._add_host(ev.host)
+
+    @set_ev_cls(event.EventHostMove)
+    def _host_move_handler(self, ev):
+        self._remove_host(ev.src)
+        self._add_host(ev.dst)
+
+    @set_ev_cls(event.EventHostDelete)
+    def _host_delete_handler(self, ev):
+        self._remove_host(ev.host)
+
     def _install_default_flows(self):
         """
         Install default flows at startup
@@ -1489,8 +1488,8 @@ class VoIPForecastController(app_manager.RyuApp):
                     self.spine_traffic[dpid] = bps
                 
                 # Resolve MACs
-                src_mac = self.ip_to_mac.get(src_ip)
-                dst_mac = self.ip_to_mac.get(dst_ip)
+                src_mac = self._ip_to_mac(src_ip)
+                dst_mac = self._ip_to_mac(dst_ip)
                 
                 # Insert to DB
                 # H1->H2 UDP:9000: Always insert (for monitoring)
@@ -1556,6 +1555,28 @@ class VoIPForecastController(app_manager.RyuApp):
             for dp in self.datapaths.values():
                 self._request_stats(dp)
 
+    def _monitor_ports(self):
+        """Request port stats, jadwal tiap switch di-stagger"""
+        while True:
+            for dpid in self.link_load.poll_due(time.time()):
+                dp = self.datapaths.get(dpid)
+                if dp is None:
+                    continue
+                req = dp.ofproto_parser.OFPPortStatsRequest(
+                    dp, 0, dp.ofproto.OFPP_ANY)
+                dp.send_msg(req)
+            timeout = self.link_load.poll_timeout(time.time())
+            hub.sleep(1 if timeout is None else timeout)
+
+    @set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)
+    def _port_stats_reply_handler(self, ev):
+        self.link_load.update_port_stats(ev.msg.datapath.id, ev.msg.body)
+
+    @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
+    def _port_status_handler(self, ev):
+        # curr_speed port bisa berubah
+        self.link_load.update_port_desc(ev.msg.datapath.id, [ev.msg.desc])
+
     def _request_stats(self, datapath):
         """Request flow statistics"""
         parser = datapath.ofproto_parser
@@ -1620,9 +1641,14 @@ class VoIPForecastController(app_manager.RyuApp):
             if datapath.id not in self.datapaths:
                 self.datapaths[datapath.id] = datapath
                 self.logger.info(f"ðŸ”Œ Switch connected: DPID {datapath.id}")
+                # Kapasitas dari curr_speed (port desc saat handshake)
+                self.link_load.update_port_desc(datapath.id,
+                                                datapath.ports.values())
+                self.link_load.add_datapath(datapath.id)
         elif ev.state == DEAD_DISPATCHER:
             if datapath.id in self.datapaths:
                 del self.datapaths[datapath.id]
+                self.link_load.remove_datapath(datapath.id)
                 self.logger.warning(f"ðŸ”Œ Switch disconnected: DPID {datapath.id}")
     
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
@@ -1666,37 +1692,39 @@ class VoIPForecastController(app_manager.RyuApp):
         in_port = msg.match['in_port']
         dpid = datapath.id
         
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        key = flow_key.extract(msg.data)
+        if key is None:
+            return
         
         # Ignore LLDP and IPv6
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        if key.eth_type == ether_types.ETH_TYPE_LLDP:
             return
-        if eth.ethertype == ether_types.ETH_TYPE_IPV6:
+        if key.eth_type == ether_types.ETH_TYPE_IPV6:
             return
         
-        dst = eth.dst
-        src = eth.src
+        dst = key.eth_dst
+        src = key.eth_src
         
         # MAC learning
         self.mac_to_port.setdefault(dpid, {})
         self.mac_to_port[dpid][src] = in_port
         
         # Extract protocols
-        arp_pkt = pkt.get_protocol(arp.arp)
-        ip_pkt = pkt.get_protocol(ipv4.ipv4)
+        arp_pkt = None
+        if key.eth_type == ether_types.ETH_TYPE_ARP:
+            arp_pkt = packet.Packet(msg.data, lazy=True).get_protocol(arp.arp)
+        is_ip = key.eth_type == ether_types.ETH_TYPE_IP and key.ip_src is not None
         
-        if ip_pkt:
-            self.ip_to_mac[ip_pkt.src] = src
+        if is_ip:
+            self.ip_to_mac[key.ip_src] = src
         
-        udp_pkt = pkt.get_protocol(udp.udp)
-        tcp_pkt = pkt.get_protocol(tcp.tcp)  # âœ… TAMBAHKAN INI
-        udp_dst = udp_pkt.dst_port if udp_pkt else None
+        udp_dst = key.dst_port if is_ip and key.ip_proto == 17 else None
+        tcp_dst = key.dst_port if is_ip and key.ip_proto == 6 else None
         
         # === SPECIAL HANDLING FOR H1->H2 (Leaf 1 - DPID 4) ===
-        if ip_pkt and dpid == 4:
-            src_ip = ip_pkt.src
-            dst_ip = ip_pkt.dst
+        if is_ip and dpid == 4:
+            src_ip = key.ip_src
+            dst_ip = key.ip_dst
             
             if src_ip == '10.0.0.1' and dst_ip == '10.0.0.2':
                 # CRITICAL: Skip flow installation during reroute
@@ -1726,9 +1754,8 @@ class VoIPForecastController(app_manager.RyuApp):
                 ]
                 
                 # âœ… UBAH: Install flow untuk UDP:9000 atau TCP (tanpa port spesifik)
-                tcp_pkt = pkt.get_protocol(tcp.tcp)
                 
-                if udp_pkt and udp_pkt.dst_port == 9000:
+                if udp_dst == 9000:
                     # UDP:9000 â†’ Install specific flow (akan di-reroute)
                     match = parser.OFPMatch(
                         eth_type=0x0800,
@@ -1738,7 +1765,7 @@ class VoIPForecastController(app_manager.RyuApp):
                         udp_dst=9000
                     )
                     self.add_flow(datapath, PRIORITY_USER, match, actions, msg.buffer_id)
-                elif tcp_pkt and tcp_pkt.dst_port == 9003:
+                elif tcp_dst == 9003:
                     # TCP â†’ Install flow tanpa port (tidak akan di-reroute)
                     match = parser.OFPMatch(
                         eth_type=0x0800,
@@ -1765,9 +1792,9 @@ class VoIPForecastController(app_manager.RyuApp):
         
         # === SPECIAL HANDLING FOR H3->H2 (Leaf 3 - DPID 6) ===
         # === SPECIAL HANDLING FOR H3->H2 (Leaf 3 - DPID 6) ===
-        if ip_pkt and dpid == 6:
-            src_ip = ip_pkt.src
-            dst_ip = ip_pkt.dst
+        if is_ip and dpid == 6:
+            src_ip = key.ip_src
+            dst_ip = key.ip_dst
             
             if src_ip == '10.0.0.3' and dst_ip == '10.0.0.2':
                 # ALWAYS port 2 (Spine 2)
@@ -1777,9 +1804,8 @@ class VoIPForecastController(app_manager.RyuApp):
                 ]
                 
                 # âœ… UBAH: Support TCP & UDP port 9001
-                tcp_pkt = pkt.get_protocol(tcp.tcp)
                 
-                if udp_pkt and udp_pkt.dst_port == 9001:
+                if udp_dst == 9001:
                     match = parser.OFPMatch(
                         eth_type=0x0800,
                         ip_proto=17,
@@ -1788,7 +1814,7 @@ class VoIPForecastController(app_manager.RyuApp):
                         udp_dst=9001
                     )
                     self.add_flow(datapath, PRIORITY_USER, match, actions, msg.buffer_id)
-                elif tcp_pkt and tcp_pkt.dst_port == 9001:
+                elif tcp_dst == 9001:
                     match = parser.OFPMatch(
                         eth_type=0x0800,
                         ip_proto=6,
@@ -1814,11 +1840,9 @@ class VoIPForecastController(app_manager.RyuApp):
         
         # === SPECIAL HANDLING FOR Leaf 2 (DPID 5) - DESTINATION ===
         # === SPECIAL HANDLING FOR Leaf 2 (DPID 5) - DESTINATION ===
-        if ip_pkt and dpid == 5:
-            src_ip = ip_pkt.src
-            dst_ip = ip_pkt.dst
-            tcp_pkt = pkt.get_protocol(tcp.tcp)
-            udp_pkt = pkt.get_protocol(udp.udp)
+        if is_ip and dpid == 5:
+            src_ip = key.ip_src
+            dst_ip = key.ip_dst
             
             if dst_ip == '10.0.0.2':
                 if dst in self.mac_to_port[dpid]:
@@ -1830,9 +1854,9 @@ class VoIPForecastController(app_manager.RyuApp):
                     # âœ… UBAH: Detect queue berdasarkan protocol & port
                     queue_id = 1  # Default VoIP queue
                     
-                    if udp_pkt:
-                        queue_id = 1 if udp_pkt.dst_port == 9000 else 2
-                    elif tcp_pkt:
+                    if udp_dst is not None:
+                        queue_id = 1 if udp_dst == 9000 else 2
+                    elif tcp_dst is not None:
                         queue_id = 2  # TCP = bursty queue
                     
                     actions = [
@@ -1841,22 +1865,22 @@ class VoIPForecastController(app_manager.RyuApp):
                     ]
                     
                     # âœ… UBAH: Install flow untuk TCP & UDP port 9000/9001
-                    if udp_pkt and udp_pkt.dst_port in [9000, 9001]:
+                    if udp_dst in [9000, 9001]:
                         match = parser.OFPMatch(
                             eth_type=0x0800,
                             ip_proto=17,
                             ipv4_src=src_ip,
                             ipv4_dst=dst_ip,
-                            udp_dst=udp_pkt.dst_port
+                            udp_dst=udp_dst
                         )
                         self.add_flow(datapath, PRIORITY_USER, match, actions, msg.buffer_id)
-                    elif tcp_pkt and tcp_pkt.dst_port in [9001, 9003]:
+                    elif tcp_dst in [9001, 9003]:
                         match = parser.OFPMatch(
                             eth_type=0x0800,
                             ip_proto=6,
                             ipv4_src=src_ip,
                             ipv4_dst=dst_ip,
-                            tcp_dst=tcp_pkt.dst_port
+                            tcp_dst=tcp_dst
                         )
                         self.add_flow(datapath, PRIORITY_USER, match, actions, msg.buffer_id)
                 
@@ -1876,26 +1900,21 @@ class VoIPForecastController(app_manager.RyuApp):
         if arp_pkt:
             self.ip_to_mac[arp_pkt.src_ip] = arp_pkt.src_mac
             
-            if arp_pkt.opcode == arp.ARP_REQUEST and arp_pkt.dst_ip in self.ip_to_mac:
-                target_mac = self.ip_to_mac[arp_pkt.dst_ip]
-                
-                e = ethernet.ethernet(
-                    dst=src, src=target_mac, ethertype=ether_types.ETH_TYPE_ARP
-                )
-                a = arp.arp(
-                    opcode=arp.ARP_REPLY, src_mac=target_mac, src_ip=arp_pkt.dst_ip, 
-                    dst_mac=src, dst_ip=arp_pkt.src_ip
+            target_mac = None
+            if arp_pkt.opcode == arp.ARP_REQUEST:
+                target_mac = self._ip_to_mac(arp_pkt.dst_ip)
+            
+            if target_mac is not None:
+                data = self.arp_reply_template.render(
+                    eth_dst=src, eth_src=target_mac,
+                    arp_sha=target_mac, arp_spa=arp_pkt.dst_ip,
+                    arp_tha=src, arp_tpa=arp_pkt.src_ip
                 )
                 
-                p = packet.Packet()
-                p.add_protocol(e)
-                p.add_protocol(a)
-                p.serialize()
-                
                 actions = [parser.OFPActionOutput(in_port)]
                 out = parser.OFPPacketOut(
                     datapath=datapath, buffer_id=ofproto.OFP_NO_BUFFER, 
-                    in_port=ofproto.OFPP_CONTROLLER, actions=actions, data=p.data
+                    in_port=ofproto.OFPP_CONTROLLER, actions=actions, data=data
                 )
                 datapath.send_msg(out)
                 return
@@ -1932,9 +1951,9 @@ class VoIPForecastController(app_manager.RyuApp):
         should_install_flow = (out_port != ofproto.OFPP_FLOOD)
         
         # Skip generic flow installation untuk H1->H2 dan H3->H2
-        if ip_pkt:
-            if (ip_pkt.src == '10.0.0.1' and ip_pkt.dst == '10.0.0.2') or \
-               (ip_pkt.src == '10.0.0.3' and ip_pkt.dst == '10.0.0.2'):
+        if is_ip:
+            if (key.ip_src == '10.0.0.1' and key.ip_dst == '10.0.0.2') or \
+               (key.ip_src == '10.0.0.3' and key.ip_dst == '10.0.0.2'):
                 should_install_flow = False  # Sudah ada high-priority specific flows
         
         if should_install_flow:
@@ -1946,34 +1965,34 @@ class VoIPForecastController(app_manager.RyuApp):
             # --------------------
 
             # Baru cek detail IP (kalau ada)
-            if ip_pkt and udp_pkt:
+            if is_ip and udp_dst is not None:
                 match = parser.OFPMatch(
                     in_port=in_port,
                     eth_dst=dst,
                     eth_type=0x0800,
                     ip_proto=17,
-                    ipv4_src=ip_pkt.src,
-                    ipv4_dst=ip_pkt.dst,
-                    udp_dst=udp_pkt.dst_port
+                    ipv4_src=key.ip_src,
+                    ipv4_dst=key.ip_dst,
+                    udp_dst=udp_dst
                 )
-            elif ip_pkt and tcp_pkt:
+            elif is_ip and tcp_dst is not None:
                 # âœ… TAMBAHKAN: TCP handling
                 match = parser.OFPMatch(
                     in_port=in_port,
                     eth_dst=dst,
                     eth_type=0x0800,
                     ip_proto=6,
-                    ipv4_src=ip_pkt.src,
-                    ipv4_dst=ip_pkt.dst,
-                    tcp_dst=tcp_pkt.dst_port
+                    ipv4_src=key.ip_src,
+                    ipv4_dst=key.ip_dst,
+                    tcp_dst=tcp_dst
                 )
-            elif ip_pkt:
+            elif is_ip:
                 match = parser.OFPMatch(
                     in_port=in_port,
                     eth_dst=dst,
                     eth_type=0x0800,
-                    ipv4_src=ip_pkt.src,
-                    ipv4_dst=ip_pkt.dst
+                    ipv4_src=key.ip_src,
+                    ipv4_dst=key.ip_dst
                 )
 
             # Sekarang aman, 'match' pasti sudah terisi (minimal yang L2 tadi)
@@ -14,6 +14,7 @@ from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
 from ryu.lib import hub
 from ryu.lib.packet import packet, ethernet, ether_types, ipv4, udp, tcp, arp
+from ryu.lib.packet import flow_key
 from ryu.topology import event, api
 from ryu.topology.api import get_switch, get_link
 import networkx as nx
@@ -462,31 +463,32 @@ class VoIPSmartController(app_manager.RyuApp):
         in_port = msg.match['in_port']
         dpid = datapath.id
         
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        key = flow_key.extract(msg.data)
         
         # Ignore LLDP packets
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        if key is None or key.eth_type == ether_types.ETH_TYPE_LLDP:
             return
         
-        dst_mac = eth.dst
-        src_mac = eth.src
+        dst_mac = key.eth_dst
+        src_mac = key.eth_src
         
         # Update MAC learning table
         self.mac_to_port.setdefault(dpid, {})
         self.mac_to_port[dpid][src_mac] = in_port
         
         # Handle ARP
-        arp_pkt = pkt.get_protocol(arp.arp)
-        if arp_pkt:
-            self._handle_arp(datapath, in_port, eth, arp_pkt, msg.buffer_id)
-            return
+        if key.eth_type == ether_types.ETH_TYPE_ARP:
+            pkt = packet.Packet(msg.data, lazy=True)
+            arp_pkt = pkt.get_protocol(arp.arp)
+            if arp_pkt:
+                eth = pkt.get_protocol(ethernet.ethernet)
+                self._handle_arp(datapath, in_port, eth, arp_pkt, msg.buffer_id)
+                return
         
         # Handle IP packets
-        ip_pkt = pkt.get_protocol(ipv4.ipv4)
-        if ip_pkt:
-            src_ip = ip_pkt.src
-            dst_ip = ip_pkt.dst
+        if key.eth_type == ether_types.ETH_TYPE_IP and key.ip_src:
+            src_ip = key.ip_src
+            dst_ip = key.ip_dst
             
             # Update IP to MAC mapping
             self.ip_to_mac[src_ip] = src_mac
@@ -2,16 +2,21 @@
 
 """
 PCAP COLLECTOR – FIXED FOR LINUX_SLL2 (Raw Packets)
-- Input  : /tmp/voip.pcap
+- Input  : /tmp/voip.pcap (pcap or pcapng)
 - Output : PostgreSQL
 - Works  : Mininet + Ryu + D-ITG + tcpdump -i any
 """
 
-from scapy.all import rdpcap
-from scapy.layers.inet import IP, UDP
 import psycopg2
 from datetime import datetime
 
+from ryu.lib import pcaplib
+from ryu.lib.packet import flow_key
+from ryu.lib.packet import in_proto
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import packet
+from ryu.lib.packet import udp
+
 # ================== DB CONFIG ==================
 DB_CONN = {
     "dbname": "development",
@@ -21,12 +26,17 @@ DB_CONN = {
 }
 
 PCAP_FILE = "/tmp/voip.pcap"
+BATCH_SIZE = 1000
 
 # ================== MAIN ==================
 def main():
     print("[*] Reading PCAP...")
-    pkts = rdpcap(PCAP_FILE)
-    print(f"[*] Total packets: {len(pkts)}")
+    # LINUX_SLL2 frames of "tcpdump -i any" are converted to Ethernet,
+    # and only the UDP packets are indexed.
+    reader = pcaplib.IndexedReader(
+        open(PCAP_FILE, "rb"), ethernet=True,
+        match=flow_key.match(ip_proto=in_proto.IPPROTO_UDP))
+    print(f"[*] Total UDP packets: {len(reader)}")
 
     conn = psycopg2.connect(**DB_CONN)
     cur = conn.cursor()
@@ -49,45 +59,50 @@ def main():
     base_time = None
 
     inserted = 0
-
-    for pkt in pkts:
-        raw = bytes(pkt)
-
-        # === MANUAL DECODE (KUNCI FIX) ===
-        try:
-            ip = IP(raw)
-            if ip.proto != 17:
+    index = 0
+
+    for batch in reader.batches(BATCH_SIZE):
+        rows = []
+        for ts, raw in batch:
+            # the length of the captured record, not of the Ethernet
+            # frame converted from it
+            length = reader.length(index)
+            index += 1
+
+            # decode up to UDP only
+            pkt = packet.Packet(raw, lazy=True)
+            ip = pkt.get_protocol(ipv4.ipv4)
+            udp_pkt = pkt.get_protocol(udp.udp)
+            if ip is None or udp_pkt is None:
+                # IPv6, or a fragment
                 continue
-            udp = ip[UDP]
-        except:
-            continue
 
-        # Time handling
-        if base_time is None:
-            base_time = pkt.time
+            # Time handling
+            if base_time is None:
+                base_time = ts
 
-        rel_time = pkt.time - base_time
-        arrival_time = datetime.fromtimestamp(pkt.time)
+            rel_time = ts - base_time
+            arrival_time = datetime.fromtimestamp(ts)
 
-        src_ip = ip.src
-        dst_ip = ip.dst
-        length = len(raw)
+            info = (f"{udp_pkt.src_port}  >  {udp_pkt.dst_port} "
+                    f"Len={udp_pkt.total_length - udp.udp._MIN_LEN}")
 
-        info = f"{udp.sport}  >  {udp.dport} Len={len(udp.payload)}"
+            rows.append((
+                round(rel_time, 6),
+                ip.src,
+                "UDP",
+                length,
+                arrival_time,
+                info,
+                pkt_no,
+                ip.dst
+            ))
 
-        cur.execute(insert_q, (
-            round(rel_time, 6),
-            src_ip,
-            "UDP",
-            length,
-            arrival_time,
-            info,
-            pkt_no,
-            dst_ip
-        ))
+            pkt_no += 1
 
-        pkt_no += 1
-        inserted += 1
+        cur.executemany(insert_q, rows)
+        inserted += len(rows)
+    reader.close()
 
     conn.commit()
     cur.close()
@@ -41,6 +41,7 @@ from ryu.lib.packet import icmp
 from ryu.lib.packet import ipv4
 from ryu.lib.packet import packet
 from ryu.lib.packet import packet_base
+from ryu.lib.packet import packet_template
 from ryu.lib.packet import tcp
 from ryu.lib.packet import udp
 from ryu.lib.packet import vlan
@@ -1469,6 +1470,8 @@ class OfCtl(object):
         self.dp = dp
         self.sw_id = {'sw_id': dpid_lib.dpid_to_str(dp.id)}
         self.logger = logger
+        # (opcode, VLAN ID) -> PacketTemplate of ARP packets
+        self._arp_templates = {}
 
     def set_sw_config_for_ttl(self):
         # OpenFlow v1_2/1_3.
@@ -1483,6 +1486,19 @@ class OfCtl(object):
     def send_arp(self, arp_opcode, vlan_id, src_mac, dst_mac,
                  src_ip, dst_ip, arp_target_mac, in_port, output):
         # Generate ARP packet
+        tmpl = self._arp_templates.get((arp_opcode, vlan_id))
+        if tmpl is None:
+            tmpl = self._arp_template(arp_opcode, vlan_id)
+            self._arp_templates[(arp_opcode, vlan_id)] = tmpl
+        data = tmpl.render(eth_dst=dst_mac, eth_src=src_mac,
+                           arp_sha=src_mac, arp_spa=src_ip,
+                           arp_tha=arp_target_mac, arp_tpa=dst_ip)
+
+        # Send packet out
+        self.send_packet_out(in_port, output, data)
+
+    @staticmethod
+    def _arp_template(arp_opcode, vlan_id):
         if vlan_id != VLANID_NONE:
             ether_proto = ether.ETH_TYPE_8021Q
             pcp = 0
@@ -1497,17 +1513,13 @@ class OfCtl(object):
         plen = 4
 
         pkt = packet.Packet()
-        e = ethernet.ethernet(dst_mac, src_mac, ether_proto)
-        a = arp.arp(hwtype, arp_proto, hlen, plen, arp_opcode,
-                    src_mac, src_ip, arp_target_mac, dst_ip)
+        e = ethernet.ethernet(ethertype=ether_proto)
+        a = arp.arp(hwtype, arp_proto, hlen, plen, arp_opcode)
         pkt.add_protocol(e)
         if vlan_id != VLANID_NONE:
             pkt.add_protocol(v)
         pkt.add_protocol(a)
-        pkt.serialize()
-
-        # Send packet out
-        self.send_packet_out(in_port, output, pkt.data, data_str=str(pkt))
+        return packet_template.PacketTemplate(pkt)
 
     def send_icmp(self, in_port, protocol_list, vlan_id, icmp_type,
                   icmp_code, icmp_data=None, msg_data=None, src_ip=None):
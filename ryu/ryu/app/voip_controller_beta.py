@@ -3,12 +3,12 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, arp, ipv4
+from ryu.lib.packet import flow_key
 from ryu.lib import hub
 from ryu.topology import event, switches
-from ryu.topology.api import get_switch, get_link
+from ryu.topology.api import get_topology
+from ryu.topology.paths import KShortestPaths
 import networkx as nx
-import itertools
 
 class KSPController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
@@ -17,6 +17,8 @@ class KSPController(app_manager.RyuApp):
         super(KSPController, self).__init__(*args, **kwargs)
         self.topology_api_app = self
         self.net = nx.DiGraph()
+        self.topo_version = None
+        self.ksp = KShortestPaths()
         self.mac_to_port = {}
         self.datapaths = {}
         self.discovery_thread = hub.spawn(self._monitor_topology)
@@ -70,15 +72,20 @@ class KSPController(app_manager.RyuApp):
             hub.sleep(2)
 
     def _update_topology(self):
-        self.net.clear()
-        switch_list = get_switch(self.topology_api_app, None)
-        switches = [switch.dp.id for switch in switch_list]
-        self.net.add_nodes_from(switches)
-        
-        link_list = get_link(self.topology_api_app, None)
-        for link in link_list:
-            self.net.add_edge(link.src.dpid, link.dst.dpid, port=link.src.port_no)
-            self.net.add_edge(link.dst.dpid, link.src.dpid, port=link.dst.port_no)
+        # Rebuild only when the topology has changed
+        topo = get_topology(self.topology_api_app)
+        if topo.version == self.topo_version:
+            return
+        net = nx.DiGraph()
+        net.add_nodes_from(topo.dpids)
+        for (src, dst), (src_port, dst_port) in topo.ports.items():
+            net.add_edge(src, dst, port=src_port)
+            if (dst, src) not in topo.ports:
+                # the reverse link is not discovered yet
+                net.add_edge(dst, src, port=dst_port)
+        self.net = net
+        self.ksp.update_topology(topo)
+        self.topo_version = topo.version
 
     # ===============================================================
     # 3. K-SHORTEST PATH LOGIC (INTI PERUBAHAN)
@@ -88,12 +95,10 @@ class KSPController(app_manager.RyuApp):
         Menghitung K-Jalur terpendek dan memilih salah satu.
         """
         try:
-            # Menggunakan shortest_simple_paths (implementasi Yen's Algorithm atau BFS varian)
-            # Generator ini menghasilkan path dari terpendek ke terpanjang
-            paths_generator = nx.shortest_simple_paths(self.net, src_dpid, dst_dpid)
-            
-            # Ambil K jalur teratas
-            k_paths = list(itertools.islice(paths_generator, self.K_PATHS))
+            # Yen's Algorithm, berhenti di jalur ke-K dan di-cache
+            # sampai topologi berubah
+            # Hasilnya urut dari terpendek ke terpanjang
+            k_paths = self.ksp.k_shortest_paths(src_dpid, dst_dpid, self.K_PATHS)
             
             if not k_paths:
                 return None, None
@@ -141,23 +146,23 @@ class KSPController(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        key = flow_key.extract(msg.data)
+        if key is None: return
 
         # Ignore LLDP/IPv6 multicast spam
-        if eth.ethertype == 35020 or eth.ethertype == 34525: return
+        if key.eth_type == 35020 or key.eth_type == 34525: return
 
-        dst = eth.dst
-        src = eth.src
+        dst = key.eth_dst
+        src = key.eth_src
         dpid = datapath.id
 
         self.mac_to_port.setdefault(dpid, {})
         self.mac_to_port[dpid][src] = in_port
 
         # --- Extract IP Info (untuk potensi logic rerouting nanti) ---
-        ip_pkt = pkt.get_protocol(ipv4.ipv4)
-        src_ip = ip_pkt.src if ip_pkt else None
-        dst_ip = ip_pkt.dst if ip_pkt else None
+        is_ipv4 = key.eth_type == 0x0800
+        src_ip = key.ip_src if is_ipv4 else None
+        dst_ip = key.ip_dst if is_ipv4 else None
 
         if dst in self.mac_to_port[dpid]:
             # Local switching
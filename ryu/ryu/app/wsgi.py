@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import inspect
+import json
 from types import MethodType
 
 from routes import Mapper
@@ -32,6 +33,7 @@ from webob.request import Request as webob_Request
 from webob.response import Response as webob_Response
 
 from ryu import cfg
+from ryu.controller import perf
 from ryu.lib import hub
 
 DEFAULT_WSGI_HOST = '0.0.0.0'
@@ -167,6 +169,25 @@ class ControllerBase(object):
         return getattr(self, action)(req, **kwargs)
 
 
+class PerfController(ControllerBase):
+    """
+    Serves the performance counters of the controller, see
+    ryu.controller.perf.  Registered by WSGIApplication if
+    --perf-stats is given.
+    """
+
+    @route('perf', '/perf/stats', methods=['GET'])
+    def get_perf_stats(self, req, **_kwargs):
+        body = json.dumps(perf.collect(), sort_keys=True)
+        return Response(content_type='application/json', body=body)
+
+    @route('perf', '/metrics', methods=['GET'])
+    def get_metrics(self, req, **_kwargs):
+        res = Response(body=perf.prometheus_text())
+        res.content_type = 'text/plain; version=0.0.4'
+        return res
+
+
 class WebSocketDisconnectedError(Exception):
     pass
 
@@ -266,6 +287,9 @@ class WSGIApplication(object):
         self.registory = {}
         self._wsmanager = WebSocketManager()
         super(WSGIApplication, self).__init__()
+        if perf.enabled():
+            self.register(PerfController)
+            perf.start_sampler()
 
     def _match(self, req):
         # Note: Invoke the new API, first. If the arguments unmatched,
@@ -23,25 +23,33 @@ The central management of Ryu applications.
 
 """
 
+import collections
 import inspect
 import itertools
 import logging
 import sys
 import os
 import gc
+import time
 
 from ryu import cfg
+# For loading event-queue-* options
+from ryu import flags  # noqa
 from ryu import utils
 from ryu.app import wsgi
 from ryu.controller.handler import register_instance, get_dependent_services
 from ryu.controller.controller import Datapath
 from ryu.controller import event
+from ryu.controller import ofp_event
+from ryu.controller import perf
 from ryu.controller.event import EventRequestBase, EventReplyBase
 from ryu.lib import hub
 from ryu.ofproto import ofproto_protocol
 
 LOG = logging.getLogger('ryu.base.app_manager')
 
+CONF = cfg.CONF
+
 SERVICE_BRICKS = {}
 
 
@@ -88,6 +96,160 @@ def require_app(app_name, api_style=False):
     LOG.debug('require_app: %s is required by %s', app_name, m.__name__)
 
 
+class EventQueue(object):
+    """
+    The event queue of a RyuApp.
+
+    Events are queued in one lane per priority (event.EVENT_PRIORITY_*,
+    see EventBase.PRIORITY) and get() returns the oldest event of the
+    highest priority.  put() blocks while the lane of the event is full
+    unless the event class is in drop_oldest; then the oldest queued
+    event of that class is discarded instead.
+
+    An event of an ORDERED class is queued in the lowest priority lane
+    which holds events of its datapath, so that it is handled after
+    them.
+    """
+
+    def __init__(self, sizes, drop_oldest=()):
+        self.sizes = dict((prio, sizes[prio]) for prio in
+                          event.EVENT_PRIORITIES)
+        self.drop_oldest = frozenset(drop_oldest)
+        self._lanes = dict((prio, collections.deque())
+                           for prio in event.EVENT_PRIORITIES)
+        self._lane_sems = dict((prio, hub.BoundedSemaphore(size))
+                               for prio, size in self.sizes.items())
+        # Priority -> {datapath: the number of its events in the lane}
+        self._dp_depths = dict((prio, collections.Counter())
+                               for prio in event.EVENT_PRIORITIES)
+        # The number of queued events.  get() waits on this.
+        self._items = hub.Semaphore(0)
+        self._stats = dict((prio, {'enqueued': 0,
+                                   'dequeued': 0,
+                                   'dropped': 0,
+                                   'blocked': 0,
+                                   'wait_total': 0.0,
+                                   'wait_max': 0.0})
+                           for prio in event.EVENT_PRIORITIES)
+        # Priority -> perf.Histogram of the queueing delays, if measured
+        self.wait_histograms = None
+
+    def qsize(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def empty(self):
+        return not any(self._lanes.values())
+
+    @staticmethod
+    def _datapath(ev):
+        dp = getattr(ev, 'datapath', None)
+        if dp is None:
+            dp = getattr(getattr(ev, 'msg', None), 'datapath', None)
+        return dp
+
+    def _append(self, prio, item):
+        self._lanes[prio].append(item)
+        dp = item[3]
+        if dp is not None:
+            self._dp_depths[prio][dp] += 1
+
+    def _popped(self, prio, item):
+        dp = item[3]
+        if dp is not None:
+            depths = self._dp_depths[prio]
+            depths[dp] -= 1
+            if not depths[dp]:
+                del depths[dp]
+
+    def _drop_oldest(self, prio, ev_cls):
+        lane = self._lanes[prio]
+        for i, item in enumerate(lane):
+            if item[0].__class__ is ev_cls:
+                del lane[i]
+                self._popped(prio, item)
+                self._stats[prio]['dropped'] += 1
+                return True
+        return False
+
+    def put(self, ev, state):
+        """
+        Queue ev, which is to be handled in the given dispatcher state.
+        Returns False if the event replaced an older one of its class.
+        """
+        prio = ev.PRIORITY
+        dp = self._datapath(ev)
+        if ev.ORDERED and dp is not None:
+            for lower in reversed(event.EVENT_PRIORITIES):
+                if lower <= prio:
+                    break
+                if self._dp_depths[lower][dp]:
+                    prio = lower
+                    break
+        stats = self._stats[prio]
+        sem = self._lane_sems[prio]
+        item = (ev, state, time.time(), dp)
+        if not sem.acquire(blocking=False):
+            if (ev.__class__ in self.drop_oldest and
+                    self._drop_oldest(prio, ev.__class__)):
+                self._append(prio, item)
+                stats['enqueued'] += 1
+                return False
+            stats['blocked'] += 1
+            sem.acquire()
+        self._append(prio, item)
+        stats['enqueued'] += 1
+        self._items.release()
+        return True
+
+    def get(self):
+        """
+        Returns (event, state) of the next event to handle.
+        """
+        self._items.acquire()
+        for prio in event.EVENT_PRIORITIES:
+            lane = self._lanes[prio]
+            if lane:
+                break
+        item = lane.popleft()
+        self._popped(prio, item)
+        ev, state, enqueued, _dp = item
+        self._lane_sems[prio].release()
+        stats = self._stats[prio]
+        stats['dequeued'] += 1
+        wait = time.time() - enqueued
+        stats['wait_total'] += wait
+        if wait > stats['wait_max']:
+            stats['wait_max'] = wait
+        if self.wait_histograms is not None:
+            self.wait_histograms[prio].observe(wait)
+        return ev, state
+
+    def stats(self):
+        """
+        Returns the counters of each lane as a dict.
+
+        ========== ===================================================
+        Key        Description
+        ========== ===================================================
+        size       Capacity of the lane
+        depth      Number of queued events
+        enqueued   Number of events queued so far
+        dequeued   Number of events handed to the event loop so far
+        dropped    Number of events discarded by the drop-oldest policy
+        blocked    Number of times a sender waited for room
+        wait_total Sum of queueing delays of dequeued events in seconds
+        wait_max   Maximum queueing delay in seconds
+        ========== ===================================================
+        """
+        result = {}
+        for prio in event.EVENT_PRIORITIES:
+            stats = dict(self._stats[prio])
+            stats['size'] = self.sizes[prio]
+            stats['depth'] = len(self._lanes[prio])
+            result[prio] = stats
+        return result
+
+
 class RyuApp(object):
     """
     The base class for Ryu applications.
@@ -129,6 +291,20 @@ class RyuApp(object):
     a different python module from the RyuApp subclass is.
     """
 
+    _EVENT_QUEUE_SIZES = {}
+    """
+    A dictionary to override the size of the event queue lanes of this
+    RyuApp.  Its key is an event priority (event.EVENT_PRIORITY_*) and its
+    value is the number of events.  Lanes not given here are sized by
+    the event-queue-*size options.
+
+    Example::
+
+        _EVENT_QUEUE_SIZES = {
+            event.EVENT_PRIORITY_DATA: 1024
+        }
+    """
+
     OFP_VERSIONS = None
     """
     A list of supported OpenFlow versions for this RyuApp.
@@ -155,10 +331,16 @@ class RyuApp(object):
         self.name = self.__class__.__name__
         self.event_handlers = {}        # ev_cls -> handlers:list
         self.observers = {}     # ev_cls -> observer-name -> states:set
+        # (ev_cls, state) -> (handlers:tuple, observer-names:tuple)
+        # Compiled on demand from the above and dropped whenever either
+        # of them changes.
+        self._dispatch_table = {}
         self.threads = []
         self.main_thread = None
-        self.events = hub.Queue(128)
-        self._events_sem = hub.BoundedSemaphore(self.events.maxsize)
+        self.events = self._create_event_queue()
+        # Handler name -> perf.Histogram of its latency, if measured
+        self.handler_latency = {} if perf.enabled() else None
+        perf.register_app(self)
         if hasattr(self.__class__, 'LOGGER_NAME'):
             self.logger = logging.getLogger(self.__class__.LOGGER_NAME)
         else:
@@ -171,6 +353,29 @@ class RyuApp(object):
         self._event_stop = _EventThreadStop()
         self.is_active = True
 
+    def _create_event_queue(self):
+        sizes = {
+            event.EVENT_PRIORITY_CONTROL: CONF.event_queue_control_size,
+            event.EVENT_PRIORITY_DEFAULT: CONF.event_queue_size,
+            event.EVENT_PRIORITY_DATA: CONF.event_queue_data_size,
+        }
+        sizes.update(self._EVENT_QUEUE_SIZES)
+        drop_oldest = []
+        if CONF.event_queue_packet_in_policy == 'drop-oldest':
+            drop_oldest.append(ofp_event.EventOFPPacketIn)
+        queue = EventQueue(sizes, drop_oldest)
+        if perf.enabled():
+            queue.wait_histograms = dict(
+                (prio, perf.Histogram()) for prio in event.EVENT_PRIORITIES)
+        return queue
+
+    def get_event_queue_stats(self):
+        """
+        Returns the counters of the event queue of this RyuApp.
+        See EventQueue.stats.
+        """
+        return self.events.stats()
+
     def start(self):
         """
         Hook that is called after startup initialization is done.
@@ -196,25 +401,30 @@ class RyuApp(object):
         assert callable(handler)
         self.event_handlers.setdefault(ev_cls, [])
         self.event_handlers[ev_cls].append(handler)
+        self._dispatch_table.clear()
 
     def unregister_handler(self, ev_cls, handler):
         assert callable(handler)
         self.event_handlers[ev_cls].remove(handler)
         if not self.event_handlers[ev_cls]:
             del self.event_handlers[ev_cls]
+        self._dispatch_table.clear()
 
     def register_observer(self, ev_cls, name, states=None):
         states = states or set()
         ev_cls_observers = self.observers.setdefault(ev_cls, {})
         ev_cls_observers.setdefault(name, set()).update(states)
+        self._dispatch_table.clear()
 
     def unregister_observer(self, ev_cls, name):
         observers = self.observers.get(ev_cls, {})
         observers.pop(name)
+        self._dispatch_table.clear()
 
     def unregister_observer_all_event(self, name):
         for observers in self.observers.values():
             observers.pop(name, None)
+        self._dispatch_table.clear()
 
     def observe_event(self, ev_cls, states=None):
         brick = _lookup_service_brick_by_ev_cls(ev_cls)
@@ -226,6 +436,42 @@ class RyuApp(object):
         if brick is not None:
             brick.unregister_observer(ev_cls, self.name)
 
+    def _compile_dispatch(self, ev_cls, state):
+        handlers = self.event_handlers.get(ev_cls, [])
+        if state is not None:
+            def test(h):
+                if not hasattr(h, 'callers') or ev_cls not in h.callers:
+                    # dynamically registered handlers does not have
+                    # h.callers element for the event.
+                    return True
+                states = h.callers[ev_cls].dispatchers
+                if not states:
+                    # empty states means all states
+                    return True
+                return state in states
+
+            handlers = [h for h in handlers if test(h)]
+
+        observers = [k for k, v in self.observers.get(ev_cls, {}).items()
+                     if not state or not v or state in v]
+
+        entry = (tuple(handlers), tuple(observers))
+        self._dispatch_table[(ev_cls, state)] = entry
+        return entry
+
+    def get_dispatch(self, ev_cls, state=None):
+        """Returns a tuple of (handlers, observer names) for the specific
+        event class and state.
+
+        The result is cached until a handler or observer is registered
+        or unregistered, so that dispatching an event costs a single
+        dict lookup.
+        """
+        try:
+            return self._dispatch_table[(ev_cls, state)]
+        except KeyError:
+            return self._compile_dispatch(ev_cls, state)
+
     def get_handlers(self, ev, state=None):
         """Returns a list of handlers for the specific event.
 
@@ -237,30 +483,27 @@ class RyuApp(object):
                       The default is None.
         """
         ev_cls = ev.__class__
-        handlers = self.event_handlers.get(ev_cls, [])
         if state is None:
-            return handlers
+            return self.event_handlers.get(ev_cls, [])
+        return self.get_dispatch(ev_cls, state)[0]
 
-        def test(h):
-            if not hasattr(h, 'callers') or ev_cls not in h.callers:
-                # dynamically registered handlers does not have
-                # h.callers element for the event.
-                return True
-            states = h.callers[ev_cls].dispatchers
-            if not states:
-                # empty states means all states
-                return True
-            return state in states
+    def get_observers(self, ev, state):
+        return self.get_dispatch(ev.__class__, state)[1]
 
-        return filter(test, handlers)
+    def has_consumers(self, ev_cls, state=None):
+        """Returns True if any handler or observer is interested in
+        the specific event class.
 
-    def get_observers(self, ev, state):
-        observers = []
-        for k, v in self.observers.get(ev.__class__, {}).items():
-            if not state or not v or state in v:
-                observers.append(k)
+        This allows an event source to skip building events which
+        nobody would receive.
 
-        return observers
+        :param ev_cls: The event class.
+        :param state: The current state. ("dispatcher")
+                      If None is given, handlers and observers are
+                      considered interested in any state.
+        """
+        handlers, observers = self.get_dispatch(ev_cls, state)
+        return bool(handlers or observers)
 
     def send_request(self, req):
         """
@@ -279,13 +522,15 @@ class RyuApp(object):
         return req.reply_q.get()
 
     def _event_loop(self):
+        latency = self.handler_latency
         while self.is_active or not self.events.empty():
             ev, state = self.events.get()
-            self._events_sem.release()
             if ev == self._event_stop:
                 continue
             handlers = self.get_handlers(ev, state)
             for handler in handlers:
+                if latency is not None:
+                    start = perf.clock()
                 try:
                     handler(ev)
                 except hub.TaskExit:
@@ -297,10 +542,14 @@ class RyuApp(object):
                                   'Backtrace from offending handler '
                                   '[%s] servicing event [%s] follows.',
                                   self.name, handler.__name__, ev.__class__.__name__)
+                if latency is not None:
+                    perf.get_histogram(latency, handler.__name__).observe(
+                        perf.clock() - start)
 
     def _send_event(self, ev, state):
-        self._events_sem.acquire()
-        self.events.put((ev, state))
+        if not self.events.put(ev, state):
+            LOG.debug('%s: event queue full, dropped the oldest %s',
+                      self.name, ev.__class__.__name__)
 
     def send_event(self, name, ev, state=None):
         """
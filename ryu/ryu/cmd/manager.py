@@ -33,6 +33,7 @@ from ryu import version
 from ryu.app import wsgi
 from ryu.base.app_manager import AppManager
 from ryu.controller import controller
+from ryu.controller import worker
 from ryu.topology import switches
 
 
@@ -96,6 +97,22 @@ def main(args=None, prog=None):
 
     app_mgr = AppManager.get_instance()
     app_mgr.load_apps(app_lists)
+
+    if CONF.ofp_workers > 1:
+        # A REST API would only see the datapaths of one worker.
+        rest_apps = [name for name, cls in app_mgr.applications_cls.items()
+                     if wsgi.WSGIApplication in cls._CONTEXTS.values()]
+        if rest_apps:
+            logger.error('REST API applications cannot run with '
+                         '--ofp-workers > 1: %s', ', '.join(rest_apps))
+            return 1
+        if worker.start_workers(CONF.ofp_workers) is None:
+            # This is the parent process and all workers have exited.
+            return
+        logger.info('worker %d of %d started (pid %d)',
+                    worker.worker_id(), worker.num_workers(), os.getpid())
+        app_mgr.load_apps(['ryu.controller.worker_channel'])
+
     contexts = app_mgr.create_contexts()
     services = []
     services.extend(app_mgr.instantiate_apps(**contexts))
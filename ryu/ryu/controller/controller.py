@@ -30,8 +30,10 @@ from socket import TCP_NODELAY
 from socket import SHUT_WR
 from socket import timeout as SocketTimeout
 import ssl
+import time
 
 from ryu import cfg
+from ryu import exception
 from ryu.lib import hub
 from ryu.lib.hub import StreamServer
 
@@ -44,6 +46,8 @@ from ryu.ofproto import ofproto_v1_0
 from ryu.ofproto import nx_match
 
 from ryu.controller import ofp_event
+from ryu.controller import perf
+from ryu.controller import worker
 from ryu.controller.handler import HANDSHAKE_DISPATCHER, DEAD_DISPATCHER
 
 from ryu.lib.dpid import dpid_to_str
@@ -53,6 +57,8 @@ LOG = logging.getLogger('ryu.controller.controller')
 
 DEFAULT_OFP_HOST = '0.0.0.0'
 DEFAULT_OFP_SW_CON_INTERVAL = 1
+DEFAULT_OFP_RECV_BUFFER_SIZE = 256 * 1024
+DEFAULT_OFP_SEND_QUEUE_SIZE = 16
 
 CONF = cfg.CONF
 CONF.register_cli_opts([
@@ -75,6 +81,11 @@ CONF.register_cli_opts([
                default=DEFAULT_OFP_SW_CON_INTERVAL,
                help='interval in seconds to connect to switches '
                     '(default %d)' % DEFAULT_OFP_SW_CON_INTERVAL),
+    cfg.IntOpt('ofp-workers', default=1, min=1,
+               help='number of controller processes sharing the openflow '
+                    'listen port; switches are spread over them. '
+                    'REST API applications need a single process '
+                    '(default 1)'),
 ])
 CONF.register_opts([
     cfg.FloatOpt('socket-timeout',
@@ -86,7 +97,46 @@ CONF.register_opts([
     cfg.IntOpt('maximum-unreplied-echo-requests',
                default=0,
                min=0,
-               help='Maximum number of unreplied echo requests before datapath is disconnected.')
+               help='Maximum number of unreplied echo requests before datapath is disconnected.'),
+    cfg.IntOpt('ofp-recv-buffer-size',
+               default=DEFAULT_OFP_RECV_BUFFER_SIZE,
+               min=ofproto_common.OFP_MAX_MSG_LEN,
+               help='Size, in bytes, of the per-datapath receive buffer.'),
+    cfg.IntOpt('ofp-send-queue-size',
+               default=DEFAULT_OFP_SEND_QUEUE_SIZE,
+               min=1,
+               help='Maximum number of messages queued for sending to a '
+                    'datapath before senders block.'),
+    cfg.IntOpt('ofp-send-queue-high-watermark',
+               default=None,
+               min=1,
+               help='Send queue depth at which a datapath is reported as '
+                    'congested (default: 3/4 of ofp-send-queue-size).'),
+    cfg.IntOpt('ofp-send-queue-low-watermark',
+               default=None,
+               min=0,
+               help='Send queue depth at which a congested datapath is '
+                    'reported as drained (default: 1/4 of '
+                    'ofp-send-queue-size).'),
+    cfg.FloatOpt('ofp-packet-in-rate',
+                 default=0.0,
+                 min=0.0,
+                 help='Maximum rate, in packet-in messages per second, '
+                      'delivered to applications per datapath and ingress '
+                      'port; the excess is dropped (default: 0, unlimited).'),
+    cfg.IntOpt('ofp-packet-in-burst',
+               default=None,
+               min=1,
+               help='Number of packet-in messages per datapath and '
+                    'ingress port which may exceed ofp-packet-in-rate '
+                    'at once (default: the rate per second).'),
+    cfg.FloatOpt('ofp-packet-in-coalesce-window',
+                 default=0.0,
+                 min=0.0,
+                 help='Time, in seconds, during which further packet-in '
+                      'messages of an already delivered flow from the same '
+                      'datapath and ingress port are dropped '
+                      '(default: 0, disabled).')
 ])
 
 
@@ -146,7 +196,10 @@ class OpenFlowController(object):
     # entry point
     def __call__(self):
         # LOG.debug('call')
-        for address in CONF.ofp_switch_address_list:
+        for i, address in enumerate(CONF.ofp_switch_address_list):
+            if not worker.is_local(i):
+                # Another worker process connects to this switch.
+                continue
             addr = tuple(_split_addr(address))
             self.spawn_client_loop(addr)
 
@@ -165,6 +218,9 @@ class OpenFlowController(object):
             client.stop()
 
     def server_loop(self, ofp_tcp_listen_port, ofp_ssl_listen_port):
+        # Worker processes share the listen port and the kernel balances
+        # incoming switch connections among them.
+        reuse_port = True if worker.num_workers() > 1 else None
         if CONF.ctl_privkey is not None and CONF.ctl_cert is not None:
             if not hasattr(ssl, 'SSLContext'):
                 # anything less than python 2.7.9 supports only TLSv1
@@ -193,17 +249,20 @@ class OpenFlowController(object):
                                       keyfile=CONF.ctl_privkey,
                                       certfile=CONF.ctl_cert,
                                       cert_reqs=ssl.CERT_REQUIRED,
-                                      ca_certs=CONF.ca_certs, **ssl_args)
+                                      ca_certs=CONF.ca_certs,
+                                      reuse_port=reuse_port, **ssl_args)
             else:
                 server = StreamServer((CONF.ofp_listen_host,
                                        ofp_ssl_listen_port),
                                       datapath_connection_factory,
                                       keyfile=CONF.ctl_privkey,
-                                      certfile=CONF.ctl_cert, **ssl_args)
+                                      certfile=CONF.ctl_cert,
+                                      reuse_port=reuse_port, **ssl_args)
         else:
             server = StreamServer((CONF.ofp_listen_host,
                                    ofp_tcp_listen_port),
-                                  datapath_connection_factory)
+                                  datapath_connection_factory,
+                                  reuse_port=reuse_port)
 
         # LOG.debug('loop')
         server.serve_forever()
@@ -222,6 +281,258 @@ def _deactivate(method):
     return deactivate
 
 
+# Messages which a switch sends on its own.  Their xid never answers
+# a request of the controller.
+_ASYNC_MSG_TYPES = ('OFPT_HELLO', 'OFPT_ECHO_REQUEST', 'OFPT_PACKET_IN',
+                    'OFPT_FLOW_REMOVED', 'OFPT_PORT_STATUS',
+                    'OFPT_ROLE_STATUS', 'OFPT_TABLE_STATUS',
+                    'OFPT_REQUESTFORWARD', 'OFPT_CONTROLLER_STATUS')
+_async_msg_types = {}
+
+
+def _get_async_msg_types(ofp):
+    types = _async_msg_types.get(ofp)
+    if types is None:
+        types = _async_msg_types[ofp] = frozenset(
+            getattr(ofp, name) for name in _ASYNC_MSG_TYPES
+            if hasattr(ofp, name))
+    return types
+
+
+def _get_multipart_types(ofp):
+    # OpenFlow 1.0-1.2 call multipart messages stats messages.
+    if hasattr(ofp, 'OFPT_MULTIPART_REQUEST'):
+        return (ofp.OFPT_MULTIPART_REQUEST, ofp.OFPT_MULTIPART_REPLY,
+                ofp.OFPMPF_REPLY_MORE)
+    return (ofp.OFPT_STATS_REQUEST, ofp.OFPT_STATS_REPLY,
+            ofp.OFPSF_REPLY_MORE)
+
+
+class ReplyFuture(object):
+    """
+    The reply to a request sent by Datapath.send_request().
+
+    The future is done when the switch answers the request with a reply
+    or an error message, when the request is cancelled or when the
+    datapath disconnects.  A multipart reply is done with its last part,
+    i.e. the first one without the MORE flag.
+
+    ========== ==================================================
+    Attribute  Description
+    ========== ==================================================
+    datapath   The datapath the request was sent to.
+    msg        The request message.
+    xid        The xid of the request.
+    replies    The list of the reply messages received so far.
+    ========== ==================================================
+    """
+
+    def __init__(self, datapath, msg):
+        self.datapath = datapath
+        self.msg = msg
+        self.xid = msg.xid
+        self.replies = []
+        ofp = datapath.ofproto
+        (request_type, self._multipart_reply_type,
+         self._more_flag) = _get_multipart_types(ofp)
+        self._multipart = msg.cls_msg_type == request_type
+        self._async_msg_types = _get_async_msg_types(ofp)
+        self._error_type = ofp.OFPT_ERROR
+        self._exception = None
+        self._done = hub.Event()
+        self._callbacks = []
+
+    def _feed(self, msg):
+        # Returns True when msg completes the future.
+        msg_type = msg.msg_type
+        if msg_type in self._async_msg_types:
+            return False
+        if msg_type == self._error_type:
+            self._set_exception(exception.OFPErrorReply(
+                msg, xid=self.xid, dpid=self.datapath.id))
+            return True
+        self._add_reply(msg)
+        if (self._multipart and msg_type == self._multipart_reply_type and
+                msg.flags & self._more_flag):
+            return False
+        self._set_done()
+        return True
+
+    def _add_reply(self, msg):
+        self.replies.append(msg)
+
+    def _set_exception(self, exc):
+        self._exception = exc
+        self._set_done()
+
+    def _set_done(self):
+        self._done.set()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """
+        Calls callback with the future as the argument when it is done,
+        or immediately if it is done already.
+        """
+        if self.done():
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the future is done or timeout seconds pass.
+        Returns True if the future is done.
+        """
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        """
+        Stops waiting for the reply.  Replies received later are
+        delivered to the event handlers only.
+        Returns False if the future was done already.
+        """
+        if self.done():
+            return False
+        self.datapath._forget_reply_future(self)
+        self._set_exception(exception.OFPRequestCancelled(
+            xid=self.xid, dpid=self.datapath.id))
+        return True
+
+    def exception(self, timeout=None):
+        """
+        Returns the exception which failed the request, or None
+        if the request succeeded.  Raises OFPRequestTimeout like result().
+        """
+        if not self.wait(timeout):
+            self.cancel()
+            raise exception.OFPRequestTimeout(
+                xid=self.xid, dpid=self.datapath.id)
+        return self._exception
+
+    def result(self, timeout=None):
+        """
+        Returns the reply message, or the list of the reply messages
+        for a multipart request.
+
+        Raises OFPErrorReply if the switch replied with an error message,
+        OFPRequestCancelled if the request was cancelled or the datapath
+        disconnected, and OFPRequestTimeout after cancelling the request
+        if no complete reply arrived within timeout seconds.
+        """
+        exc = self.exception(timeout)
+        if exc is not None:
+            raise exc
+        if self._multipart:
+            return self.replies
+        return self.replies[-1]
+
+
+class ReplyStream(ReplyFuture):
+    """
+    The reply to a request sent by Datapath.send_stream_request().
+
+    Unlike ReplyFuture, the parts of a multipart reply are not collected
+    in replies.  They are queued as they arrive until the caller takes
+    them with messages(), or takes their body entries with records() or
+    by iterating over the stream.  A caller which keeps up with the
+    switch holds a single part at a time however many parts the reply
+    has, and can process the first entries before the last part arrives.
+
+    Example::
+
+        stream = datapath.send_stream_request(
+            parser.OFPFlowStatsRequest(datapath))
+        for stats in stream.records(timeout=5):
+            ...
+    """
+
+    def __init__(self, datapath, msg):
+        super(ReplyStream, self).__init__(datapath, msg)
+        self._parts = hub.Queue()
+
+    def _add_reply(self, msg):
+        self._parts.put(msg)
+
+    def _set_done(self):
+        self._parts.put(None)
+        super(ReplyStream, self)._set_done()
+
+    def result(self, timeout=None):
+        raise TypeError('Take the replies of a ReplyStream with messages()')
+
+    def messages(self, timeout=None):
+        """
+        Yields the reply messages as they arrive.
+
+        timeout limits the wait for each message, not for the whole reply.
+        Raises the exceptions described for ReplyFuture.result() after the
+        messages which arrived before the failure.  Leaving the iteration
+        early cancels the request.
+        """
+        try:
+            while True:
+                try:
+                    msg = self._parts.get(timeout=timeout)
+                except hub.QueueEmpty:
+                    self.cancel()
+                    raise exception.OFPRequestTimeout(
+                        xid=self.xid, dpid=self.datapath.id)
+                if msg is None:
+                    break
+                yield msg
+        finally:
+            self.cancel()
+        if self._exception is not None:
+            raise self._exception
+
+    def records(self, timeout=None):
+        """
+        Yields the entries of the bodies of the reply messages, e.g.
+        OFPFlowStats, as they arrive.  A body which is not a list, e.g.
+        the one of OFPDescStatsReply, is yielded as it is.
+
+        See messages() for timeout and the exceptions.
+        """
+        for msg in self.messages(timeout):
+            body = msg.body
+            if isinstance(body, list):
+                for record in body:
+                    yield record
+            else:
+                yield body
+
+    def __iter__(self):
+        return self.records()
+
+
+def wait_replies(futures, timeout=None):
+    """
+    Waits for a list of ReplyFuture objects, e.g. requests issued to
+    many switches at once, and returns the list of their results.
+
+    The timeout applies to the whole list.  The first exception
+    raised by ReplyFuture.result() is propagated after the remaining
+    futures are cancelled.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    results = []
+    try:
+        for future in futures:
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            results.append(future.result(timeout))
+    finally:
+        for future in futures:
+            future.cancel()
+    return results
+
+
 class Datapath(ofproto_protocol.ProtocolDesc):
     """
     A class to describe an OpenFlow switch connected to this controller.
@@ -262,6 +573,26 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                                          the corresponding switch.  If msg.xid
                                          is None, set_xid is automatically
                                          called on the message before queueing.
+    send_request(self, msg)              Queue an OpenFlow request message
+                                         like send_msg and return a
+                                         ReplyFuture for its reply.
+    send_stream_request(self, msg)       Queue a multipart request message
+                                         like send_msg and return a
+                                         ReplyStream which yields the parts
+                                         of its reply as they arrive.
+    send_q_congested                     True while the number of queued
+                                         messages is above the configured
+                                         high watermark and not yet drained
+                                         to the low watermark.
+    send_q_stats                         A dict of send queue counters:
+                                         'msgs' queued (of a send_msgs()
+                                         batch, each), socket 'flushes',
+                                         'blocked' senders and 'congested'
+                                         events.
+    perf_stats                           A dict of the 'msgs_in', 'bytes_in',
+                                         'msgs_out' and 'bytes_out' counters
+                                         of the connection.
+                                         See ryu.controller.perf.
     send_packet_out                      deprecated
     send_flow_mod                        deprecated
     send_flow_del                        deprecated
@@ -282,11 +613,34 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         self.address = address
         self.is_active = True
 
-        # The limit is arbitrary. We need to limit queue size to
-        # prevent it from eating memory up.
-        self.send_q = hub.Queue(16)
+        # We need to limit queue size to prevent it from eating memory up.
+        send_q_size = CONF.ofp_send_queue_size
+        self.send_q = hub.Queue(send_q_size)
         self._send_q_sem = hub.BoundedSemaphore(self.send_q.maxsize)
 
+        # Backpressure reporting: send_q_congested is set when the queue
+        # depth reaches the high watermark and cleared when the send loop
+        # has drained it down to the low watermark.
+        self.send_q_high_watermark = min(
+            CONF.ofp_send_queue_high_watermark or
+            max(send_q_size * 3 // 4, 1), send_q_size)
+        self.send_q_low_watermark = min(
+            CONF.ofp_send_queue_low_watermark
+            if CONF.ofp_send_queue_low_watermark is not None
+            else send_q_size // 4, self.send_q_high_watermark - 1)
+        self.send_q_congested = False
+        self.send_q_stats = {
+            'msgs': 0,       # messages queued
+            'flushes': 0,    # socket writes
+            'blocked': 0,    # send() calls which waited for queue space
+            'congested': 0,  # times the high watermark was reached
+        }
+
+        # The receive buffer must be able to hold at least one message of
+        # the maximum length which the OpenFlow header can describe.
+        self._recv_buf = bytearray(max(CONF.ofp_recv_buffer_size,
+                                       ofproto_common.OFP_MAX_MSG_LEN))
+
         self.echo_request_interval = CONF.echo_request_interval
         self.max_unreplied_echo_requests = CONF.maximum_unreplied_echo_requests
         self.unreplied_echo_requests = []
@@ -296,6 +650,15 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         self._ports = None
         self.flow_format = ofproto_v1_0.NXFF_OPENFLOW10
         self.ofp_brick = ryu.base.app_manager.lookup_service_brick('ofp_event')
+        # xid -> ReplyFuture
+        self._reply_futures = {}
+        # Multipart reply type -> callable(buf, offset, msg_len) which
+        # decodes the reply body in place of the parser of ofproto_parser.
+        # (OpenFlow 1.3 only.  See ryu.lib.stats_batch.)
+        self.stats_body_decoders = {}
+        self.connected_at = time.time()
+        self.perf_stats = dict((name, 0) for name in perf.DATAPATH_COUNTERS)
+        perf.register_datapath(self)
         self.state = None  # for pylint
         self.set_state(HANDSHAKE_DISPATCHER)
 
@@ -323,16 +686,31 @@ class Datapath(ofproto_protocol.ProtocolDesc):
     # Low level socket handling layer
     @_deactivate
     def _recv_loop(self):
-        buf = bytearray()
+        # Messages are framed in place inside a preallocated buffer which
+        # is filled by recv_into() and handed to the parser as memoryview
+        # slices, so framing never copies the received data.  The
+        # unconsumed tail is moved to the front only when the next message
+        # would not fit into the remaining space.
+        buf = self._recv_buf
+        view = memoryview(buf)
+        buf_size = len(buf)
+        head = tail = 0
         count = 0
-        min_read_len = remaining_read_len = ofproto_common.OFP_HEADER_SIZE
+        min_read_len = required_len = ofproto_common.OFP_HEADER_SIZE
+
+        # See ofp_handler.PacketInAdmission.
+        admission = getattr(self.ofp_brick, 'packet_in_admission', None)
+        perf_stats = self.perf_stats
+        parse_time = perf.PARSE_TIME if perf.enabled() else None
 
         while self.state != DEAD_DISPATCHER:
+            if head + required_len > buf_size:
+                view[:tail - head] = view[head:tail]
+                tail -= head
+                head = 0
+
             try:
-                read_len = min_read_len
-                if remaining_read_len > min_read_len:
-                    read_len = remaining_read_len
-                ret = self.socket.recv(read_len)
+                ret = self.socket.recv_into(view[tail:])
             except SocketTimeout:
                 continue
             except ssl.SSLError:
@@ -345,39 +723,60 @@ class Datapath(ofproto_protocol.ProtocolDesc):
             if not ret:
                 break
 
-            buf += ret
-            buf_len = len(buf)
-            while buf_len >= min_read_len:
-                (version, msg_type, msg_len, xid) = ofproto_parser.header(buf)
+            tail += ret
+            perf_stats['bytes_in'] += ret
+            required_len = min_read_len
+            while tail - head >= min_read_len:
+                (version, msg_type, msg_len, xid) = ofproto_parser.header(
+                    buf, head)
                 if msg_len < min_read_len:
                     # Someone isn't playing nicely; log it, and try something sane.
                     LOG.debug("Message with invalid length %s received from switch at address %s",
                               msg_len, self.address)
                     msg_len = min_read_len
-                if buf_len < msg_len:
-                    remaining_read_len = (msg_len - buf_len)
+                if tail - head < msg_len:
+                    required_len = msg_len
                     break
 
-                msg = ofproto_parser.msg(
-                    self, version, msg_type, msg_len, xid, buf[:msg_len])
+                # Only the header is decoded for messages which no
+                # handler or observer would receive in the current state.
+                msg = None
+                if (self.ofp_brick is None or
+                        xid in self._reply_futures or
+                        self._has_msg_consumers(version, msg_type)):
+                    if parse_time is None:
+                        msg = ofproto_parser.msg(
+                            self, version, msg_type, msg_len, xid,
+                            view[head:head + msg_len])
+                    else:
+                        start = perf.clock()
+                        msg = ofproto_parser.msg(
+                            self, version, msg_type, msg_len, xid,
+                            view[head:head + msg_len])
+                        # msg is None if the message is malformed
+                        if msg is not None:
+                            perf.get_histogram(
+                                parse_time, msg.__class__.__name__).observe(
+                                    perf.clock() - start)
                 # LOG.debug('queue msg %s cls %s', msg, msg.__class__)
                 if msg:
                     ev = ofp_event.ofp_msg_to_ev(msg)
-                    if self.ofp_brick is not None:
+                    if (admission is not None and
+                            ev.__class__ is ofp_event.EventOFPPacketIn and
+                            not admission.admit(ev)):
+                        pass
+                    elif self.ofp_brick is not None:
                         self.ofp_brick.send_event_to_observers(ev, self.state)
-
-                        def dispatchers(x):
-                            return x.callers[ev.__class__].dispatchers
-
-                        handlers = [handler for handler in
-                                    self.ofp_brick.get_handlers(ev) if
-                                    self.state in dispatchers(handler)]
-                        for handler in handlers:
+                        for handler in self.ofp_brick.get_handlers(
+                                ev, self.state):
                             handler(ev)
+                    if xid in self._reply_futures:
+                        future = self._reply_futures[xid]
+                        if future._feed(msg):
+                            del self._reply_futures[xid]
 
-                buf = buf[msg_len:]
-                buf_len = len(buf)
-                remaining_read_len = min_read_len
+                head += msg_len
+                perf_stats['msgs_in'] += 1
 
                 # We need to schedule other greenlets. Otherwise, ryu
                 # can't accept new switches or handle the existing
@@ -388,12 +787,41 @@ class Datapath(ofproto_protocol.ProtocolDesc):
                     count = 0
                     hub.sleep(0)
 
+            if head == tail:
+                head = tail = 0
+
+    def _has_msg_consumers(self, version, msg_type):
+        ev_clses = ofp_event.ofp_msg_type_to_ev_clses(version, msg_type)
+        if not ev_clses:
+            # Unknown to us; let the parser report it.
+            return True
+        for ev_cls in ev_clses:
+            if self.ofp_brick.has_consumers(ev_cls, self.state):
+                return True
+        return False
+
     def _send_loop(self):
         try:
             while self.state != DEAD_DISPATCHER:
                 buf, close_socket = self.send_q.get()
                 self._send_q_sem.release()
-                self.socket.sendall(buf)
+                # Coalesce everything queued meanwhile into a single write.
+                bufs = [buf]
+                while not close_socket:
+                    try:
+                        buf, close_socket = self.send_q.get(block=False)
+                    except hub.QueueEmpty:
+                        break
+                    self._send_q_sem.release()
+                    bufs.append(buf)
+                if (self.send_q_congested and
+                        self.send_q.qsize() <= self.send_q_low_watermark):
+                    self.send_q_congested = False
+                if len(bufs) == 1:
+                    self.socket.sendall(bufs[0])
+                else:
+                    self.socket.sendall(b''.join(bufs))
+                self.send_q_stats['flushes'] += 1
                 if close_socket:
                     break
         except SocketTimeout:
@@ -420,10 +848,19 @@ class Datapath(ofproto_protocol.ProtocolDesc):
 
     def send(self, buf, close_socket=False):
         msg_enqueued = False
-        self._send_q_sem.acquire()
+        if not self._send_q_sem.acquire(blocking=False):
+            self.send_q_stats['blocked'] += 1
+            self._send_q_sem.acquire()
         if self.send_q:
             self.send_q.put((buf, close_socket))
             msg_enqueued = True
+            self.send_q_stats['msgs'] += 1
+            self.perf_stats['msgs_out'] += 1
+            self.perf_stats['bytes_out'] += len(buf)
+            if (not self.send_q_congested and
+                    self.send_q.qsize() >= self.send_q_high_watermark):
+                self.send_q_congested = True
+                self.send_q_stats['congested'] += 1
         else:
             self._send_q_sem.release()
         if not msg_enqueued:
@@ -445,6 +882,72 @@ class Datapath(ofproto_protocol.ProtocolDesc):
         # LOG.debug('send_msg %s', msg)
         return self.send(msg.buf, close_socket=close_socket)
 
+    def send_msgs(self, msgs):
+        """
+        Serializes the given messages like send_msg and queues them as
+        one buffer, so that they are written to the switch at once.
+
+        The buffer is one entry of the send queue: it counts as one
+        against ofp-send-queue-size and the watermarks, however many
+        messages it holds.  The 'msgs' of send_q_stats and the
+        'msgs_out' of perf_stats count all of them.
+        """
+        bufs = []
+        for msg in msgs:
+            assert isinstance(msg, self.ofproto_parser.MsgBase)
+            if msg.xid is None:
+                self.set_xid(msg)
+            msg.serialize()
+            bufs.append(msg.buf)
+        if not bufs:
+            return True
+        enqueued = self.send(b''.join(bufs))
+        if enqueued:
+            # send() counted the buffer as one message
+            self.send_q_stats['msgs'] += len(bufs) - 1
+            self.perf_stats['msgs_out'] += len(bufs) - 1
+        return enqueued
+
+    def send_request(self, msg):
+        """
+        Queues a request message like send_msg and returns a ReplyFuture
+        which is done when the switch replied to it.
+
+        Unlike send_stats_request of ryu.lib.ofctl_utils this does not
+        block until the reply arrives, so that requests to many switches
+        can be issued at once and then waited for with wait_replies().
+        Messages without a reply, e.g. flow-mod, can be followed by
+        a barrier request to learn when the switch processed them.
+        """
+        return self._send_request(ReplyFuture, msg)
+
+    def send_stream_request(self, msg):
+        """
+        Queues a multipart request message like send_request and returns
+        a ReplyStream, which delivers the parts of the reply as they
+        arrive instead of collecting all of them.
+        """
+        return self._send_request(ReplyStream, msg)
+
+    def _send_request(self, future_cls, msg):
+        if msg.xid is None:
+            self.set_xid(msg)
+        future = future_cls(self, msg)
+        self._reply_futures[msg.xid] = future
+        if not self.send_msg(msg):
+            future.cancel()
+        return future
+
+    def _forget_reply_future(self, future):
+        if self._reply_futures.get(future.xid) is future:
+            del self._reply_futures[future.xid]
+
+    def _cancel_reply_futures(self):
+        futures = list(self._reply_futures.values())
+        self._reply_futures.clear()
+        for future in futures:
+            future.cancel()
+
     def _echo_request_loop(self):
         if not self.max_unreplied_echo_requests:
             return
@@ -478,6 +981,7 @@ class Datapath(ofproto_protocol.ProtocolDesc):
             hub.kill(echo_thr)
             hub.joinall([send_thr, echo_thr])
             self.is_active = False
+            self._cancel_reply_futures()
 
     #
     # Utility methods for convenience
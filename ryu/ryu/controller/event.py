@@ -14,14 +14,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+# Event priorities.  Each RyuApp queues events of each priority separately
+# and handles events of a higher priority (a smaller value) first, so that
+# e.g. a flood of packet-in does not delay switch or port state changes.
+EVENT_PRIORITY_CONTROL = 0
+EVENT_PRIORITY_DEFAULT = 1
+EVENT_PRIORITY_DATA = 2
+
+EVENT_PRIORITIES = (EVENT_PRIORITY_CONTROL,
+                    EVENT_PRIORITY_DEFAULT,
+                    EVENT_PRIORITY_DATA)
+
 
 class EventBase(object):
     """
     The base of all event classes.
 
     A Ryu application can define its own event type by creating a subclass.
+    The class attribute PRIORITY, one of EVENT_PRIORITY_*, selects the
+    event queue lane of the receiving applications.  If the class
+    attribute ORDERED is true, the event is not handled before the
+    events of the same datapath queued earlier in lower priority lanes.
     """
 
+    PRIORITY = EVENT_PRIORITY_DEFAULT
+    ORDERED = False
+
     def __init__(self):
         super(EventBase, self).__init__()
 
@@ -63,6 +63,30 @@ class EventOFPMsgBase(event.EventBase):
 
 _OFP_MSG_EVENTS = {}
 
+# (version, msg_type) -> event classes of the messages which can be
+# received with the given header.
+_OFP_MSG_TYPE_EVENTS = {}
+
+
+# Messages whose events are queued ahead of or behind the others.
+# See event.EVENT_PRIORITY_*.  Replies, including barrier replies, and
+# error messages are all queued in the data lane, behind the replies to
+# the earlier requests they may refer to.
+_CONTROL_MSGS = (
+    'OFPHello',
+    'OFPEchoRequest',
+    'OFPEchoReply',
+    'OFPSwitchFeatures',
+    'OFPPortStatus',
+    'OFPRoleStatus',
+)
+_DATA_MSGS = (
+    'OFPPacketIn',
+    'OFPFlowRemoved',
+    'OFPErrorMsg',
+    'OFPBarrierReply',
+)
+
 
 def _ofp_msg_name_to_ev_name(msg_name):
     return 'Event' + msg_name
@@ -77,6 +101,19 @@ def ofp_msg_to_ev_cls(msg_cls):
     return _OFP_MSG_EVENTS[name]
 
 
+def ofp_msg_type_to_ev_clses(version, msg_type):
+    """
+    Returns the event classes which a message with the given OpenFlow
+    version and message type can be delivered as.
+
+    A message type can map to several event classes, e.g. a multipart
+    reply is delivered as EventOFPFlowStatsReply, EventOFPPortStatsReply
+    and so on depending on its body.  An empty tuple is returned for
+    unknown messages.
+    """
+    return _OFP_MSG_TYPE_EVENTS.get((version, msg_type), ())
+
+
 def _create_ofp_msg_ev_class(msg_cls):
     name = _ofp_msg_name_to_ev_name(msg_cls.__name__)
     # print 'creating ofp_event %s' % name
@@ -84,25 +121,40 @@ def _create_ofp_msg_ev_class(msg_cls):
     if name in _OFP_MSG_EVENTS:
         return
 
+    if msg_cls.__name__ in _CONTROL_MSGS:
+        priority = event.EVENT_PRIORITY_CONTROL
+    elif (msg_cls.__name__ in _DATA_MSGS or
+          msg_cls.__name__.endswith('Reply')):
+        priority = event.EVENT_PRIORITY_DATA
+    else:
+        priority = event.EVENT_PRIORITY_DEFAULT
     cls = type(name, (EventOFPMsgBase,),
                dict(__init__=lambda self, msg:
-                    super(self.__class__, self).__init__(msg)))
+                    super(self.__class__, self).__init__(msg),
+                    PRIORITY=priority))
     globals()[name] = cls
     _OFP_MSG_EVENTS[name] = cls
 
 
-def _create_ofp_msg_ev_from_module(ofp_parser):
+def _create_ofp_msg_ev_from_module(ofp_parser, version=None):
     # print mod
     for _k, cls in inspect.getmembers(ofp_parser, inspect.isclass):
         if not hasattr(cls, 'cls_msg_type'):
             continue
         _create_ofp_msg_ev_class(cls)
+        if version is None or cls.cls_msg_type is None:
+            continue
+        ev_cls = ofp_msg_to_ev_cls(cls)
+        ev_clses = _OFP_MSG_TYPE_EVENTS.get((version, cls.cls_msg_type), ())
+        if ev_cls not in ev_clses:
+            _OFP_MSG_TYPE_EVENTS[(version, cls.cls_msg_type)] = (
+                ev_clses + (ev_cls,))
 
 
-for ofp_mods in ofproto.get_ofp_modules().values():
+for ofp_version, ofp_mods in ofproto.get_ofp_modules().items():
     ofp_parser = ofp_mods[1]
     # print 'loading module %s' % ofp_parser
-    _create_ofp_msg_ev_from_module(ofp_parser)
+    _create_ofp_msg_ev_from_module(ofp_parser, ofp_version)
 
 
 class EventOFPStateChange(event.EventBase):
@@ -120,6 +172,10 @@ class EventOFPStateChange(event.EventBase):
     ========= =================================================================
     """
 
+    PRIORITY = event.EVENT_PRIORITY_CONTROL
+    # e.g. DEAD_DISPATCHER is not handled before the queued packet-in
+    ORDERED = True
+
     def __init__(self, dp):
         super(EventOFPStateChange, self).__init__()
         self.datapath = dp
@@ -142,6 +198,8 @@ class EventOFPPortStateChange(event.EventBase):
     ========= =================================================================
     """
 
+    PRIORITY = event.EVENT_PRIORITY_CONTROL
+
     def __init__(self, dp, reason, port_no):
         super(EventOFPPortStateChange, self).__init__()
         self.datapath = dp
@@ -18,13 +18,16 @@
 Basic OpenFlow handling including negotiation.
 """
 
+import collections
 import itertools
 import logging
 import warnings
 
 import ryu.base.app_manager
 
+from ryu import cfg
 from ryu.lib import hub
+from ryu.lib.packet import flow_key
 from ryu import utils
 from ryu.controller import ofp_event
 from ryu.controller.controller import OpenFlowController
@@ -33,6 +36,8 @@ from ryu.controller.handler import HANDSHAKE_DISPATCHER, CONFIG_DISPATCHER,\
     MAIN_DISPATCHER
 from ryu.ofproto import ofproto_parser
 
+CONF = cfg.CONF
+
 
 # The state transition: HANDSHAKE -> CONFIG -> MAIN
 #
@@ -48,11 +53,122 @@ from ryu.ofproto import ofproto_parser
 # back Echo Reply message.
 
 
+def _packet_in_port(msg):
+    in_port = getattr(msg, 'in_port', None)
+    if in_port is None:
+        match = getattr(msg, 'match', None)
+        if match is not None:
+            in_port = match.get('in_port')
+    return in_port
+
+
+class PacketInAdmission(object):
+    """
+    Admission control of packet-in messages.
+
+    Packet-in messages are admitted by a token bucket per datapath and
+    ingress port which is refilled with ``rate`` tokens per second up to
+    ``burst`` tokens.  In addition, a message is dropped if a message of
+    the same flow (see ryu.lib.packet.flow_key.extract) was admitted from
+    the same datapath and ingress port less than ``coalesce_window``
+    seconds before, which suppresses the storm of packet-in messages sent
+    by a switch until the application has installed a flow entry.
+
+    A zero ``rate`` or ``coalesce_window`` disables the respective check.
+    The numbers of admitted and suppressed messages per datapath are
+    reported by stats().
+    """
+
+    def __init__(self, rate=0, burst=None, coalesce_window=0):
+        self.rate = float(rate)
+        self.burst = float(burst or max(self.rate, 1))
+        self.coalesce_window = float(coalesce_window)
+        # (dpid, in_port) -> [tokens, last refill]
+        self._buckets = {}
+        # (dpid, in_port, flow key) -> time admitted
+        self._recent = {}
+        self._next_purge = 0
+        self._stats = collections.defaultdict(
+            lambda: {'admitted': 0, 'rate_limited': 0, 'coalesced': 0})
+
+    def __bool__(self):
+        return bool(self.rate or self.coalesce_window)
+
+    __nonzero__ = __bool__
+
+    def admit(self, ev):
+        """
+        Returns True if the packet-in event should be delivered to
+        the applications.
+        """
+        msg = ev.msg
+        dpid = msg.datapath.id
+        now = ev.timestamp
+        port_key = (dpid, _packet_in_port(msg))
+        stats = self._stats[dpid]
+
+        if self.coalesce_window:
+            if now >= self._next_purge:
+                self._purge(now)
+            key = port_key + (flow_key.extract(msg.data), )
+            admitted = self._recent.get(key)
+            if admitted is not None and now - admitted < self.coalesce_window:
+                stats['coalesced'] += 1
+                return False
+
+        if self.rate:
+            bucket = self._buckets.get(port_key)
+            if bucket is None:
+                bucket = self._buckets[port_key] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst,
+                                bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                stats['rate_limited'] += 1
+                return False
+            bucket[0] -= 1
+
+        if self.coalesce_window:
+            self._recent[key] = now
+        stats['admitted'] += 1
+        return True
+
+    def _purge(self, now):
+        expiry = now - self.coalesce_window
+        self._recent = dict((key, admitted)
+                            for key, admitted in self._recent.items()
+                            if admitted > expiry)
+        self._next_purge = now + self.coalesce_window
+
+    def stats(self):
+        """
+        Returns a dict which maps each datapath id to a dict of
+        the numbers of 'admitted', 'rate_limited' and 'coalesced'
+        packet-in messages.
+        """
+        return dict((dpid, dict(counters))
+                    for dpid, counters in self._stats.items())
+
+
 class OFPHandler(ryu.base.app_manager.RyuApp):
     def __init__(self, *args, **kwargs):
         super(OFPHandler, self).__init__(*args, **kwargs)
         self.name = ofp_event.NAME
         self.controller = None
+        # Used by Datapath._recv_loop()
+        self.packet_in_admission = PacketInAdmission(
+            CONF.ofp_packet_in_rate, CONF.ofp_packet_in_burst,
+            CONF.ofp_packet_in_coalesce_window) or None
+
+    def get_packet_in_stats(self):
+        """
+        Returns the packet-in admission counters per datapath.
+        See PacketInAdmission.stats().
+        """
+        if self.packet_in_admission is None:
+            return {}
+        return self.packet_in_admission.stats()
 
     def start(self):
         super(OFPHandler, self).start()
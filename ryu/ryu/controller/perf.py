@@ -0,0 +1,354 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Performance instrumentation of the controller.
+
+Every Datapath counts the messages and bytes it receives and sends
+(Datapath.perf_stats) and every RyuApp counts the events passing its
+event queue (RyuApp.get_event_queue_stats).  With --perf-stats the
+following are measured in addition, into histograms with fixed buckets:
+
+- the time to decode OpenFlow messages, per message class
+- the latency of event handlers, per application and handler
+- the queueing delay of events, per application and event priority
+
+This costs two clock reads per message and per handler call.
+
+collect() returns all of them as a dict and prometheus_text() in the
+Prometheus text exposition format.  ryu.app.wsgi serves them at
+/perf/stats and /metrics.
+
+The message and byte rates of the datapaths are computed over fixed
+windows of --perf-rate-interval seconds by a sampler thread, which
+ryu.app.wsgi starts, so that they do not depend on how often or by how
+many clients they are read.
+"""
+
+import bisect
+import time
+import weakref
+
+from ryu import cfg
+# For loading perf-* options
+from ryu import flags  # noqa
+from ryu.controller import event
+from ryu.lib import dpid as dpid_lib
+from ryu.lib import hub
+
+CONF = cfg.CONF
+
+clock = time.perf_counter
+
+# Upper bounds of the histogram buckets in seconds.  Values above the
+# last one fall into an extra unbounded bucket.
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+           0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PRIORITY_NAMES = {
+    event.EVENT_PRIORITY_CONTROL: 'control',
+    event.EVENT_PRIORITY_DEFAULT: 'default',
+    event.EVENT_PRIORITY_DATA: 'data',
+}
+
+DATAPATH_COUNTERS = ('msgs_in', 'bytes_in', 'msgs_out', 'bytes_out')
+
+# Message class name -> Histogram of the decoding time
+PARSE_TIME = {}
+
+_datapaths = weakref.WeakSet()
+_apps = weakref.WeakSet()
+# Datapath -> (time, counters) of the last sample
+_samples = weakref.WeakKeyDictionary()
+# Datapath -> {'<counter>_per_sec': rate} over the last window
+_rates = weakref.WeakKeyDictionary()
+_sampler = None
+
+
+class Histogram(object):
+    """
+    A histogram of durations in seconds with the buckets of BUCKETS.
+    """
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Returns the upper bound of the bucket which holds the q-quantile,
+        or the maximum if it is in the unbounded bucket.
+        """
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            total += count
+            if total and total >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+
+def enabled():
+    return CONF.perf_stats
+
+
+def get_histogram(histograms, key):
+    hist = histograms.get(key)
+    if hist is None:
+        hist = histograms[key] = Histogram()
+    return hist
+
+
+def register_datapath(datapath):
+    _datapaths.add(datapath)
+
+
+def register_app(app):
+    _apps.add(app)
+
+
+def _datapath_name(dp):
+    if dp.id is None:
+        return str(dp.address)
+    return dpid_lib.dpid_to_str(dp.id)
+
+
+def _active_datapaths():
+    return sorted((dp for dp in list(_datapaths) if dp.is_active),
+                  key=_datapath_name)
+
+
+def _sorted_apps():
+    return sorted(list(_apps), key=lambda app: app.name)
+
+
+def _histograms_to_dict(histograms):
+    return dict((key, hist.to_dict()) for key, hist in histograms.items())
+
+
+def _by_dpid_str(stats):
+    return dict((dpid_lib.dpid_to_str(dpid) if dpid is not None else 'None',
+                 counters)
+                for dpid, counters in stats.items())
+
+
+def _rates_since(dp, counters, now):
+    last_time, last = _samples.get(dp, (dp.connected_at, None))
+    elapsed = now - last_time
+    rates = {}
+    for name in DATAPATH_COUNTERS:
+        delta = counters[name] - (last[name] if last else 0)
+        rates[name + '_per_sec'] = delta / elapsed if elapsed > 0 else 0.0
+    return rates
+
+
+def sample(now=None):
+    """
+    Samples the counters of the active datapaths and sets their rates
+    over the window since the previous sample.  Called by the sampler
+    thread every --perf-rate-interval seconds.
+    """
+    if now is None:
+        now = time.time()
+    for dp in _active_datapaths():
+        counters = dict(dp.perf_stats)
+        _rates[dp] = _rates_since(dp, counters, now)
+        _samples[dp] = (now, counters)
+
+
+def _sample_loop():
+    while True:
+        hub.sleep(CONF.perf_rate_interval)
+        sample()
+
+
+def start_sampler():
+    """
+    Starts the sampler thread unless started.
+    """
+    global _sampler
+    if _sampler is None:
+        _sampler = hub.spawn(_sample_loop)
+
+
+def collect():
+    """
+    Returns the counters and histograms as a dict.
+
+    The message and byte rates of a datapath are those of the last
+    sampler window, or averaged since the connection until the first
+    window ends.  Reading them changes nothing.
+    """
+    now = time.time()
+    datapaths = {}
+    for dp in _active_datapaths():
+        counters = dict(dp.perf_stats)
+        stats = dict(counters)
+        rates = _rates.get(dp)
+        if rates is None:
+            rates = _rates_since(dp, counters, now)
+        stats.update(rates)
+        datapaths[_datapath_name(dp)] = stats
+
+    apps = {}
+    for app in _sorted_apps():
+        queue = {}
+        wait = app.events.wait_histograms or {}
+        for prio, stats in app.get_event_queue_stats().items():
+            if prio in wait:
+                stats['wait'] = wait[prio].to_dict()
+            queue[PRIORITY_NAMES[prio]] = stats
+        apps[app.name] = {
+            'event_queue': queue,
+            'handlers': _histograms_to_dict(app.handler_latency or {}),
+        }
+        get_packet_in_stats = getattr(app, 'get_packet_in_stats', None)
+        if get_packet_in_stats is not None:
+            apps[app.name]['packet_in'] = _by_dpid_str(
+                get_packet_in_stats())
+
+    return {
+        'enabled': enabled(),
+        'datapaths': datapaths,
+        'parse_time': _histograms_to_dict(PARSE_TIME),
+        'apps': apps,
+    }
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _labels(labels):
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value))
+                             for name, value in labels)
+
+
+class _Writer(object):
+    def __init__(self):
+        self.lines = []
+
+    def header(self, name, type_, help_):
+        self.lines.append('# HELP %s %s' % (name, help_))
+        self.lines.append('# TYPE %s %s' % (name, type_))
+
+    def sample(self, name, labels, value):
+        self.lines.append('%s%s %r' % (name, _labels(labels), value))
+
+    def histogram(self, name, labels, hist):
+        total = 0
+        for bound, count in zip(BUCKETS, hist.counts):
+            total += count
+            self.sample(name + '_bucket', labels + [('le', repr(bound))],
+                        total)
+        self.sample(name + '_bucket', labels + [('le', '+Inf')], hist.count)
+        self.sample(name + '_sum', labels, hist.sum)
+        self.sample(name + '_count', labels, hist.count)
+
+
+def prometheus_text():
+    """
+    Returns the counters and histograms in the Prometheus text
+    exposition format.
+    """
+    w = _Writer()
+    datapaths = [(_datapath_name(dp), dp) for dp in _active_datapaths()]
+    for counter, name, help_ in (
+            ('msgs_in', 'ryu_datapath_received_messages_total',
+             'OpenFlow messages received from the datapath.'),
+            ('bytes_in', 'ryu_datapath_received_bytes_total',
+             'Bytes received from the datapath.'),
+            ('msgs_out', 'ryu_datapath_sent_messages_total',
+             'OpenFlow messages queued to send to the datapath.'),
+            ('bytes_out', 'ryu_datapath_sent_bytes_total',
+             'Bytes queued to send to the datapath.')):
+        w.header(name, 'counter', help_)
+        for dpid, dp in datapaths:
+            w.sample(name, [('dpid', dpid)], dp.perf_stats[counter])
+
+    w.header('ryu_ofp_parse_seconds', 'histogram',
+             'Time to decode OpenFlow messages.')
+    for msg_cls, hist in sorted(PARSE_TIME.items()):
+        w.histogram('ryu_ofp_parse_seconds', [('msg', msg_cls)], hist)
+
+    apps = _sorted_apps()
+    w.header('ryu_event_handler_seconds', 'histogram',
+             'Latency of event handlers.')
+    for app in apps:
+        for handler, hist in sorted((app.handler_latency or {}).items()):
+            w.histogram('ryu_event_handler_seconds',
+                        [('app', app.name), ('handler', handler)], hist)
+
+    w.header('ryu_event_queue_wait_seconds', 'histogram',
+             'Time events spent in the event queue.')
+    for app in apps:
+        for prio, hist in sorted((app.events.wait_histograms or {}).items()):
+            w.histogram('ryu_event_queue_wait_seconds',
+                        [('app', app.name),
+                         ('priority', PRIORITY_NAMES[prio])], hist)
+
+    queue_stats = [(app, app.get_event_queue_stats()) for app in apps]
+    for key, name, type_, help_ in (
+            ('depth', 'ryu_event_queue_depth', 'gauge',
+             'Events in the event queue.'),
+            ('enqueued', 'ryu_event_queue_enqueued_total', 'counter',
+             'Events put into the event queue.'),
+            ('dropped', 'ryu_event_queue_dropped_total', 'counter',
+             'Events discarded by the drop-oldest policy.'),
+            ('blocked', 'ryu_event_queue_blocked_total', 'counter',
+             'Times a sender waited for room in the event queue.')):
+        w.header(name, type_, help_)
+        for app, stats in queue_stats:
+            for prio in sorted(stats):
+                w.sample(name, [('app', app.name),
+                                ('priority', PRIORITY_NAMES[prio])],
+                         stats[prio][key])
+
+    w.header('ryu_packet_in_total', 'counter',
+             'Packet-in messages by admission result.')
+    for app in apps:
+        get_packet_in_stats = getattr(app, 'get_packet_in_stats', None)
+        if get_packet_in_stats is None:
+            continue
+        for dpid, counters in sorted(
+                _by_dpid_str(get_packet_in_stats()).items()):
+            for result, value in sorted(counters.items()):
+                w.sample('ryu_packet_in_total',
+                         [('dpid', dpid), ('result', result)], value)
+
+    return '\n'.join(w.lines) + '\n'
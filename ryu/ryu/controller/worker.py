@@ -0,0 +1,167 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Multi-process OpenFlow controller support.
+
+With ``ryu-manager --ofp-workers N`` the manager forks N worker processes.
+Each of them loads the same applications and listens on the OpenFlow port
+with SO_REUSEPORT, so the kernel spreads switch connections, and hence
+datapaths, over the workers.
+
+See ryu.controller.worker_channel for the communication among workers.
+
+The applications which use the REST API (the 'wsgi' context) cannot run
+with more than one worker: ryu-manager refuses to start them, since each
+worker would only serve its own datapaths.
+"""
+
+import logging
+import os
+import signal
+import socket
+
+from ryu.lib import hub
+
+LOG = logging.getLogger('ryu.controller.worker')
+
+# Unix datagram sockets deliver a message atomically or not at all.
+MAX_MSG_SIZE = 64 * 1024
+
+_worker_id = None
+_num_workers = 1
+_channel = None
+
+
+def worker_id():
+    """
+    Returns the index of this worker process, or None when the
+    controller runs as a single process.
+    """
+    return _worker_id
+
+
+def num_workers():
+    """
+    Returns the number of worker processes.
+    """
+    return _num_workers
+
+
+def is_primary():
+    """
+    Returns True in a single process controller or in the first worker.
+    Services which must not run once per worker should only be started
+    where this returns True.
+    """
+    return not _worker_id
+
+
+def is_local(index):
+    """
+    Returns True if an item with the given index (e.g. a position in
+    ofp-switch-address-list) belongs to this worker.
+    """
+    return index % _num_workers == (_worker_id or 0)
+
+
+class _Channel(object):
+    """
+    Full mesh of Unix datagram sockets between the worker processes.
+
+    Every worker has its own socketpair.  It receives on one end and the
+    other workers send to the other end.  All pairs are created before
+    forking so that they are inherited by every worker.
+    """
+
+    def __init__(self, num):
+        self._pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+                       for _ in range(num)]
+        self.index = None
+
+    def bind(self, index):
+        self.index = index
+        for i, (rsock, _wsock) in enumerate(self._pairs):
+            if i != index:
+                rsock.close()
+
+    def send(self, data):
+        for i, (_rsock, wsock) in enumerate(self._pairs):
+            if i == self.index:
+                continue
+            try:
+                wsock.send(data)
+            except (IOError, OSError) as e:
+                LOG.debug('worker %d: failed to send to worker %d: %s',
+                          self.index, i, e)
+
+    def recv(self):
+        return self._pairs[self.index][0].recv(MAX_MSG_SIZE)
+
+    def close(self):
+        for rsock, wsock in self._pairs:
+            rsock.close()
+            wsock.close()
+
+
+def start_workers(num):
+    """
+    Fork num worker processes.
+
+    Returns the worker index in each worker.  In the parent process this
+    waits until all workers exit, forwarding SIGINT and SIGTERM to them,
+    and then returns None.
+    """
+    global _worker_id, _num_workers, _channel
+
+    assert num > 1
+    channel = _Channel(num)
+    pids = []
+    for i in range(num):
+        pid = hub.fork()
+        if pid == 0:
+            _worker_id = i
+            _num_workers = num
+            _channel = channel
+            channel.bind(i)
+            return i
+        pids.append(pid)
+
+    LOG.info('started %d workers: %s', num, pids)
+    channel.close()
+
+    def _forward(signum, _frame):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass
+
+    signal.signal(signal.SIGINT, _forward)
+    signal.signal(signal.SIGTERM, _forward)
+    for pid in pids:
+        try:
+            os.waitpid(pid, 0)
+        except OSError:
+            pass
+    return None
+
+
+def get_channel():
+    """
+    Returns the channel to the other workers, or None when the
+    controller runs as a single process.
+    """
+    return _channel
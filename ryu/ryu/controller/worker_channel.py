@@ -0,0 +1,169 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Communication among the worker processes of a multi-process controller.
+
+WorkerChannel lets applications publish small msgpack-serializable
+messages to all other workers, keep a replicated key-value state and
+learn about the topology events of the other workers.  Messages arrive
+as EventWorkerMessage.
+
+ryu.topology.switches merges the relayed topology events, so get_switch(),
+get_link() and get_topology() cover the switches of all workers.
+"""
+
+import logging
+
+import msgpack
+
+from ryu.base import app_manager
+from ryu.controller import event
+from ryu.controller import handler
+from ryu.controller import worker
+from ryu.lib import hub
+
+LOG = logging.getLogger('ryu.controller.worker_channel')
+
+TOPIC_STATE = 'state'
+TOPIC_TOPOLOGY = 'topology'
+
+
+class EventWorkerMessage(event.EventBase):
+    """
+    An event class for a message published by another worker.
+
+    An instance has at least the following attributes.
+
+    ========= =================================================================
+    Attribute Description
+    ========= =================================================================
+    src       Index of the publishing worker.
+    topic     A str to tell messages apart. 'state' is used for replicated
+              key-value state and 'topology' for topology events.
+    data      The published data.
+    ========= =================================================================
+    """
+
+    def __init__(self, src, topic, data):
+        super(EventWorkerMessage, self).__init__()
+        self.src = src
+        self.topic = topic
+        self.data = data
+
+
+class WorkerChannel(app_manager.RyuApp):
+    """
+    Exchange messages among the worker processes.
+
+    In a single process controller publish() is a no-op, so applications
+    can use this service unconditionally.
+    """
+    _EVENTS = [EventWorkerMessage]
+
+    def __init__(self, *args, **kwargs):
+        super(WorkerChannel, self).__init__(*args, **kwargs)
+        self.name = 'worker_channel'
+        self._channel = worker.get_channel()
+        # key -> value, replicated to all workers. Last writer wins.
+        self.global_state = {}
+
+    def start(self):
+        super(WorkerChannel, self).start()
+        self._observe_topology()
+        if self._channel is not None:
+            return hub.spawn(self._recv_loop)
+
+    def close(self):
+        super(WorkerChannel, self).close()
+        # Wake up the receive loop by closing the receiving socket.
+        if self._channel is not None:
+            self._channel.close()
+
+    def publish(self, topic, data):
+        """
+        Send data to all other workers.  data must be serializable with
+        msgpack and its encoding must fit into a single datagram.
+        """
+        if self._channel is None:
+            return
+        buf = msgpack.packb([worker.worker_id(), topic, data], use_bin_type=True)
+        if len(buf) > worker.MAX_MSG_SIZE:
+            LOG.error('worker message on %s too large: %d bytes',
+                      topic, len(buf))
+            return
+        self._channel.send(buf)
+
+    def set_global(self, key, value):
+        """
+        Set the replicated state key to value on all workers.
+        """
+        self.global_state[key] = value
+        self.publish(TOPIC_STATE, [key, value])
+
+    def get_global(self, key, default=None):
+        return self.global_state.get(key, default)
+
+    def _recv_loop(self):
+        while self.is_active:
+            try:
+                buf = self._channel.recv()
+            except (IOError, OSError):
+                break
+            if not buf:
+                break
+            try:
+                src, topic, data = msgpack.unpackb(buf, raw=False)
+            except Exception:
+                LOG.exception('malformed worker message')
+                continue
+            if topic == TOPIC_STATE:
+                key, value = data
+                self.global_state[key] = value
+            self.send_event_to_observers(
+                EventWorkerMessage(src, topic, data))
+
+    # Relay topology events, if the topology service is running.
+    # The handlers are registered dynamically in order not to make
+    # ryu.topology.switches a dependency of this service.
+    def _observe_topology(self):
+        from ryu.topology import event as topology_event
+        switches = app_manager.lookup_service_brick('switches')
+        if switches is None:
+            return
+        for ev_cls in [topology_event.EventSwitchEnter,
+                       topology_event.EventSwitchLeave,
+                       topology_event.EventPortAdd,
+                       topology_event.EventPortDelete,
+                       topology_event.EventLinkAdd,
+                       topology_event.EventLinkDelete]:
+            self.register_handler(ev_cls, self._topology_handler)
+            # observe_event() looks up the brick by the module of ev_cls,
+            # which is ryu.topology.event, not ryu.topology.switches
+            switches.register_observer(ev_cls, self.name)
+
+    def _topology_handler(self, ev):
+        if hasattr(ev, 'switch'):
+            data = ev.switch.to_dict()
+        elif hasattr(ev, 'port'):
+            if ev.port.is_reserved():
+                return
+            data = ev.port.to_dict()
+        else:
+            data = ev.link.to_dict()
+        self.publish(TOPIC_TOPOLOGY, [ev.__class__.__name__, data])
+
+
+handler.register_service('ryu.controller.worker_channel')
@@ -56,6 +56,24 @@ class OFPInvalidActionString(RyuException):
     message = 'unable to parse: %(action_str)s'
 
 
+class OFPRequestTimeout(RyuException):
+    message = 'no reply to xid %(xid)s from datapath %(dpid)s'
+
+
+class OFPRequestCancelled(RyuException):
+    message = 'request xid %(xid)s to datapath %(dpid)s cancelled'
+
+
+class OFPErrorReply(RyuException):
+    message = 'error reply to xid %(xid)s from datapath %(dpid)s: %(error)s'
+
+    def __init__(self, error_msg, msg=None, **kwargs):
+        self.error_msg = error_msg
+        kwargs['error'] = str(error_msg)
+
+        super(OFPErrorReply, self).__init__(msg, **kwargs)
+
+
 class NetworkNotFound(RyuException):
     message = 'no such network id %(network_id)s'
 
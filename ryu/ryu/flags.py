@@ -127,3 +127,43 @@ CONF.register_cli_opts([
         'frr-version', LooseVersion, default=DEFAULT_ZSERV_FRR_VERSION,
         help='FRRouting version when integrated with FRRouting (e.g., 3.0)'),
 ], group='zapi')
+
+
+DEFAULT_EVENT_QUEUE_SIZE = 128
+
+CONF.register_cli_opts([
+    # base/app_manager.py
+    cfg.IntOpt('event-queue-control-size', default=DEFAULT_EVENT_QUEUE_SIZE,
+               min=1,
+               help='Size of the event queue lane of each application for '
+               'control events, e.g. switch state and port status changes '
+               '(default: %d)' % DEFAULT_EVENT_QUEUE_SIZE),
+    cfg.IntOpt('event-queue-size', default=DEFAULT_EVENT_QUEUE_SIZE, min=1,
+               help='Size of the event queue lane of each application for '
+               'events which are neither control nor data plane events '
+               '(default: %d)' % DEFAULT_EVENT_QUEUE_SIZE),
+    cfg.IntOpt('event-queue-data-size', default=DEFAULT_EVENT_QUEUE_SIZE,
+               min=1,
+               help='Size of the event queue lane of each application for '
+               'data plane events, e.g. packet-in and statistics replies '
+               '(default: %d)' % DEFAULT_EVENT_QUEUE_SIZE),
+    cfg.StrOpt('event-queue-packet-in-policy', default='block',
+               choices=['block', 'drop-oldest'],
+               help='What to do with a packet-in event for an application '
+               'whose data event queue is full: wait for room (block) or '
+               'discard its oldest queued packet-in (drop-oldest) '
+               '(default: block)'),
+])
+
+CONF.register_cli_opts([
+    # controller/perf.py
+    cfg.BoolOpt('perf-stats', default=False,
+                help='Measure message parse times, event handler latencies '
+                'and event queueing delays, and serve them with the '
+                'datapath traffic counters at /perf/stats and /metrics '
+                'of the WSGI server (default: False)'),
+    cfg.FloatOpt('perf-rate-interval', default=5.0,
+                 help='Window in seconds over which the datapath message '
+                 'and byte rates of --perf-stats are computed '
+                 '(default: 5.0)'),
+])
@@ -33,6 +33,7 @@ if HUB_TYPE == 'eventlet':
     # https://github.com/eventlet/eventlet/issues/401
     eventlet.sleep()
     import eventlet.event
+    import eventlet.hubs
     import eventlet.queue
     import eventlet.semaphore
     import eventlet.timeout
@@ -95,6 +96,16 @@ if HUB_TYPE == 'eventlet':
     def kill(thread):
         thread.kill()
 
+    def fork():
+        """
+        Fork the process.  The child gets a fresh hub so that it does not
+        share the parent's poller.  Must be called before spawning.
+        """
+        pid = os.fork()
+        if pid == 0:
+            eventlet.hubs.use_hub()
+        return pid
+
     def joinall(threads):
         for t in threads:
             # This try-except is necessary when killing an inactive
@@ -112,19 +123,21 @@ if HUB_TYPE == 'eventlet':
 
     class StreamServer(object):
         def __init__(self, listen_info, handle=None, backlog=None,
-                     spawn='default', **ssl_args):
+                     spawn='default', reuse_port=None, **ssl_args):
             assert backlog is None
             assert spawn == 'default'
 
             if ip.valid_ipv6(listen_info[0]):
                 self.server = eventlet.listen(listen_info,
-                                              family=socket.AF_INET6)
+                                              family=socket.AF_INET6,
+                                              reuse_port=reuse_port)
             elif os.path.isdir(os.path.dirname(listen_info[0])):
                 # Case for Unix domain socket
                 self.server = eventlet.listen(listen_info[0],
                                               family=socket.AF_UNIX)
             else:
-                self.server = eventlet.listen(listen_info)
+                self.server = eventlet.listen(listen_info,
+                                              reuse_port=reuse_port)
 
             if ssl_args:
                 ssl_args.setdefault('server_side', True)
@@ -237,3 +250,998 @@ if HUB_TYPE == 'eventlet':
                     pass
 
             return self._cond
+
+elif HUB_TYPE == 'asyncio':
+    # asyncio based hub.
+    #
+    # Green threads are plain greenlets.  The asyncio event loop runs in
+    # its own greenlet (the hub) and a green thread which has to block
+    # switches to the hub after arranging for the loop to switch back to
+    # it, e.g. by a timer or a file descriptor callback.  So the existing
+    # synchronous code keeps working, patch() only has to replace a few
+    # blocking primitives, and coroutines of asyncio native libraries can
+    # run on the same loop.  See run_coroutine().
+    import asyncio
+    import base64
+    import collections
+    import errno
+    import hashlib
+    import select
+    import socket
+    import ssl
+    import struct
+    import time
+    import traceback
+    from wsgiref import simple_server
+
+    import greenlet
+
+    _select = select.select
+    _socket_class = socket.socket
+
+    _select_module = select
+    _socket_module = socket
+    _time_module = time
+
+    TaskExit = greenlet.GreenletExit
+    getcurrent = greenlet.getcurrent
+
+    class _Hub(object):
+        def __init__(self):
+            self.loop = asyncio.new_event_loop()
+            self.greenlet = greenlet.greenlet(self._run)
+
+        def _run(self):
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_forever()
+
+        def switch(self):
+            assert getcurrent() is not self.greenlet, \
+                'hub: cannot block in the hub'
+            return self.greenlet.switch()
+
+    _hub = _Hub()
+
+    def get_event_loop():
+        """
+        Returns the asyncio event loop driving the green threads.
+        """
+        return _hub.loop
+
+    class _Waiter(object):
+        # A single blocking wait of a green thread.
+        #
+        # Wake-ups are scheduled as loop callbacks.  A wake-up which arrives
+        # after the wait was interrupted (e.g. by Timeout) is ignored, so it
+        # never resumes the green thread in a later, unrelated wait.
+        __slots__ = ('greenlet', 'active')
+
+        def __init__(self):
+            self.greenlet = getcurrent()
+            self.active = False
+
+        def wait(self):
+            self.active = True
+            try:
+                return _hub.switch()
+            finally:
+                self.active = False
+
+        def switch(self, value=None):
+            if self.active:
+                self.active = False
+                self.greenlet.switch(value)
+
+        def throw(self, exc):
+            if self.active:
+                self.active = False
+                self.greenlet.throw(exc)
+
+    def _call_later(seconds, callback, *args):
+        if seconds is None:
+            return None
+        return _hub.loop.call_later(max(seconds, 0), callback, *args)
+
+    def _cancel(handle):
+        if handle is not None:
+            handle.cancel()
+
+    def _wake_one(waiters):
+        if waiters:
+            _hub.loop.call_soon(waiters.popleft().switch)
+
+    def sleep(seconds=0):
+        w = _Waiter()
+        if seconds <= 0:
+            handle = _hub.loop.call_soon(w.switch)
+        else:
+            handle = _hub.loop.call_later(seconds, w.switch)
+        try:
+            w.wait()
+        finally:
+            handle.cancel()
+
+    class _GreenThread(object):
+        def __init__(self, func, args, kwargs):
+            self._func = func
+            self._args = args
+            self._kwargs = kwargs
+            self._greenlet = greenlet.greenlet(self._main,
+                                               parent=_hub.greenlet)
+            self._handle = None
+            self._started = False
+            self._result = None
+            self._exc = None
+            self._waiters = collections.deque()
+            self._links = []
+            self.dead = False
+
+        def _main(self):
+            self._started = True
+            try:
+                self._result = self._func(*self._args, **self._kwargs)
+            except BaseException as e:
+                self._exc = e
+            finally:
+                self._finish()
+
+        def _finish(self):
+            self.dead = True
+            while self._waiters:
+                _wake_one(self._waiters)
+            links, self._links = self._links, []
+            for func, args, kwargs in links:
+                _hub.loop.call_soon(self._call_link, func, args, kwargs)
+
+        def _call_link(self, func, args, kwargs):
+            spawn(func, self, *args, **kwargs)
+
+        def _start(self):
+            self._handle = None
+            if not self.dead:
+                self._greenlet.switch()
+
+        def link(self, func, *args, **kwargs):
+            if self.dead:
+                _hub.loop.call_soon(self._call_link, func, args, kwargs)
+            else:
+                self._links.append((func, args, kwargs))
+
+        def wait(self):
+            if not self.dead:
+                w = _Waiter()
+                self._waiters.append(w)
+                try:
+                    w.wait()
+                finally:
+                    if w in self._waiters:
+                        self._waiters.remove(w)
+            if self._exc is not None:
+                raise self._exc
+            return self._result
+
+        def kill(self):
+            if self.dead:
+                return
+            if not self._started:
+                _cancel(self._handle)
+                self._handle = None
+                self._exc = TaskExit()
+                self._finish()
+                return
+            if getcurrent() is self._greenlet:
+                raise TaskExit()
+            # The killed thread switches to the hub when it dies or
+            # catches TaskExit and blocks again.  Resume from there.
+            w = _Waiter()
+            w.active = True
+            _hub.loop.call_soon(w.switch)
+            try:
+                self._greenlet.throw(TaskExit())
+            finally:
+                w.active = False
+
+    def _spawn(seconds, args, kwargs):
+        raise_error = kwargs.pop('raise_error', False)
+
+        def _launch(func, *args, **kwargs):
+            # Mimic gevent's default raise_error=False behaviour
+            # by not propagating an exception to the joiner.
+            try:
+                return func(*args, **kwargs)
+            except TaskExit:
+                pass
+            except BaseException as e:
+                if raise_error:
+                    raise e
+                # Log uncaught exception.
+                # Note: this is an intentional divergence from gevent
+                # behaviour; gevent silently ignores such exceptions.
+                LOG.error('hub: uncaught exception: %s',
+                          traceback.format_exc())
+
+        thread = _GreenThread(_launch, args, kwargs)
+        if seconds is None:
+            thread._handle = _hub.loop.call_soon(thread._start)
+        else:
+            thread._handle = _call_later(seconds, thread._start)
+        return thread
+
+    def spawn(*args, **kwargs):
+        return _spawn(None, args, kwargs)
+
+    def spawn_after(seconds, *args, **kwargs):
+        return _spawn(seconds, args, kwargs)
+
+    def kill(thread):
+        thread.kill()
+
+    def joinall(threads):
+        for t in threads:
+            # This try-except is necessary when killing an inactive
+            # greenthread.
+            try:
+                t.wait()
+            except TaskExit:
+                pass
+
+    def run_coroutine(coro, timeout=None):
+        """
+        Run an asyncio coroutine (e.g. of aiohttp or asyncpg) on the hub's
+        event loop and block the calling green thread until it completes.
+        Returns the result of the coroutine or raises its exception.
+        """
+        fut = asyncio.ensure_future(coro, loop=_hub.loop)
+        w = _Waiter()
+        fut.add_done_callback(lambda _fut: w.switch())
+        try:
+            with Timeout(timeout):
+                w.wait()
+        except BaseException:
+            fut.cancel()
+            raise
+        return fut.result()
+
+    def fork():
+        """
+        Fork the process.  The child gets a fresh event loop so that it
+        does not share the parent's poller.  Must be called before spawning.
+        """
+        global _hub
+
+        pid = os.fork()
+        if pid == 0:
+            _hub = _Hub()
+        return pid
+
+    def _green_select(rlist, wlist, xlist, timeout=None):
+        # Cooperative replacement of select.select() installed by patch().
+        ready = _select(rlist, wlist, xlist, 0)
+        if any(ready) or timeout == 0:
+            # Yield anyway, as eventlet does, so that a caller polling in
+            # a loop does not starve the other green threads.
+            sleep(0)
+            return ready
+
+        def _fd(f):
+            return f if isinstance(f, int) else f.fileno()
+
+        loop = _hub.loop
+        w = _Waiter()
+        rfds = [_fd(f) for f in rlist]
+        wfds = [_fd(f) for f in wlist]
+        for fd in rfds:
+            loop.add_reader(fd, w.switch)
+        for fd in wfds:
+            loop.add_writer(fd, w.switch)
+        handle = _call_later(timeout, w.switch)
+        try:
+            w.wait()
+        finally:
+            for fd in rfds:
+                loop.remove_reader(fd)
+            for fd in wfds:
+                loop.remove_writer(fd)
+            _cancel(handle)
+        return _select(rlist, wlist, xlist, 0)
+
+    def patch(select=True, socket=True, time=True, **_kwargs):
+        """
+        Make select.select(), socket.socket and time.sleep() cooperative.
+        Unlike eventlet, nothing else (e.g. threading or os) is patched.
+        Sockets created through this module (listen, connect, StreamServer
+        and StreamClient) are always cooperative.
+        """
+        if select:
+            _select_module.select = _green_select
+        if socket:
+            _socket_module.socket = GreenSocket
+        if time:
+            _time_module.sleep = sleep
+
+    class QueueEmpty(Exception):
+        pass
+
+    class QueueFull(Exception):
+        pass
+
+    class Queue(object):
+        def __init__(self, maxsize=None):
+            if maxsize is not None and maxsize < 0:
+                maxsize = None
+            self.maxsize = maxsize
+            self._items = collections.deque()
+            self._getters = collections.deque()
+            self._putters = collections.deque()
+
+        def qsize(self):
+            return len(self._items)
+
+        def empty(self):
+            return not self._items
+
+        def full(self):
+            return self.maxsize is not None and \
+                len(self._items) >= self.maxsize
+
+        def _wait(self, waiters, deadline):
+            w = _Waiter()
+            waiters.append(w)
+            handle = None
+            if deadline is not None:
+                handle = _call_later(deadline - time.monotonic(),
+                                     w.switch, False)
+            try:
+                return w.wait() is not False
+            finally:
+                _cancel(handle)
+                if w in waiters:
+                    waiters.remove(w)
+
+        def put(self, item, block=True, timeout=None):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                while self.full():
+                    if not block or not self._wait(self._putters, deadline):
+                        raise QueueFull()
+            except BaseException:
+                # Pass a wake-up we may have consumed on to the next one.
+                if not self.full():
+                    _wake_one(self._putters)
+                raise
+            self._items.append(item)
+            _wake_one(self._getters)
+
+        def put_nowait(self, item):
+            self.put(item, False)
+
+        def get(self, block=True, timeout=None):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                while not self._items:
+                    if not block or not self._wait(self._getters, deadline):
+                        raise QueueEmpty()
+            except BaseException:
+                # Pass a wake-up we may have consumed on to the next one.
+                if self._items:
+                    _wake_one(self._getters)
+                raise
+            item = self._items.popleft()
+            _wake_one(self._putters)
+            return item
+
+        def get_nowait(self):
+            return self.get(False)
+
+    class Semaphore(object):
+        def __init__(self, value=1):
+            if value < 0:
+                raise ValueError('Semaphore must be initialized with a '
+                                 'non-negative value; got %r' % value)
+            self.counter = value
+            self._waiters = collections.deque()
+
+        def locked(self):
+            return self.counter <= 0
+
+        def acquire(self, blocking=True, timeout=None):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.counter <= 0:
+                if not blocking:
+                    return False
+                w = _Waiter()
+                self._waiters.append(w)
+                handle = None
+                if deadline is not None:
+                    handle = _call_later(deadline - time.monotonic(),
+                                         w.switch, False)
+                try:
+                    if w.wait() is False:
+                        return False
+                except BaseException:
+                    if self.counter > 0:
+                        _wake_one(self._waiters)
+                    raise
+                finally:
+                    _cancel(handle)
+                    if w in self._waiters:
+                        self._waiters.remove(w)
+            self.counter -= 1
+            return True
+
+        def release(self):
+            self.counter += 1
+            _wake_one(self._waiters)
+
+        def __enter__(self):
+            self.acquire()
+
+        def __exit__(self, typ, val, tb):
+            self.release()
+
+    class BoundedSemaphore(Semaphore):
+        def __init__(self, value=1):
+            super(BoundedSemaphore, self).__init__(value)
+            self.original_counter = value
+
+        def release(self):
+            if self.counter >= self.original_counter:
+                raise ValueError('Semaphore released too many times')
+            super(BoundedSemaphore, self).release()
+
+    class Timeout(BaseException):
+        """
+        Raises this instance, or exception if given, in the green thread
+        which created it after seconds unless cancelled before.
+        """
+
+        def __init__(self, seconds=None, exception=None):
+            super(Timeout, self).__init__(seconds)
+            self.seconds = seconds
+            self.exception = exception
+            self._handle = None
+            self.start()
+
+        def start(self):
+            self.cancel()
+            if self.seconds is not None:
+                self._handle = _call_later(self.seconds, self._fire,
+                                           getcurrent())
+
+        def _fire(self, gr):
+            self._handle = None
+            if gr.dead:
+                return
+            exc = self if self.exception is None else self.exception
+            gr.throw(exc)
+
+        @property
+        def pending(self):
+            return self._handle is not None
+
+        def cancel(self):
+            _cancel(self._handle)
+            self._handle = None
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, typ, value, tb):
+            self.cancel()
+            return value is self and self.exception is False
+
+        def __str__(self):
+            return '%s seconds' % self.seconds
+
+    class Event(object):
+        def __init__(self):
+            self._cond = False
+            self._waiters = collections.deque()
+
+        def is_set(self):
+            return self._cond
+
+        def set(self):
+            self._cond = True
+            while self._waiters:
+                _wake_one(self._waiters)
+
+        def clear(self):
+            self._cond = False
+
+        def wait(self, timeout=None):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._cond:
+                if deadline is not None and deadline <= time.monotonic():
+                    break
+                w = _Waiter()
+                self._waiters.append(w)
+                handle = None
+                if deadline is not None:
+                    handle = _call_later(deadline - time.monotonic(),
+                                         w.switch)
+                try:
+                    w.wait()
+                finally:
+                    _cancel(handle)
+                    if w in self._waiters:
+                        self._waiters.remove(w)
+
+            return self._cond
+
+    class _GreenSocketMixin(object):
+        # The file descriptor is always in non-blocking mode.  Operations
+        # which would block wait on the event loop instead, honouring the
+        # timeout set by settimeout().
+        _green_timeout = None
+
+        def settimeout(self, timeout):
+            super(_GreenSocketMixin, self).settimeout(0.0)
+            self._green_timeout = timeout
+
+        def gettimeout(self):
+            return self._green_timeout
+
+        def setblocking(self, flag):
+            self.settimeout(None if flag else 0.0)
+
+        def getblocking(self):
+            return self._green_timeout != 0.0
+
+        def _wait(self, writable, exc):
+            if self._green_timeout == 0.0:
+                raise exc
+            fd = self.fileno()
+            loop = _hub.loop
+            w = _Waiter()
+            if writable:
+                loop.add_writer(fd, w.switch)
+            else:
+                loop.add_reader(fd, w.switch)
+            handle = _call_later(self._green_timeout, w.throw,
+                                 socket.timeout('timed out'))
+            try:
+                w.wait()
+            finally:
+                if writable:
+                    loop.remove_writer(fd)
+                else:
+                    loop.remove_reader(fd)
+                _cancel(handle)
+
+        def _io(self, writable, op, *args):
+            while True:
+                try:
+                    return op(*args)
+                except ssl.SSLWantReadError as e:
+                    self._wait(False, e)
+                except ssl.SSLWantWriteError as e:
+                    self._wait(True, e)
+                except BlockingIOError as e:
+                    self._wait(writable, e)
+
+        def recv(self, *args):
+            return self._io(False, super(_GreenSocketMixin, self).recv,
+                            *args)
+
+        def recv_into(self, *args):
+            return self._io(False,
+                            super(_GreenSocketMixin, self).recv_into, *args)
+
+        def recvfrom(self, *args):
+            return self._io(False, super(_GreenSocketMixin, self).recvfrom,
+                            *args)
+
+        def send(self, *args):
+            return self._io(True, super(_GreenSocketMixin, self).send,
+                            *args)
+
+        def sendto(self, *args):
+            return self._io(True, super(_GreenSocketMixin, self).sendto,
+                            *args)
+
+        def sendall(self, data, *args):
+            view = memoryview(data).cast('B')
+            while view:
+                view = view[self.send(view, *args):]
+
+        def connect_ex(self, addr):
+            err = super(_GreenSocketMixin, self).connect_ex(addr)
+            if err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+                try:
+                    self._wait(True, BlockingIOError(err, os.strerror(err)))
+                except BlockingIOError:
+                    return err
+                err = self.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            return err
+
+        def connect(self, addr):
+            err = self.connect_ex(addr)
+            if err:
+                raise socket.error(err, os.strerror(err))
+
+    class GreenSocket(_GreenSocketMixin, _socket_class):
+        """
+        Cooperative socket.  patch() installs this as socket.socket.
+        """
+
+        def __init__(self, family=-1, type=-1, proto=-1, fileno=None):
+            super(GreenSocket, self).__init__(family, type, proto, fileno)
+            self.settimeout(_socket_class.gettimeout(self))
+
+        def accept(self):
+            fd, addr = self._io(False, self._accept)
+            sock = GreenSocket(self.family, self.type, self.proto, fileno=fd)
+            return sock, addr
+
+    class _GreenSSLSocket(_GreenSocketMixin, ssl.SSLSocket):
+        def do_handshake(self, block=False):
+            self._io(False, super(_GreenSSLSocket, self).do_handshake)
+
+    def _ssl_context(ssl_args, server_side):
+        # Build an SSLContext from eventlet (ssl.wrap_socket) style
+        # arguments.
+        ssl_args = dict(ssl_args)
+        ctx = ssl_args.pop('ssl_ctx', None)
+        if ctx is None:
+            if server_side:
+                protocol = ssl.PROTOCOL_TLS_SERVER
+            else:
+                protocol = ssl.PROTOCOL_TLS_CLIENT
+            ctx = ssl.SSLContext(ssl_args.pop('ssl_version', protocol))
+            if not server_side:
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+        if 'certfile' in ssl_args:
+            ctx.load_cert_chain(ssl_args.pop('certfile'),
+                                ssl_args.pop('keyfile', None))
+        if 'cert_reqs' in ssl_args:
+            ctx.verify_mode = ssl_args.pop('cert_reqs')
+        if ssl_args.get('ca_certs'):
+            ctx.load_verify_locations(ssl_args.pop('ca_certs'))
+        if ssl_args.get('ciphers'):
+            ctx.set_ciphers(ssl_args.pop('ciphers'))
+        ctx.sslsocket_class = _GreenSSLSocket
+        return ctx
+
+    def _wrap_ssl(sock, ctx, server_side):
+        sock = ctx.wrap_socket(sock, server_side=server_side,
+                               do_handshake_on_connect=False)
+        sock.do_handshake()
+        return sock
+
+    def listen(addr, family=socket.AF_INET, backlog=50, reuse_addr=True,
+               reuse_port=None):
+        sock = GreenSocket(family, socket.SOCK_STREAM)
+        try:
+            if reuse_addr and family != socket.AF_UNIX:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(addr)
+            sock.listen(backlog)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def connect(addr, family=socket.AF_INET, bind=None):
+        sock = GreenSocket(family, socket.SOCK_STREAM)
+        try:
+            if bind is not None:
+                sock.bind(bind)
+            sock.connect(addr)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    class StreamServer(object):
+        def __init__(self, listen_info, handle=None, backlog=None,
+                     spawn='default', reuse_port=None, **ssl_args):
+            assert backlog is None
+            assert spawn == 'default'
+
+            if ip.valid_ipv6(listen_info[0]):
+                self.server = listen(listen_info, family=socket.AF_INET6,
+                                     reuse_port=reuse_port)
+            elif os.path.isdir(os.path.dirname(listen_info[0])):
+                # Case for Unix domain socket
+                self.server = listen(listen_info[0], family=socket.AF_UNIX)
+            else:
+                self.server = listen(listen_info, reuse_port=reuse_port)
+
+            if ssl_args:
+                ctx = _ssl_context(ssl_args, True)
+
+                def wrap_and_handle_ssl(sock, addr):
+                    try:
+                        sock = _wrap_ssl(sock, ctx, True)
+                    except (ssl.SSLError, socket.error) as e:
+                        LOG.debug('hub: SSL handshake with %s failed: %s',
+                                  addr, e)
+                        sock.close()
+                        return
+                    handle(sock, addr)
+
+                self.handle = wrap_and_handle_ssl
+            else:
+                self.handle = handle
+
+        def serve_forever(self):
+            while True:
+                sock, addr = self.server.accept()
+                spawn(self.handle, sock, addr)
+
+    class StreamClient(object):
+        def __init__(self, addr, timeout=None, **ssl_args):
+            assert ip.valid_ipv4(addr[0]) or ip.valid_ipv6(addr[0])
+            self.addr = addr
+            self.timeout = timeout
+            self.ssl_args = ssl_args
+            self._is_active = True
+
+        def connect(self):
+            if ip.valid_ipv6(self.addr[0]):
+                family = socket.AF_INET6
+            else:
+                family = socket.AF_INET
+            client = GreenSocket(family, socket.SOCK_STREAM)
+            client.settimeout(self.timeout)
+            try:
+                client.connect(self.addr)
+                if self.ssl_args:
+                    client = _wrap_ssl(client,
+                                       _ssl_context(self.ssl_args, False),
+                                       False)
+            except (ssl.SSLError, socket.error):
+                client.close()
+                return None
+
+            return client
+
+        def connect_loop(self, handle, interval):
+            while self._is_active:
+                sock = self.connect()
+                if sock:
+                    handle(sock, self.addr)
+                sleep(interval)
+
+        def stop(self):
+            self._is_active = False
+
+    class _WSGIServerHandler(simple_server.ServerHandler):
+        def finish_response(self):
+            status = self.environ.get('ryu.hub.answered')
+            if status:
+                # WebSocketWSGI has answered on the connection itself
+                self.status = status
+                self.close()
+                return
+            super(_WSGIServerHandler, self).finish_response()
+
+    class _WSGIRequestHandler(simple_server.WSGIRequestHandler):
+        def log_message(self, format, *args):
+            LOG.info('%s - - [%s] %s', self.address_string(),
+                     self.log_date_time_string(), format % args)
+
+        def handle(self):
+            # As simple_server.WSGIRequestHandler.handle(), but the
+            # connection is passed to WebSocketWSGI in the environ.
+            self.raw_requestline = self.rfile.readline(65537)
+            if len(self.raw_requestline) > 65536:
+                self.requestline = ''
+                self.request_version = ''
+                self.command = ''
+                self.send_error(414)
+                return
+            if not self.parse_request():
+                return
+            environ = self.get_environ()
+            environ['ryu.hub.connection'] = self.connection
+            handler = _WSGIServerHandler(
+                self.rfile, self.wfile, self.get_stderr(), environ,
+                multithread=False)
+            handler.request_handler = self
+            handler.run(self.server.get_app())
+
+    class WSGIServer(StreamServer):
+        def serve_forever(self):
+            host, port = self.server.getsockname()[:2]
+            self.base_environ = {
+                'SERVER_NAME': host,
+                'GATEWAY_INTERFACE': 'CGI/1.1',
+                'SERVER_PORT': str(port),
+                'REMOTE_HOST': '',
+                'CONTENT_LENGTH': '',
+                'SCRIPT_NAME': '',
+            }
+            while True:
+                sock, addr = self.server.accept()
+                spawn(self._handle_request, sock, addr)
+
+        def get_app(self):
+            return self.handle
+
+        def _handle_request(self, sock, addr):
+            try:
+                _WSGIRequestHandler(sock, addr, self)
+            except socket.error as e:
+                LOG.debug('hub: WSGI connection from %s failed: %s',
+                          addr, e)
+            finally:
+                sock.close()
+
+    class WebSocketError(Exception):
+        pass
+
+    class WebSocket(object):
+        """
+        Server side of a WebSocket connection (RFC 6455) with the methods
+        of eventlet.websocket.WebSocket which Ryu uses.
+
+        wait() returns the next message, str for a text message and bytes
+        for a binary one, or None after the connection is closed.
+        send() sends a message.
+        """
+
+        _OP_CONTINUATION = 0x0
+        _OP_TEXT = 0x1
+        _OP_BINARY = 0x2
+        _OP_CLOSE = 0x8
+        _OP_PING = 0x9
+        _OP_PONG = 0xa
+
+        # The maximum size of a received message
+        MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+        def __init__(self, sock, rfile, environ):
+            self.socket = sock
+            self.environ = environ
+            self._rfile = rfile
+            self._send_lock = Semaphore()
+            self._closed = False
+
+        def _read(self, size):
+            data = self._rfile.read(size)
+            if len(data) < size:
+                raise WebSocketError('connection closed')
+            return data
+
+        @staticmethod
+        def _unmask(mask, data):
+            size = len(data)
+            if not size:
+                return data
+            key = (mask * (size // 4 + 1))[:size]
+            return (int.from_bytes(data, 'big') ^
+                    int.from_bytes(key, 'big')).to_bytes(size, 'big')
+
+        def _recv_frame(self):
+            head, length = self._read(2)
+            fin = head & 0x80
+            opcode = head & 0x0f
+            if not length & 0x80:
+                # frames from a client are masked
+                raise WebSocketError('unmasked frame')
+            length &= 0x7f
+            if length == 126:
+                (length, ) = struct.unpack('!H', self._read(2))
+            elif length == 127:
+                (length, ) = struct.unpack('!Q', self._read(8))
+            if length > self.MAX_MESSAGE_SIZE:
+                raise WebSocketError('frame too large')
+            mask = self._read(4)
+            return fin, opcode, self._unmask(mask, self._read(length))
+
+        def _send_frame(self, opcode, payload):
+            length = len(payload)
+            if length < 126:
+                header = struct.pack('!BB', 0x80 | opcode, length)
+            elif length < 0x10000:
+                header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+            else:
+                header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+            with self._send_lock:
+                self.socket.sendall(header + payload)
+
+        def send(self, message):
+            if isinstance(message, str):
+                self._send_frame(self._OP_TEXT, message.encode('utf-8'))
+            else:
+                self._send_frame(self._OP_BINARY, bytes(message))
+
+        def wait(self):
+            if self._closed:
+                return None
+            opcode = None
+            fragments = []
+            size = 0
+            try:
+                while True:
+                    fin, op, payload = self._recv_frame()
+                    if op == self._OP_CLOSE:
+                        self.close(payload[:2] if payload else b'')
+                        return None
+                    elif op == self._OP_PING:
+                        self._send_frame(self._OP_PONG, payload)
+                        continue
+                    elif op == self._OP_PONG:
+                        continue
+                    elif op in (self._OP_TEXT, self._OP_BINARY):
+                        if opcode is not None:
+                            raise WebSocketError('unfinished message')
+                        opcode = op
+                    elif op != self._OP_CONTINUATION or opcode is None:
+                        raise WebSocketError('unexpected opcode %d' % op)
+                    fragments.append(payload)
+                    size += len(payload)
+                    if size > self.MAX_MESSAGE_SIZE:
+                        raise WebSocketError('message too large')
+                    if fin:
+                        break
+            except (WebSocketError, socket.error) as e:
+                LOG.debug('hub: WebSocket connection closed: %s', e)
+                self._closed = True
+                return None
+            message = b''.join(fragments)
+            if opcode == self._OP_TEXT:
+                return message.decode('utf-8', 'replace')
+            return message
+
+        def close(self, status=b'\x03\xe8'):
+            """
+            Sends a close frame, by default of status 1000 (normal
+            closure).
+            """
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._send_frame(self._OP_CLOSE, status)
+            except socket.error:
+                pass
+
+    class WebSocketWSGI(object):
+        """
+        A WSGI application which accepts the WebSocket handshake and
+        calls handler with a WebSocket.  The connection is closed when
+        handler returns.  Works on the WSGIServer of this hub.
+        """
+
+        _GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+        def __init__(self, handler):
+            self.handler = handler
+
+        def __call__(self, environ, start_response):
+            sock = environ.get('ryu.hub.connection')
+            if sock is None:
+                raise RuntimeError('WebSocketWSGI needs the WSGIServer of '
+                                   'the asyncio hub')
+            key = environ.get('HTTP_SEC_WEBSOCKET_KEY', '')
+            if ('websocket' not in environ.get('HTTP_UPGRADE', '').lower() or
+                    not key or
+                    environ.get('HTTP_SEC_WEBSOCKET_VERSION') != '13'):
+                environ['ryu.hub.answered'] = '400 Bad Request'
+                sock.sendall(b'HTTP/1.1 400 Bad Request\r\n'
+                             b'Connection: close\r\n'
+                             b'Content-Length: 0\r\n\r\n')
+                return []
+
+            environ['ryu.hub.answered'] = '101 Switching Protocols'
+            accept = base64.b64encode(hashlib.sha1(
+                key.encode('latin-1') + self._GUID).digest())
+            sock.sendall(b'HTTP/1.1 101 Switching Protocols\r\n'
+                         b'Upgrade: websocket\r\n'
+                         b'Connection: Upgrade\r\n'
+                         b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+            ws = WebSocket(sock, environ['wsgi.input'], environ)
+            try:
+                self.handler(ws)
+            finally:
+                ws.close()
+            return []
+
+else:
+    raise ValueError('unknown hub type: %s' % HUB_TYPE)
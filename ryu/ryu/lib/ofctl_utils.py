@@ -19,6 +19,7 @@ import logging
 import netaddr
 import six
 
+from ryu import exception
 from ryu.lib import dpid
 from ryu.lib import hub
 from ryu.ofproto import ofproto_v1_2
@@ -243,6 +244,12 @@ def send_msg(dp, msg, logger=None):
 
 
 def send_stats_request(dp, stats, waiters, msgs, logger=None):
+    if hasattr(dp, 'send_request'):
+        # The datapath correlates the replies by itself; waiters is
+        # kept only for datapath objects without send_request.
+        _send_request(dp, stats, msgs, logger)
+        return
+
     dp.set_xid(stats)
     waiters_per_dp = waiters.setdefault(dp.id, {})
     lock = hub.Event()
@@ -262,6 +269,50 @@ def send_stats_request(dp, stats, waiters, msgs, logger=None):
         del waiters_per_dp[stats.xid]
 
 
+def _send_request(dp, stats, msgs, logger=None):
+    dp.set_xid(stats)
+    log = get_logger(logger)
+    log.debug('Sending message with xid(%x) to '
+              'datapath(' + dpid._DPID_FMT + '): %s', stats.xid, dp.id, stats)
+    future = dp.send_request(stats)
+
+    # As long as parts of a multipart reply keep arriving, wait for
+    # the next one.
+    received = -1
+    while not future.done() and len(future.replies) > received:
+        received = len(future.replies)
+        future.wait(timeout=DEFAULT_TIMEOUT)
+    future.cancel()
+    msgs.extend(future.replies)
+
+
+def stream_stats_request(dp, stats, waiters, logger=None):
+    """
+    Sends a multipart request like send_stats_request, but yields the
+    reply messages one by one as they arrive instead of collecting
+    all of them first.  Waits up to DEFAULT_TIMEOUT for each message.
+    """
+    if not hasattr(dp, 'send_stream_request'):
+        msgs = []
+        send_stats_request(dp, stats, waiters, msgs, logger)
+        for msg in msgs:
+            yield msg
+        return
+
+    dp.set_xid(stats)
+    log = get_logger(logger)
+    log.debug('Sending message with xid(%x) to '
+              'datapath(' + dpid._DPID_FMT + '): %s', stats.xid, dp.id, stats)
+    stream = dp.send_stream_request(stats)
+    try:
+        for msg in stream.messages(timeout=DEFAULT_TIMEOUT):
+            yield msg
+    except (exception.OFPRequestTimeout, exception.OFPRequestCancelled,
+            exception.OFPErrorReply) as e:
+        # Like send_stats_request, deliver what arrived.
+        log.debug('Incomplete reply to xid(%x): %s', stats.xid, e)
+
+
 def str_to_int(str_num):
     return int(str(str_num), 0)
 
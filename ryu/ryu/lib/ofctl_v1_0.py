@@ -334,11 +334,8 @@ def get_flow_stats(dp, waiters, flow=None):
     stats = dp.ofproto_parser.OFPFlowStatsRequest(
         dp, 0, match, table_id, out_port)
 
-    msgs = []
-    ofctl_utils.send_stats_request(dp, stats, waiters, msgs, LOG)
-
     flows = []
-    for msg in msgs:
+    for msg in ofctl_utils.stream_stats_request(dp, stats, waiters, LOG):
         for stats in msg.body:
             if 0 <= priority != stats.priority:
                 continue
@@ -457,11 +457,8 @@ def get_flow_stats(dp, waiters, flow=None, to_user=True):
         dp, flags, table_id, out_port, out_group, cookie, cookie_mask,
         match)
 
-    msgs = []
-    ofctl_utils.send_stats_request(dp, stats, waiters, msgs, LOG)
-
     flows = []
-    for msg in msgs:
+    for msg in ofctl_utils.stream_stats_request(dp, stats, waiters, LOG):
         for stats in msg.body:
             if 0 <= priority != stats.priority:
                 continue
@@ -0,0 +1,188 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Flow key extraction from raw packets.
+
+extract() reads the addresses, the protocol numbers and the transport
+ports of a packet straight from its bytes, without creating the
+protocol objects of packet.Packet.  This is meant for packet-in handlers
+which only classify packets::
+
+    key = flow_key.extract(ev.msg.data)
+    if key.eth_type == ether_types.ETH_TYPE_IP and key.dst_port == 5060:
+        ...
+
+match() builds a filter of the packets by their flow keys.
+"""
+
+import collections
+import socket
+import struct
+
+from . import ether_types
+from . import in_proto as inet
+
+
+FlowKey = collections.namedtuple('FlowKey', [
+    'eth_dst', 'eth_src', 'eth_type', 'vlan_vid',
+    'ip_src', 'ip_dst', 'ip_proto', 'src_port', 'dst_port'])
+FlowKey.__doc__ = """
+The flow key of a packet.
+
+========== ==============================================================
+Attribute  Description
+========== ==============================================================
+eth_dst    Destination MAC address, e.g. 'aa:bb:cc:dd:ee:ff'
+eth_src    Source MAC address
+eth_type   Ethertype after the VLAN tags
+vlan_vid   VLAN ID of the outermost VLAN tag, or None if untagged
+ip_src     Source IPv4/IPv6 address, or ARP sender protocol address
+ip_dst     Destination IPv4/IPv6 address, or ARP target protocol address
+ip_proto   IP protocol number, or ARP opcode
+src_port   TCP/UDP/SCTP source port
+dst_port   TCP/UDP/SCTP destination port
+========== ==============================================================
+
+The fields which are not present in the packet are None.
+The transport ports are None for IPv4 and IPv6 fragments but the first.
+"""
+
+_VLAN_TPIDS = (ether_types.ETH_TYPE_8021Q, ether_types.ETH_TYPE_8021AD,
+               0x9100)  # pre-standard QinQ
+_PORT_PROTOS = (inet.IPPROTO_TCP, inet.IPPROTO_UDP, inet.IPPROTO_SCTP)
+# IPv6 extension headers whose length is in 8-octet units
+_IPV6_EXT_HEADERS = (inet.IPPROTO_HOPOPTS, inet.IPPROTO_ROUTING,
+                     inet.IPPROTO_DSTOPTS)
+
+_MAC_FMT = '%02x:%02x:%02x:%02x:%02x:%02x'
+_ETHERNET = struct.Struct('!12BH')
+_VLAN = struct.Struct('!HH')
+# version/ihl, flags/fragment offset, protocol, src, dst
+_IPV4 = struct.Struct('!B5xHxB2x4s4s')
+# next header, src, dst
+_IPV6 = struct.Struct('!6xB1x16s16s')
+# htype, ptype, hlen, plen, opcode, spa, tpa of Ethernet/IPv4 ARP
+_ARP = struct.Struct('!HHBBH6x4s6x4s')
+_PORTS = struct.Struct('!HH')
+
+_ETHERNET_SIZE = _ETHERNET.size
+
+
+def _ports(buf, offset, proto):
+    if proto in _PORT_PROTOS and len(buf) >= offset + _PORTS.size:
+        return _PORTS.unpack_from(buf, offset)
+    return None, None
+
+
+def _ipv6_payload(buf, offset, nxt):
+    # Skips the extension headers.  Returns the upper-layer protocol and
+    # its offset, or the offset None if the ports are not available.
+    while True:
+        if nxt in _IPV6_EXT_HEADERS or nxt == inet.IPPROTO_AH:
+            if len(buf) < offset + 2:
+                return nxt, None
+            if nxt == inet.IPPROTO_AH:
+                length = (buf[offset + 1] + 2) * 4
+            else:
+                length = (buf[offset + 1] + 1) * 8
+        elif nxt == inet.IPPROTO_FRAGMENT:
+            if len(buf) < offset + 8:
+                return nxt, None
+            if struct.unpack_from('!H', buf, offset + 2)[0] & 0xfff8:
+                # not the first fragment
+                return buf[offset], None
+            length = 8
+        else:
+            return nxt, offset
+        nxt = buf[offset]
+        offset += length
+
+
+def extract(buf):
+    """
+    Returns the FlowKey of the given Ethernet frame, which is bytes,
+    bytearray or memoryview, or None if it is shorter than an Ethernet
+    header.
+    Truncated headers are not an error; the fields which do not fit
+    in the frame are None.
+    """
+    if len(buf) < _ETHERNET_SIZE:
+        return None
+    eth = _ETHERNET.unpack_from(buf)
+    eth_type = eth[12]
+    offset = _ETHERNET_SIZE
+    vlan_vid = None
+    while eth_type in _VLAN_TPIDS and len(buf) >= offset + _VLAN.size:
+        tci, eth_type = _VLAN.unpack_from(buf, offset)
+        if vlan_vid is None:
+            vlan_vid = tci & 0xfff
+        offset += _VLAN.size
+
+    ip_src = ip_dst = ip_proto = src_port = dst_port = None
+    if eth_type == ether_types.ETH_TYPE_IP:
+        if len(buf) >= offset + _IPV4.size:
+            (ver_ihl, frag, ip_proto,
+             src, dst) = _IPV4.unpack_from(buf, offset)
+            ip_src = socket.inet_ntoa(src)
+            ip_dst = socket.inet_ntoa(dst)
+            if not frag & 0x1fff:
+                src_port, dst_port = _ports(
+                    buf, offset + (ver_ihl & 0xf) * 4, ip_proto)
+    elif eth_type == ether_types.ETH_TYPE_IPV6:
+        if len(buf) >= offset + _IPV6.size:
+            nxt, src, dst = _IPV6.unpack_from(buf, offset)
+            ip_src = socket.inet_ntop(socket.AF_INET6, src)
+            ip_dst = socket.inet_ntop(socket.AF_INET6, dst)
+            ip_proto, offset = _ipv6_payload(buf, offset + _IPV6.size, nxt)
+            if offset is not None:
+                src_port, dst_port = _ports(buf, offset, ip_proto)
+    elif eth_type == ether_types.ETH_TYPE_ARP:
+        if len(buf) >= offset + _ARP.size:
+            (htype, ptype, hlen, plen, ip_proto,
+             src, dst) = _ARP.unpack_from(buf, offset)
+            if (hlen, plen, ptype) == (6, 4, ether_types.ETH_TYPE_IP):
+                ip_src = socket.inet_ntoa(src)
+                ip_dst = socket.inet_ntoa(dst)
+            else:
+                ip_proto = None
+
+    return FlowKey(_MAC_FMT % eth[:6], _MAC_FMT % eth[6:12], eth_type,
+                   vlan_vid, ip_src, ip_dst, ip_proto, src_port, dst_port)
+
+
+def match(**fields):
+    """
+    Returns a function which takes an Ethernet frame and returns whether
+    its FlowKey has all the given field values, e.g. to filter the
+    records of pcaplib.IndexedReader::
+
+        is_sip = flow_key.match(ip_proto=inet.IPPROTO_UDP, dst_port=5060)
+    """
+    expected = []
+    for name, value in fields.items():
+        if name not in FlowKey._fields:
+            raise ValueError('Unknown field %s' % name)
+        expected.append((FlowKey._fields.index(name), value))
+
+    def _match(buf):
+        key = extract(buf)
+        if key is None:
+            return False
+        for i, value in expected:
+            if key[i] != value:
+                return False
+        return True
+    return _match
@@ -55,32 +55,76 @@ class Packet(StringifyMixin):
 
     # Ignore data field when outputting json representation.
     _base_attributes = ['data']
+    _opt_attributes = ['protocols']
 
-    def __init__(self, data=None, protocols=None, parse_cls=ethernet.ethernet):
+    def __init__(self, data=None, protocols=None, parse_cls=ethernet.ethernet,
+                 lazy=False):
         super(Packet, self).__init__()
+        if isinstance(data, memoryview):
+            # The protocol parsers keep slices of their input.
+            data = data.tobytes()
         self.data = data
         if protocols is None:
-            self.protocols = []
+            self._protocols = []
         else:
-            self.protocols = protocols
+            self._protocols = protocols
+        # The class to parse the rest of data with, and the rest of data
+        # while decoding is in progress.
+        self._parse_cls = None
+        self._rest_data = None
         if self.data:
-            self._parser(parse_cls)
+            self._parse_cls = parse_cls
+            self._rest_data = self.data
+            if not lazy:
+                self._parse_all()
+
+    @property
+    def protocols(self):
+        if self._rest_data is not None:
+            self._parse_all()
+        return self._protocols
+
+    @protocols.setter
+    def protocols(self, protocols):
+        self._parse_cls = None
+        self._rest_data = None
+        self._protocols = protocols
 
     def _parser(self, cls):
-        rest_data = self.data
-        while cls:
-            # Ignores an empty buffer
-            if not six.binary_type(rest_data).strip(b'\x00'):
-                break
+        self._parse_cls = cls
+        self._rest_data = self.data
+        self._parse_all()
+
+    def _parse_all(self):
+        while self._parse_next():
+            pass
+
+    def _parse_next(self):
+        # Decodes the next protocol header, if any, and appends it to
+        # self._protocols.  Returns False when the decoding is done.
+        cls = self._parse_cls
+        rest_data = self._rest_data
+        if rest_data is None:
+            return False
+        # Ignores an empty buffer
+        if cls and not _is_padding(rest_data):
             try:
                 proto, cls, rest_data = cls.parser(rest_data)
             except struct.error:
-                break
-            if proto:
-                self.protocols.append(proto)
+                cls = None
+            else:
+                if proto:
+                    self._protocols.append(proto)
+                self._rest_data = rest_data
+                if cls:
+                    self._parse_cls = cls
+                    return True
+        self._parse_cls = None
+        self._rest_data = None
         # If rest_data is all padding, we ignore rest_data
-        if rest_data and six.binary_type(rest_data).strip(b'\x00'):
-            self.protocols.append(rest_data)
+        if rest_data and not _is_padding(rest_data):
+            self._protocols.append(rest_data)
+        return False
 
     def serialize(self):
         """Encode a packet and store the resulted bytearray in self.data.
@@ -139,12 +183,29 @@ class Packet(StringifyMixin):
     def get_protocol(self, protocol):
         """Returns the firstly found protocol that matches to the
         specified protocol.
+
+        When the packet was created with lazy=True, the headers are
+        decoded only up to the found one.
         """
-        result = self.get_protocols(protocol)
-        if len(result) > 0:
-            return result[0]
+        if isinstance(protocol, packet_base.PacketBase):
+            protocol = protocol.__class__
+        assert issubclass(protocol, packet_base.PacketBase)
+        for p in self._iter_protocols():
+            if isinstance(p, protocol):
+                return p
         return None
 
+    def _iter_protocols(self):
+        # Yields the protocols, decoding them on the way if needed.
+        protocols = self._protocols
+        i = 0
+        while True:
+            while i < len(protocols):
+                yield protocols[i]
+                i += 1
+            if not self._parse_next() and i == len(protocols):
+                return
+
     def __div__(self, trailer):
         self.add_protocol(trailer)
         return self
@@ -153,7 +214,9 @@ class Packet(StringifyMixin):
         return self.__div__(trailer)
 
     def __iter__(self):
-        return iter(self.protocols)
+        if self._rest_data is None:
+            return iter(self._protocols)
+        return self._iter_protocols()
 
     def __getitem__(self, idx):
         return self.protocols[idx]
@@ -178,6 +241,17 @@ class Packet(StringifyMixin):
     __repr__ = __str__  # note: str(list) uses __repr__ for elements
 
 
+def _is_padding(buf):
+    # Returns True if buf is empty or all zeros, without copying it.
+    if not isinstance(buf, (bytes, bytearray)):
+        buf = six.binary_type(buf)
+    if not buf:
+        return True
+    if buf[0] or buf[-1]:
+        return False
+    return buf.count(b'\x00') == len(buf)
+
+
 # XXX: Hack for preventing recursive import
 def _PacketBase__div__(self, trailer):
     pkt = Packet()
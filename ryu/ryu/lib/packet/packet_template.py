@@ -0,0 +1,285 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Packets serialized once and patched for each use.
+
+A PacketTemplate serializes a packet.Packet once.  render() copies the
+serialized packet and overwrites the given fields, updating the IPv4
+header, ICMP, TCP and UDP checksums incrementally, which is much
+cheaper than building and serializing the protocol objects again::
+
+    tmpl = packet_template.PacketTemplate(
+        ethernet.ethernet(ethertype=ether_types.ETH_TYPE_ARP) /
+        arp.arp(opcode=arp.ARP_REPLY))
+    data = tmpl.render(eth_dst=dst_mac, eth_src=src_mac,
+                       arp_sha=src_mac, arp_spa=src_ip,
+                       arp_tha=dst_mac, arp_tpa=dst_ip)
+
+The fields are those of the first header of each protocol:
+
+=============== ======================================================
+Field           Value
+=============== ======================================================
+eth_dst         Ethernet destination MAC address
+eth_src         Ethernet source MAC address
+vlan_vid        VLAN ID of the first VLAN tag
+ipv4_src        IPv4 source address
+ipv4_dst        IPv4 destination address
+arp_op          ARP opcode
+arp_sha         ARP sender hardware address
+arp_spa         ARP sender protocol address
+arp_tha         ARP target hardware address
+arp_tpa         ARP target protocol address
+icmpv4_type     ICMP type
+icmpv4_code     ICMP code
+icmp_id         ICMP echo identifier
+icmp_seq        ICMP echo sequence number
+lldp_chassis_id LLDP Chassis ID (bytes of the template's length)
+lldp_port_id    LLDP Port ID (bytes of the template's length)
+lldp_ttl        LLDP TTL
+=============== ======================================================
+
+MAC and IPv4 addresses are given in text or binary representation.
+The IPv4 addresses are covered by the TCP and UDP checksums through
+their pseudo header, which are updated as well.  A zero UDP checksum,
+meaning no checksum, is left as is.
+"""
+
+import socket
+import struct
+
+import six
+
+from . import arp
+from . import ethernet
+from . import icmp
+from . import ipv4
+from . import lldp
+from . import packet_base
+from . import packet_utils
+from . import tcp
+from . import udp
+from . import vlan
+from ryu.lib import addrconv
+
+
+def _encode_mac(value, old):
+    if isinstance(value, (bytes, bytearray)):
+        if len(value) != 6:
+            raise ValueError('Invalid MAC address %r' % value)
+        return bytes(value)
+    try:
+        b = bytes.fromhex(value.replace(':', ''))
+    except ValueError:
+        b = b''
+    if len(b) != 6:
+        return addrconv.mac.text_to_bin(value)
+    return b
+
+
+def _encode_ipv4(value, old):
+    if isinstance(value, (bytes, bytearray)):
+        if len(value) != 4:
+            raise ValueError('Invalid IPv4 address %r' % value)
+        return bytes(value)
+    try:
+        return socket.inet_pton(socket.AF_INET, value)
+    except (socket.error, OSError):
+        raise ValueError('Invalid IPv4 address %r' % value)
+
+
+def _encode_bytes(value, old):
+    if len(value) != len(old):
+        raise ValueError('%d bytes expected but %d given'
+                         % (len(old), len(value)))
+    return bytes(value)
+
+
+def _int_encoder(fmt, mask):
+    def _encode_int(value, old):
+        if not isinstance(value, six.integer_types) or value & ~mask:
+            raise ValueError('Invalid value %r' % (value, ))
+        (o, ) = struct.unpack(fmt, old)
+        return struct.pack(fmt, (o & ~mask) | value)
+    return _encode_int
+
+
+_encode_uint8 = _int_encoder('!B', 0xff)
+_encode_uint16 = _int_encoder('!H', 0xffff)
+
+
+def _lldp_fields(lldp_pkt):
+    fields = []
+    offset = 0
+    for tlv in lldp_pkt.tlvs:
+        length = len(tlv.serialize())
+        if isinstance(tlv, lldp.ChassisID):
+            # type/length and subtype
+            fields.append(('lldp_chassis_id', offset + 3, length - 3,
+                           _encode_bytes))
+        elif isinstance(tlv, lldp.PortID):
+            fields.append(('lldp_port_id', offset + 3, length - 3,
+                           _encode_bytes))
+        elif isinstance(tlv, lldp.TTL):
+            fields.append(('lldp_ttl', offset + 2, 2, _encode_uint16))
+        offset += length
+    return fields
+
+
+def _icmp_fields(icmp_pkt):
+    fields = [('icmpv4_type', 0, 1, _encode_uint8),
+              ('icmpv4_code', 1, 1, _encode_uint8)]
+    if isinstance(icmp_pkt.data, icmp.echo):
+        fields += [('icmp_id', 4, 2, _encode_uint16),
+                   ('icmp_seq', 6, 2, _encode_uint16)]
+    return fields
+
+
+# protocol class -> function which returns a list of
+# (name, offset in the header, size, encoder)
+_PROTOCOL_FIELDS = {
+    ethernet.ethernet: lambda _p: [('eth_dst', 0, 6, _encode_mac),
+                                   ('eth_src', 6, 6, _encode_mac)],
+    vlan.vlan: lambda _p: [('vlan_vid', 0, 2,
+                            _int_encoder('!H', 0xfff))],
+    vlan.svlan: lambda _p: [('vlan_vid', 0, 2,
+                             _int_encoder('!H', 0xfff))],
+    ipv4.ipv4: lambda _p: [('ipv4_src', 12, 4, _encode_ipv4),
+                           ('ipv4_dst', 16, 4, _encode_ipv4)],
+    arp.arp: lambda _p: [('arp_op', 6, 2, _encode_uint16),
+                         ('arp_sha', 8, 6, _encode_mac),
+                         ('arp_spa', 14, 4, _encode_ipv4),
+                         ('arp_tha', 18, 6, _encode_mac),
+                         ('arp_tpa', 24, 4, _encode_ipv4)],
+    icmp.icmp: _icmp_fields,
+    lldp.lldp: _lldp_fields,
+}
+
+
+# protocol class -> offset of the checksum of the transport protocols
+# whose checksum covers the IPv4 addresses
+_L4_CHECKSUM_OFFSETS = {
+    tcp.tcp: 16,
+    udp.udp: 6,
+}
+
+
+def _checksum_regions(layout):
+    # Returns a list of (start, end, checksum offset, optional) of the
+    # checksummed bytes.  An optional checksum is not updated if zero.
+    regions = []
+    for i, (p, offset, length) in enumerate(layout):
+        if isinstance(p, ipv4.ipv4):
+            regions.append((offset, offset + p.header_length * 4,
+                            offset + 10, False))
+            if i + 1 < len(layout):
+                l4, l4_offset, _l4_length = layout[i + 1]
+                csum_offset = _L4_CHECKSUM_OFFSETS.get(type(l4))
+                if csum_offset is not None:
+                    # the addresses in the pseudo header
+                    regions.append((offset + 12, offset + 20,
+                                    l4_offset + csum_offset,
+                                    isinstance(l4, udp.udp)))
+        elif isinstance(p, icmp.icmp):
+            regions.append((offset, offset + length, offset + 2, False))
+    return regions
+
+
+def _serialize(pkt):
+    # Serializes like Packet.serialize() and returns the data and the
+    # offset and length of each protocol.
+    data = bytearray()
+    layout = []
+    r = pkt.protocols[::-1]
+    for i, p in enumerate(r):
+        if isinstance(p, packet_base.PacketBase):
+            prev = r[i + 1] if i < len(r) - 1 else None
+            hdr = p.serialize(data, prev)
+        else:
+            hdr = six.binary_type(p)
+        data = bytearray(hdr + data)
+        layout.append((p, len(hdr)))
+    offset = 0
+    result = []
+    for p, length in reversed(layout):
+        result.append((p, offset, length))
+        offset += length
+    return bytes(data), result
+
+
+class PacketTemplate(object):
+    """
+    A packet serialized once to be patched by render().
+
+    ========== ==========================================================
+    Attribute  Description
+    ========== ==========================================================
+    data       The serialized packet
+    fields     Names of the fields which render() can patch
+    ========== ==========================================================
+    """
+
+    def __init__(self, pkt):
+        self.data, layout = _serialize(pkt)
+        self._fields = {}
+        regions = _checksum_regions(layout)
+        for p, offset, _length in layout:
+            get_fields = _PROTOCOL_FIELDS.get(type(p))
+            if get_fields is None:
+                continue
+            for name, field_offset, size, encode in get_fields(p):
+                if name in self._fields:
+                    continue
+                start = offset + field_offset
+                checksums = [(s, c, optional)
+                             for s, e, c, optional in regions
+                             if s <= start and start + size <= e]
+                self._fields[name] = (start, size, encode, checksums)
+
+    @property
+    def fields(self):
+        return sorted(self._fields)
+
+    def render(self, **values):
+        """
+        Returns a bytearray of the packet with the given fields replaced.
+        """
+        buf = bytearray(self.data)
+        for name, value in values.items():
+            try:
+                offset, size, encode, checksums = self._fields[name]
+            except KeyError:
+                raise ValueError('Unknown field %s' % name)
+            end = offset + size
+            new = encode(value, buf[offset:end])
+            spans = []
+            for start, csum_offset, optional in checksums:
+                # the 16-bit words which the field overlaps
+                a = offset - (offset - start) % 2
+                b = end + (end - start) % 2
+                spans.append((a, b, csum_offset, optional,
+                              bytes(buf[a:b])))
+            buf[offset:end] = new
+            for a, b, csum_offset, optional, old in spans:
+                (csum, ) = struct.unpack_from('!H', buf, csum_offset)
+                if optional and not csum:
+                    continue
+                csum = packet_utils.checksum_update(csum, old,
+                                                    bytes(buf[a:b]))
+                if optional and not csum:
+                    csum = 0xffff
+                struct.pack_into('!H', buf, csum_offset, csum)
+        return buf
@@ -13,10 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import array
 import six
 import socket
 import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from ryu.lib import addrconv
 
 
@@ -25,15 +30,85 @@ def carry_around_add(a, b):
     return (c & 0xffff) + (c >> 16)
 
 
+# Above this length NumPy sums the words faster than int.from_bytes().
+_NUMPY_MIN_LEN = 1024
+
+
+def _sum16(data):
+    # Returns the 16-bit one's complement sum of data, which is padded
+    # with a zero octet if its length is odd, without copying data.
+    # The sum is 0 only if all words are zero, 0xffff otherwise.
+    length = len(data)
+    if numpy is not None and length >= _NUMPY_MIN_LEN:
+        n = int(numpy.frombuffer(data, dtype='>u2', count=length // 2)
+                .sum(dtype=numpy.uint64))
+        if length % 2:
+            n += data[-1] << 8
+    else:
+        # 2 ** 16 == 1 (mod 0xffff), so the sum of the words is the
+        # whole data as a big-endian number modulo 0xffff.
+        n = int.from_bytes(data, 'big')
+        if length % 2:
+            n <<= 8
+    s = n % 0xffff
+    if s == 0 and n:
+        s = 0xffff
+    return s
+
+
 def checksum(data):
-    data = six.binary_type(data)    # input can be bytearray.
-    if len(data) % 2:
-        data += b'\x00'
+    """
+    Returns the Internet checksum (RFC 1071) of data, which is bytes,
+    bytearray or memoryview.
+    """
+    return ~_sum16(data) & 0xffff
 
-    s = sum(array.array('H', data))
-    s = (s & 0xffff) + (s >> 16)
-    s += (s >> 16)
-    return socket.ntohs(~s & 0xffff)
+
+def checksum_update(csum, old, new):
+    """
+    Returns the checksum updated incrementally (RFC 1624) for a change
+    of a field from old to new, without summing the whole data again.
+
+    old and new are bytes of the same length at an even offset of the
+    checksummed data, or 16-bit integers.
+    """
+    if isinstance(old, six.integer_types):
+        old = struct.pack('!H', old)
+        new = struct.pack('!H', new)
+    assert len(old) == len(new)
+    # HC' = ~(~HC + ~m + m')
+    s = carry_around_add(~csum & 0xffff, ~_sum16(old) & 0xffff)
+    s = carry_around_add(s, _sum16(new))
+    return ~s & 0xffff
+
+
+def checksum_batch(buffers):
+    """
+    Returns a list of the checksums of the given buffers.
+
+    With NumPy the words of all buffers are summed at once.
+    """
+    if numpy is None:
+        return [checksum(buf) for buf in buffers]
+    buffers = list(buffers)
+    lengths = numpy.fromiter(map(len, buffers), dtype=numpy.intp,
+                             count=len(buffers))
+    odd = lengths % 2
+    if odd.any():
+        buffers = [bytes(buf) + b'\x00' if len(buf) % 2 else buf
+                   for buf in buffers]
+    ends = numpy.cumsum((lengths + odd) // 2)
+    if not len(ends) or not ends[-1]:
+        return [0xffff] * len(buffers)
+    words = numpy.frombuffer(b''.join(buffers), dtype='>u2')
+    starts = ends - (lengths + odd) // 2
+    # reduceat() takes a single word for an empty buffer
+    sums = numpy.add.reduceat(words, numpy.minimum(starts, ends[-1] - 1),
+                              dtype=numpy.uint64)
+    sums[starts == ends] = 0
+    s = sums % 0xffff
+    s[(s == 0) & (sums != 0)] = 0xffff
+    return (~s.astype(numpy.uint16)).tolist()
 
 
 # avoid circular import
@@ -96,8 +171,7 @@ def checksum_ip(ipvx, length, payload):
     else:
         raise ValueError('Unknown IP version %d' % ipvx.version)
 
-    buf = header + payload
-    return checksum(buf)
+    return ~carry_around_add(_sum16(header), _sum16(payload)) & 0xffff
 
 
 _MODX = 4102
@@ -16,6 +16,8 @@
 """
 Parsing libpcap and reading/writing PCAP file.
 Reference source: http://wiki.wireshark.org/Development/LibpcapFileFormat
+IndexedReader also reads pcapng files.
+Reference source: https://github.com/pcapng/pcapng
 
 
                   Libpcap File Format
@@ -37,10 +39,20 @@ Reference source: http://wiki.wireshark.org/Development/LibpcapFileFormat
                 +---------------------+
 """
 
+import array
+import io
+import mmap
 import struct
 import sys
 import time
 
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
 
 class PcapFileHdr(object):
     """
@@ -82,6 +94,9 @@ class PcapFileHdr(object):
     # the byte ordering.
     MAGIC_NUMBER_IDENTICAL = b'\xa1\xb2\xc3\xd4'  # Big Endian
     MAGIC_NUMBER_SWAPPED = b'\xd4\xc3\xb2\xa1'    # Little Endian
+    # Timestamps in nanoseconds instead of microseconds
+    MAGIC_NUMBER_IDENTICAL_NSEC = b'\xa1\xb2\x3c\x4d'  # Big Endian
+    MAGIC_NUMBER_SWAPPED_NSEC = b'\x4d\x3c\xb2\xa1'    # Little Endian
 
     def __init__(self, magic=MAGIC_NUMBER_SWAPPED, version_major=2,
                  version_minor=4, thiszone=0, sigfigs=0, snaplen=0,
@@ -97,11 +112,13 @@ class PcapFileHdr(object):
     @classmethod
     def parser(cls, buf):
         magic_buf = buf[:4]
-        if magic_buf == cls.MAGIC_NUMBER_IDENTICAL:
+        if magic_buf in (cls.MAGIC_NUMBER_IDENTICAL,
+                         cls.MAGIC_NUMBER_IDENTICAL_NSEC):
             # Big Endian
             fmt = cls._FILE_HDR_FMT_BIG_ENDIAN
             byteorder = 'big'
-        elif magic_buf == cls.MAGIC_NUMBER_SWAPPED:
+        elif magic_buf in (cls.MAGIC_NUMBER_SWAPPED,
+                           cls.MAGIC_NUMBER_SWAPPED_NSEC):
             # Little Endian
             fmt = cls._FILE_HDR_FMT_LITTLE_ENDIAN
             byteorder = 'little'
@@ -110,6 +127,16 @@ class PcapFileHdr(object):
 
         return cls(*struct.unpack_from(fmt, buf)), byteorder
 
+    @property
+    def ts_scale(self):
+        """
+        Number of the fractional timestamp units in a second.
+        """
+        if self.magic in (self.MAGIC_NUMBER_IDENTICAL_NSEC,
+                          self.MAGIC_NUMBER_SWAPPED_NSEC):
+            return 1e9
+        return 1e6
+
     def serialize(self):
         if sys.byteorder == 'big':
             # Big Endian
@@ -220,9 +247,13 @@ class Reader(object):
         buf = self._fp.read(PcapFileHdr.FILE_HDR_SIZE)
         # Read only pcap file header
         self.pcap_header, self._file_byteorder = PcapFileHdr.parser(buf)
+        self._ts_scale = self.pcap_header.ts_scale
         # Read pcap data with out header
         self._pcap_body = self._fp.read()
         self._fp.close()
+        # Parse the records in place instead of copying the rest of
+        # the body for each record.
+        self._pcap_body_view = memoryview(self._pcap_body)
         self._next_pos = 0
 
     def __iter__(self):
@@ -231,18 +262,277 @@ class Reader(object):
     def next(self):
         try:
             pkt_hdr, pkt_data = PcapPktHdr.parser(
-                self._pcap_body[self._next_pos:], self._file_byteorder)
+                self._pcap_body_view[self._next_pos:], self._file_byteorder)
             self._next_pos += pkt_hdr.incl_len + PcapPktHdr.PKT_HDR_SIZE
 
         except IndexError:
             raise StopIteration()
 
-        return pkt_hdr.ts_sec + (pkt_hdr.ts_usec / 1e6), pkt_data
+        return (pkt_hdr.ts_sec + (pkt_hdr.ts_usec / self._ts_scale),
+                pkt_data.tobytes())
 
     # for Python 3 compatible
     __next__ = next
 
 
+_ETH_ADDR_ZERO = b'\x00' * 6
+_ETH_TYPE = struct.Struct('!H')
+# pkttype, hatype, halen, address, protocol
+_LINUX_SLL = struct.Struct('!HHH8sH')
+# protocol, reserved, ifindex, hatype, pkttype, halen, address
+_LINUX_SLL2 = struct.Struct('!H2x4xHBB8s')
+
+
+def _linux_sll_to_ethernet(buf, hdr):
+    if len(buf) < hdr.size:
+        return buf
+    if hdr is _LINUX_SLL:
+        _pkttype, _hatype, halen, addr, proto = hdr.unpack_from(buf)
+    else:
+        proto, _hatype, _pkttype, halen, addr = hdr.unpack_from(buf)
+    src = addr[:6] if halen == 6 else _ETH_ADDR_ZERO
+    return _ETH_ADDR_ZERO + src + _ETH_TYPE.pack(proto) + buf[hdr.size:]
+
+
+def _raw_to_ethernet(buf):
+    version = buf[0] >> 4 if buf else None
+    if version == 4:
+        ethertype = 0x0800
+    elif version == 6:
+        ethertype = 0x86dd
+    else:
+        return buf
+    return _ETH_ADDR_ZERO * 2 + _ETH_TYPE.pack(ethertype) + buf
+
+
+def to_ethernet(linktype, buf):
+    """
+    Returns the given packet data of the given data link type as an
+    Ethernet frame.
+
+    Linux cooked captures (LINKTYPE_LINUX_SLL and LINKTYPE_LINUX_SLL2,
+    e.g. of "tcpdump -i any") and raw IP packets (LINKTYPE_RAW,
+    LINKTYPE_IPV4 and LINKTYPE_IPV6) get an Ethernet header whose
+    destination is 00:00:00:00:00:00 and whose source is the link-layer
+    address of the capture, if any.
+    The data of the other types is returned as it is.
+    """
+    if linktype == LINKTYPE_LINUX_SLL2:
+        return _linux_sll_to_ethernet(buf, _LINUX_SLL2)
+    elif linktype == LINKTYPE_LINUX_SLL:
+        return _linux_sll_to_ethernet(buf, _LINUX_SLL)
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        return _raw_to_ethernet(buf)
+    return buf
+
+
+class IndexedReader(object):
+    """
+    Indexed PCAP and pcapng file reader
+
+    The file is memory-mapped, if possible, and indexed once.  The
+    records are then read without copying the rest of the file, randomly
+    or in batches.
+
+    ================ ===================================================
+    Argument         Description
+    ================ ===================================================
+    file_obj         File object which reading PCAP or pcapng file
+                     in binary mode
+    match            Function which takes the packet data and returns
+                     whether to index the record, e.g. the function
+                     returned by ryu.lib.packet.flow_key.match()
+    ethernet         If True, converts the packet data to Ethernet
+                     frames with to_ethernet()
+    ================ ===================================================
+
+    The filter is applied while indexing, so only the matching records
+    are counted and read.
+    Of pcapng files, the Enhanced Packet Blocks are read; the timestamps
+    follow the resolution and offset of their interfaces.
+
+    Example of usage::
+
+        from ryu.lib import pcaplib
+        from ryu.lib.packet import flow_key
+
+        reader = pcaplib.IndexedReader(
+            open('voip.pcap', 'rb'), ethernet=True,
+            match=flow_key.match(ip_proto=17, dst_port=5060))
+        print("%d SIP packets" % len(reader))
+        for batch in reader.batches(1000):
+            for ts, buf in batch:
+                key = flow_key.extract(buf)
+                ...
+    """
+
+    _PCAPNG_SHB = 0x0a0d0d0a  # Section Header Block
+    _PCAPNG_IDB = 0x00000001  # Interface Description Block
+    _PCAPNG_EPB = 0x00000006  # Enhanced Packet Block
+    _PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+    _PCAPNG_OPT_IF_TSRESOL = 9
+    _PCAPNG_OPT_IF_TSOFFSET = 14
+
+    def __init__(self, file_obj, match=None, ethernet=False):
+        try:
+            self._buf = mmap.mmap(file_obj.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except (AttributeError, io.UnsupportedOperation, ValueError,
+                EnvironmentError):
+            # not a regular file, or an empty one
+            self._buf = file_obj.read()
+        file_obj.close()
+        self._ethernet = ethernet
+        self.pcap_header = None
+        self._offsets = array.array('Q')
+        self._lengths = array.array('I')
+        self._timestamps = array.array('d')
+        self._linktypes = array.array('H')
+        if self._buf[:4] == struct.pack('!I', self._PCAPNG_SHB):
+            self._index_pcapng(match)
+        else:
+            self._index_pcap(match)
+
+    def _data(self, offset, length, linktype):
+        data = self._buf[offset:offset + length]
+        if self._ethernet:
+            return to_ethernet(linktype, data)
+        return data
+
+    def _add(self, offset, length, ts, linktype, match):
+        if match is None or match(self._data(offset, length, linktype)):
+            self._offsets.append(offset)
+            self._lengths.append(length)
+            self._timestamps.append(ts)
+            self._linktypes.append(linktype)
+
+    def _index_pcap(self, match):
+        buf = self._buf
+        self.pcap_header, byteorder = PcapFileHdr.parser(
+            buf[:PcapFileHdr.FILE_HDR_SIZE])
+        ts_scale = self.pcap_header.ts_scale
+        linktype = self.pcap_header.network & 0xffff
+        if byteorder == 'big':
+            pkt_hdr = struct.Struct(PcapPktHdr._PKT_HDR_FMT_BIG_ENDIAN)
+        else:
+            pkt_hdr = struct.Struct(PcapPktHdr._PKT_HDR_FMT_LITTLE_ENDIAN)
+        end = len(buf)
+        pos = PcapFileHdr.FILE_HDR_SIZE
+        while pos + pkt_hdr.size <= end:
+            ts_sec, ts_frac, incl_len, _orig_len = pkt_hdr.unpack_from(
+                buf, pos)
+            pos += pkt_hdr.size
+            if pos + incl_len > end:
+                # truncated record
+                break
+            self._add(pos, incl_len, ts_sec + ts_frac / ts_scale,
+                      linktype, match)
+            pos += incl_len
+
+    def _pcapng_interface(self, fmt, start, end):
+        # Returns (linktype, timestamp divisor, timestamp offset)
+        buf = self._buf
+        (linktype, ) = struct.unpack_from(fmt + 'H', buf, start)
+        divisor = 1e6
+        offset = 0
+        pos = start + 8
+        while pos + 4 <= end:
+            code, length = struct.unpack_from(fmt + 'HH', buf, pos)
+            if code == 0:
+                # opt_endofopt
+                break
+            if code == self._PCAPNG_OPT_IF_TSRESOL and length >= 1:
+                resol = bytearray(buf[pos + 4:pos + 5])[0]
+                if resol & 0x80:
+                    divisor = float(2 ** (resol & 0x7f))
+                else:
+                    divisor = float(10 ** resol)
+            elif code == self._PCAPNG_OPT_IF_TSOFFSET and length >= 8:
+                (offset, ) = struct.unpack_from(fmt + 'q', buf, pos + 4)
+            pos += 4 + ((length + 3) & ~3)
+        return linktype, divisor, offset
+
+    def _index_pcapng(self, match):
+        buf = self._buf
+        end = len(buf)
+        fmt = '<'
+        interfaces = []
+        pos = 0
+        while pos + 12 <= end:
+            # The type of Section Header Block is a palindrome.
+            (block_type, ) = struct.unpack_from(fmt + 'I', buf, pos)
+            if block_type == self._PCAPNG_SHB:
+                for fmt in ('<', '>'):
+                    (magic, ) = struct.unpack_from(fmt + 'I', buf, pos + 8)
+                    if magic == self._PCAPNG_BYTE_ORDER_MAGIC:
+                        break
+                else:
+                    raise struct.error('Invalid byte ordered pcapng file.')
+                interfaces = []
+            (block_len, ) = struct.unpack_from(fmt + 'I', buf, pos + 4)
+            if block_len < 12 or pos + block_len > end:
+                # truncated block
+                break
+            body = pos + 8
+            body_end = pos + block_len - 4
+            if block_type == self._PCAPNG_IDB:
+                interfaces.append(
+                    self._pcapng_interface(fmt, body, body_end))
+            elif block_type == self._PCAPNG_EPB:
+                (if_id, ts_high, ts_low,
+                 cap_len) = struct.unpack_from(fmt + 'IIII', buf, body)
+                if if_id >= len(interfaces):
+                    raise struct.error('Invalid interface ID %d' % if_id)
+                linktype, divisor, offset = interfaces[if_id]
+                data = body + 20
+                self._add(data, min(cap_len, body_end - data),
+                          ((ts_high << 32) | ts_low) / divisor + offset,
+                          linktype, match)
+            pos += block_len
+
+    def close(self):
+        """
+        Unmaps the file.
+        """
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return (self._timestamps[index],
+                self._data(self._offsets[index], self._lengths[index],
+                           self._linktypes[index]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def linktype(self, index):
+        """
+        Returns the data link type of the given record as it is in the
+        file, even if the data is converted to an Ethernet frame.
+        """
+        return self._linktypes[index]
+
+    def length(self, index):
+        """
+        Returns the captured length of the given record as it is in the
+        file, even if the data is converted to an Ethernet frame.
+        """
+        return self._lengths[index]
+
+    def batches(self, size):
+        """
+        Iterates lists of up to the given number of (timestamp, data).
+        """
+        for start in range(0, len(self), size):
+            yield self[start:start + size]
+
+
 class Writer(object):
     """
     PCAP file writer
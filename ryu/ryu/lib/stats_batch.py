@@ -0,0 +1,291 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar decoding of OpenFlow 1.3 flow and port statistics.
+
+Applications which poll the statistics of many flows usually read only a
+few numeric fields of each entry.  After enable() the bodies of
+OFPFlowStatsReply and OFPPortStatsReply from the datapath are decoded
+into NumPy structured arrays, one record per entry, instead of lists of
+OFPFlowStats and OFPPortStats::
+
+    from ryu.lib import stats_batch
+
+    @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
+    def switch_features_handler(self, ev):
+        stats_batch.enable(ev.msg.datapath)
+
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)
+    def flow_stats_reply_handler(self, ev):
+        batch = ev.msg.body  # FlowStatsBatch
+        rates = stats_batch.flow_rates(self.last_batch, batch)
+        self.last_batch = batch
+
+The match of a flow entry is not decoded for every reply.  The flows,
+i.e. (table_id, priority, match) triples, are interned per datapath and
+each record carries flow_id, the index into FlowStatsDecoder.flows.
+Flow ids are stable across replies, so per-flow deltas between two polls
+are computed without a Python loop over the entries.
+Instructions are not decoded.
+
+NumPy is an optional dependency, only required by this module.
+"""
+
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+
+
+# ofp_flow_stats up to and excluding the match (OFP_FLOW_STATS_0_PACK_STR)
+_FLOW_STATS_0_WIRE = [
+    ('length', '>u2'),
+    ('table_id', 'u1'),
+    ('_pad1', 'V1'),
+    ('duration_sec', '>u4'),
+    ('duration_nsec', '>u4'),
+    ('priority', '>u2'),
+    ('idle_timeout', '>u2'),
+    ('hard_timeout', '>u2'),
+    ('flags', '>u2'),
+    ('_pad2', 'V4'),
+    ('cookie', '>u8'),
+    ('packet_count', '>u8'),
+    ('byte_count', '>u8'),
+]
+
+# ofp_port_stats (OFP_PORT_STATS_PACK_STR)
+_PORT_STATS_WIRE = (
+    [('port_no', '>u4'), ('_pad1', 'V4')] +
+    [(name, '>u8')
+     for name in ofproto_v1_3_parser.OFPPortStats._fields[1:-2]] +
+    [('duration_sec', '>u4'), ('duration_nsec', '>u4')])
+
+# length, table_id, priority of ofp_flow_stats and type, length of ofp_match
+_FLOW_KEY = struct.Struct('!HBx8xH34xHH')
+assert _FLOW_KEY.size == ofproto_v1_3.OFP_FLOW_STATS_0_SIZE + 4
+
+
+def _native(wire):
+    return [(name, fmt.replace('>', '=')) for name, fmt in wire
+            if not name.startswith('_')]
+
+
+if numpy is not None:
+    FLOW_STATS_WIRE_DTYPE = numpy.dtype(_FLOW_STATS_0_WIRE)
+    assert (FLOW_STATS_WIRE_DTYPE.itemsize ==
+            ofproto_v1_3.OFP_FLOW_STATS_0_SIZE)
+    FLOW_STATS_DTYPE = numpy.dtype(
+        _native(_FLOW_STATS_0_WIRE[1:]) + [('flow_id', '=i4')])
+    PORT_STATS_WIRE_DTYPE = numpy.dtype(_PORT_STATS_WIRE)
+    assert PORT_STATS_WIRE_DTYPE.itemsize == ofproto_v1_3.OFP_PORT_STATS_SIZE
+    PORT_STATS_DTYPE = numpy.dtype(_native(_PORT_STATS_WIRE))
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError('NumPy is required for columnar statistics')
+
+
+def _to_native(wire_records, dtype):
+    records = numpy.empty(len(wire_records), dtype=dtype)
+    for name in wire_records.dtype.names:
+        if name in dtype.names:
+            records[name] = wire_records[name]
+    return records
+
+
+class FlowStatsBatch(object):
+    """
+    The body of an OFPFlowStatsReply decoded by FlowStatsDecoder.
+
+    ========== =========================================================
+    Attribute  Description
+    ========== =========================================================
+    records    NumPy structured array of FLOW_STATS_DTYPE, one record
+               per flow entry: table_id, duration_sec, duration_nsec,
+               priority, idle_timeout, hard_timeout, flags, cookie,
+               packet_count, byte_count and flow_id
+    flows      List of (table_id, priority, OFPMatch) indexed by
+               flow_id; shared with the decoder
+    ========== =========================================================
+    """
+
+    def __init__(self, records, flows):
+        self.records = records
+        self.flows = flows
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, name):
+        return self.records[name]
+
+    def match(self, i):
+        """
+        Returns the OFPMatch of the i-th record.
+        """
+        return self.flows[self.records['flow_id'][i]][2]
+
+    def match_column(self, field, default=None):
+        """
+        Returns an object array of the value of the given match field
+        of each record, or default if the match does not have it.
+        """
+        values = numpy.empty(len(self.flows), dtype=object)
+        for i, (_table_id, _priority, match) in enumerate(self.flows):
+            values[i] = match.get(field, default)
+        return values[self.records['flow_id']]
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+        Joins the batches of the replies of a multipart sequence.
+        """
+        assert batches
+        flows = batches[0].flows
+        assert all(b.flows is flows for b in batches)
+        return cls(numpy.concatenate([b.records for b in batches]), flows)
+
+
+class FlowStatsDecoder(object):
+    """
+    Decodes bodies of OFPFlowStatsReply into FlowStatsBatch.
+
+    A decoder interns the flows of the replies it decodes.  Use one
+    decoder per datapath and clear() it if the flow table churns a lot,
+    since the interned flows are never released otherwise.
+    """
+
+    def __init__(self):
+        _check_numpy()
+        self.flows = []
+        self._flow_ids = {}
+
+    def clear(self):
+        self.flows = []
+        self._flow_ids = {}
+
+    def __call__(self, buf, offset, msg_len):
+        flows = self.flows
+        flow_ids = self._flow_ids
+        unpack_from = _FLOW_KEY.unpack_from
+        match_parser = ofproto_v1_3_parser.OFPMatch.parser
+        headers = []
+        ids = []
+        while offset < msg_len:
+            (length, table_id, priority,
+             _match_type, match_len) = unpack_from(buf, offset)
+            if length < _FLOW_KEY.size:
+                raise struct.error(
+                    'Bad ofp_flow_stats length %d at offset %d'
+                    % (length, offset))
+            match_offset = offset + ofproto_v1_3.OFP_FLOW_STATS_0_SIZE
+            key = (table_id, priority,
+                   bytes(buf[match_offset:match_offset + match_len]))
+            flow_id = flow_ids.get(key)
+            if flow_id is None:
+                flow_id = flow_ids[key] = len(flows)
+                flows.append((table_id, priority,
+                              match_parser(buf, match_offset)))
+            headers.append(buf[offset:match_offset])
+            ids.append(flow_id)
+            offset += length
+
+        wire_records = numpy.frombuffer(b''.join(headers),
+                                        dtype=FLOW_STATS_WIRE_DTYPE)
+        records = _to_native(wire_records, FLOW_STATS_DTYPE)
+        records['flow_id'] = ids
+        return FlowStatsBatch(records, flows)
+
+
+def decode_port_stats(buf, offset, msg_len):
+    """
+    Decodes the body of an OFPPortStatsReply into a NumPy structured
+    array of PORT_STATS_DTYPE with the fields of OFPPortStats.
+    """
+    _check_numpy()
+    count = (msg_len - offset) // ofproto_v1_3.OFP_PORT_STATS_SIZE
+    wire_records = numpy.frombuffer(buf, dtype=PORT_STATS_WIRE_DTYPE,
+                                    count=count, offset=offset)
+    return _to_native(wire_records, PORT_STATS_DTYPE)
+
+
+def _duration(records):
+    return records['duration_sec'] + records['duration_nsec'] * 1e-9
+
+
+def flow_rates(prev, cur):
+    """
+    Computes per-flow deltas between two FlowStatsBatch of the same
+    decoder.
+
+    Returns a NumPy structured array with the fields flow_id, elapsed
+    (seconds between the two samples by the flow durations),
+    packet_delta, byte_delta, packet_rate and byte_rate (per second),
+    one record for each flow which is in both batches and whose
+    duration increased.  Counters which went backwards (e.g. a flow
+    re-installed in between) give zero deltas.
+    """
+    assert prev.flows is cur.flows
+    pos = numpy.full(len(cur.flows), -1, dtype=numpy.intp)
+    pos[prev.records['flow_id']] = numpy.arange(len(prev.records))
+    idx = pos[cur.records['flow_id']]
+    c = cur.records[idx >= 0]
+    p = prev.records[idx[idx >= 0]]
+
+    elapsed = _duration(c) - _duration(p)
+    valid = elapsed > 0
+    c = c[valid]
+    p = p[valid]
+    elapsed = elapsed[valid]
+
+    rates = numpy.empty(len(c), dtype=[
+        ('flow_id', '=i4'), ('elapsed', '=f8'),
+        ('packet_delta', '=u8'), ('byte_delta', '=u8'),
+        ('packet_rate', '=f8'), ('byte_rate', '=f8')])
+    rates['flow_id'] = c['flow_id']
+    rates['elapsed'] = elapsed
+    for name in ('packet', 'byte'):
+        count = name + '_count'
+        delta = numpy.where(c[count] >= p[count], c[count] - p[count], 0)
+        rates[name + '_delta'] = delta
+        rates[name + '_rate'] = delta / elapsed
+    return rates
+
+
+def enable(datapath):
+    """
+    Makes the OFPFlowStatsReply and OFPPortStatsReply from the given
+    datapath carry a FlowStatsBatch and a structured array as body.
+    """
+    _check_numpy()
+    if datapath.ofproto.OFP_VERSION != ofproto_v1_3.OFP_VERSION:
+        raise ValueError('Columnar statistics require OpenFlow 1.3')
+    datapath.stats_body_decoders[ofproto_v1_3.OFPMP_FLOW] = (
+        FlowStatsDecoder())
+    datapath.stats_body_decoders[ofproto_v1_3.OFPMP_PORT_STATS] = (
+        decode_port_stats)
+
+
+def disable(datapath):
+    datapath.stats_body_decoders.pop(ofproto_v1_3.OFPMP_FLOW, None)
+    datapath.stats_body_decoders.pop(ofproto_v1_3.OFPMP_PORT_STATS, None)
@@ -38,7 +38,7 @@ import six
 # 'len', 'property', 'set', 'type'
 # A bit more generic way is adopted
 
-_RESERVED_KEYWORD = dir(six.moves.builtins)
+_RESERVED_KEYWORD = frozenset(dir(six.moves.builtins))
 
 _mapdict = lambda f, d: dict([(k, f(v)) for k, v in d.items()])
 _mapdict_key = lambda f, d: dict([(f(k), v) for k, v in d.items()])
@@ -111,6 +111,55 @@ _types = {
     'nx-flow-spec-field': NXFlowSpecFieldType,  # XXX this should not be here
 }
 
+# Values which the default encoder and decoder pass through as they are.
+# Exact types only; e.g. an IntEnum might have to_jsondict().
+_JSON_SCALAR_TYPES = frozenset(
+    list(six.integer_types) + [float, bool, type(None)])
+
+# class -> (_TYPE, number of attributes in _TYPE, {attribute: TypeDescr})
+_class_types = {}
+_NO_TYPES = {}
+
+# class -> (default encoding?, default decoding?)
+_class_codecs = {}
+
+
+def _get_types(cls):
+    # The inverse of cls._TYPE, built once per class.  _TYPE is seldom
+    # changed at runtime, but NXActionRegLoad2 appends to it; the
+    # number of attributes catches that.
+    _TYPE = getattr(cls, '_TYPE', None) or _NO_TYPES
+    num_attrs = sum(len(attrs) for attrs in _TYPE.values())
+    cached = _class_types.get(cls)
+    if (cached is not None and cached[0] is _TYPE and
+            cached[1] == num_attrs):
+        return cached[2]
+    types = {}
+    for t, attrs in _TYPE.items():
+        for k in attrs:
+            types.setdefault(k, _types[t])
+    _class_types[cls] = (_TYPE, num_attrs, types)
+    return types
+
+
+def _get_codec(cls):
+    # Whether cls leaves the per-attribute encoding and decoding of
+    # to_jsondict() and from_jsondict() to StringifyMixin, so that
+    # those can use _get_types() and one default encoder or decoder
+    # for all attributes.
+    codec = _class_codecs.get(cls)
+    if codec is None:
+        def default(*names):
+            return all(getattr(cls, name).__func__ is
+                       getattr(StringifyMixin, name).__func__
+                       for name in names)
+        codec = _class_codecs[cls] = (
+            default('_get_type', '_get_encoder', '_encode_value',
+                    '_get_default_encoder'),
+            default('_get_type', '_get_decoder', '_decode_value',
+                    '_get_default_decoder'))
+    return codec
+
 
 class StringifyMixin(object):
 
@@ -187,11 +236,7 @@ class StringifyMixin(object):
 
     @classmethod
     def _get_type(cls, k):
-        if hasattr(cls, '_TYPE'):
-            for t, attrs in cls._TYPE.items():
-                if k in attrs:
-                    return _types[t]
-        return None
+        return _get_types(cls).get(k)
 
     @classmethod
     def _get_encoder(cls, k, encode_string):
@@ -207,7 +252,9 @@ class StringifyMixin(object):
     @classmethod
     def _get_default_encoder(cls, encode_string):
         def _encode(v):
-            if isinstance(v, (bytes, six.text_type)):
+            if v.__class__ in _JSON_SCALAR_TYPES:
+                json_value = v
+            elif isinstance(v, (bytes, six.text_type)):
                 if isinstance(v, six.text_type):
                     v = v.encode('utf-8')
                 json_value = encode_string(v)
@@ -259,10 +306,17 @@ class StringifyMixin(object):
         =============  =====================================================
         """
         dict_ = {}
-        encode = lambda key, val: self._encode_value(key, val, encode_string)
-        for k, v in obj_attrs(self):
-            dict_[k] = encode(k, v)
-        return {self.__class__.__name__: dict_}
+        cls = self.__class__
+        if _get_codec(cls)[0]:
+            types = _get_types(cls)
+            default = cls._get_default_encoder(encode_string)
+            for k, v in obj_attrs(self):
+                t = types.get(k)
+                dict_[k] = t.encode(v) if t else default(v)
+        else:
+            for k, v in obj_attrs(self):
+                dict_[k] = self._encode_value(k, v, encode_string)
+        return {cls.__name__: dict_}
 
     @classmethod
     def cls_from_jsondict_key(cls, k):
@@ -295,7 +349,9 @@ class StringifyMixin(object):
     @classmethod
     def _get_default_decoder(cls, decode_string):
         def _decode(json_value, **additional_args):
-            if isinstance(json_value, (bytes, six.text_type)):
+            if json_value.__class__ in _JSON_SCALAR_TYPES:
+                v = json_value
+            elif isinstance(json_value, (bytes, six.text_type)):
                 v = decode_string(json_value)
             elif isinstance(json_value, list):
                 v = [_decode(jv) for jv in json_value]
@@ -348,9 +404,20 @@ class StringifyMixin(object):
         additional_args (Optional) Additional kwargs for constructor.
         =============== =====================================================
         """
-        decode = lambda k, x: cls._decode_value(k, x, decode_string,
-                                                **additional_args)
-        kwargs = cls._restore_args(_mapdict_kv(decode, dict_))
+        if _get_codec(cls)[1]:
+            types = _get_types(cls)
+            default = cls._get_default_decoder(decode_string)
+            kwargs = {}
+            for k, v in dict_.items():
+                t = types.get(k)
+                v = t.decode(v) if t else default(v)
+                if k in _RESERVED_KEYWORD:
+                    k += '_'
+                kwargs[k] = v
+        else:
+            decode = lambda k, x: cls._decode_value(k, x, decode_string,
+                                                    **additional_args)
+            kwargs = cls._restore_args(_mapdict_kv(decode, dict_))
         try:
             return cls(**dict(kwargs, **additional_args))
         except TypeError:
@@ -378,6 +445,26 @@ def obj_python_attrs(msg_):
         return
     base = getattr(msg_, '_base_attributes', [])
     opt = getattr(msg_, '_opt_attributes', [])
+    cls = msg_.__class__
+    dict_ = getattr(msg_, '__dict__', None)
+    if dict_ is not None and cls.__dir__ is object.__dir__:
+        # The same as below without inspect.getmembers(), which looks
+        # up every attribute of the class.  Only instance attributes
+        # and _opt_attributes can pass the filter.
+        for k in sorted(set(dict_).union(opt)):
+            if k in opt:
+                try:
+                    v = getattr(msg_, k)
+                except AttributeError:
+                    continue
+            elif k.startswith('_'):
+                continue
+            else:
+                v = dict_[k]
+                if callable(v) or k in base or hasattr(cls, k):
+                    continue
+            yield (k, v)
+        return
     for k, v in inspect.getmembers(msg_):
         if k in opt:
             pass
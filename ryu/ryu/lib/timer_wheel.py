@@ -0,0 +1,158 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Hashed timer wheel.
+
+A TimerWheel keeps keys with deadlines in slots of a fixed time
+granularity, the tick.  Scheduling and cancelling a key are O(1) and
+expire() only visits the slots of the ticks elapsed since the previous
+call, so periodic work over many objects, e.g. the LLDP sends of every
+port of a fabric, does not scan all of them::
+
+    wheel = timer_wheel.TimerWheel(tick=.05)
+    wheel.schedule(port, time.time() + 1)
+    ...
+    for port in wheel.expire(time.time()):
+        send(port)
+        wheel.schedule(port, time.time() + 1)
+
+Deadlines further than a revolution of the wheel stay in their slot
+until a later revolution.
+"""
+
+
+class TimerWheel(object):
+    """
+    Hashed timer wheel of hashable keys.
+
+    ========== ==========================================================
+    Argument   Description
+    ========== ==========================================================
+    tick       Granularity of the deadlines in seconds
+    num_slots  Number of the slots; a revolution is tick * num_slots
+    ========== ==========================================================
+    """
+
+    def __init__(self, tick, num_slots=256):
+        self.tick = tick
+        self._slots = [{} for _ in range(num_slots)]
+        self._deadlines = {}  # key -> (deadline, slot)
+        # tick number of the next slot to visit.  The slots before it
+        # are visited, once expire() is called.
+        self._cursor = None
+        self._expired = False
+
+    def _tick_no(self, t):
+        return int(t / self.tick)
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def deadline(self, key):
+        """
+        Returns the deadline of the given key, or None.
+        """
+        entry = self._deadlines.get(key)
+        return entry[0] if entry else None
+
+    def schedule(self, key, deadline):
+        """
+        Schedules the given key at the deadline, replacing its previous
+        deadline.  Deadlines in the past expire on the next expire().
+        """
+        self.cancel(key)
+        tick_no = self._tick_no(deadline)
+        if self._cursor is None:
+            self._cursor = tick_no
+        elif tick_no < self._cursor:
+            if self._expired:
+                tick_no = self._cursor
+            else:
+                self._cursor = tick_no
+        slot = self._slots[tick_no % len(self._slots)]
+        slot[key] = deadline
+        self._deadlines[key] = (deadline, slot)
+
+    def cancel(self, key):
+        """
+        Cancels the given key if it is scheduled.
+        """
+        entry = self._deadlines.pop(key, None)
+        if entry is not None:
+            del entry[1][key]
+
+    def clear(self):
+        for slot in self._slots:
+            slot.clear()
+        self._deadlines.clear()
+        self._cursor = None
+        self._expired = False
+
+    def expire(self, now, limit=None):
+        """
+        Removes and returns the list of keys whose deadline is not later
+        than now, in the order of their deadlines.
+
+        If limit is given, at most that many keys are returned and the
+        others are returned by the next calls.
+        """
+        expired = []
+        if self._cursor is None:
+            return expired
+        self._expired = True
+        num_slots = len(self._slots)
+        end = self._tick_no(now)
+        # visit each slot at most once
+        cursor = max(self._cursor, end - num_slots + 1)
+        while cursor <= end:
+            slot = self._slots[cursor % num_slots]
+            if slot:
+                due = sorted(((key, deadline) for key, deadline
+                              in slot.items() if deadline <= now),
+                             key=lambda item: item[1])
+                if limit is not None and len(expired) + len(due) > limit:
+                    due = due[:limit - len(expired)]
+                for key, _deadline in due:
+                    del slot[key]
+                    del self._deadlines[key]
+                    expired.append(key)
+                if limit is not None and len(expired) >= limit:
+                    break
+            cursor += 1
+        self._cursor = min(cursor, end)
+        return expired
+
+    def timeout(self, now):
+        """
+        Returns the seconds until the earliest deadline, or None if no key
+        is scheduled.
+        """
+        if not self._deadlines:
+            return None
+        num_slots = len(self._slots)
+        start = self._cursor
+        for tick_no in range(start, start + num_slots):
+            slot = self._slots[tick_no % num_slots]
+            if slot:
+                deadline = min(slot.values())
+                # not a key of a later revolution
+                if deadline < (tick_no + 1) * self.tick:
+                    return max(0, deadline - now)
+        return max(0, min(deadline for deadline, _slot
+                          in self._deadlines.values()) - now)
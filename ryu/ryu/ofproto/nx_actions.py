@@ -224,7 +224,10 @@ def generate(ofp_name, ofpp_name):
                           buf,
                           offset + ofp.OFP_ACTION_EXPERIMENTER_HEADER_SIZE,
                           self.subtype)
-            buf += data
+            # Written at the offset rather than appended, since buf may
+            # be preallocated beyond the end of this action.
+            msg_pack_into('!%ds' % (self.len - payload_offset), buf,
+                          offset + payload_offset, bytes(data))
 
         @classmethod
         def register(cls, subtype_cls):
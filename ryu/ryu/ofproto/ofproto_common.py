@@ -20,6 +20,8 @@ from struct import calcsize
 OFP_HEADER_PACK_STR = '!BBHI'
 OFP_HEADER_SIZE = 8
 assert calcsize(OFP_HEADER_PACK_STR) == OFP_HEADER_SIZE
+# The length field of the header is 16 bits wide.
+OFP_MAX_MSG_LEN = 0xffff
 
 # Note: IANA assigned port number for OpenFlow is 6653
 # from OpenFlow 1.3.3 (EXT-133).
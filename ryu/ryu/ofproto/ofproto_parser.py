@@ -21,6 +21,7 @@ import collections
 import logging
 import struct
 import functools
+import re
 
 from ryu import exception
 from ryu import utils
@@ -35,11 +36,10 @@ if six.PY3:
     buffer = bytes
 
 
-def header(buf):
-    assert len(buf) >= ofproto_common.OFP_HEADER_SIZE
+def header(buf, offset=0):
+    assert len(buf) - offset >= ofproto_common.OFP_HEADER_SIZE
     # LOG.debug('len %d bufsize %d', len(buf), ofproto.OFP_HEADER_SIZE)
-    return struct.unpack_from(ofproto_common.OFP_HEADER_PACK_STR,
-                              six.binary_type(buf))
+    return struct.unpack_from(ofproto_common.OFP_HEADER_PACK_STR, buf, offset)
 
 
 _MSG_PARSERS = {}
@@ -63,6 +63,12 @@ def msg(datapath, version, msg_type, msg_len, xid, buf):
     if msg_parser is None:
         raise exception.OFPUnknownVersion(version=version)
 
+    # The caller may pass a memoryview over its receive buffer, which will
+    # be overwritten by subsequent messages.  Parsers keep slices of buf as
+    # message attributes, so take the only copy of the message here.
+    if isinstance(buf, memoryview):
+        buf = buf.tobytes()
+
     try:
         msg = msg_parser(datapath, version, msg_type, msg_len, xid, buf)
     except exception.OFPTruncatedMessage as e:
@@ -270,6 +276,11 @@ class MsgBase(StringifyMixin):
         self._serialize_body()
         self._serialize_header()
 
+    def _template_fields(self):
+        # Returns {name: [(pack_str, offset), ...]} of the fields which
+        # MsgTemplate can patch in the serialized message.
+        return {}
+
 
 class MsgInMsgBase(MsgBase):
     @classmethod
@@ -279,6 +290,120 @@ class MsgInMsgBase(MsgBase):
                                                   **additional_args)
 
 
+_PACK_STR_TOKEN = re.compile(r'(\d*)([xcbB?hHiIlLqQnNefdspP])')
+
+
+def pack_str_offsets(pack_str, names, offset=0):
+    """
+    Returns {name: [(pack_str, offset)]} of the fields of a struct
+    format, e.g. OFP_FLOW_MOD_PACK_STR0, placed at the given offset.
+    Padding bytes are skipped and the remaining fields are named in
+    order by names.
+    """
+    byte_order = pack_str[0] if pack_str[0] in '@=<>!' else '@'
+    fields = {}
+    names = iter(names)
+    prefix = byte_order
+    for count, code in _PACK_STR_TOKEN.findall(pack_str):
+        count = int(count) if count else 1
+        if code == 'x':
+            prefix += '%dx' % count
+            continue
+        if code in 'sp':
+            fmt = '%d%s' % (count, code)
+            count = 1
+        else:
+            fmt = code
+        for _ in range(count):
+            pos = (struct.calcsize(prefix + fmt) -
+                   struct.calcsize(byte_order + fmt))
+            fields[next(names)] = [(byte_order + fmt, offset + pos)]
+            prefix += fmt
+    return fields
+
+
+_HEADER_FIELDS = pack_str_offsets(ofproto_common.OFP_HEADER_PACK_STR,
+                                  ('version', 'msg_type', 'msg_len', 'xid'))
+
+
+class MsgTemplate(object):
+    """
+    A message serialized once, to be sent many times with a few fields
+    patched into the serialized bytes.
+
+    Building and serializing a message costs much more than copying
+    its bytes, which matters when the same flow-mod is pushed to many
+    switches or with only its output port changed::
+
+        tmpl = MsgTemplate(parser.OFPFlowMod(datapath, match=match,
+                                             instructions=inst))
+        datapath.send_msg(tmpl(output_port=2))
+        datapath.send_msg(tmpl(output_port=3, cookie=0x10))
+
+    The xid is always patched.  The other fields are those the message
+    class declares, e.g. for OpenFlow 1.3 OFPFlowMod the fields of
+    ofp_flow_mod up to the match, like cookie, priority and out_port,
+    and output_port, the port of every OFPActionOutput in its
+    instructions.  ValueError is raised for other fields.
+
+    The template keeps the datapath of the message; use a template per
+    datapath.
+    """
+
+    def __init__(self, msg):
+        msg.serialize()
+        self.datapath = msg.datapath
+        self.version = msg.version
+        self.cls_msg_type = msg.cls_msg_type
+        self.msg_name = msg.__class__.__name__
+        self.buf = bytes(msg.buf)
+        self.fields = msg._template_fields()
+
+    def render(self, xid=0, **values):
+        """
+        Returns the serialized message as a bytearray with the given
+        xid and field values.
+        """
+        buf = bytearray(self.buf)
+        (pack_str, offset), = _HEADER_FIELDS['xid']
+        struct.pack_into(pack_str, buf, offset, xid)
+        for name, value in values.items():
+            offsets = self.fields.get(name)
+            if offsets is None:
+                raise ValueError('%s of %s is not patchable'
+                                 % (name, self.msg_name))
+            for pack_str, offset in offsets:
+                struct.pack_into(pack_str, buf, offset, value)
+        return buf
+
+    def __call__(self, **values):
+        """
+        Returns a message to pass to Datapath.send_msg, which is
+        serialized by render() with its xid and the given values.
+        """
+        return TemplateMsg(self, values)
+
+
+class TemplateMsg(MsgBase):
+    """
+    A message created by MsgTemplate.
+    """
+
+    def __init__(self, template, values):
+        super(TemplateMsg, self).__init__(template.datapath)
+        self.template = template
+        self.values = values
+        self.cls_msg_type = template.cls_msg_type
+
+    def serialize(self):
+        if self.xid is None:
+            self.xid = 0
+        self.version = self.template.version
+        self.msg_type = self.cls_msg_type
+        self.buf = self.template.render(self.xid, **self.values)
+        self.msg_len = len(self.buf)
+
+
 def namedtuple(typename, fields, **kwargs):
     class _namedtuple(StringifyMixin,
                       collections.namedtuple(typename, fields, **kwargs)):
@@ -1620,8 +1620,7 @@ class OFPActionSetField(OFPAction):
     @classmethod
     def parser(cls, buf, offset):
         (type_, len_) = struct.unpack_from('!HH', buf, offset)
-        (n, value, mask, _len) = ofproto.oxm_parse(buf, offset + 4)
-        k, uv = ofproto.oxm_to_user(n, value, mask)
+        k, uv, _len = ofproto.oxm_parse_to_user(buf, offset + 4)
         action = cls(**{k: uv})
         action.len = len_
 
@@ -1635,8 +1634,8 @@ class OFPActionSetField(OFPAction):
         if self._composed_with_old_api():
             return self.serialize_old(buf, offset)
 
-        n, value, mask = ofproto.oxm_from_user(self.key, self.value)
-        len_ = ofproto.oxm_serialize(n, value, mask, buf, offset + 4)
+        len_ = ofproto.oxm_serialize_user(self.key, self.value, buf,
+                                          offset + 4)
         self.len = utils.round_up(4 + len_, 8)
         msg_pack_into('!HH', buf, offset, self.type, self.len)
         pad_len = self.len - (4 + len_)
@@ -3712,14 +3711,11 @@ class OFPMatch(StringifyMixin):
         if self._composed_with_old_api():
             return self.serialize_old(buf, offset)
 
-        fields = [ofproto.oxm_from_user(k, uv) for (k, uv)
-                  in self._fields2]
-
         hdr_pack_str = '!HH'
         field_offset = offset + struct.calcsize(hdr_pack_str)
-        for (n, value, mask) in fields:
-            field_offset += ofproto.oxm_serialize(n, value, mask, buf,
-                                                  field_offset)
+        for (k, uv) in self._fields2:
+            field_offset += ofproto.oxm_serialize_user(k, uv, buf,
+                                                       field_offset)
 
         length = field_offset - offset
         msg_pack_into(hdr_pack_str, buf, offset,
@@ -3957,8 +3953,7 @@ class OFPMatch(StringifyMixin):
 
         fields = []
         while length > 0:
-            n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-            k, uv = ofproto.oxm_to_user(n, value, mask)
+            k, uv, field_len = ofproto.oxm_parse_to_user(buf, offset)
             fields.append((k, uv))
             offset += field_len
             length -= field_len
@@ -63,6 +63,25 @@ LOG = logging.getLogger('ryu.ofproto.ofproto_v1_3_parser')
 
 _MSG_PARSERS = {}
 
+# OFPFlowMod and OFPPacketOut are serialized into a buffer of this size,
+# allocated at once and truncated to the message length at the end, rather
+# than into one grown field by field.  Longer messages still grow it.
+_SERIALIZE_BUF_SIZE = 512
+
+
+def _output_port_offsets(actions, offset):
+    # Offsets of the port of OFPActionOutput in serialized actions,
+    # for MsgTemplate.
+    port = ofproto_parser.pack_str_offsets(
+        ofproto.OFP_ACTION_OUTPUT_PACK_STR,
+        ('type', 'len', 'port', 'max_len'))['port']
+    offsets = []
+    for a in actions:
+        if isinstance(a, OFPActionOutput):
+            offsets.extend((pack_str, offset + pos) for pack_str, pos in port)
+        offset += a.len
+    return offsets
+
 
 def _set_msg_type(msg_type):
     def _set_cls_msg_type(cls):
@@ -1049,14 +1068,11 @@ class OFPMatch(StringifyMixin):
         if self._composed_with_old_api():
             return self.serialize_old(buf, offset)
 
-        fields = [ofproto.oxm_from_user(k, uv) for (k, uv)
-                  in self._fields2]
-
         hdr_pack_str = '!HH'
         field_offset = offset + struct.calcsize(hdr_pack_str)
-        for (n, value, mask) in fields:
-            field_offset += ofproto.oxm_serialize(n, value, mask, buf,
-                                                  field_offset)
+        for (k, uv) in self._fields2:
+            field_offset += ofproto.oxm_serialize_user(k, uv, buf,
+                                                       field_offset)
 
         length = field_offset - offset
         msg_pack_into(hdr_pack_str, buf, offset,
@@ -1328,8 +1344,7 @@ class OFPMatch(StringifyMixin):
         fields = []
         try:
             while length > 0:
-                n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-                k, uv = ofproto.oxm_to_user(n, value, mask)
+                k, uv, field_len = ofproto.oxm_parse_to_user(buf, offset)
                 fields.append((k, uv))
                 offset += field_len
                 length -= field_len
@@ -2595,6 +2610,10 @@ class OFPPacketOut(MsgBase):
         self.actions = actions
         self.data = data
 
+    def _serialize_pre(self):
+        super(OFPPacketOut, self)._serialize_pre()
+        self.buf = bytearray(_SERIALIZE_BUF_SIZE)
+
     def _serialize_body(self):
         self.actions_len = 0
         offset = ofproto.OFP_PACKET_OUT_SIZE
@@ -2607,14 +2626,26 @@ class OFPPacketOut(MsgBase):
             assert self.buffer_id == 0xffffffff
             if isinstance(self.data, packet.Packet):
                 self.data.serialize()
-                self.buf += self.data.data
+                self.buf[offset:] = self.data.data
             else:
-                self.buf += self.data
+                self.buf[offset:] = self.data
+        else:
+            del self.buf[offset:]
 
         msg_pack_into(ofproto.OFP_PACKET_OUT_PACK_STR,
                       self.buf, ofproto.OFP_HEADER_SIZE,
                       self.buffer_id, self.in_port, self.actions_len)
 
+    def _template_fields(self):
+        fields = ofproto_parser.pack_str_offsets(
+            ofproto.OFP_PACKET_OUT_PACK_STR,
+            ('buffer_id', 'in_port', 'actions_len'),
+            ofproto.OFP_HEADER_SIZE)
+        del fields['actions_len']
+        fields['output_port'] = _output_port_offsets(
+            self.actions, ofproto.OFP_PACKET_OUT_SIZE)
+        return fields
+
     @classmethod
     def from_jsondict(cls, dict_, decode_string=base64.b64decode,
                       **additional_args):
@@ -2729,6 +2760,10 @@ class OFPFlowMod(MsgBase):
             assert isinstance(i, OFPInstruction)
         self.instructions = instructions
 
+    def _serialize_pre(self):
+        super(OFPFlowMod, self)._serialize_pre()
+        self.buf = bytearray(_SERIALIZE_BUF_SIZE)
+
     def _serialize_body(self):
         msg_pack_into(ofproto.OFP_FLOW_MOD_PACK_STR0, self.buf,
                       ofproto.OFP_HEADER_SIZE,
@@ -2746,6 +2781,26 @@ class OFPFlowMod(MsgBase):
         for inst in self.instructions:
             inst.serialize(self.buf, offset)
             offset += inst.len
+        del self.buf[offset:]
+
+    def _template_fields(self):
+        fields = ofproto_parser.pack_str_offsets(
+            ofproto.OFP_FLOW_MOD_PACK_STR0,
+            ('cookie', 'cookie_mask', 'table_id', 'command', 'idle_timeout',
+             'hard_timeout', 'priority', 'buffer_id', 'out_port',
+             'out_group', 'flags'),
+            ofproto.OFP_HEADER_SIZE)
+        offset = (ofproto.OFP_FLOW_MOD_SIZE - ofproto.OFP_MATCH_SIZE +
+                  utils.round_up(self.match.length, 8))
+        output_port = []
+        for inst in self.instructions:
+            if isinstance(inst, OFPInstructionActions):
+                output_port.extend(_output_port_offsets(
+                    inst.actions,
+                    offset + ofproto.OFP_INSTRUCTION_ACTIONS_SIZE))
+            offset += inst.len
+        fields['output_port'] = output_port
+        return fields
 
     @classmethod
     def parser(cls, datapath, version, msg_type, msg_len, xid, buf):
@@ -3393,8 +3448,7 @@ class OFPActionSetField(OFPAction):
     def parser(cls, buf, offset):
         (type_, len_) = struct.unpack_from(
             ofproto.OFP_ACTION_SET_FIELD_PACK_STR, buf, offset)
-        (n, value, mask, _len) = ofproto.oxm_parse(buf, offset + 4)
-        k, uv = ofproto.oxm_to_user(n, value, mask)
+        k, uv, _len = ofproto.oxm_parse_to_user(buf, offset + 4)
         action = cls(**{k: uv})
         action.len = len_
 
@@ -3408,8 +3462,8 @@ class OFPActionSetField(OFPAction):
         if self._composed_with_old_api():
             return self.serialize_old(buf, offset)
 
-        n, value, mask = ofproto.oxm_from_user(self.key, self.value)
-        len_ = ofproto.oxm_serialize(n, value, mask, buf, offset + 4)
+        len_ = ofproto.oxm_serialize_user(self.key, self.value, buf,
+                                          offset + 4)
         self.len = utils.round_up(4 + len_, 8)
         msg_pack_into('!HH', buf, offset, self.type, self.len)
         pad_len = self.len - (4 + len_)
@@ -3940,7 +3994,12 @@ class OFPMultipartReply(MsgBase):
         msg.type = type_
         msg.flags = flags
 
-        if stats_type_cls is not None:
+        decoder = getattr(datapath, 'stats_body_decoders', {}).get(type_)
+        if decoder is not None:
+            # e.g. columnar decoding by ryu.lib.stats_batch
+            msg.body = decoder(msg.buf, ofproto.OFP_MULTIPART_REPLY_SIZE,
+                               msg_len)
+        elif stats_type_cls is not None:
             offset = ofproto.OFP_MULTIPART_REPLY_SIZE
             body = []
             while offset < msg_len:
@@ -783,8 +783,7 @@ class OFPMatch(StringifyMixin):
 
         fields = []
         while length > 0:
-            n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
-            k, uv = ofproto.oxm_to_user(n, value, mask)
+            k, uv, field_len = ofproto.oxm_parse_to_user(buf, offset)
             fields.append((k, uv))
             offset += field_len
             length -= field_len
@@ -797,14 +796,11 @@ class OFPMatch(StringifyMixin):
         the buf.
         Returns the output length.
         """
-        fields = [ofproto.oxm_from_user(k, uv) for (k, uv)
-                  in self._fields2]
-
         hdr_pack_str = '!HH'
         field_offset = offset + struct.calcsize(hdr_pack_str)
-        for (n, value, mask) in fields:
-            field_offset += ofproto.oxm_serialize(n, value, mask, buf,
-                                                  field_offset)
+        for (k, uv) in self._fields2:
+            field_offset += ofproto.oxm_serialize_user(k, uv, buf,
+                                                       field_offset)
 
         length = field_offset - offset
         msg_pack_into(hdr_pack_str, buf, offset, ofproto.OFPMT_OXM, length)
@@ -5925,15 +5921,14 @@ class OFPActionSetField(OFPAction):
     def parser(cls, buf, offset):
         (type_, len_) = struct.unpack_from(
             ofproto.OFP_ACTION_SET_FIELD_PACK_STR, buf, offset)
-        (n, value, mask, _len) = ofproto.oxm_parse(buf, offset + 4)
-        k, uv = ofproto.oxm_to_user(n, value, mask)
+        k, uv, _len = ofproto.oxm_parse_to_user(buf, offset + 4)
         action = cls(**{k: uv})
         action.len = len_
         return action
 
     def serialize(self, buf, offset):
-        n, value, mask = ofproto.oxm_from_user(self.key, self.value)
-        len_ = ofproto.oxm_serialize(n, value, mask, buf, offset + 4)
+        len_ = ofproto.oxm_serialize_user(self.key, self.value, buf,
+                                          offset + 4)
         self.len = utils.round_up(4 + len_, 8)
         msg_pack_into('!HH', buf, offset, self.type, self.len)
         pad_len = self.len - (4 + len_)
@@ -74,8 +74,12 @@ from ryu.ofproto.oxx_fields import (
     _normalize_user,
     _parse,
     _parse_header,
+    _make_decoders,
+    _make_encoders,
+    _parse_to_user,
     _serialize,
-    _serialize_header)
+    _serialize_header,
+    _serialize_user)
 from ryu.ofproto import ofproto_common
 
 
@@ -200,10 +204,20 @@ def generate(modname):
              functools.partial(_parse, mod))
     add_attr('oxm_parse_header',  # oxx is not required
              functools.partial(_parse_header, mod))
+    # Same as oxm_to_user(*oxm_parse(buf, offset)[:3]) plus the field
+    # length, but faster.
+    add_attr('oxm_parse_to_user',
+             functools.partial(_parse_to_user, oxx, mod, num_to_field,
+                               _make_decoders(num_to_field)))
     add_attr('oxm_serialize',
              functools.partial(_serialize, oxx, mod))
     add_attr('oxm_serialize_header',
              functools.partial(_serialize_header, oxx, mod))
+    # Same as oxm_serialize(*oxm_from_user(k, uv), buf, offset), but
+    # faster.
+    add_attr('oxm_serialize_user',
+             functools.partial(_serialize_user, oxx, mod, name_to_field,
+                               _make_encoders(name_to_field)))
 
     add_attr('oxm_to_jsondict', _to_jsondict)
     add_attr('oxm_from_jsondict', _from_jsondict)
@@ -24,6 +24,7 @@
 #   mask is None if no mask.
 
 import six
+import socket
 import struct
 
 from ryu.ofproto import ofproto_common
@@ -203,6 +204,91 @@ def _parse(mod, buf, offset):
     return oxx_type_num, value, mask, field_len
 
 
+# Decoding of OXM/OXS TLVs with a precompiled decoder per header word.
+#
+# The header word of a (non-experimenter) TLV determines the field, the
+# presence of the mask and the payload length, so the decoder for each
+# known header can be built in advance: one struct.Struct which unpacks
+# value and mask at once, and a conversion to the "user" representation.
+# The result is the same as _to_user(_parse()), which remains the path
+# for other headers, e.g. experimenter TLVs and malformed lengths.
+
+_HEADER = struct.Struct('!I')
+_INT_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+def _mac_to_user(v):
+    return '%02x:%02x:%02x:%02x:%02x:%02x' % struct.unpack('6B', v)
+
+
+def _ipv4_to_user(v):
+    return '%d.%d.%d.%d' % struct.unpack('4B', v)
+
+
+def _make_decoder(name, t, hasmask):
+    size = t.size
+    field_len = _HEADER.size + (size * 2 if hasmask else size)
+    int_fmt = (_INT_FORMATS.get(size)
+               if isinstance(t, type_desc.IntDescr) else None)
+    if int_fmt is not None:
+        if hasmask:
+            unpack_from = struct.Struct('!4x' + int_fmt * 2).unpack_from
+
+            def decode(buf, offset):
+                return name, unpack_from(buf, offset), field_len
+        else:
+            unpack_from = struct.Struct('!4x' + int_fmt).unpack_from
+
+            def decode(buf, offset):
+                return name, unpack_from(buf, offset)[0], field_len
+        return decode
+
+    if t is type_desc.MacAddr:
+        to_user = _mac_to_user
+    elif t is type_desc.IPv4Addr:
+        to_user = _ipv4_to_user
+    else:
+        to_user = t.to_user
+    if hasmask:
+        unpack_from = struct.Struct('!4x%ds%ds' % (size, size)).unpack_from
+
+        def decode(buf, offset):
+            v, m = unpack_from(buf, offset)
+            return name, (to_user(v), to_user(m)), field_len
+    else:
+        unpack_from = struct.Struct('!4x%ds' % size).unpack_from
+
+        def decode(buf, offset):
+            return name, to_user(unpack_from(buf, offset)[0]), field_len
+    return decode
+
+
+def _make_decoders(num_to_field):
+    decoders = {}
+    for num, f in num_to_field.items():
+        if not isinstance(num, six.integer_types):
+            # Experimenter fields; their header word is followed by
+            # the experimenter id.
+            continue
+        size = getattr(f.type, 'size', None)
+        if not size or (num >> 7) == OFPXXC_EXPERIMENTER:
+            continue
+        decoders[(num << 9) | size] = _make_decoder(f.name, f.type, False)
+        decoders[(num << 9) | (1 << 8) | (size * 2)] = _make_decoder(
+            f.name, f.type, True)
+    return decoders
+
+
+def _parse_to_user(oxx, mod, num_to_field, decoders, buf, offset):
+    (header, ) = _HEADER.unpack_from(buf, offset)
+    decode = decoders.get(header)
+    if decode is not None:
+        return decode(buf, offset)
+    n, value, mask, field_len = _parse(mod, buf, offset)
+    name, user_value = _to_user(oxx, num_to_field, n, value, mask)
+    return name, user_value, field_len
+
+
 def _make_exp_hdr(oxx, mod, n):
     exp_hdr = bytearray()
     try:
@@ -263,3 +349,105 @@ def _serialize(oxx, mod, n, value, mask, buf, offset):
                       (n << 9) | (0 << 8) | (exp_hdr_len + value_len),
                       bytes(exp_hdr), value)
     return struct.calcsize(pack_str)
+
+
+# Encoding of OXM/OXS TLVs from the "user" representation with a
+# precompiled encoder per field, the counterpart of the decoders above.
+#
+# The encoders cover integer, MAC address and IPv4 address fields in
+# their common notations (e.g. "10.0.0.1", "00:11:22:33:44:55") and
+# give up on anything else, e.g. CIDR notations, which then takes the
+# _from_user() and _serialize() path.
+
+_ENCODE_FALLBACK = (TypeError, ValueError, AttributeError, socket.error)
+
+
+def _mac_from_user(text):
+    if len(text) != 17 or text.count(':') != 5:
+        raise ValueError(text)
+    b = bytes.fromhex(text.replace(':', ''))
+    if len(b) != 6:
+        raise ValueError(text)
+    return b
+
+
+def _ipv4_from_user(text):
+    return socket.inet_pton(socket.AF_INET, text)
+
+
+def _grow(buf, length):
+    if len(buf) < length:
+        buf += bytearray(length - len(buf))
+
+
+def _make_encoder(num, t):
+    size = t.size
+    int_fmt = (_INT_FORMATS.get(size)
+               if isinstance(t, type_desc.IntDescr) else None)
+    if int_fmt is not None:
+        fmt = int_fmt
+        limit = (1 << (size * 8)) - 1
+
+        def to_wire(v):
+            return v & limit
+    elif t is type_desc.MacAddr:
+        fmt = '6s'
+        to_wire = _mac_from_user
+    elif t is type_desc.IPv4Addr:
+        fmt = '4s'
+        to_wire = _ipv4_from_user
+    else:
+        return None
+    header = (num << 9) | size
+    header_w = (num << 9) | (1 << 8) | (size * 2)
+    pack_into = struct.Struct('!I' + fmt).pack_into
+    pack_into_w = struct.Struct('!I' + fmt * 2).pack_into
+    field_len = _HEADER.size + size
+    field_len_w = _HEADER.size + size * 2
+
+    def encode(user_value, buf, offset):
+        # Returns the field length, or None to take the generic path.
+        if isinstance(user_value, (tuple, list)):
+            (value, mask) = user_value
+        else:
+            value = user_value
+            mask = None
+        try:
+            value = to_wire(value)
+            if mask is not None:
+                mask = to_wire(mask)
+        except _ENCODE_FALLBACK:
+            return None
+        if mask is None:
+            _grow(buf, offset + field_len)
+            pack_into(buf, offset, header, value)
+            return field_len
+        _grow(buf, offset + field_len_w)
+        pack_into_w(buf, offset, header_w, value, mask)
+        return field_len_w
+    return encode
+
+
+def _make_encoders(name_to_field):
+    encoders = {}
+    for name, f in name_to_field.items():
+        num = f.num
+        if (not isinstance(num, six.integer_types) or
+                (num >> 7) == OFPXXC_EXPERIMENTER or
+                not getattr(f.type, 'size', None)):
+            continue
+        encode = _make_encoder(num, f.type)
+        if encode is not None:
+            encoders[name] = encode
+    return encoders
+
+
+def _serialize_user(oxx, mod, name_to_field, encoders, name, user_value,
+                    buf, offset):
+    encode = encoders.get(name)
+    if encode is not None:
+        field_len = encode(user_value, buf, offset)
+        if field_len is not None:
+            return field_len
+    n, value, mask = _from_user(oxx, name_to_field, name, user_value)
+    return _serialize(oxx, mod, n, value, mask, buf, offset)
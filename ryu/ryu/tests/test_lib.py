@@ -272,3 +272,14 @@ def add_method(cls, method_name, method):
     else:
         methodtype = types.MethodType(method, None, cls)
     setattr(cls, method_name, methodtype)
+
+
+def benchmark(func):
+    """
+    Decorator of a benchmark test, which only logs its measurements.
+    It is skipped unless the environment variable RYU_BENCHMARK is set::
+
+        RYU_BENCHMARK=1 python -m pytest ryu/tests/unit -k benchmark
+    """
+    return unittest.skipUnless(os.environ.get('RYU_BENCHMARK'),
+                               'RYU_BENCHMARK is not set')(func)
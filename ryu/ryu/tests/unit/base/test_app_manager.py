@@ -0,0 +1,278 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import time
+import unittest
+
+from nose.tools import eq_, ok_
+
+from ryu.base import app_manager
+from ryu.controller import event
+from ryu.controller import ofp_event
+from ryu.controller.handler import set_ev_cls
+from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+from ryu.controller.handler import DEAD_DISPATCHER
+from ryu.lib import hub
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.tests import test_lib
+
+
+LOG = logging.getLogger('test_app_manager')
+
+
+def _dispatch_app():
+    # Defined on each call, because test_manager reloads app_manager
+    # and RyuApp.__init__ refers to the reloaded class
+    class _DispatchApp(app_manager.RyuApp):
+        @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+        def packet_in_handler(self, ev):
+            pass
+
+        @set_ev_cls(ofp_event.EventOFPPacketIn, CONFIG_DISPATCHER)
+        def config_packet_in_handler(self, ev):
+            pass
+
+        @set_ev_cls(ofp_event.EventOFPPacketIn)
+        def any_packet_in_handler(self, ev):
+            pass
+
+    return _DispatchApp()
+
+
+class Test_RyuApp_dispatch(unittest.TestCase):
+    """
+    Test cases for the dispatch table of RyuApp
+    """
+
+    def setUp(self):
+        self.app = _dispatch_app()
+        for m in [self.app.packet_in_handler,
+                  self.app.config_packet_in_handler,
+                  self.app.any_packet_in_handler]:
+            self.app.register_handler(ofp_event.EventOFPPacketIn, m)
+        self.app.register_observer(ofp_event.EventOFPPacketIn, 'main_app',
+                                   [MAIN_DISPATCHER])
+        self.app.register_observer(ofp_event.EventOFPPacketIn, 'any_app')
+        self.ev = ofp_event.EventOFPPacketIn(
+            ofproto_v1_3_parser.OFPPacketIn(None))
+
+    def test_get_handlers(self):
+        eq_((self.app.packet_in_handler, self.app.any_packet_in_handler),
+            self.app.get_handlers(self.ev, MAIN_DISPATCHER))
+        eq_((self.app.config_packet_in_handler,
+             self.app.any_packet_in_handler),
+            self.app.get_handlers(self.ev, CONFIG_DISPATCHER))
+        eq_(3, len(self.app.get_handlers(self.ev)))
+
+    def test_get_observers(self):
+        eq_(('main_app', 'any_app'),
+            self.app.get_observers(self.ev, MAIN_DISPATCHER))
+        eq_(('any_app',), self.app.get_observers(self.ev, CONFIG_DISPATCHER))
+        eq_(('main_app', 'any_app'), self.app.get_observers(self.ev, None))
+
+    def test_dispatch_table_invalidation(self):
+        handlers = self.app.get_handlers(self.ev, MAIN_DISPATCHER)
+        ok_(handlers is self.app.get_handlers(self.ev, MAIN_DISPATCHER))
+
+        self.app.unregister_handler(ofp_event.EventOFPPacketIn,
+                                    self.app.packet_in_handler)
+        eq_((self.app.any_packet_in_handler,),
+            self.app.get_handlers(self.ev, MAIN_DISPATCHER))
+
+        self.app.unregister_observer(ofp_event.EventOFPPacketIn, 'main_app')
+        eq_(('any_app',), self.app.get_observers(self.ev, MAIN_DISPATCHER))
+
+        self.app.unregister_observer_all_event('any_app')
+        eq_((), self.app.get_observers(self.ev, MAIN_DISPATCHER))
+
+        self.app.register_observer(ofp_event.EventOFPPacketIn, 'new_app')
+        eq_(('new_app',), self.app.get_observers(self.ev, MAIN_DISPATCHER))
+
+    def test_has_consumers(self):
+        ok_(self.app.has_consumers(ofp_event.EventOFPPacketIn,
+                                   MAIN_DISPATCHER))
+        ok_(not self.app.has_consumers(ofp_event.EventOFPFlowStatsReply,
+                                       MAIN_DISPATCHER))
+
+    @test_lib.benchmark
+    def test_dispatch_benchmark(self):
+        count = 100000
+        app = self.app
+
+        def dispatch(get_dispatch):
+            start = time.time()
+            for _ in range(count):
+                handlers, observers = get_dispatch(
+                    ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
+            return time.time() - start, handlers, observers
+
+        elapsed, handlers, observers = dispatch(app.get_dispatch)
+        compile_elapsed, compiled_handlers, compiled_observers = dispatch(
+            app._compile_dispatch)
+        eq_(compiled_handlers, handlers)
+        eq_(compiled_observers, observers)
+
+        LOG.info('PacketIn dispatch: %.0f events/s (uncached: %.0f events/s)',
+                 count / max(elapsed, 1e-9),
+                 count / max(compile_elapsed, 1e-9))
+
+
+class Test_EventQueue(unittest.TestCase):
+    """
+    Test cases for the prioritized event queue of RyuApp
+    """
+
+    def _queue(self, size, drop_oldest=()):
+        sizes = dict((prio, size) for prio in event.EVENT_PRIORITIES)
+        return app_manager.EventQueue(sizes, drop_oldest)
+
+    def _packet_in(self, dp=None):
+        return ofp_event.EventOFPPacketIn(
+            ofproto_v1_3_parser.OFPPacketIn(dp))
+
+    def test_event_priorities(self):
+        eq_(event.EVENT_PRIORITY_CONTROL,
+            ofp_event.EventOFPStateChange.PRIORITY)
+        eq_(event.EVENT_PRIORITY_CONTROL,
+            ofp_event.EventOFPPortStatus.PRIORITY)
+        eq_(event.EVENT_PRIORITY_CONTROL,
+            ofp_event.EventOFPEchoRequest.PRIORITY)
+        eq_(event.EVENT_PRIORITY_DATA, ofp_event.EventOFPPacketIn.PRIORITY)
+        eq_(event.EVENT_PRIORITY_DATA,
+            ofp_event.EventOFPFlowStatsReply.PRIORITY)
+        # replies and errors stay behind the replies they may refer to
+        eq_(event.EVENT_PRIORITY_DATA,
+            ofp_event.EventOFPBarrierReply.PRIORITY)
+        eq_(event.EVENT_PRIORITY_DATA, ofp_event.EventOFPErrorMsg.PRIORITY)
+        eq_(event.EVENT_PRIORITY_DATA,
+            ofp_event.EventOFPPortDescStatsReply.PRIORITY)
+        eq_(event.EVENT_PRIORITY_DEFAULT,
+            ofp_event.EventOFPFlowMod.PRIORITY)
+        eq_(event.EVENT_PRIORITY_DEFAULT, event.EventBase.PRIORITY)
+
+    def test_control_events_first(self):
+        q = self._queue(8)
+        packet_ins = [self._packet_in() for _ in range(4)]
+        for ev in packet_ins:
+            q.put(ev, MAIN_DISPATCHER)
+        other = event.EventBase()
+        q.put(other, None)
+        state_change = ofp_event.EventOFPStateChange(None)
+        q.put(state_change, MAIN_DISPATCHER)
+        eq_(6, q.qsize())
+
+        eq_((state_change, MAIN_DISPATCHER), q.get())
+        eq_((other, None), q.get())
+        for ev in packet_ins:
+            eq_((ev, MAIN_DISPATCHER), q.get())
+        ok_(q.empty())
+
+    def test_state_change_after_queued_events(self):
+        dp1 = object()
+        dp2 = object()
+        q = self._queue(8)
+        packet_in1 = self._packet_in(dp1)
+        q.put(packet_in1, MAIN_DISPATCHER)
+        packet_in2 = self._packet_in(dp2)
+        q.put(packet_in2, MAIN_DISPATCHER)
+        dead1 = ofp_event.EventOFPStateChange(dp1)
+        q.put(dead1, DEAD_DISPATCHER)
+        port_status = ofp_event.EventOFPPortStatus(
+            ofproto_v1_3_parser.OFPPortStatus(dp2))
+        q.put(port_status, MAIN_DISPATCHER)
+        dead2 = ofp_event.EventOFPStateChange(dp2)
+        q.put(dead2, DEAD_DISPATCHER)
+
+        # Port status overtakes the packet-in, but the state changes
+        # do not overtake the events of their datapaths
+        eq_(port_status, q.get()[0])
+        eq_([packet_in1, packet_in2, dead1, dead2],
+            [q.get()[0] for _ in range(4)])
+        ok_(q.empty())
+
+        dead1 = ofp_event.EventOFPStateChange(dp1)
+        q.put(self._packet_in(dp2), MAIN_DISPATCHER)
+        q.put(dead1, DEAD_DISPATCHER)
+        eq_(dead1, q.get()[0])
+
+    def test_lanes_are_bounded_separately(self):
+        q = self._queue(2)
+        q.put(self._packet_in(), None)
+        q.put(self._packet_in(), None)
+        # The data lane is full but control events still go through.
+        with hub.Timeout(1):
+            q.put(ofp_event.EventOFPStateChange(None), None)
+
+        sender = hub.spawn(q.put, self._packet_in(), None)
+        hub.sleep(0)
+        eq_(1, q.stats()[event.EVENT_PRIORITY_DATA]['blocked'])
+        eq_(3, q.qsize())
+        q.get()
+        q.get()
+        hub.joinall([sender])
+        eq_(2, q.qsize())
+
+    def test_drop_oldest(self):
+        q = self._queue(3, drop_oldest=[ofp_event.EventOFPPacketIn])
+        stats_reply = ofp_event.EventOFPFlowStatsReply(None)
+        q.put(stats_reply, None)
+        packet_ins = [self._packet_in() for _ in range(4)]
+        for ev in packet_ins:
+            q.put(ev, None)
+
+        stats = q.stats()[event.EVENT_PRIORITY_DATA]
+        eq_(2, stats['dropped'])
+        eq_(3, stats['depth'])
+        eq_(0, stats['blocked'])
+        # The oldest packet-in events are gone, the other events are kept.
+        eq_(stats_reply, q.get()[0])
+        eq_(packet_ins[2], q.get()[0])
+        eq_(packet_ins[3], q.get()[0])
+
+    def test_stats(self):
+        q = self._queue(4)
+        q.put(self._packet_in(), None)
+        q.put(self._packet_in(), None)
+        time.sleep(0.01)
+        q.get()
+
+        stats = q.stats()
+        data = stats[event.EVENT_PRIORITY_DATA]
+        eq_(4, data['size'])
+        eq_(1, data['depth'])
+        eq_(2, data['enqueued'])
+        eq_(1, data['dequeued'])
+        ok_(data['wait_max'] >= 0.01)
+        ok_(data['wait_total'] >= data['wait_max'])
+        eq_(0, stats[event.EVENT_PRIORITY_CONTROL]['enqueued'])
+
+    def test_app_event_queue(self):
+        class _App(app_manager.RyuApp):
+            _EVENT_QUEUE_SIZES = {event.EVENT_PRIORITY_DATA: 1024}
+
+        app = _App()
+        stats = app.get_event_queue_stats()
+        eq_(1024, stats[event.EVENT_PRIORITY_DATA]['size'])
+        eq_(app_manager.CONF.event_queue_size,
+            stats[event.EVENT_PRIORITY_DEFAULT]['size'])
+
+        app_manager.CONF.set_override('event_queue_packet_in_policy',
+                                      'drop-oldest')
+        try:
+            app = _App()
+        finally:
+            app_manager.CONF.clear_override('event_queue_packet_in_policy')
+        ok_(ofp_event.EventOFPPacketIn in app.events.drop_oldest)
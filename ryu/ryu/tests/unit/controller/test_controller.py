@@ -23,21 +23,30 @@ except ImportError:
 import json
 import os
 import ssl
+import struct
 import sys
+import time
 import warnings
 import logging
 import random
 import unittest
 
-from nose.tools import eq_, raises
+from nose.tools import eq_, ok_, raises
 
+from ryu import exception
 from ryu.base import app_manager  # To suppress cyclic import
 from ryu.controller import controller
 from ryu.controller import handler
+from ryu.controller import ofp_event
 from ryu.lib import hub
+from ryu.lib import ofctl_utils
+from ryu.ofproto import ofproto_common
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_v1_3
 from ryu.ofproto import ofproto_v1_3_parser
 from ryu.ofproto import ofproto_v1_2_parser
 from ryu.ofproto import ofproto_v1_0_parser
+from ryu.tests import test_lib
 hub.patch()
 
 
@@ -153,6 +162,11 @@ class Test_Datapath(unittest.TestCase):
                 self.buf = self.buf[size:]
                 return out
 
+            def recv_into(self, buffer, nbytes=0):
+                out = self.recv(nbytes or len(buffer))
+                buffer[:len(out)] = out
+                return len(out)
+
         # Prepare mock
         ofp_brick_mock = mock.MagicMock(spec=app_manager.RyuApp)
         app_manager_mock.lookup_service_brick.return_value = ofp_brick_mock
@@ -181,6 +195,527 @@ class Test_Datapath(unittest.TestCase):
             self.assertEqual(kwargs, {})
         self.assertEqual(expected_json, output_json)
 
+    def _send_loop_datapath(self, send_q_size):
+        controller.CONF.set_override('ofp_send_queue_size', send_q_size)
+        self.addCleanup(controller.CONF.clear_override, 'ofp_send_queue_size')
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(mock.Mock(), mock.Mock())
+        dp.state = handler.MAIN_DISPATCHER
+        return dp
+
+    def test_send_loop_coalesces_queued_messages(self):
+        dp = self._send_loop_datapath(16)
+        bufs = [bytearray([i]) * (i + 1) for i in range(13)]
+        for buf in bufs[:-1]:
+            ok_(dp.send(buf))
+        ok_(dp.send(bufs[-1], close_socket=True))
+
+        dp._send_loop()
+
+        dp.socket.sendall.assert_called_once_with(b''.join(bufs))
+        eq_(13, dp.send_q_stats['msgs'])
+        eq_(1, dp.send_q_stats['flushes'])
+        eq_(0, dp.send_q_stats['blocked'])
+        eq_(None, dp.send_q)
+
+    def test_send_msgs(self):
+        dp = self._send_loop_datapath(16)
+        dp.ofproto = ofproto_v1_3
+        dp.ofproto_parser = ofproto_v1_3_parser
+        msgs = [ofproto_v1_3_parser.OFPBarrierRequest(dp),
+                ofproto_v1_3_parser.OFPEchoRequest(dp, data=b'echo')]
+        ok_(dp.send_msgs(msgs))
+        ok_(dp.send_msgs([]))
+        # one entry of the queue, two messages
+        eq_(1, dp.send_q.qsize())
+        eq_(2, dp.send_q_stats['msgs'])
+        eq_(2, dp.perf_stats['msgs_out'])
+        ok_(msgs[0].xid is not None)
+        eq_(msgs[0].xid + 1, msgs[1].xid)
+        ok_(dp.send(b'', close_socket=True))
+
+        dp._send_loop()
+
+        dp.socket.sendall.assert_called_once_with(msgs[0].buf + msgs[1].buf)
+
+    def test_send_queue_watermarks(self):
+        dp = self._send_loop_datapath(8)
+        eq_(6, dp.send_q_high_watermark)
+        eq_(2, dp.send_q_low_watermark)
+
+        for _ in range(5):
+            dp.send(b'x')
+        ok_(not dp.send_q_congested)
+        dp.send(b'x')
+        ok_(dp.send_q_congested)
+        eq_(1, dp.send_q_stats['congested'])
+
+        # A sender blocked on a full queue is released by the send loop,
+        # which drains and flushes everything in one write.
+        dp.send(b'x')
+        dp.send(b'x')
+        sender = hub.spawn(dp.send, b'y', close_socket=True)
+        hub.sleep(0)
+        eq_(1, dp.send_q_stats['blocked'])
+        dp._send_loop()
+        hub.joinall([sender])
+
+        ok_(not dp.send_q_congested)
+        eq_(9, dp.send_q_stats['msgs'])
+        calls = dp.socket.sendall.call_args_list
+        eq_(b'x' * 8 + b'y', b''.join(args[0] for args, _ in calls))
+
+    @staticmethod
+    def _multipart_flow_stats_stream(num_msgs):
+        # Builds num_msgs FlowStatsReply messages of nearly the maximum
+        # length, all but the last flagged with OFPMPF_REPLY_MORE.
+        this_dir = os.path.dirname(sys.modules[__name__].__file__)
+        packet_data_file = os.path.join(
+            this_dir, '../../packet_data/of13/4-12-ofp_flow_stats_reply.packet')
+        template = open(packet_data_file, 'rb').read()
+        hdr_len = ofproto_v1_3.OFP_MULTIPART_REPLY_SIZE
+        body = template[hdr_len:]
+        body = body * ((ofproto_common.OFP_MAX_MSG_LEN - hdr_len) // len(body))
+        stream = bytearray()
+        for i in range(num_msgs):
+            flags = 0
+            if i < num_msgs - 1:
+                flags = ofproto_v1_3.OFPMPF_REPLY_MORE
+            msg = bytearray(template[:hdr_len]) + body
+            struct.pack_into(ofproto_common.OFP_HEADER_PACK_STR, msg, 0,
+                             ofproto_v1_3.OFP_VERSION,
+                             ofproto_v1_3.OFPT_MULTIPART_REPLY,
+                             len(msg), i)
+            struct.pack_into('!HH', msg, ofproto_common.OFP_HEADER_SIZE,
+                             ofproto_v1_3.OFPMP_FLOW, flags)
+            stream += msg
+        return bytes(stream)
+
+    class _StreamSocket(object):
+        # Returns at most 'segment' bytes per call, like a TCP socket.
+        def __init__(self, data, segment=65536):
+            self.data = data
+            self.offset = 0
+            self.segment = segment
+            self.calls = 0
+
+        def _next(self, bufsize):
+            self.calls += 1
+            size = min(bufsize, self.segment)
+            out = self.data[self.offset:self.offset + size]
+            self.offset += len(out)
+            return out
+
+        def recv(self, bufsize):
+            return self._next(bufsize)
+
+        def recv_into(self, buffer, nbytes=0):
+            out = self._next(nbytes or len(buffer))
+            buffer[:len(out)] = out
+            return len(out)
+
+        def setsockopt(self, *args):
+            pass
+
+        def settimeout(self, *args):
+            pass
+
+        def close(self):
+            pass
+
+    @staticmethod
+    def _legacy_recv_loop(dp):
+        # The framing loop which _recv_loop replaced, kept as the
+        # baseline of test_recv_loop_benchmark.
+        buf = bytearray()
+        min_read_len = remaining_read_len = ofproto_common.OFP_HEADER_SIZE
+        msgs = []
+        while True:
+            read_len = min_read_len
+            if remaining_read_len > min_read_len:
+                read_len = remaining_read_len
+            ret = dp.socket.recv(read_len)
+            if not ret:
+                break
+            buf += ret
+            buf_len = len(buf)
+            while buf_len >= min_read_len:
+                (version, msg_type, msg_len, xid) = ofproto_parser.header(
+                    bytes(buf))
+                if buf_len < msg_len:
+                    remaining_read_len = (msg_len - buf_len)
+                    break
+                msgs.append(ofproto_parser.msg(
+                    dp, version, msg_type, msg_len, xid, buf[:msg_len]))
+                buf = buf[msg_len:]
+                buf_len = len(buf)
+                remaining_read_len = min_read_len
+        return msgs
+
+    def _benchmark_recv_loop(self, name, stream, num_msgs):
+        def run(recv_loop):
+            sock = self._StreamSocket(stream)
+            with mock.patch('ryu.controller.controller.Datapath.set_state'):
+                dp = controller.Datapath(sock, mock.Mock())
+            dp.ofp_brick = None
+            msgs = []
+
+            def msg(datapath, version, msg_type, msg_len, xid, buf):
+                msgs.append(bytes(buf))
+
+            with mock.patch.object(ofproto_parser, 'msg', msg):
+                start = time.time()
+                recv_loop(dp)
+                elapsed = time.time() - start
+            return sock, msgs, elapsed
+
+        sock, msgs, elapsed = run(controller.Datapath._recv_loop)
+        eq_(num_msgs, len(msgs))
+        eq_(stream, b''.join(msgs))
+        # One recv_into() per TCP segment rather than one or two per message.
+        self.assertLessEqual(sock.calls, len(stream) // sock.segment + 2)
+
+        legacy_sock, legacy_msgs, legacy_elapsed = run(
+            self._legacy_recv_loop)
+        eq_(num_msgs, len(legacy_msgs))
+
+        LOG.info('recv_loop %s: %d bytes, %d msgs, %d recv calls, '
+                 '%.0f msgs/s (legacy: %d recv calls, %.0f msgs/s)',
+                 name, len(stream), num_msgs, sock.calls,
+                 num_msgs / max(elapsed, 1e-9), legacy_sock.calls,
+                 num_msgs / max(legacy_elapsed, 1e-9))
+
+    @test_lib.benchmark
+    def test_recv_loop_benchmark(self):
+        num_msgs = 64
+        self._benchmark_recv_loop(
+            'multipart', self._multipart_flow_stats_stream(num_msgs),
+            num_msgs)
+
+        this_dir = os.path.dirname(sys.modules[__name__].__file__)
+        packet_data_file = os.path.join(
+            this_dir, '../../packet_data/of13/4-4-ofp_packet_in.packet')
+        packet_in = open(packet_data_file, 'rb').read()
+        num_msgs = 20000
+        self._benchmark_recv_loop('packet_in', packet_in * num_msgs,
+                                  num_msgs)
+
+    def test_recv_loop_parses_multipart_stream(self):
+        num_msgs = 40
+        stream = self._multipart_flow_stats_stream(num_msgs)
+        sock = self._StreamSocket(stream, segment=1500)
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(sock, mock.Mock())
+        received = []
+        dp.ofp_brick = mock.Mock()
+        dp.ofp_brick.send_event_to_observers.side_effect = (
+            lambda ev, state: received.append(ev.msg))
+        dp.ofp_brick.get_handlers.return_value = []
+
+        dp._recv_loop()
+
+        eq_(num_msgs, len(received))
+        for i, msg in enumerate(received):
+            eq_(i, msg.xid)
+            self.assertIsInstance(msg.buf, bytes)
+            self.assertIsInstance(msg, ofproto_v1_3_parser.OFPFlowStatsReply)
+        eq_(0, received[-1].flags)
+        eq_(stream, b''.join(msg.buf for msg in received))
+
+    def test_recv_loop_skips_unconsumed_messages(self):
+        this_dir = os.path.dirname(sys.modules[__name__].__file__)
+        packet_data_file = os.path.join(
+            this_dir, '../../packet_data/of13/4-4-ofp_packet_in.packet')
+        packet_in = open(packet_data_file, 'rb').read()
+        stream = packet_in * 10 + self._multipart_flow_stats_stream(2)
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(self._StreamSocket(stream), mock.Mock())
+        dp.state = handler.MAIN_DISPATCHER
+        dp.ofp_brick = app_manager.RyuApp()
+        dp.ofp_brick.register_observer(ofp_event.EventOFPFlowStatsReply,
+                                       'observer', [handler.MAIN_DISPATCHER])
+
+        with mock.patch.object(ofproto_parser, 'msg',
+                               wraps=ofproto_parser.msg) as msg_mock:
+            dp._recv_loop()
+
+        eq_(2, msg_mock.call_count)
+        for args, _kwargs in msg_mock.call_args_list:
+            eq_(ofproto_v1_3.OFPT_MULTIPART_REPLY, args[2])
+
+
+class TestReplyFuture(unittest.TestCase):
+    """
+    Test cases for Datapath.send_request and ReplyFuture
+    """
+
+    @staticmethod
+    def _reply(msg_type, xid, body=b''):
+        return struct.pack(ofproto_common.OFP_HEADER_PACK_STR,
+                           ofproto_v1_3.OFP_VERSION, msg_type,
+                           ofproto_common.OFP_HEADER_SIZE + len(body),
+                           xid) + body
+
+    def _port_desc_reply(self, xid, more):
+        flags = ofproto_v1_3.OFPMPF_REPLY_MORE if more else 0
+        return self._reply(
+            ofproto_v1_3.OFPT_MULTIPART_REPLY, xid,
+            struct.pack(ofproto_v1_3.OFP_MULTIPART_REPLY_PACK_STR,
+                        ofproto_v1_3.OFPMP_PORT_DESC, flags))
+
+    def _datapath(self, dpid=1):
+        sock = Test_Datapath._StreamSocket(b'')
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(sock, mock.Mock())
+        dp.set_version(ofproto_v1_3.OFP_VERSION)
+        dp.state = handler.MAIN_DISPATCHER
+        dp.id = dpid
+        dp.ofp_brick = None
+        return dp
+
+    @staticmethod
+    def _receive(dp, stream):
+        dp.socket.data = stream
+        dp.socket.offset = 0
+        dp._recv_loop()
+
+    def test_barrier(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        future = dp.send_request(parser.OFPBarrierRequest(dp))
+        ok_(not future.done())
+
+        self._receive(dp, self._reply(ofproto_v1_3.OFPT_BARRIER_REPLY,
+                                      future.xid))
+
+        ok_(future.done())
+        reply = future.result()
+        self.assertIsInstance(reply, parser.OFPBarrierReply)
+        eq_(future.xid, reply.xid)
+        eq_(None, future.exception())
+        eq_({}, dp._reply_futures)
+
+    def test_role(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        future = dp.send_request(parser.OFPRoleRequest(
+            dp, dp.ofproto.OFPCR_ROLE_NOCHANGE, 0))
+
+        self._receive(dp, self._reply(
+            ofproto_v1_3.OFPT_ROLE_REPLY, future.xid,
+            struct.pack(ofproto_v1_3.OFP_ROLE_REQUEST_PACK_STR,
+                        ofproto_v1_3.OFPCR_ROLE_MASTER, 7)))
+
+        reply = future.result()
+        eq_(ofproto_v1_3.OFPCR_ROLE_MASTER, reply.role)
+        eq_(7, reply.generation_id)
+
+    def test_multipart(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        future = dp.send_request(parser.OFPPortDescStatsRequest(dp))
+        other = dp.send_request(parser.OFPBarrierRequest(dp))
+
+        this_dir = os.path.dirname(sys.modules[__name__].__file__)
+        packet_data_file = os.path.join(
+            this_dir, '../../packet_data/of13/4-4-ofp_packet_in.packet')
+        packet_in = bytearray(open(packet_data_file, 'rb').read())
+        # A message sent by the switch on its own never answers a request.
+        struct.pack_into('!I', packet_in, 4, future.xid)
+
+        self._receive(dp, self._port_desc_reply(future.xid, True) +
+                      bytes(packet_in) +
+                      self._port_desc_reply(future.xid, True))
+        ok_(not future.done())
+        eq_(2, len(future.replies))
+
+        self._receive(dp, self._reply(ofproto_v1_3.OFPT_BARRIER_REPLY,
+                                      other.xid) +
+                      self._port_desc_reply(future.xid, False))
+
+        replies = future.result()
+        eq_(3, len(replies))
+        for reply in replies:
+            self.assertIsInstance(reply, parser.OFPPortDescStatsReply)
+            eq_(future.xid, reply.xid)
+        ok_(other.done())
+        eq_({}, dp._reply_futures)
+
+    def test_error(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        future = dp.send_request(parser.OFPPortDescStatsRequest(dp))
+
+        self._receive(dp, self._reply(
+            ofproto_v1_3.OFPT_ERROR, future.xid,
+            struct.pack(ofproto_v1_3.OFP_ERROR_MSG_PACK_STR,
+                        ofproto_v1_3.OFPET_BAD_REQUEST,
+                        ofproto_v1_3.OFPBRC_BAD_MULTIPART)))
+
+        ok_(future.done())
+        exc = future.exception()
+        self.assertIsInstance(exc, exception.OFPErrorReply)
+        eq_(ofproto_v1_3.OFPBRC_BAD_MULTIPART, exc.error_msg.code)
+        self.assertRaises(exception.OFPErrorReply, future.result)
+        eq_({}, dp._reply_futures)
+
+    def test_timeout(self):
+        dp = self._datapath()
+        future = dp.send_request(dp.ofproto_parser.OFPBarrierRequest(dp))
+
+        self.assertRaises(exception.OFPRequestTimeout, future.result, 0.01)
+        eq_({}, dp._reply_futures)
+        # A late reply is ignored.
+        self._receive(dp, self._reply(ofproto_v1_3.OFPT_BARRIER_REPLY,
+                                      future.xid))
+        eq_([], future.replies)
+
+    def test_disconnect(self):
+        dp = self._datapath()
+        future = dp.send_request(dp.ofproto_parser.OFPBarrierRequest(dp))
+        called = []
+        future.add_done_callback(called.append)
+
+        dp._cancel_reply_futures()
+
+        eq_([future], called)
+        self.assertRaises(exception.OFPRequestCancelled, future.result)
+        ok_(not future.cancel())
+
+    def test_wait_replies(self):
+        dps = [self._datapath(dpid) for dpid in range(1, 4)]
+        futures = [dp.send_request(dp.ofproto_parser.OFPBarrierRequest(dp))
+                   for dp in dps]
+
+        def reply(dp, future):
+            self._receive(dp, self._reply(ofproto_v1_3.OFPT_BARRIER_REPLY,
+                                          future.xid))
+
+        threads = [hub.spawn(reply, dp, future)
+                   for dp, future in zip(dps, futures)]
+        replies = controller.wait_replies(futures, timeout=5)
+        hub.joinall(threads)
+
+        eq_([future.xid for future in futures],
+            [reply.xid for reply in replies])
+
+        futures = [dp.send_request(dp.ofproto_parser.OFPBarrierRequest(dp))
+                   for dp in dps]
+        self.assertRaises(exception.OFPRequestTimeout,
+                          controller.wait_replies, futures, 0.01)
+        for dp in dps:
+            eq_({}, dp._reply_futures)
+
+    def test_send_stats_request(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        xid = dp.xid + 1
+        msgs = []
+        thread = hub.spawn(ofctl_utils.send_stats_request, dp,
+                           parser.OFPPortDescStatsRequest(dp), {}, msgs)
+        hub.sleep(0)
+
+        self._receive(dp, self._port_desc_reply(xid, True) +
+                      self._port_desc_reply(xid, False))
+        hub.joinall([thread])
+
+        eq_(2, len(msgs))
+        eq_({}, dp._reply_futures)
+
+    def _port_stats_reply(self, xid, more, port_nos):
+        flags = ofproto_v1_3.OFPMPF_REPLY_MORE if more else 0
+        body = b''.join(
+            struct.pack(ofproto_v1_3.OFP_PORT_STATS_PACK_STR,
+                        *([port_no] + [0] * 14))
+            for port_no in port_nos)
+        return self._reply(
+            ofproto_v1_3.OFPT_MULTIPART_REPLY, xid,
+            struct.pack(ofproto_v1_3.OFP_MULTIPART_REPLY_PACK_STR,
+                        ofproto_v1_3.OFPMP_PORT_STATS, flags) + body)
+
+    def test_stream(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        stream = dp.send_stream_request(parser.OFPPortStatsRequest(dp))
+        records = iter(stream)
+
+        self._receive(dp, self._port_stats_reply(stream.xid, True, [1, 2]))
+        eq_(1, next(records).port_no)
+        eq_(2, next(records).port_no)
+        ok_(not stream.done())
+
+        self._receive(dp, self._port_stats_reply(stream.xid, True, [3]) +
+                      self._port_stats_reply(stream.xid, False, [4]))
+        eq_([3, 4], [r.port_no for r in records])
+        # The parts are not collected.
+        eq_([], stream.replies)
+        ok_(stream.done())
+        eq_({}, dp._reply_futures)
+        self.assertRaises(TypeError, stream.result)
+
+    def test_stream_error(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        stream = dp.send_stream_request(parser.OFPPortStatsRequest(dp))
+
+        self._receive(dp, self._port_stats_reply(stream.xid, True, [1]) +
+                      self._reply(
+                          ofproto_v1_3.OFPT_ERROR, stream.xid,
+                          struct.pack(ofproto_v1_3.OFP_ERROR_MSG_PACK_STR,
+                                      ofproto_v1_3.OFPET_BAD_REQUEST,
+                                      ofproto_v1_3.OFPBRC_EPERM)))
+
+        msgs = stream.messages()
+        self.assertIsInstance(next(msgs), parser.OFPPortStatsReply)
+        self.assertRaises(exception.OFPErrorReply, next, msgs)
+
+    def test_stream_timeout(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        stream = dp.send_stream_request(parser.OFPPortStatsRequest(dp))
+        self._receive(dp, self._port_stats_reply(stream.xid, True, [1]))
+
+        records = stream.records(timeout=0.01)
+        eq_(1, next(records).port_no)
+        self.assertRaises(exception.OFPRequestTimeout, next, records)
+        eq_({}, dp._reply_futures)
+
+    def test_stream_close(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        stream = dp.send_stream_request(parser.OFPPortStatsRequest(dp))
+        self._receive(dp, self._port_stats_reply(stream.xid, True, [1]))
+
+        records = iter(stream)
+        next(records)
+        records.close()
+        ok_(stream.done())
+        eq_({}, dp._reply_futures)
+
+    def test_stream_stats_request(self):
+        dp = self._datapath()
+        parser = dp.ofproto_parser
+        xid = dp.xid + 1
+        msgs = ofctl_utils.stream_stats_request(
+            dp, parser.OFPPortStatsRequest(dp), {})
+        received = []
+
+        def consume():
+            for msg in msgs:
+                received.append([s.port_no for s in msg.body])
+
+        thread = hub.spawn(consume)
+        hub.sleep(0)
+        self._receive(dp, self._port_stats_reply(xid, True, [1]))
+        hub.sleep(0)
+        # The first part is delivered before the last one arrives.
+        eq_([[1]], received)
+
+        self._receive(dp, self._port_stats_reply(xid, False, [2]))
+        hub.joinall([thread])
+        eq_([[1], [2]], received)
+        eq_({}, dp._reply_futures)
+
 
 class TestOpenFlowController(unittest.TestCase):
     """
@@ -0,0 +1,241 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+import logging
+import time
+import unittest
+
+from nose.tools import eq_, ok_
+
+from ryu.base import app_manager  # To suppress cyclic import
+from ryu.controller import controller
+from ryu.controller import handler
+from ryu.controller import ofp_event
+from ryu.controller import ofp_handler
+from ryu.lib.pack_utils import msg_pack_into
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import packet
+from ryu.lib.packet import tcp
+from ryu.lib.packet import vlan
+from ryu.ofproto import ether
+from ryu.ofproto import inet
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_0
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.tests import test_lib
+
+
+LOG = logging.getLogger(__name__)
+
+
+def _frame(*protocols):
+    pkt = packet.Packet()
+    for p in protocols:
+        pkt.add_protocol(p)
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def _tcp_frame(src_port=1234, dst_port=80, seq=0, vid=None):
+    eth_type = ether.ETH_TYPE_8021Q if vid else ether.ETH_TYPE_IP
+    protocols = [ethernet.ethernet('00:00:00:00:00:02', '00:00:00:00:00:01',
+                                   eth_type)]
+    if vid:
+        protocols.append(vlan.vlan(vid=vid, ethertype=ether.ETH_TYPE_IP))
+    protocols.append(ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2',
+                               proto=inet.IPPROTO_TCP))
+    protocols.append(tcp.tcp(src_port=src_port, dst_port=dst_port, seq=seq))
+    return _frame(*protocols)
+
+
+class _PacketIn(object):
+    def __init__(self, dpid=1, version=ofproto_v1_3.OFP_VERSION):
+        self.dp = ofproto_protocol.ProtocolDesc(version)
+        self.dp.id = dpid
+
+    def __call__(self, data, in_port=1, now=100.0):
+        parser = self.dp.ofproto_parser
+        if self.dp.ofproto.OFP_VERSION == ofproto_v1_0.OFP_VERSION:
+            msg = parser.OFPPacketIn(self.dp, in_port=in_port, data=data)
+        else:
+            msg = parser.OFPPacketIn(
+                self.dp, match=parser.OFPMatch(in_port=in_port), data=data)
+        ev = ofp_event.EventOFPPacketIn(msg)
+        ev.timestamp = now
+        return ev
+
+
+def _packet_in_msg(data, in_port=1, xid=0):
+    # OFPPacketIn of OpenFlow 1.3 has no serializer.
+    ofp = ofproto_v1_3
+    buf = bytearray(ofp.OFP_PACKET_IN_SIZE - ofp.OFP_MATCH_SIZE)
+    ofproto_v1_3_parser.OFPMatch(in_port=in_port).serialize(buf, len(buf))
+    buf += bytearray(2) + data
+    msg_pack_into(ofp.OFP_HEADER_PACK_STR, buf, 0, ofp.OFP_VERSION,
+                  ofp.OFPT_PACKET_IN, len(buf), xid)
+    msg_pack_into(ofp.OFP_PACKET_IN_PACK_STR, buf, ofp.OFP_HEADER_SIZE,
+                  ofp.OFP_NO_BUFFER, len(data), ofp.OFPR_NO_MATCH, 0, 0)
+    return bytes(buf)
+
+
+class Test_PacketInAdmission(unittest.TestCase):
+
+    def test_disabled(self):
+        admission = ofp_handler.PacketInAdmission()
+        ok_(not admission)
+        ok_(ofp_handler.PacketInAdmission(rate=10))
+        ok_(ofp_handler.PacketInAdmission(coalesce_window=0.1))
+
+    def test_rate(self):
+        admission = ofp_handler.PacketInAdmission(rate=10, burst=3)
+        packet_in = _PacketIn()
+        data = _tcp_frame()
+
+        admitted = [admission.admit(packet_in(data, now=100.0))
+                    for _ in range(5)]
+        eq_([True, True, True, False, False], admitted)
+        # Another port has its own bucket.
+        ok_(admission.admit(packet_in(data, in_port=2, now=100.0)))
+        # One token per 0.1 second is refilled.
+        ok_(admission.admit(packet_in(data, now=100.15)))
+        ok_(not admission.admit(packet_in(data, now=100.15)))
+        # The bucket holds no more than burst tokens.
+        admitted = [admission.admit(packet_in(data, now=200.0))
+                    for _ in range(5)]
+        eq_([True, True, True, False, False], admitted)
+
+        eq_({1: {'admitted': 8, 'rate_limited': 5, 'coalesced': 0}},
+            admission.stats())
+
+    def test_default_burst(self):
+        eq_(1, ofp_handler.PacketInAdmission(rate=0.5).burst)
+        eq_(100, ofp_handler.PacketInAdmission(rate=100).burst)
+
+    def test_coalesce(self):
+        admission = ofp_handler.PacketInAdmission(coalesce_window=0.5)
+        packet_in = _PacketIn()
+
+        ok_(admission.admit(packet_in(_tcp_frame(), now=100.0)))
+        ok_(not admission.admit(packet_in(_tcp_frame(seq=1), now=100.2)))
+        # Other flows and ports are not suppressed.
+        ok_(admission.admit(packet_in(_tcp_frame(src_port=1), now=100.2)))
+        ok_(admission.admit(packet_in(_tcp_frame(vid=10), now=100.2)))
+        ok_(admission.admit(packet_in(_tcp_frame(), in_port=2, now=100.2)))
+        # The window starts at the admitted message.
+        ok_(admission.admit(packet_in(_tcp_frame(), now=100.5)))
+
+        eq_({1: {'admitted': 5, 'rate_limited': 0, 'coalesced': 1}},
+            admission.stats())
+
+    def test_coalesce_purge(self):
+        admission = ofp_handler.PacketInAdmission(coalesce_window=1)
+        packet_in = _PacketIn()
+
+        for i in range(100):
+            admission.admit(packet_in(_tcp_frame(src_port=i), now=100.0))
+        eq_(100, len(admission._recent))
+        admission.admit(packet_in(_tcp_frame(), now=101.5))
+        eq_(1, len(admission._recent))
+
+    def test_coalesced_messages_do_not_consume_tokens(self):
+        admission = ofp_handler.PacketInAdmission(
+            rate=1, burst=2, coalesce_window=1)
+        packet_in = _PacketIn()
+
+        ok_(admission.admit(packet_in(_tcp_frame(), now=100.0)))
+        for _ in range(10):
+            ok_(not admission.admit(packet_in(_tcp_frame(), now=100.0)))
+        ok_(admission.admit(packet_in(_tcp_frame(src_port=1), now=100.0)))
+        ok_(not admission.admit(packet_in(_tcp_frame(src_port=2), now=100.0)))
+
+        eq_({1: {'admitted': 2, 'rate_limited': 1, 'coalesced': 10}},
+            admission.stats())
+
+    def test_stats_per_datapath(self):
+        admission = ofp_handler.PacketInAdmission(rate=1, burst=1)
+        data = _tcp_frame()
+
+        ok_(admission.admit(_PacketIn(dpid=1)(data)))
+        ok_(admission.admit(_PacketIn(dpid=2)(data)))
+        ok_(not admission.admit(_PacketIn(dpid=2)(data)))
+
+        eq_({1: {'admitted': 1, 'rate_limited': 0, 'coalesced': 0},
+             2: {'admitted': 1, 'rate_limited': 1, 'coalesced': 0}},
+            admission.stats())
+
+    def test_of10(self):
+        admission = ofp_handler.PacketInAdmission(rate=1, burst=1)
+        packet_in = _PacketIn(version=ofproto_v1_0.OFP_VERSION)
+        data = _tcp_frame()
+
+        ok_(admission.admit(packet_in(data, in_port=1)))
+        ok_(admission.admit(packet_in(data, in_port=2)))
+        ok_(not admission.admit(packet_in(data, in_port=1)))
+
+    def test_recv_loop(self):
+        stream = b''
+        for i in range(10):
+            stream += _packet_in_msg(_tcp_frame(src_port=i % 2), xid=i)
+
+        segments = [stream, b'']
+
+        def recv_into(buf, nbytes=0):
+            data = segments.pop(0)
+            buf[:len(data)] = data
+            return len(data)
+
+        sock = mock.Mock()
+        sock.recv_into.side_effect = recv_into
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(sock, mock.Mock())
+        dp.state = handler.MAIN_DISPATCHER
+        received = []
+        dp.ofp_brick = app_manager.RyuApp()
+        dp.ofp_brick.packet_in_admission = ofp_handler.PacketInAdmission(
+            coalesce_window=10)
+        dp.ofp_brick.register_observer(ofp_event.EventOFPPacketIn,
+                                       'observer', [handler.MAIN_DISPATCHER])
+        with mock.patch.object(dp.ofp_brick, 'send_event_to_observers',
+                               side_effect=lambda ev, state:
+                               received.append(ev.msg)):
+            dp._recv_loop()
+
+        eq_(2, len(received))
+        eq_({None: {'admitted': 2, 'rate_limited': 0, 'coalesced': 8}},
+            dp.ofp_brick.packet_in_admission.stats())
+
+    @test_lib.benchmark
+    def test_admit_benchmark(self):
+        num_msgs = 20000
+        packet_in = _PacketIn()
+        events = [packet_in(_tcp_frame(src_port=i % 100), now=100.0)
+                  for i in range(num_msgs)]
+        admission = ofp_handler.PacketInAdmission(
+            rate=1000, coalesce_window=1)
+
+        start = time.time()
+        admitted = sum(1 for ev in events if admission.admit(ev))
+        elapsed = time.time() - start
+
+        eq_(100, admitted)
+        LOG.info('PacketInAdmission.admit: %.2f usec/msg',
+                 elapsed / num_msgs * 1e6)
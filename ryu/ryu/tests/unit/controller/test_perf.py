@@ -0,0 +1,241 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+import json
+import logging
+import os
+import sys
+import time
+import unittest
+
+from nose.tools import eq_, ok_
+
+from ryu.base import app_manager  # To suppress cyclic import
+from ryu.app import wsgi
+from ryu.controller import controller
+from ryu.controller import event
+from ryu.controller import handler
+from ryu.controller import ofp_event
+from ryu.controller import perf
+from ryu.tests import test_lib
+from ryu.tests.unit.controller.test_controller import Test_Datapath
+
+
+LOG = logging.getLogger(__name__)
+
+
+class _Event(event.EventBase):
+    pass
+
+
+def _app():
+    # Defined on each call, because test_manager reloads app_manager
+    # and RyuApp.__init__ refers to the reloaded class
+    class _App(app_manager.RyuApp):
+
+        def __init__(self, *args, **kwargs):
+            super(_App, self).__init__(*args, **kwargs)
+            self.register_handler(_Event, self._handle)
+
+        def _handle(self, ev):
+            pass
+
+    return _App()
+
+
+def _packet_in_stream(num_msgs):
+    this_dir = os.path.dirname(sys.modules[__name__].__file__)
+    packet_data_file = os.path.join(
+        this_dir, '../../packet_data/of13/4-4-ofp_packet_in.packet')
+    return open(packet_data_file, 'rb').read() * num_msgs
+
+
+class Test_Histogram(unittest.TestCase):
+
+    def test_observe(self):
+        hist = perf.Histogram()
+        eq_(0.0, hist.quantile(0.5))
+        for value in (0.00002, 0.00002, 0.0003, 20.0):
+            hist.observe(value)
+
+        eq_(4, hist.count)
+        eq_(20.0, hist.max)
+        eq_(2, hist.counts[perf.BUCKETS.index(0.000025)])
+        eq_(1, hist.counts[perf.BUCKETS.index(0.0005)])
+        eq_(1, hist.counts[-1])
+        eq_(0.000025, hist.quantile(0.5))
+        eq_(0.0005, hist.quantile(0.75))
+        eq_(20.0, hist.quantile(0.99))
+        d = hist.to_dict()
+        eq_(4, d['count'])
+        self.assertAlmostEqual(hist.sum / 4, d['avg'])
+
+
+class Test_perf(unittest.TestCase):
+
+    def setUp(self):
+        perf.CONF.set_override('perf_stats', True)
+        self.addCleanup(perf.CONF.clear_override, 'perf_stats')
+        perf.PARSE_TIME.clear()
+
+    def _datapath(self, stream, dpid=1):
+        with mock.patch('ryu.controller.controller.Datapath.set_state'):
+            dp = controller.Datapath(Test_Datapath._StreamSocket(stream),
+                                     mock.Mock())
+        dp.state = handler.MAIN_DISPATCHER
+        dp.id = dpid
+        dp.ofp_brick = app_manager.RyuApp()
+        dp.ofp_brick.register_observer(ofp_event.EventOFPPacketIn,
+                                       'observer', [handler.MAIN_DISPATCHER])
+        dp.ofp_brick.send_event_to_observers = lambda ev, state: None
+        return dp
+
+    def test_datapath(self):
+        stream = _packet_in_stream(10)
+        dp = self._datapath(stream, dpid=0x1234)
+        dp.connected_at -= 10
+        dp._recv_loop()
+        dp.send(b'x' * 100)
+
+        eq_({'msgs_in': 10, 'bytes_in': len(stream),
+             'msgs_out': 1, 'bytes_out': 100}, dp.perf_stats)
+        eq_(10, perf.PARSE_TIME['OFPPacketIn'].count)
+
+        stats = perf.collect()
+        ok_(stats['enabled'])
+        dp_stats = stats['datapaths']['0000000000001234']
+        eq_(10, dp_stats['msgs_in'])
+        self.assertAlmostEqual(1.0, dp_stats['msgs_in_per_sec'], places=1)
+        eq_(10, stats['parse_time']['OFPPacketIn']['count'])
+        # Reading the rates does not change them.
+        stats = perf.collect()
+        self.assertAlmostEqual(
+            1.0, stats['datapaths']['0000000000001234']['msgs_in_per_sec'],
+            places=1)
+
+        text = perf.prometheus_text()
+        ok_('ryu_datapath_received_messages_total{dpid="0000000000001234"} '
+            '10\n' in text)
+        ok_('ryu_ofp_parse_seconds_count{msg="OFPPacketIn"} 10\n' in text)
+        ok_('ryu_ofp_parse_seconds_bucket{msg="OFPPacketIn",le="+Inf"} 10\n'
+            in text)
+
+        # The sampler sets the rates over its window.
+        now = time.time()
+        perf.sample(now)
+        stats = perf.collect()['datapaths']['0000000000001234']
+        self.assertAlmostEqual(1.0, stats['msgs_in_per_sec'], places=1)
+        dp.perf_stats['msgs_in'] += 20
+        perf.sample(now + 5)
+        for _ in range(2):
+            stats = perf.collect()['datapaths']['0000000000001234']
+            eq_(4.0, stats['msgs_in_per_sec'])
+            eq_(0.0, stats['bytes_out_per_sec'])
+
+        dp.is_active = False
+        ok_('0000000000001234' not in perf.collect()['datapaths'])
+
+    def test_malformed(self):
+        dp = self._datapath(_packet_in_stream(2))
+        with mock.patch('ryu.ofproto.ofproto_parser.msg', return_value=None):
+            dp._recv_loop()
+        eq_(2, dp.perf_stats['msgs_in'])
+        eq_({}, perf.collect()['parse_time'])
+        ok_('NoneType' not in perf.prometheus_text())
+
+    def test_disabled(self):
+        perf.CONF.set_override('perf_stats', False)
+        dp = self._datapath(_packet_in_stream(10))
+        dp._recv_loop()
+        eq_(10, dp.perf_stats['msgs_in'])
+        eq_({}, perf.PARSE_TIME)
+
+        app = _app()
+        eq_(None, app.handler_latency)
+        eq_(None, app.events.wait_histograms)
+
+    def test_app(self):
+        app = _app()
+        app.name = 'perf_test_app'
+        for _ in range(5):
+            app._send_event(_Event(), None)
+        app.stop()
+        app._event_loop()
+
+        eq_(5, app.handler_latency['_handle'].count)
+        wait = app.events.wait_histograms
+        eq_(6, wait[event.EVENT_PRIORITY_DEFAULT].count)
+
+        stats = perf.collect()['apps']['perf_test_app']
+        eq_(5, stats['handlers']['_handle']['count'])
+        eq_(6, stats['event_queue']['default']['wait']['count'])
+        eq_(6, stats['event_queue']['default']['dequeued'])
+
+        text = perf.prometheus_text()
+        ok_('ryu_event_handler_seconds_count{app="perf_test_app",'
+            'handler="_handle"} 5\n' in text)
+        ok_('ryu_event_queue_wait_seconds_count{app="perf_test_app",'
+            'priority="default"} 6\n' in text)
+        ok_('ryu_event_queue_enqueued_total{app="perf_test_app",'
+            'priority="default"} 6\n' in text)
+
+    def test_label_escape(self):
+        eq_('{a="x\\"y\\\\z\\n"}', perf._labels([('a', 'x"y\\z\n')]))
+
+    def test_wsgi(self):
+        app = _app()
+        app.name = 'perf_test_wsgi'
+        wsgi_app = wsgi.WSGIApplication()
+
+        res = wsgi_app({'REQUEST_METHOD': 'GET',
+                        'PATH_INFO': '/perf/stats'},
+                       lambda s, _: eq_(s, '200 OK'))
+        stats = json.loads(b''.join(res).decode('utf-8'))
+        ok_('perf_test_wsgi' in stats['apps'])
+
+        headers = []
+        res = wsgi_app({'REQUEST_METHOD': 'GET', 'PATH_INFO': '/metrics'},
+                       lambda s, h: headers.extend(h))
+        ok_(('Content-Type', 'text/plain; version=0.0.4; charset=UTF-8')
+            in headers)
+        ok_(b'app="perf_test_wsgi"' in b''.join(res))
+
+    def test_wsgi_disabled(self):
+        perf.CONF.set_override('perf_stats', False)
+        wsgi.WSGIApplication()({'REQUEST_METHOD': 'GET',
+                                'PATH_INFO': '/metrics'},
+                               lambda s, _: eq_(s, '404 Not Found'))
+
+    @test_lib.benchmark
+    def test_recv_loop_benchmark(self):
+        num_msgs = 20000
+        stream = _packet_in_stream(num_msgs)
+        elapsed = {}
+        for enabled in (False, True):
+            perf.CONF.set_override('perf_stats', enabled)
+            dp = self._datapath(stream)
+            start = time.time()
+            dp._recv_loop()
+            elapsed[enabled] = time.time() - start
+            eq_(num_msgs, dp.perf_stats['msgs_in'])
+        LOG.info('_recv_loop packet-in: %.2f usec/msg, '
+                 'with --perf-stats %.2f usec/msg',
+                 elapsed[False] / num_msgs * 1e6,
+                 elapsed[True] / num_msgs * 1e6)
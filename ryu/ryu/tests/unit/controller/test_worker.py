@@ -0,0 +1,130 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+import unittest
+
+import msgpack
+from nose.tools import eq_, ok_
+from six.moves import reload_module
+
+from ryu.base import app_manager  # To suppress cyclic import
+from ryu.controller import worker
+from ryu.controller import worker_channel
+from ryu.lib import hub
+hub.patch()
+
+
+class Test_worker(unittest.TestCase):
+    """
+    Test cases for ryu.controller.worker
+    """
+
+    def test_single_process(self):
+        eq_(None, worker.worker_id())
+        eq_(1, worker.num_workers())
+        ok_(worker.is_primary())
+        ok_(worker.is_local(0))
+        ok_(worker.is_local(5))
+
+    def test_is_local(self):
+        with mock.patch.object(worker, '_worker_id', 1), \
+                mock.patch.object(worker, '_num_workers', 3):
+            ok_(not worker.is_primary())
+            eq_([1, 4], [i for i in range(6) if worker.is_local(i)])
+
+    def test_channel_send(self):
+        channel = worker._Channel(3)
+        self.addCleanup(channel.close)
+        channel.index = 0
+        channel.send(b'hello')
+        for i in (1, 2):
+            eq_(b'hello', channel._pairs[i][0].recv(worker.MAX_MSG_SIZE))
+        channel._pairs[0][0].setblocking(False)
+        self.assertRaises(IOError, channel._pairs[0][0].recv, 1)
+
+
+class Test_WorkerChannel(unittest.TestCase):
+    """
+    Test cases for ryu.controller.worker_channel.WorkerChannel
+    """
+
+    def setUp(self):
+        # test_manager reloads app_manager; WorkerChannel has to derive
+        # from the reloaded RyuApp
+        if not issubclass(worker_channel.WorkerChannel, app_manager.RyuApp):
+            reload_module(worker_channel)
+
+    def test_publish_without_workers(self):
+        app = worker_channel.WorkerChannel()
+        app.set_global('key', 1)
+        eq_(1, app.get_global('key'))
+
+    def test_publish(self):
+        channel = mock.Mock()
+        with mock.patch.object(worker, '_channel', channel), \
+                mock.patch.object(worker, '_worker_id', 1):
+            app = worker_channel.WorkerChannel()
+            app.set_global('key', [1, 2])
+        buf, = channel.send.call_args[0]
+        eq_([1, worker_channel.TOPIC_STATE, ['key', [1, 2]]],
+            msgpack.unpackb(buf, raw=False))
+
+    def test_recv_loop(self):
+        channel = mock.Mock()
+        channel.recv.side_effect = [
+            msgpack.packb([0, worker_channel.TOPIC_STATE, ['key', 'value']],
+                          use_bin_type=True),
+            msgpack.packb([2, 'app', {'a': 1}], use_bin_type=True),
+            IOError()]
+        with mock.patch.object(worker, '_channel', channel):
+            app = worker_channel.WorkerChannel()
+        with mock.patch.object(app, 'send_event_to_observers') as send_mock:
+            app._recv_loop()
+
+        eq_('value', app.get_global('key'))
+        evs = [args[0] for args, _kwargs in send_mock.call_args_list]
+        eq_([(0, worker_channel.TOPIC_STATE, ['key', 'value']),
+             (2, 'app', {'a': 1})],
+            [(ev.src, ev.topic, ev.data) for ev in evs])
+
+    def test_relay_topology(self):
+        from ryu.topology import event as topology_event
+        brick = mock.Mock()
+        channel = mock.Mock()
+        with mock.patch.dict(app_manager.SERVICE_BRICKS,
+                             {'switches': brick}), \
+                mock.patch.object(worker, '_channel', channel), \
+                mock.patch.object(worker, '_worker_id', 1):
+            app = worker_channel.WorkerChannel()
+            app._observe_topology()
+            ok_(mock.call(topology_event.EventPortAdd, 'worker_channel')
+                in brick.register_observer.call_args_list)
+
+            port = mock.Mock()
+            port.to_dict.return_value = {'port_no': '00000001'}
+            port.is_reserved.return_value = False
+            app._topology_handler(topology_event.EventPortAdd(port))
+            port.is_reserved.return_value = True
+            app._topology_handler(topology_event.EventPortDelete(port))
+        eq_(1, channel.send.call_count)
+        buf, = channel.send.call_args[0]
+        eq_([1, worker_channel.TOPIC_TOPOLOGY,
+             ['EventPortAdd', {'port_no': '00000001'}]],
+            msgpack.unpackb(buf, raw=False))
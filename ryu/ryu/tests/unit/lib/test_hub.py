@@ -14,18 +14,147 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import hashlib
+import logging
+import os
+import struct
+import subprocess
+import sys
 import time
 import unittest
-from nose.tools import raises
+from nose.tools import eq_, raises
 
 from ryu.lib import hub
+from ryu.ofproto import ofproto_common
+from ryu.ofproto import ofproto_parser
 hub.patch()
 
 
+LOG = logging.getLogger('test_hub')
+
+
 class MyException(BaseException):
     pass
 
 
+def _recv_msg(sock):
+    buf = b''
+    while len(buf) < ofproto_common.OFP_HEADER_SIZE or \
+            len(buf) < ofproto_parser.header(buf)[2]:
+        data = sock.recv(4096)
+        if not data:
+            return None
+        buf += data
+    return buf
+
+
+def _packet_in_round_trip(num_msgs):
+    """
+    Sends num_msgs PacketIn messages through a StreamServer, which answers
+    each with a PacketOut, one at a time.  Returns the mean round-trip
+    time in microseconds.
+    """
+    data_dir = os.path.join(os.path.dirname(__file__),
+                            '../../packet_data/of13')
+    with open(os.path.join(data_dir, '4-4-ofp_packet_in.packet'), 'rb') as f:
+        packet_in = f.read()
+    with open(os.path.join(data_dir, '4-1-ofp_packet_out.packet'), 'rb') as f:
+        packet_out = f.read()
+
+    def _handle(sock, addr):
+        while _recv_msg(sock):
+            sock.sendall(packet_out)
+        sock.close()
+
+    server = hub.StreamServer(('127.0.0.1', 0), _handle)
+    server_thread = hub.spawn(server.serve_forever)
+    client = hub.StreamClient(('127.0.0.1', server.server.getsockname()[1]))
+    sock = client.connect()
+    start = time.time()
+    for _ in range(num_msgs):
+        sock.sendall(packet_in)
+        assert _recv_msg(sock) == packet_out
+    elapsed = time.time() - start
+    sock.close()
+    hub.kill(server_thread)
+    return elapsed / num_msgs * 1000000
+
+
+def _ws_recv(sock, size):
+    buf = b''
+    while len(buf) < size:
+        data = sock.recv(size - len(buf))
+        if not data:
+            raise EOFError()
+        buf += data
+    return buf
+
+
+def _ws_send_frame(sock, opcode, payload, fin=True):
+    mask = b'\x01\x02\x03\x04'
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', fin << 7 | opcode, 0x80 | length)
+    else:
+        header = struct.pack('!BBH', fin << 7 | opcode, 0x80 | 126, length)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    sock.sendall(header + mask + masked)
+
+
+def _ws_recv_frame(sock):
+    head, length = _ws_recv(sock, 2)
+    if length == 126:
+        (length, ) = struct.unpack('!H', _ws_recv(sock, 2))
+    elif length == 127:
+        (length, ) = struct.unpack('!Q', _ws_recv(sock, 8))
+    return head & 0x0f, _ws_recv(sock, length)
+
+
+def _websocket_echo():
+    """
+    Exchanges messages with an echo server of hub.WebSocketWSGI and
+    returns the list of (opcode, payload) of the frames received.
+    """
+    def _echo(ws):
+        while True:
+            msg = ws.wait()
+            if msg is None:
+                break
+            ws.send(msg)
+
+    server = hub.WSGIServer(('127.0.0.1', 0), hub.WebSocketWSGI(_echo))
+    server_thread = hub.spawn(server.serve_forever)
+    sock = hub.connect(('127.0.0.1', server.server.getsockname()[1]))
+    key = base64.b64encode(b'0123456789abcdef')
+    sock.sendall(b'GET /ws HTTP/1.1\r\n'
+                 b'Host: localhost\r\n'
+                 b'Upgrade: websocket\r\n'
+                 b'Connection: Upgrade\r\n'
+                 b'Sec-WebSocket-Key: ' + key + b'\r\n'
+                 b'Sec-WebSocket-Version: 13\r\n\r\n')
+    response = b''
+    while not response.endswith(b'\r\n\r\n'):
+        response += _ws_recv(sock, 1)
+    accept = base64.b64encode(hashlib.sha1(
+        key + b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11').digest())
+    assert response.startswith(b'HTTP/1.1 101 ')
+    assert b'\r\nSec-WebSocket-Accept: ' + accept + b'\r\n' in response
+
+    frames = []
+    _ws_send_frame(sock, 0x1, b'hello')
+    frames.append(_ws_recv_frame(sock))
+    # a fragmented message
+    _ws_send_frame(sock, 0x1, b'x' * 200, fin=False)
+    _ws_send_frame(sock, 0x0, b'y' * 100)
+    frames.append(_ws_recv_frame(sock))
+    _ws_send_frame(sock, 0x8, struct.pack('!H', 1000))
+    frames.append(_ws_recv_frame(sock))
+    sock.close()
+    hub.kill(server_thread)
+    return frames
+
+
 class Test_hub(unittest.TestCase):
     """ Test case for ryu.lib.hub
     """
@@ -237,3 +366,25 @@ class Test_hub(unittest.TestCase):
         # allow multiple sets unlike eventlet Event
         ev.set()
         ev.set()
+
+    def test_packet_in_round_trip(self):
+        with hub.Timeout(10):
+            self.assertGreater(_packet_in_round_trip(100), 0)
+
+    def test_hubs(self):
+        # The hub type is chosen at import time, so test each of them
+        # in its own process.  _packet_in_round_trip() checks the replies.
+        top_dir = os.path.join(os.path.dirname(__file__), '../../../..')
+        code = ('from ryu.tests.unit.lib import test_hub; '
+                'print(test_hub._packet_in_round_trip(100)); '
+                'print(test_hub._websocket_echo())')
+        expected = str([(0x1, b'hello'), (0x1, b'x' * 200 + b'y' * 100),
+                        (0x8, struct.pack('!H', 1000))])
+        for hub_type in ('eventlet', 'asyncio'):
+            env = dict(os.environ, RYU_HUB_TYPE=hub_type,
+                       PYTHONPATH=os.path.abspath(top_dir))
+            out = subprocess.check_output([sys.executable, '-c', code],
+                                          env=env, timeout=60)
+            round_trip, echo = out.decode().strip().splitlines()[-2:]
+            self.assertGreater(float(round_trip), 0)
+            eq_(expected, echo)
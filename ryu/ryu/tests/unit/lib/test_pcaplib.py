@@ -15,10 +15,14 @@
 
 from __future__ import print_function
 
+import io
 import logging
 import os
+import shutil
 import struct
 import sys
+import tempfile
+import time
 import unittest
 
 try:
@@ -27,10 +31,18 @@ except ImportError:
     from unittest import mock  # Python 3
 
 from nose.tools import eq_
+from nose.tools import ok_
 from nose.tools import raises
 
 from ryu.utils import binary_str
 from ryu.lib import pcaplib
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import flow_key
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import packet
+from ryu.lib.packet import tcp
+from ryu.lib.packet import udp
+from ryu.tests import test_lib
 
 LOG = logging.getLogger(__name__)
 
@@ -183,6 +195,227 @@ class Test_pcaplib_Reader(unittest.TestCase):
         self._test(os.path.join(PCAP_PACKET_DATA_DIR, 'little_endian.pcap'))
 
 
+def _pcapng_block(fmt, block_type, body):
+    body += b'\x00' * (-len(body) % 4)
+    block_len = struct.pack(fmt + 'I', len(body) + 12)
+    return struct.pack(fmt + 'I', block_type) + block_len + body + block_len
+
+
+def _pcapng_shb(fmt):
+    return _pcapng_block(fmt, 0x0a0d0d0a,
+                         struct.pack(fmt + 'IHHq', 0x1a2b3c4d, 1, 0, -1))
+
+
+def _pcapng_idb(fmt, linktype, tsresol=None):
+    body = struct.pack(fmt + 'HHI', linktype, 0, 0)
+    if tsresol is not None:
+        body += struct.pack(fmt + 'HHB3x', 9, 1, tsresol)
+        body += struct.pack(fmt + 'HH', 0, 0)
+    return _pcapng_block(fmt, 1, body)
+
+
+def _pcapng_epb(fmt, if_id, ts, data):
+    return _pcapng_block(fmt, 6, struct.pack(
+        fmt + 'IIIII', if_id, ts >> 32, ts & 0xffffffff, len(data),
+        len(data)) + data)
+
+
+def _udp_frame(dst_port, src_ip='10.0.0.1'):
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet())
+    pkt.add_protocol(ipv4.ipv4(proto=17, src=src_ip, dst='10.0.0.2'))
+    pkt.add_protocol(udp.udp(5000, dst_port))
+    pkt.add_protocol(b'payload')
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+def _tcp_frame():
+    pkt = packet.Packet()
+    pkt.add_protocol(ethernet.ethernet())
+    pkt.add_protocol(ipv4.ipv4(proto=6))
+    pkt.add_protocol(tcp.tcp(1234, 80))
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+class Test_pcaplib_IndexedReader(unittest.TestCase):
+    """
+    Test case for pcaplib.IndexedReader class
+    """
+
+    expected_outputs = Test_pcaplib_Reader.expected_outputs
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_pcap(self, frames):
+        path = os.path.join(self.tmp_dir, 'test.pcap')
+        w = pcaplib.Writer(open(path, 'wb'))
+        for i, buf in enumerate(frames):
+            w.write_pkt(buf, ts=1000 + i)
+        del w
+        return path
+
+    def _test(self, file_name):
+        reader = pcaplib.IndexedReader(open(file_name, 'rb'))
+        eq_(2, len(reader))
+        eq_(self.expected_outputs, list(reader))
+        eq_(self.expected_outputs[1], reader[-1])
+        eq_(self.expected_outputs[1:], reader[1:])
+        eq_([self.expected_outputs[:1], self.expected_outputs[1:]],
+            list(reader.batches(1)))
+        eq_([self.expected_outputs], list(reader.batches(10)))
+        eq_(pcaplib.LINKTYPE_ETHERNET, reader.linktype(0))
+        reader.close()
+
+        # without mmap
+        reader = pcaplib.IndexedReader(
+            io.BytesIO(open(file_name, 'rb').read()))
+        eq_(self.expected_outputs, list(reader))
+
+    def test_with_big_endian(self):
+        self._test(os.path.join(PCAP_PACKET_DATA_DIR, 'big_endian.pcap'))
+
+    def test_with_little_endian(self):
+        self._test(os.path.join(PCAP_PACKET_DATA_DIR, 'little_endian.pcap'))
+
+    def test_same_as_reader(self):
+        for name in sorted(os.listdir(PCAP_PACKET_DATA_DIR)):
+            path = os.path.join(PCAP_PACKET_DATA_DIR, name)
+            eq_(list(pcaplib.Reader(open(path, 'rb'))),
+                list(pcaplib.IndexedReader(open(path, 'rb'))), name)
+
+    def test_truncated(self):
+        buf = open(os.path.join(PCAP_PACKET_DATA_DIR, 'little_endian.pcap'),
+                   'rb').read()
+        reader = pcaplib.IndexedReader(io.BytesIO(buf[:-1]))
+        eq_(self.expected_outputs[:1], list(reader))
+        reader = pcaplib.IndexedReader(
+            io.BytesIO(buf[:pcaplib.PcapFileHdr.FILE_HDR_SIZE]))
+        eq_(0, len(reader))
+
+    def test_nsec(self):
+        buf = (pcaplib.PcapFileHdr.MAGIC_NUMBER_SWAPPED_NSEC +
+               struct.pack('<HHIIII', 2, 4, 0, 0, 65535, 1) +
+               struct.pack('<IIII', 10, 500000000, 4, 4) + b'data')
+        expected = [(10.5, b'data')]
+        eq_(expected, list(pcaplib.IndexedReader(io.BytesIO(buf))))
+        eq_(expected, list(pcaplib.Reader(io.BytesIO(buf))))
+
+    def test_match(self):
+        frames = [_udp_frame(5060), _tcp_frame(), _udp_frame(53),
+                  b'short', _udp_frame(5060, '10.0.0.3')]
+        path = self._write_pcap(frames)
+        reader = pcaplib.IndexedReader(
+            open(path, 'rb'), match=flow_key.match(ip_proto=17,
+                                                   dst_port=5060))
+        eq_([(1000.0, frames[0]), (1004.0, frames[4])], list(reader))
+        reader.close()
+
+        reader = pcaplib.IndexedReader(
+            open(path, 'rb'), match=flow_key.match(ip_src='10.0.0.3'))
+        eq_([(1004.0, frames[4])], list(reader))
+        reader.close()
+
+        self.assertRaises(ValueError, flow_key.match, ip_port=5060)
+
+    def _test_pcapng(self, fmt):
+        frame = _udp_frame(5060)
+        ip = frame[14:]
+        sll2 = struct.pack('!HHIHBB8s', 0x0800, 0, 2, 1, 4, 6,
+                           b'\x00\x11\x22\x33\x44\x55') + ip
+        sll = struct.pack('!HHH8sH', 0, 1, 6,
+                          b'\x00\x11\x22\x33\x44\x55', 0x0800) + ip
+        ts = 1700000000123456789
+        buf = (_pcapng_shb(fmt) +
+               _pcapng_idb(fmt, pcaplib.LINKTYPE_LINUX_SLL2, tsresol=9) +
+               _pcapng_idb(fmt, pcaplib.LINKTYPE_ETHERNET) +
+               _pcapng_epb(fmt, 0, ts, sll2) +
+               _pcapng_block(fmt, 4, b'\x00' * 4) +  # Name Resolution Block
+               _pcapng_epb(fmt, 1, ts // 1000, frame) +
+               # another section
+               _pcapng_shb(fmt) +
+               _pcapng_idb(fmt, pcaplib.LINKTYPE_LINUX_SLL, tsresol=0x83) +
+               _pcapng_idb(fmt, pcaplib.LINKTYPE_RAW) +
+               _pcapng_idb(fmt, pcaplib.LINKTYPE_IPV4) +
+               _pcapng_epb(fmt, 0, 8 * 3, sll) +
+               _pcapng_epb(fmt, 1, 0, ip) +
+               _pcapng_epb(fmt, 2, 0, ip))
+
+        reader = pcaplib.IndexedReader(io.BytesIO(buf))
+        eq_(5, len(reader))
+        eq_([sll2, frame, sll, ip, ip], [data for _, data in reader])
+        eq_([pcaplib.LINKTYPE_LINUX_SLL2, pcaplib.LINKTYPE_ETHERNET,
+             pcaplib.LINKTYPE_LINUX_SLL, pcaplib.LINKTYPE_RAW,
+             pcaplib.LINKTYPE_IPV4],
+            [reader.linktype(i) for i in range(5)])
+        ok_(abs(reader[0][0] - ts / 1e9) < 1e-6)
+        ok_(abs(reader[1][0] - ts / 1e9) < 1e-6)
+        eq_(3.0, reader[2][0])
+
+        reader = pcaplib.IndexedReader(io.BytesIO(buf), ethernet=True)
+        eth_ip = b'\x00' * 6 + b'\x00\x11\x22\x33\x44\x55\x08\x00' + ip
+        raw_ip = b'\x00' * 12 + b'\x08\x00' + ip
+        eq_([eth_ip, frame, eth_ip, raw_ip, raw_ip],
+            [data for _, data in reader])
+        # the lengths of the records, not of the converted frames
+        eq_([len(sll2), len(frame), len(sll), len(ip), len(ip)],
+            [reader.length(i) for i in range(5)])
+
+        reader = pcaplib.IndexedReader(io.BytesIO(buf), ethernet=True,
+                                       match=flow_key.match(dst_port=5060))
+        eq_(5, len(reader))
+        reader = pcaplib.IndexedReader(io.BytesIO(buf),
+                                       match=flow_key.match(dst_port=5060))
+        eq_([frame], [data for _, data in reader])
+
+    def test_pcapng_little_endian(self):
+        self._test_pcapng('<')
+
+    def test_pcapng_big_endian(self):
+        self._test_pcapng('>')
+
+    @raises(struct.error)
+    def test_pcapng_invalid_byte_order(self):
+        buf = _pcapng_block('<', 0x0a0d0d0a, b'\xff' * 16)
+        pcaplib.IndexedReader(io.BytesIO(buf))
+
+    @test_lib.benchmark
+    def test_read_benchmark(self):
+        num = 20000
+        frames = [_udp_frame(5060), _udp_frame(53), _tcp_frame()]
+        path = self._write_pcap(frames[i % 3] for i in range(num))
+
+        start = time.time()
+        count = sum(1 for _ in pcaplib.Reader(open(path, 'rb')))
+        elapsed_reader = time.time() - start
+        eq_(num, count)
+
+        start = time.time()
+        reader = pcaplib.IndexedReader(open(path, 'rb'))
+        count = sum(len(batch) for batch in reader.batches(1000))
+        elapsed_indexed = time.time() - start
+        eq_(num, count)
+        reader.close()
+
+        start = time.time()
+        reader = pcaplib.IndexedReader(
+            open(path, 'rb'), match=flow_key.match(dst_port=5060))
+        count = sum(len(batch) for batch in reader.batches(1000))
+        elapsed_match = time.time() - start
+        eq_((num + 2) // 3, count)
+        reader.close()
+
+        LOG.info('%d records: Reader %.2f usec, IndexedReader %.2f usec, '
+                 'with match %.2f usec per record', num,
+                 elapsed_reader / num * 1e6, elapsed_indexed / num * 1e6,
+                 elapsed_match / num * 1e6)
+
+
 class DummyFile(object):
 
     def __init__(self):
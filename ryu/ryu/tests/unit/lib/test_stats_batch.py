@@ -0,0 +1,237 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import struct
+import time
+import unittest
+
+from nose.tools import eq_, ok_
+
+from ryu.lib import stats_batch
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_0
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.tests import test_lib
+
+
+LOG = logging.getLogger(__name__)
+
+numpy = stats_batch.numpy
+
+
+class _Datapath(ofproto_protocol.ProtocolDesc):
+    def __init__(self, version=ofproto_v1_3.OFP_VERSION):
+        super(_Datapath, self).__init__(version)
+        self.stats_body_decoders = {}
+
+
+def _flow_stats(match, table_id=0, priority=100, duration_sec=1,
+                duration_nsec=0, packet_count=0, byte_count=0, cookie=0):
+    match_buf = bytearray()
+    match_len = match.serialize(match_buf, 0)
+    match_len += -match_len % 8  # padding
+    # followed by an instruction to check the entry length is honoured
+    inst = struct.pack('!HH4x', ofproto_v1_3.OFPIT_CLEAR_ACTIONS, 8)
+    return (struct.pack(ofproto_v1_3.OFP_FLOW_STATS_0_PACK_STR,
+                        ofproto_v1_3.OFP_FLOW_STATS_0_SIZE + match_len +
+                        len(inst),
+                        table_id, duration_sec, duration_nsec, priority,
+                        10, 20, 0, cookie, packet_count, byte_count) +
+            bytes(match_buf.ljust(match_len, b'\x00')) + inst)
+
+
+def _multipart_reply(type_, body, xid=1):
+    msg_len = ofproto_v1_3.OFP_MULTIPART_REPLY_SIZE + len(body)
+    return (struct.pack(ofproto_v1_3.OFP_HEADER_PACK_STR,
+                        ofproto_v1_3.OFP_VERSION,
+                        ofproto_v1_3.OFPT_MULTIPART_REPLY, msg_len, xid) +
+            struct.pack('!HH4x', type_, 0) + body)
+
+
+def _parse(datapath, buf):
+    version, msg_type, msg_len, xid = ofproto_parser.header(buf)
+    return ofproto_parser.msg(datapath, version, msg_type, msg_len, xid,
+                              buf)
+
+
+def _matches(num):
+    parser = ofproto_v1_3_parser
+    return [parser.OFPMatch(eth_type=0x0800, ipv4_src='10.0.0.%d' % (i % 250),
+                            ipv4_dst='10.0.1.%d' % (i // 250),
+                            ip_proto=6, tcp_dst=80 + i)
+            for i in range(num)]
+
+
+class Test_stats_body_decoders(unittest.TestCase):
+
+    def test_decoder(self):
+        calls = []
+
+        def decoder(buf, offset, msg_len):
+            calls.append((bytes(buf[offset:msg_len]), msg_len))
+            return 'decoded'
+
+        dp = _Datapath()
+        dp.stats_body_decoders[ofproto_v1_3.OFPMP_PORT_STATS] = decoder
+        buf = _multipart_reply(ofproto_v1_3.OFPMP_PORT_STATS, b'body')
+        msg = _parse(dp, buf)
+        ok_(isinstance(msg, ofproto_v1_3_parser.OFPPortStatsReply))
+        eq_('decoded', msg.body)
+        eq_([(b'body', len(buf))], calls)
+
+        # other types are not affected
+        buf = _multipart_reply(ofproto_v1_3.OFPMP_FLOW,
+                               _flow_stats(_matches(1)[0]))
+        eq_(1, len(_parse(dp, buf).body))
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class Test_stats_batch(unittest.TestCase):
+
+    def setUp(self):
+        self.dp = _Datapath()
+        stats_batch.enable(self.dp)
+
+    def test_enable(self):
+        eq_(set([ofproto_v1_3.OFPMP_FLOW, ofproto_v1_3.OFPMP_PORT_STATS]),
+            set(self.dp.stats_body_decoders))
+        stats_batch.disable(self.dp)
+        eq_({}, self.dp.stats_body_decoders)
+        self.assertRaises(ValueError, stats_batch.enable,
+                          _Datapath(ofproto_v1_0.OFP_VERSION))
+
+    def test_flow_stats(self):
+        matches = _matches(3)
+        body = b''.join(
+            _flow_stats(m, table_id=i, priority=100 + i, duration_sec=5,
+                        duration_nsec=i * 1000, packet_count=i * 10,
+                        byte_count=i * 1000, cookie=i << 40)
+            for i, m in enumerate(matches))
+        buf = _multipart_reply(ofproto_v1_3.OFPMP_FLOW, body)
+        batch = _parse(self.dp, buf).body
+        expected = _parse(_Datapath(), buf).body
+
+        ok_(isinstance(batch, stats_batch.FlowStatsBatch))
+        eq_(3, len(batch))
+        for name in stats_batch.FLOW_STATS_DTYPE.names:
+            if name == 'flow_id':
+                continue
+            eq_([getattr(s, name) for s in expected], list(batch[name]))
+        eq_([0, 1, 2], list(batch['flow_id']))
+        for i, s in enumerate(expected):
+            eq_(s.match.to_jsondict(), batch.match(i).to_jsondict())
+        eq_(['10.0.0.0', '10.0.0.1', '10.0.0.2'],
+            list(batch.match_column('ipv4_src')))
+        eq_([None] * 3, list(batch.match_column('udp_dst')))
+
+    def test_flow_rates(self):
+        m1, m2, m3 = _matches(3)
+        prev = _parse(self.dp, _multipart_reply(
+            ofproto_v1_3.OFPMP_FLOW,
+            _flow_stats(m1, duration_sec=10, packet_count=10,
+                        byte_count=1000) +
+            _flow_stats(m2, duration_sec=10, packet_count=10,
+                        byte_count=1000))).body
+        cur = _parse(self.dp, _multipart_reply(
+            ofproto_v1_3.OFPMP_FLOW,
+            # new flow
+            _flow_stats(m3, duration_sec=1) +
+            # re-installed
+            _flow_stats(m2, duration_sec=1, packet_count=1) +
+            _flow_stats(m1, duration_sec=12, duration_nsec=500000000,
+                        packet_count=30, byte_count=6000))).body
+
+        # flows are interned across replies
+        eq_([2, 1, 0], list(cur['flow_id']))
+        eq_(3, len(cur.flows))
+
+        rates = stats_batch.flow_rates(prev, cur)
+        eq_(1, len(rates))
+        eq_(0, rates['flow_id'][0])
+        self.assertAlmostEqual(2.5, rates['elapsed'][0])
+        eq_(20, rates['packet_delta'][0])
+        eq_(5000, rates['byte_delta'][0])
+        self.assertAlmostEqual(8.0, rates['packet_rate'][0])
+        self.assertAlmostEqual(2000.0, rates['byte_rate'][0])
+
+        # counters going backwards do not wrap around
+        later = _parse(self.dp, _multipart_reply(
+            ofproto_v1_3.OFPMP_FLOW,
+            _flow_stats(m1, duration_sec=13, packet_count=5,
+                        byte_count=100))).body
+        rates = stats_batch.flow_rates(cur, later)
+        eq_([0], list(rates['flow_id']))
+        eq_([0], list(rates['packet_delta']))
+        eq_([0], list(rates['byte_delta']))
+
+    def test_concatenate(self):
+        matches = _matches(2)
+        batches = [_parse(self.dp, _multipart_reply(
+            ofproto_v1_3.OFPMP_FLOW, _flow_stats(m))).body for m in matches]
+        batch = stats_batch.FlowStatsBatch.concatenate(batches)
+        eq_([0, 1], list(batch['flow_id']))
+
+    def test_port_stats(self):
+        body = b''.join(
+            struct.pack(ofproto_v1_3.OFP_PORT_STATS_PACK_STR,
+                        *([port_no] + list(range(i, i + 14))))
+            for i, port_no in enumerate((1, 2, ofproto_v1_3.OFPP_LOCAL)))
+        buf = _multipart_reply(ofproto_v1_3.OFPMP_PORT_STATS, body)
+        records = _parse(self.dp, buf).body
+        expected = _parse(_Datapath(), buf).body
+
+        eq_(3, len(records))
+        eq_(ofproto_v1_3_parser.OFPPortStats._fields, records.dtype.names)
+        eq_([tuple(s) for s in expected], [tuple(r) for r in records.tolist()])
+
+    def test_truncated(self):
+        # ofp_flow_stats with length 0
+        body = b'\x00\x00' + _flow_stats(_matches(1)[0])[2:]
+        # logged and dropped by ofproto_parser.msg()
+        eq_(None, _parse(self.dp,
+                         _multipart_reply(ofproto_v1_3.OFPMP_FLOW, body)))
+
+    @test_lib.benchmark
+    def test_flow_stats_benchmark(self):
+        num_entries = 10000
+        matches = _matches(num_entries)
+        buf = b''.join(_flow_stats(m, packet_count=i, byte_count=i * 100)
+                       for i, m in enumerate(matches))
+
+        start = time.time()
+        offset = 0
+        objects = []
+        while offset < len(buf):
+            s = ofproto_v1_3_parser.OFPFlowStats.parser(buf, offset)
+            objects.append(s)
+            offset += s.length
+        elapsed_objects = time.time() - start
+
+        decoder = stats_batch.FlowStatsDecoder()
+        elapsed = []
+        for _ in range(2):  # the 2nd poll finds the flows interned
+            start = time.time()
+            batch = decoder(buf, 0, len(buf))
+            elapsed.append(time.time() - start)
+        eq_(num_entries, len(batch))
+        eq_([s.byte_count for s in objects], list(batch['byte_count']))
+        LOG.info('OFPFlowStats: objects %.2f usec/entry, '
+                 'columnar 1st %.2f usec/entry, 2nd %.2f usec/entry',
+                 elapsed_objects / num_entries * 1e6,
+                 elapsed[0] / num_entries * 1e6,
+                 elapsed[1] / num_entries * 1e6)
@@ -17,11 +17,24 @@
 from __future__ import print_function
 
 import base64
+import inspect
+import json
+import logging
 import six
+import time
 import unittest
 from nose.tools import eq_
 
 from ryu.lib import stringify
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.ofproto import ofproto_v1_4
+from ryu.ofproto import ofproto_v1_4_parser
+from ryu.tests import test_lib
+
+
+LOG = logging.getLogger(__name__)
 
 
 class C1(stringify.StringifyMixin):
@@ -32,6 +45,74 @@ class C1(stringify.StringifyMixin):
         self.c = c
 
 
+class C2(stringify.StringifyMixin):
+    _TYPE = {
+        'ascii': ['name'],
+    }
+    _opt_attributes = ['prop']
+    _class_prefixes = ['C1']
+
+    def __init__(self, name, type_, obj=None, values=None, prop=None):
+        self.name = name
+        self.type_ = type_
+        self.obj = obj
+        self.values = values
+        self.callback = len
+
+    @property
+    def prop(self):
+        return len(self.name)
+
+
+class C3(C2):
+    # per-attribute hooks are still honoured
+    @classmethod
+    def _encode_value(cls, k, v, encode_string=base64.b64encode):
+        if k == 'type':
+            return 'type-%d' % v
+        return super(C3, cls)._encode_value(k, v, encode_string)
+
+    @classmethod
+    def _decode_value(cls, k, json_value, decode_string=base64.b64decode,
+                      **additional_args):
+        if k == 'type':
+            return int(json_value[5:])
+        return super(C3, cls)._decode_value(k, json_value, decode_string)
+
+
+def _getmembers_python_attrs(msg_):
+    # obj_python_attrs() as implemented with inspect.getmembers()
+    base = getattr(msg_, '_base_attributes', [])
+    opt = getattr(msg_, '_opt_attributes', [])
+    for k, v in inspect.getmembers(msg_):
+        if k in opt:
+            pass
+        elif k.startswith('_'):
+            continue
+        elif callable(v):
+            continue
+        elif k in base:
+            continue
+        elif hasattr(msg_.__class__, k):
+            continue
+        yield (k, v)
+
+
+def _flow_stats(num):
+    parser = ofproto_v1_4_parser
+    actions = [parser.OFPActionOutput(2),
+               parser.OFPActionSetField(eth_dst='00:11:22:33:44:55')]
+    inst = [parser.OFPInstructionActions(ofproto_v1_4.OFPIT_APPLY_ACTIONS,
+                                         actions)]
+    return [parser.OFPFlowStats(
+        table_id=0, duration_sec=1, duration_nsec=2, priority=3,
+        idle_timeout=0, hard_timeout=0, flags=0, importance=0,
+        cookie=i, packet_count=i * 10, byte_count=i * 1000,
+        match=parser.OFPMatch(in_port=1, eth_type=0x0800,
+                              ipv4_src='10.0.0.%d' % (i % 256)),
+        instructions=inst) for i in range(num)]
+
+
 class Test_stringify(unittest.TestCase):
     """ Test case for ryu.lib.stringify
     """
@@ -73,3 +154,57 @@ class Test_stringify(unittest.TestCase):
         eq_(c.__class__, c2.__class__)
         eq_(c.__dict__, c2.__dict__)
         eq_(j, c.to_jsondict(encode_string=my_encode))
+
+    def test_jsondict_types(self):
+        c = C2(name='foo', type_=1, obj=C1(a=b'A', c=None),
+               values={1: b'B'})
+        j = {'C2': {'name': 'foo', 'type': 1, 'prop': 3,
+                    'obj': {'C1': {'a': 'QQ==', 'c': None}},
+                    'values': {'1': 'Qg=='}}}
+        eq_(j, c.to_jsondict())
+        c2 = C2.from_jsondict(j['C2'])
+        eq_(C1, c2.obj.__class__)
+        eq_(c.obj.__dict__, c2.obj.__dict__)
+        eq_(('foo', 1, {1: b'B'}), (c2.name, c2.type_, c2.values))
+
+    def test_jsondict_hooks(self):
+        c = C3(name='foo', type_=1)
+        j = c.to_jsondict()
+        eq_('type-1', j['C3']['type'])
+        eq_(1, C3.from_jsondict(j['C3']).type_)
+
+    def test_obj_python_attrs(self):
+        dp = ofproto_protocol.ProtocolDesc(ofproto_v1_3.OFP_VERSION)
+        parser = ofproto_v1_3_parser
+        for obj in [C1(a=1, c=2), C2(name='foo', type_=1),
+                    parser.OFPFlowMod(dp, match=parser.OFPMatch(in_port=1)),
+                    parser.OFPActionOutput(1)] + _flow_stats(1):
+            eq_(list(_getmembers_python_attrs(obj)),
+                list(stringify.obj_python_attrs(obj)))
+
+    @test_lib.benchmark
+    def test_to_jsondict_benchmark(self):
+        num_entries = 2000
+        stats = _flow_stats(num_entries)
+
+        def getmembers_to_jsondict(stats):
+            orig = stringify.obj_python_attrs
+            stringify.obj_python_attrs = _getmembers_python_attrs
+            try:
+                return json.dumps([s.to_jsondict() for s in stats])
+            finally:
+                stringify.obj_python_attrs = orig
+
+        elapsed = {}
+        for name, dumps in (
+                ('getmembers', getmembers_to_jsondict),
+                ('to_jsondict',
+                 lambda stats: json.dumps([s.to_jsondict() for s in stats]))):
+            start = time.time()
+            res = dumps(stats)
+            elapsed[name] = time.time() - start
+            eq_(num_entries, len(json.loads(res)))
+        LOG.info('OFPFlowStats to JSON: with inspect.getmembers %.2f '
+                 'usec/entry, to_jsondict %.2f usec/entry',
+                 elapsed['getmembers'] / num_entries * 1e6,
+                 elapsed['to_jsondict'] / num_entries * 1e6)
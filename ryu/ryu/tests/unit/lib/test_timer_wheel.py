@@ -0,0 +1,118 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import unittest
+
+from nose.tools import eq_, ok_
+
+from ryu.lib import timer_wheel
+
+
+class Test_TimerWheel(unittest.TestCase):
+
+    def setUp(self):
+        self.wheel = timer_wheel.TimerWheel(tick=.1, num_slots=8)
+
+    def test_expire(self):
+        wheel = self.wheel
+        eq_([], wheel.expire(1000.))
+        eq_(None, wheel.timeout(1000.))
+        wheel.schedule('b', 1000.25)
+        wheel.schedule('a', 1000.2)
+        wheel.schedule('c', 1000.5)
+        eq_(3, len(wheel))
+        ok_('a' in wheel)
+        eq_(1000.2, wheel.deadline('a'))
+        ok_(abs(wheel.timeout(1000.) - .2) < 1e-9)
+
+        eq_([], wheel.expire(1000.1))
+        eq_(['a', 'b'], wheel.expire(1000.3))
+        eq_(None, wheel.deadline('a'))
+        eq_(['c'], wheel.expire(1000.5))
+        eq_(0, len(wheel))
+
+    def test_schedule_earlier(self):
+        wheel = self.wheel
+        # before the first expire(), any deadline can be scheduled
+        wheel.schedule('late', 1000.5)
+        wheel.schedule('early', 1000.1)
+        eq_(['early'], wheel.expire(1000.2))
+        # deadlines in the past expire next
+        wheel.schedule('past', 900.)
+        eq_(0, wheel.timeout(1000.2))
+        eq_(['past'], wheel.expire(1000.2))
+
+    def test_reschedule_and_cancel(self):
+        wheel = self.wheel
+        wheel.schedule('a', 1000.1)
+        wheel.schedule('b', 1000.1)
+        wheel.schedule('a', 1000.4)
+        wheel.cancel('b')
+        wheel.cancel('unknown')
+        eq_([], wheel.expire(1000.3))
+        eq_(['a'], wheel.expire(1000.4))
+
+    def test_later_revolution(self):
+        wheel = self.wheel
+        # 0.8 seconds a revolution
+        wheel.schedule('a', 1000.05)
+        wheel.schedule('b', 1002.05)
+        ok_(abs(wheel.timeout(1000.) - .05) < 1e-9)
+        eq_(['a'], wheel.expire(1000.1))
+        # the slot of b is visited but it is not due
+        ok_(abs(wheel.timeout(1000.1) - 1.95) < 1e-9)
+        eq_([], wheel.expire(1000.9))
+        eq_([], wheel.expire(1001.8))
+        eq_(['b'], wheel.expire(1002.1))
+
+    def test_limit(self):
+        wheel = self.wheel
+        for i in range(10):
+            wheel.schedule(i, 1000. + i * .01)
+        eq_([0, 1, 2], wheel.expire(1001., limit=3))
+        eq_(0, wheel.timeout(1001.))
+        eq_([3, 4, 5, 6, 7], wheel.expire(1001., limit=5))
+        eq_([8, 9], wheel.expire(1001., limit=5))
+
+    def test_random(self):
+        rand = random.Random(1)
+        wheel = timer_wheel.TimerWheel(tick=.05, num_slots=16)
+        deadlines = {}
+        now = 1000.
+        wheel.expire(now)
+        for _ in range(2000):
+            key = rand.randrange(100)
+            op = rand.random()
+            if op < .5:
+                deadline = now + rand.uniform(-1, 3)
+                wheel.schedule(key, deadline)
+                deadlines[key] = deadline
+            elif op < .6:
+                wheel.cancel(key)
+                deadlines.pop(key, None)
+            else:
+                now += rand.uniform(0, .5)
+                expected = sorted((d, k) for k, d in deadlines.items()
+                                  if d <= now)
+                eq_([k for _, k in expected], wheel.expire(now))
+                for _, k in expected:
+                    del deadlines[k]
+                timeout = wheel.timeout(now)
+                if deadlines:
+                    eq_(max(0, min(deadlines.values()) - now), timeout)
+                else:
+                    eq_(None, timeout)
+        eq_(len(deadlines), len(wheel))
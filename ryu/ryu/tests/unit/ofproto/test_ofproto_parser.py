@@ -25,6 +25,8 @@ from ryu import exception
 
 from ryu.ofproto import ofproto_common, ofproto_parser
 from ryu.ofproto import ofproto_v1_0, ofproto_v1_0_parser
+from ryu.ofproto import ofproto_v1_3, ofproto_v1_3_parser
+from ryu.ofproto import ofproto_protocol
 
 import logging
 LOG = logging.getLogger(__name__)
@@ -242,3 +244,100 @@ class TestMsgStrAttr(unittest.TestCase):
         str_ = str_.rsplit()
         eq_('check', str_[0])
         eq_('msg_str_attr_test', str_[1])
+
+
+class TestPackStrOffsets(unittest.TestCase):
+
+    def test_pack_str_offsets(self):
+        eq_({'cookie': [('!Q', 8)], 'cookie_mask': [('!Q', 16)],
+             'table_id': [('!B', 24)], 'command': [('!B', 25)],
+             'idle_timeout': [('!H', 26)], 'hard_timeout': [('!H', 28)],
+             'priority': [('!H', 30)], 'buffer_id': [('!I', 32)],
+             'out_port': [('!I', 36)], 'out_group': [('!I', 40)],
+             'flags': [('!H', 44)]},
+            ofproto_parser.pack_str_offsets(
+                ofproto_v1_3.OFP_FLOW_MOD_PACK_STR0,
+                ('cookie', 'cookie_mask', 'table_id', 'command',
+                 'idle_timeout', 'hard_timeout', 'priority', 'buffer_id',
+                 'out_port', 'out_group', 'flags'), 8))
+        eq_({'a': [('!H', 2)], 'b': [('!H', 4)], 'c': [('!6s', 6)]},
+            ofproto_parser.pack_str_offsets('!2x2H6s', ('a', 'b', 'c')))
+
+
+class TestMsgTemplate(unittest.TestCase):
+    """ Test case for ofproto_parser.MsgTemplate
+    """
+
+    def setUp(self):
+        self.dp = ofproto_protocol.ProtocolDesc(ofproto_v1_3.OFP_VERSION)
+
+    def _flow_mod(self, port, xid=None, **kwargs):
+        parser = ofproto_v1_3_parser
+        ofp = ofproto_v1_3
+        match = parser.OFPMatch(eth_type=0x0800, ip_proto=17,
+                                ipv4_src='10.0.0.1', ipv4_dst='10.0.0.2',
+                                udp_dst=9000)
+        inst = [
+            parser.OFPInstructionGotoTable(1),
+            parser.OFPInstructionActions(ofp.OFPIT_APPLY_ACTIONS, [
+                parser.NXActionRegLoad(ofs_nbits=31, dst='reg0', value=7),
+                parser.OFPActionSetField(vlan_vid=0x1005),
+                parser.OFPActionOutput(port)]),
+            parser.OFPInstructionActions(ofp.OFPIT_WRITE_ACTIONS, [
+                parser.OFPActionOutput(port)]),
+        ]
+        msg = parser.OFPFlowMod(self.dp, match=match, instructions=inst,
+                                **kwargs)
+        msg.xid = xid
+        msg.serialize()
+        return msg
+
+    def test_flow_mod(self):
+        template = ofproto_parser.MsgTemplate(self._flow_mod(1))
+        eq_(self._flow_mod(1, xid=0).buf, template.render())
+        eq_(self._flow_mod(2, xid=3, cookie=10, priority=20,
+                           out_port=4).buf,
+            template.render(3, output_port=2, cookie=10, priority=20,
+                            out_port=4))
+        eq_(2, len(template.fields['output_port']))
+        self.assertRaises(ValueError, template.render, udp_dst=1)
+
+        # the message itself is not changed
+        msg = self._flow_mod(1)
+        buf = bytes(msg.buf)
+        ofproto_parser.MsgTemplate(msg).render(output_port=5)
+        eq_(buf, msg.buf)
+
+    def test_packet_out(self):
+        parser = ofproto_v1_3_parser
+
+        def packet_out(in_port, port):
+            msg = parser.OFPPacketOut(
+                self.dp, buffer_id=ofproto_v1_3.OFP_NO_BUFFER,
+                in_port=in_port, actions=[parser.OFPActionOutput(port)],
+                data=b'\x01' * 60)
+            msg.serialize()
+            return msg
+
+        template = ofproto_parser.MsgTemplate(packet_out(1, 2))
+        eq_(packet_out(3, 4).buf, template.render(in_port=3, output_port=4))
+        self.assertRaises(ValueError, template.render, actions_len=0)
+
+    def test_msg(self):
+        template = ofproto_parser.MsgTemplate(self._flow_mod(1))
+        msg = template(output_port=2)
+        ok_(isinstance(msg, ofproto_parser.MsgBase))
+        eq_(ofproto_v1_3.OFPT_FLOW_MOD, msg.cls_msg_type)
+        msg.set_xid(7)
+        msg.serialize()
+        eq_(self._flow_mod(2, xid=7).buf, msg.buf)
+        eq_((ofproto_v1_3.OFP_VERSION, ofproto_v1_3.OFPT_FLOW_MOD,
+             len(msg.buf), 7),
+            (msg.version, msg.msg_type, msg.msg_len, msg.xid))
+
+    def test_no_fields(self):
+        msg = ofproto_v1_3_parser.OFPBarrierRequest(self.dp)
+        template = ofproto_parser.MsgTemplate(msg)
+        eq_({}, template.fields)
+        six.assertRaisesRegex(self, ValueError, 'of OFPBarrierRequest',
+                              template.render, output_port=1)
@@ -14,9 +14,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+import logging
+import struct
+import time
 import unittest
 
+from ryu.ofproto import ofproto_v1_2
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_4
+from ryu.ofproto import ofproto_v1_5
+from ryu.ofproto import ofproto_parser
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_3_parser
 import ryu.ofproto.ofproto_v1_3 as ofp
+from ryu.tests import test_lib
+
+
+LOG = logging.getLogger(__name__)
 
 
 class Test_OXM(unittest.TestCase):
@@ -26,12 +41,17 @@ class Test_OXM(unittest.TestCase):
         buf = bytearray()
         ofp.oxm_serialize(n, v, m, buf, 0)
         self.assertEqual(on_wire, buf)
+        buf = bytearray()
+        self.assertEqual(len(on_wire), ofp.oxm_serialize_user(f, uv, buf, 0))
+        self.assertEqual(on_wire, buf)
 
     def _test_decode(self, user, on_wire):
         (n, v, m, l) = ofp.oxm_parse(on_wire, 0)
         self.assertEqual(len(on_wire), l)
         (f, uv) = ofp.oxm_to_user(n, v, m)
         self.assertEqual(user, (f, uv))
+        self.assertEqual(user + (len(on_wire), ),
+                         ofp.oxm_parse_to_user(on_wire, 0))
 
     def _test_encode_header(self, user, on_wire):
         f = user
@@ -186,3 +206,199 @@ class Test_OXM(unittest.TestCase):
             b'fugafuga'
         )
         self._test(user, on_wire, 4)
+
+
+def _legacy_parse_to_user(ofproto, buf, offset):
+    n, value, mask, field_len = ofproto.oxm_parse(buf, offset)
+    k, uv = ofproto.oxm_to_user(n, value, mask)
+    return k, uv, field_len
+
+
+class Test_OXM_parse_to_user(unittest.TestCase):
+    def _test_fields(self, ofproto):
+        for f in ofproto.oxm_types:
+            size = getattr(f.type, 'size', None)
+            if size is None:
+                continue
+            value = bytes(bytearray(range(1, size + 1)))
+            mask = bytes(bytearray(range(0xff, 0xff - size, -1)))
+            for m in (None, mask):
+                buf = bytearray(b'\x00' * 4)  # not at the beginning
+                field_len = ofproto.oxm_serialize(f.num, value, m, buf, 4)
+                self.assertEqual(_legacy_parse_to_user(ofproto, buf, 4),
+                                 ofproto.oxm_parse_to_user(buf, 4))
+                self.assertEqual(field_len,
+                                 ofproto.oxm_parse_to_user(buf, 4)[2])
+
+    def test_fields_v1_2(self):
+        self._test_fields(ofproto_v1_2)
+
+    def test_fields_v1_3(self):
+        self._test_fields(ofproto_v1_3)
+
+    def test_fields_v1_4(self):
+        self._test_fields(ofproto_v1_4)
+
+    def test_fields_v1_5(self):
+        self._test_fields(ofproto_v1_5)
+
+    def test_bad_length(self):
+        # in_port with a 2 bytes payload; not a precompiled header
+        on_wire = b'\x80\x00\x00\x02\x00\x01'
+        self.assertRaises(Exception, ofp.oxm_parse_to_user, on_wire, 0)
+
+    def test_truncated(self):
+        on_wire = b'\x80\x00\x00\x04\x00\x00'
+        self.assertRaises(struct.error, ofp.oxm_parse_to_user, on_wire, 0)
+
+    @test_lib.benchmark
+    def test_flow_stats_benchmark(self):
+        num_entries = 10000
+        parser = ofproto_v1_3_parser
+        match = parser.OFPMatch(
+            in_port=1, eth_type=0x0800, eth_dst='f2:0b:a4:7d:f8:ea',
+            ipv4_src=('10.0.0.0', '255.255.255.0'), ipv4_dst='10.0.1.2',
+            ip_proto=6, tcp_dst=80)
+        match_buf = bytearray()
+        match_len = match.serialize(match_buf, 0)
+        match_len += -match_len % 8  # padding
+        entry = bytes(struct.pack(ofproto_v1_3.OFP_FLOW_STATS_0_PACK_STR,
+                                  ofproto_v1_3.OFP_FLOW_STATS_0_SIZE +
+                                  match_len,
+                                  0, 1, 2, 100, 0, 0, 0, 0, 0, 0) +
+                      match_buf.ljust(match_len, b'\x00'))
+        buf = entry * num_entries
+        expected = match.to_jsondict()
+
+        elapsed = {}
+        for name, parse_to_user in (
+                ('legacy', functools.partial(_legacy_parse_to_user,
+                                             ofproto_v1_3)),
+                ('precompiled', ofproto_v1_3.oxm_parse_to_user)):
+            orig = ofproto_v1_3.oxm_parse_to_user
+            ofproto_v1_3.oxm_parse_to_user = parse_to_user
+            try:
+                start = time.time()
+                offset = 0
+                stats = []
+                while offset < len(buf):
+                    s = parser.OFPFlowStats.parser(buf, offset)
+                    stats.append(s)
+                    offset += s.length
+                elapsed[name] = time.time() - start
+            finally:
+                ofproto_v1_3.oxm_parse_to_user = orig
+            self.assertEqual(num_entries, len(stats))
+            self.assertEqual(expected, stats[-1].match.to_jsondict())
+        LOG.info('OFPFlowStats with 7 match fields: legacy %.2f usec/entry, '
+                 'precompiled %.2f usec/entry',
+                 elapsed['legacy'] / num_entries * 1e6,
+                 elapsed['precompiled'] / num_entries * 1e6)
+
+
+def _legacy_serialize_user(ofproto, k, uv, buf, offset):
+    n, value, mask = ofproto.oxm_from_user(k, uv)
+    return ofproto.oxm_serialize(n, value, mask, buf, offset)
+
+
+class Test_OXM_serialize_user(unittest.TestCase):
+    def _test_serialize(self, ofproto, k, uv):
+        expected = bytearray(b'\x00' * 4)  # not at the beginning
+        expected_len = _legacy_serialize_user(ofproto, k, uv, expected, 4)
+        for buf in (bytearray(b'\x00' * 4),
+                    bytearray(b'\x00' * 64)):  # preallocated
+            field_len = ofproto.oxm_serialize_user(k, uv, buf, 4)
+            self.assertEqual(expected_len, field_len)
+            self.assertEqual(expected, buf[:4 + field_len])
+
+    def _test_fields(self, ofproto):
+        for f in ofproto.oxm_types:
+            size = getattr(f.type, 'size', None)
+            if size is None:
+                continue
+            value = bytes(bytearray(range(1, size + 1)))
+            mask = bytes(bytearray(range(0xff, 0xff - size, -1)))
+            for m in (None, mask):
+                k, uv = ofproto.oxm_to_user(f.num, value, m)
+                self._test_serialize(ofproto, k, uv)
+
+    def test_fields_v1_2(self):
+        self._test_fields(ofproto_v1_2)
+
+    def test_fields_v1_3(self):
+        self._test_fields(ofproto_v1_3)
+
+    def test_fields_v1_4(self):
+        self._test_fields(ofproto_v1_4)
+
+    def test_fields_v1_5(self):
+        self._test_fields(ofproto_v1_5)
+
+    def test_fallback(self):
+        # values the precompiled encoders leave to oxm_from_user()
+        for k, uv in (('ipv4_src', '10.0.0.0/24'),
+                      ('ipv4_src', 0x0a000001),
+                      ('ipv4_dst', ('10.0.0.0', 0xffffff00)),
+                      ('eth_dst', 'f2:0b:a4:7d:f8:ea'),
+                      ('eth_dst', 'F2:0B:A4:7D:F8:EA'),
+                      ('eth_src', ('f2:0b:a4:7d:f8:ea', 'ff:ff:ff:00:00:00')),
+                      ('vlan_vid', 0x1001),
+                      ('in_port', 0x1ffffffff),
+                      ('ipv6_src', '2001:db8::1'),
+                      ('reg0', 0x12345678)):
+            self._test_serialize(ofproto_v1_3, k, uv)
+
+    def test_bad_value(self):
+        self.assertRaises(Exception, ofp.oxm_serialize_user,
+                          'eth_dst', 'f2:0b:a4:7d:f8:zz', bytearray(), 0)
+
+    @test_lib.benchmark
+    def test_flow_mod_benchmark(self):
+        num_msgs = 5000
+        parser = ofproto_v1_3_parser
+        dp = ofproto_protocol.ProtocolDesc(ofproto_v1_3.OFP_VERSION)
+        match = parser.OFPMatch(
+            in_port=1, eth_type=0x0800, eth_dst='f2:0b:a4:7d:f8:ea',
+            ipv4_src=('10.0.0.0', '255.255.255.0'), ipv4_dst='10.0.1.2',
+            ip_proto=6, tcp_dst=80)
+
+        def flow_mod(port):
+            actions = [parser.OFPActionOutput(port)]
+            inst = [parser.OFPInstructionActions(
+                ofproto_v1_3.OFPIT_APPLY_ACTIONS, actions)]
+            return parser.OFPFlowMod(dp, priority=100, match=match,
+                                     instructions=inst)
+
+        elapsed = {}
+        for name, serialize_user in (
+                ('legacy', functools.partial(_legacy_serialize_user,
+                                             ofproto_v1_3)),
+                ('precompiled', ofproto_v1_3.oxm_serialize_user)):
+            orig = ofproto_v1_3.oxm_serialize_user
+            ofproto_v1_3.oxm_serialize_user = serialize_user
+            try:
+                start = time.time()
+                for i in range(num_msgs):
+                    msg = flow_mod(i)
+                    msg.serialize()
+                elapsed[name] = time.time() - start
+            finally:
+                ofproto_v1_3.oxm_serialize_user = orig
+            self.assertEqual(num_msgs - 1,
+                             parser.OFPFlowMod.parser(
+                                 dp, msg.version, msg.msg_type, msg.msg_len,
+                                 msg.xid, msg.buf
+                             ).instructions[0].actions[0].port)
+
+        template = ofproto_parser.MsgTemplate(flow_mod(0))
+        start = time.time()
+        for i in range(num_msgs):
+            buf = template.render(output_port=i)
+        elapsed['template'] = time.time() - start
+        self.assertEqual(msg.buf, buf)
+
+        LOG.info('OFPFlowMod with 7 match fields: legacy %.2f usec/msg, '
+                 'precompiled %.2f usec/msg, template %.2f usec/msg',
+                 elapsed['legacy'] / num_msgs * 1e6,
+                 elapsed['precompiled'] / num_msgs * 1e6,
+                 elapsed['template'] / num_msgs * 1e6)
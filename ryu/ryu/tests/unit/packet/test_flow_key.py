@@ -0,0 +1,208 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import logging
+import os
+import sys
+import time
+import unittest
+
+from nose.tools import eq_
+
+from ryu.lib import pcaplib
+from ryu.lib.packet import arp
+from ryu.lib.packet import ether_types
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import flow_key
+from ryu.lib.packet import in_proto as inet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import ipv6
+from ryu.lib.packet import packet
+from ryu.lib.packet import sctp
+from ryu.lib.packet import tcp
+from ryu.lib.packet import udp
+from ryu.lib.packet import vlan
+from ryu.tests import test_lib
+
+LOG = logging.getLogger(__name__)
+
+PCAP_DATA_DIR = os.path.join(
+    os.path.dirname(sys.modules[__name__].__file__),
+    '../../packet_data/pcap/')
+
+SRC_MAC = '00:11:22:33:44:55'
+DST_MAC = 'aa:bb:cc:dd:ee:0f'
+
+
+def _key_from_packet(pkt):
+    # The flow key built from the decoded outermost protocols.
+    protocols = iter(pkt)
+    eth = next(protocols)
+    eth_type = eth.ethertype
+    vlan_vid = ip_src = ip_dst = ip_proto = src_port = dst_port = None
+    for p in protocols:
+        if isinstance(p, vlan._vlan):
+            if vlan_vid is None:
+                vlan_vid = p.vid
+            eth_type = p.ethertype
+        elif isinstance(p, ipv4.ipv4):
+            ip_src, ip_dst, ip_proto = p.src, p.dst, p.proto
+        elif isinstance(p, ipv6.ipv6):
+            ip_src, ip_dst = p.src, p.dst
+            ip_proto = p.ext_hdrs[-1].nxt if p.ext_hdrs else p.nxt
+        elif isinstance(p, arp.arp):
+            ip_src, ip_dst, ip_proto = p.src_ip, p.dst_ip, p.opcode
+            break
+        else:
+            if isinstance(p, (tcp.tcp, udp.udp, sctp.sctp)):
+                src_port, dst_port = p.src_port, p.dst_port
+            break
+    return flow_key.FlowKey(eth.dst, eth.src, eth_type, vlan_vid,
+                            ip_src, ip_dst, ip_proto, src_port, dst_port)
+
+
+def _serialize(*protocols):
+    pkt = packet.Packet()
+    for p in protocols:
+        pkt.add_protocol(p)
+    pkt.serialize()
+    return bytes(pkt.data)
+
+
+class Test_flow_key(unittest.TestCase):
+
+    def _eth(self, ethertype):
+        return ethernet.ethernet(DST_MAC, SRC_MAC, ethertype)
+
+    def _ipv4(self, proto, **kwargs):
+        return ipv4.ipv4(proto=proto, src='10.0.0.1', dst='10.0.0.2',
+                         **kwargs)
+
+    def _check(self, buf, expected):
+        eq_(expected, flow_key.extract(buf))
+        eq_(expected, flow_key.extract(bytearray(buf)))
+        eq_(expected, flow_key.extract(memoryview(buf)))
+        eq_(_key_from_packet(packet.Packet(buf)), flow_key.extract(buf))
+
+    def test_ipv4_udp(self):
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IP),
+                         self._ipv4(inet.IPPROTO_UDP),
+                         udp.udp(5060, 9000), b'payload')
+        self._check(buf, flow_key.FlowKey(
+            DST_MAC, SRC_MAC, ether_types.ETH_TYPE_IP, None,
+            '10.0.0.1', '10.0.0.2', inet.IPPROTO_UDP, 5060, 9000))
+
+    def test_ipv4_options_tcp(self):
+        ip = self._ipv4(inet.IPPROTO_TCP, header_length=6,
+                        option=b'\x01\x01\x01\x00')
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IP), ip,
+                         tcp.tcp(1234, 80))
+        eq_(80, flow_key.extract(buf).dst_port)
+        self._check(buf, _key_from_packet(packet.Packet(buf)))
+
+    def test_ipv4_fragment(self):
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IP),
+                         self._ipv4(inet.IPPROTO_UDP, offset=100),
+                         b'\x13\xc4\x23\x28' + b'\x00' * 12)
+        key = flow_key.extract(buf)
+        eq_(inet.IPPROTO_UDP, key.ip_proto)
+        eq_((None, None), (key.src_port, key.dst_port))
+
+    def test_qinq_sctp(self):
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_8021AD),
+                         vlan.svlan(vid=100,
+                                    ethertype=ether_types.ETH_TYPE_8021Q),
+                         vlan.vlan(vid=200,
+                                   ethertype=ether_types.ETH_TYPE_IP),
+                         self._ipv4(inet.IPPROTO_SCTP),
+                         sctp.sctp(3868, 3869))
+        self._check(buf, flow_key.FlowKey(
+            DST_MAC, SRC_MAC, ether_types.ETH_TYPE_IP, 100,
+            '10.0.0.1', '10.0.0.2', inet.IPPROTO_SCTP, 3868, 3869))
+
+    def test_ipv6_tcp(self):
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IPV6),
+                         ipv6.ipv6(nxt=inet.IPPROTO_TCP, src='2001:db8::1',
+                                   dst='fe80::2'),
+                         tcp.tcp(1234, 443))
+        self._check(buf, flow_key.FlowKey(
+            DST_MAC, SRC_MAC, ether_types.ETH_TYPE_IPV6, None,
+            '2001:db8::1', 'fe80::2', inet.IPPROTO_TCP, 1234, 443))
+
+    def test_ipv6_ext_headers(self):
+        ext = [ipv6.hop_opts(nxt=inet.IPPROTO_FRAGMENT,
+                             data=[ipv6.option(type_=1, len_=4,
+                                               data=b'\x00' * 4)]),
+               ipv6.fragment(nxt=inet.IPPROTO_UDP, offset=0, more=1)]
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IPV6),
+                         ipv6.ipv6(nxt=inet.IPPROTO_HOPOPTS, ext_hdrs=ext),
+                         udp.udp(53, 5353))
+        key = flow_key.extract(buf)
+        eq_((inet.IPPROTO_UDP, 53, 5353),
+            (key.ip_proto, key.src_port, key.dst_port))
+
+        # non-first fragment
+        ext[1].offset = 10
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IPV6),
+                         ipv6.ipv6(nxt=inet.IPPROTO_HOPOPTS, ext_hdrs=ext),
+                         b'\x00' * 8)
+        key = flow_key.extract(buf)
+        eq_((inet.IPPROTO_UDP, None, None),
+            (key.ip_proto, key.src_port, key.dst_port))
+
+    def test_arp(self):
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_ARP),
+                         arp.arp_ip(arp.ARP_REQUEST, SRC_MAC, '10.0.0.1',
+                                    '00:00:00:00:00:00', '10.0.0.2'))
+        self._check(buf, flow_key.FlowKey(
+            DST_MAC, SRC_MAC, ether_types.ETH_TYPE_ARP, None,
+            '10.0.0.1', '10.0.0.2', arp.ARP_REQUEST, None, None))
+
+    def test_truncated(self):
+        eq_(None, flow_key.extract(b'\x00' * 13))
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IP),
+                         self._ipv4(inet.IPPROTO_TCP), tcp.tcp(1, 2))
+        key = flow_key.extract(buf[:20])
+        eq_((ether_types.ETH_TYPE_IP, None), (key.eth_type, key.ip_src))
+        key = flow_key.extract(buf[:36])
+        eq_(('10.0.0.2', None), (key.ip_dst, key.dst_port))
+
+    def test_pcap(self):
+        for path in sorted(glob.glob(PCAP_DATA_DIR + '*.pcap')):
+            for _, buf in pcaplib.Reader(open(path, 'rb')):
+                if len(buf) < ethernet.ethernet._MIN_LEN:
+                    eq_(None, flow_key.extract(buf))
+                    continue
+                eq_(_key_from_packet(packet.Packet(buf)),
+                    flow_key.extract(buf), path)
+
+    @test_lib.benchmark
+    def test_extract_benchmark(self):
+        num = 20000
+        buf = _serialize(self._eth(ether_types.ETH_TYPE_IP),
+                         self._ipv4(inet.IPPROTO_UDP),
+                         udp.udp(5060, 9000), b'\x00' * 160)
+        start = time.time()
+        for _ in range(num):
+            key = _key_from_packet(packet.Packet(buf))
+        elapsed_packet = time.time() - start
+        start = time.time()
+        for _ in range(num):
+            key = flow_key.extract(buf)
+        elapsed = time.time() - start
+        eq_(9000, key.dst_port)
+        LOG.info('flow key: packet.Packet %.2f usec, extract %.2f usec',
+                 elapsed_packet / num * 1e6, elapsed / num * 1e6)
@@ -19,6 +19,7 @@ import unittest
 import logging
 import struct
 import inspect
+import time
 from nose.tools import ok_, eq_
 import six
 from ryu.ofproto import ether, inet
@@ -33,6 +34,7 @@ from ryu.lib.packet import sctp
 from ryu.lib.packet import tcp, udp
 from ryu.lib.packet import vlan
 from ryu.lib import addrconv
+from ryu.tests import test_lib
 
 
 LOG = logging.getLogger('test_packet')
@@ -1551,3 +1553,85 @@ class TestPacket(unittest.TestCase):
         ok_(isinstance(pkt.protocols[0], ethernet.ethernet))
         ok_(isinstance(pkt.protocols[1], ipv4.ipv4))
         ok_(isinstance(pkt.protocols[2], udp.udp))
+
+    def _tcp_packet(self, padding=b''):
+        pkt = (ethernet.ethernet(self.dst_mac, self.src_mac,
+                                 ether.ETH_TYPE_IP) /
+               ipv4.ipv4(proto=inet.IPPROTO_TCP, src=self.src_ip,
+                         dst=self.dst_ip) /
+               tcp.tcp(self.src_port, self.dst_port) / self.payload)
+        pkt.serialize()
+        return bytes(pkt.data) + padding
+
+    def test_lazy(self):
+        buf = self._tcp_packet()
+        pkt = packet.Packet(buf, lazy=True)
+        eq_(0, len(pkt._protocols))
+        p_ipv4 = pkt.get_protocol(ipv4.ipv4)
+        eq_(self.dst_ip, p_ipv4.dst)
+        # decoded up to ipv4 only
+        eq_(2, len(pkt._protocols))
+        eq_(pkt.get_protocol(ethernet.ethernet), pkt._protocols[0])
+        eq_(2, len(pkt._protocols))
+
+        eq_(self.dst_port, pkt.get_protocol(tcp.tcp).dst_port)
+        eq_(None, pkt.get_protocol(udp.udp))
+        eq_(str(packet.Packet(buf)), str(pkt))
+        eq_(self.payload, pkt[-1])
+        eq_(packet.Packet(buf).to_jsondict(), pkt.to_jsondict())
+
+    def test_lazy_iter(self):
+        buf = self._tcp_packet()
+        pkt = packet.Packet(buf, lazy=True)
+        for p in pkt:
+            if isinstance(p, ipv4.ipv4):
+                break
+        eq_(2, len(pkt._protocols))
+        eq_([type(p) for p in packet.Packet(buf)],
+            [type(p) for p in pkt])
+        eq_(4, len(pkt))
+
+    def test_lazy_protocols(self):
+        pkt = packet.Packet(self._tcp_packet(), lazy=True)
+        eq_(4, len(pkt.protocols))
+        ok_(tcp.tcp in pkt)
+
+        pkt = packet.Packet(self._tcp_packet(), lazy=True)
+        pkt.protocols = []
+        eq_(None, pkt.get_protocol(ethernet.ethernet))
+        eq_(0, len(pkt))
+
+    def test_padding(self):
+        # trailing zeros are not a payload
+        pkt = packet.Packet(self._tcp_packet()[:-len(self.payload)] +
+                            b'\x00' * 20)
+        eq_(3, len(pkt))
+        # but a payload starting and ending with zeros is
+        payload = b'\x00\x01\x00'
+        pkt = packet.Packet(self._tcp_packet()[:-len(self.payload)] +
+                            payload)
+        eq_(payload, pkt[-1])
+        eq_(0, len(packet.Packet(b'\x00' * 60)))
+        eq_(0, len(packet.Packet(bytearray(60), lazy=True)))
+
+    def test_memoryview(self):
+        buf = self._tcp_packet()
+        pkt = packet.Packet(memoryview(b'\xff' + buf)[1:])
+        eq_(str(packet.Packet(buf)), str(pkt))
+        ok_(isinstance(pkt.data, bytes))
+        ok_(isinstance(pkt[-1], bytes))
+
+    @test_lib.benchmark
+    def test_lazy_benchmark(self):
+        num = 10000
+        buf = self._tcp_packet(padding=b'\x00' * 1400)
+        elapsed = {}
+        for lazy in (False, True):
+            start = time.time()
+            for _ in range(num):
+                pkt = packet.Packet(buf, lazy=lazy)
+                p_ipv4 = pkt.get_protocol(ipv4.ipv4)
+            elapsed[lazy] = time.time() - start
+            eq_(self.dst_ip, p_ipv4.dst)
+        LOG.info('Packet.get_protocol(ipv4): eager %.2f usec, lazy %.2f usec',
+                 elapsed[False] / num * 1e6, elapsed[True] / num * 1e6)
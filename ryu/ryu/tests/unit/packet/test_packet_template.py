@@ -0,0 +1,199 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import struct
+import time
+import unittest
+
+from nose.tools import eq_, ok_
+
+from ryu.lib import addrconv
+from ryu.lib.packet import arp
+from ryu.lib.packet import ether_types
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import icmp
+from ryu.lib.packet import in_proto as inet
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import packet
+from ryu.lib.packet import packet_template
+from ryu.lib.packet import packet_utils
+from ryu.lib.packet import tcp
+from ryu.lib.packet import udp
+from ryu.lib.packet import vlan
+from ryu.tests import test_lib
+from ryu.topology import switches
+
+LOG = logging.getLogger(__name__)
+
+DL_ADDR = '00:11:22:33:44:55'
+
+
+def _serialize(*protocols):
+    pkt = packet.Packet()
+    for p in protocols:
+        pkt.add_protocol(p)
+    pkt.serialize()
+    return pkt.data
+
+
+def _arp(vid, src_mac, dst_mac, src_ip, dst_ip, opcode=arp.ARP_REPLY):
+    return (ethernet.ethernet(dst_mac, src_mac,
+                              ether_types.ETH_TYPE_8021Q),
+            vlan.vlan(vid=vid, ethertype=ether_types.ETH_TYPE_ARP),
+            arp.arp(opcode=opcode, src_mac=src_mac, src_ip=src_ip,
+                    dst_mac=dst_mac, dst_ip=dst_ip))
+
+
+def _icmp_echo(src_ip, dst_ip, id_=0, seq=0, type_=icmp.ICMP_ECHO_REPLY,
+               ttl=64):
+    return (ethernet.ethernet('00:00:00:00:00:02', '00:00:00:00:00:01',
+                              ether_types.ETH_TYPE_IP),
+            ipv4.ipv4(proto=inet.IPPROTO_ICMP, src=src_ip, dst=dst_ip,
+                      ttl=ttl),
+            icmp.icmp(type_, 0, 0,
+                      data=icmp.echo(id_=id_, seq=seq, data=b'ping data')))
+
+
+def _l4(src_ip, dst_ip, l4):
+    proto = (inet.IPPROTO_TCP if isinstance(l4, tcp.tcp)
+             else inet.IPPROTO_UDP)
+    return (ethernet.ethernet('00:00:00:00:00:02', '00:00:00:00:00:01',
+                              ether_types.ETH_TYPE_IP),
+            ipv4.ipv4(proto=proto, src=src_ip, dst=dst_ip),
+            l4, b'payload')
+
+
+class Test_PacketTemplate(unittest.TestCase):
+
+    def test_arp(self):
+        tmpl = packet_template.PacketTemplate(packet.Packet(
+            protocols=list(_arp(0, '00:00:00:00:00:00', '00:00:00:00:00:00',
+                                '0.0.0.0', '0.0.0.0'))))
+        data = tmpl.render(eth_dst='aa:bb:cc:dd:ee:ff',
+                           eth_src='00:11:22:33:44:55', vlan_vid=100,
+                           arp_sha='00:11:22:33:44:55', arp_spa='10.0.0.1',
+                           arp_tha='aa:bb:cc:dd:ee:ff', arp_tpa='10.0.0.2')
+        ok_(isinstance(data, bytearray))
+        eq_(_serialize(*_arp(100, '00:11:22:33:44:55', 'aa:bb:cc:dd:ee:ff',
+                             '10.0.0.1', '10.0.0.2')), data)
+
+        # binary addresses, and the template is unchanged
+        data = tmpl.render(
+            eth_dst=addrconv.mac.text_to_bin('aa:bb:cc:dd:ee:ff'),
+            arp_tpa=addrconv.ipv4.text_to_bin('10.0.0.2'),
+            arp_op=arp.ARP_REQUEST)
+        eq_(_serialize(*_arp(0, '00:00:00:00:00:00', 'aa:bb:cc:dd:ee:ff',
+                             '0.0.0.0', '10.0.0.2', arp.ARP_REQUEST))[:14],
+            data[:14])
+        eq_(_serialize(*_arp(0, '00:00:00:00:00:00', '00:00:00:00:00:00',
+                             '0.0.0.0', '0.0.0.0')), tmpl.render())
+
+    def test_icmp(self):
+        tmpl = packet_template.PacketTemplate(packet.Packet(
+            protocols=list(_icmp_echo('0.0.0.0', '0.0.0.0'))))
+        eq_(['eth_dst', 'eth_src', 'icmp_id', 'icmp_seq', 'icmpv4_code',
+             'icmpv4_type', 'ipv4_dst', 'ipv4_src'], tmpl.fields)
+        for values in ({'ipv4_src': '192.168.1.1'},
+                       {'ipv4_src': '10.0.0.1', 'ipv4_dst': '10.255.0.2',
+                        'icmp_id': 0x1234, 'icmp_seq': 7},
+                       {'icmpv4_type': icmp.ICMP_ECHO_REQUEST,
+                        'icmp_seq': 0xffff}):
+            data = tmpl.render(**values)
+            eq_(_serialize(*_icmp_echo(
+                values.get('ipv4_src', '0.0.0.0'),
+                values.get('ipv4_dst', '0.0.0.0'),
+                values.get('icmp_id', 0), values.get('icmp_seq', 0),
+                values.get('icmpv4_type', icmp.ICMP_ECHO_REPLY))), data)
+            # valid checksums of the IPv4 header and of ICMP
+            eq_(0, packet_utils.checksum(data[14:34]))
+            eq_(0, packet_utils.checksum(data[34:]))
+
+    def test_tcp_udp(self):
+        for l4 in (lambda: tcp.tcp(src_port=1234, dst_port=80, seq=1),
+                   lambda: udp.udp(src_port=5060, dst_port=5060)):
+            tmpl = packet_template.PacketTemplate(packet.Packet(
+                protocols=list(_l4('0.0.0.0', '0.0.0.0', l4()))))
+            data = tmpl.render(ipv4_src='10.0.0.1', ipv4_dst='10.255.0.2')
+            eq_(_serialize(*_l4('10.0.0.1', '10.255.0.2', l4())), data)
+
+    def test_udp_without_checksum(self):
+        tmpl = packet_template.PacketTemplate(packet.Packet(
+            protocols=list(_l4('0.0.0.0', '0.0.0.0',
+                               udp.udp(src_port=53, dst_port=53)))))
+        data = bytearray(tmpl.data)
+        data[40:42] = b'\x00\x00'
+        tmpl.data = bytes(data)
+        data = tmpl.render(ipv4_src='10.0.0.1')
+        eq_(b'\x00\x00', data[40:42])
+        eq_(0, packet_utils.checksum(data[14:34]))
+
+    def test_lldp(self):
+        for dpid, port_no, dl_addr, ttl in (
+                (1, 1, '00:00:00:00:00:01', 120),
+                (0xffffffffffffffff, 0xfffffffe, 'aa:bb:cc:dd:ee:ff', 0)):
+            pkt = switches.LLDPPacket._lldp_packet(dpid, port_no, dl_addr,
+                                                   ttl)
+            pkt.serialize()
+            data = switches.LLDPPacket.lldp_packet(dpid, port_no, dl_addr,
+                                                   ttl)
+            eq_(pkt.data, data)
+            eq_((dpid, port_no), switches.LLDPPacket.lldp_parse(data))
+
+    def test_invalid(self):
+        tmpl = packet_template.PacketTemplate(packet.Packet(
+            protocols=list(_arp(0, '00:00:00:00:00:00', '00:00:00:00:00:00',
+                                '0.0.0.0', '0.0.0.0'))))
+        self.assertRaises(ValueError, tmpl.render, ipv4_src='10.0.0.1')
+        self.assertRaises(ValueError, tmpl.render, arp_spa='10.0.0.256')
+        self.assertRaises(ValueError, tmpl.render, arp_sha=b'\x00' * 5)
+        self.assertRaises(ValueError, tmpl.render, vlan_vid=4096)
+
+        switches.LLDPPacket.lldp_packet(1, 1, DL_ADDR, 120)
+        tmpl = switches.LLDPPacket._template
+        self.assertRaises(ValueError, tmpl.render,
+                          lldp_port_id=struct.pack('!H', 1))
+
+    @test_lib.benchmark
+    def test_render_benchmark(self):
+        num = 5000
+        protocols = _icmp_echo('10.0.0.1', '10.0.0.2')
+        tmpl = packet_template.PacketTemplate(
+            packet.Packet(protocols=list(protocols)))
+        start = time.time()
+        for i in range(num):
+            expected = _serialize(*_icmp_echo('10.0.0.1', '10.0.0.2',
+                                              seq=i & 0xffff))
+        elapsed_serialize = time.time() - start
+        start = time.time()
+        for i in range(num):
+            data = tmpl.render(icmp_seq=i & 0xffff)
+        elapsed_render = time.time() - start
+        eq_(expected, data)
+
+        start = time.time()
+        for i in range(num):
+            data = switches.LLDPPacket._lldp_packet(i, i, DL_ADDR, 120)
+            data.serialize()
+        elapsed_lldp_serialize = time.time() - start
+        start = time.time()
+        for i in range(num):
+            data = switches.LLDPPacket.lldp_packet(i, i, DL_ADDR, 120)
+        elapsed_lldp_render = time.time() - start
+        LOG.info('ICMP echo: serialize %.2f usec, render %.2f usec; '
+                 'LLDP: serialize %.2f usec, render %.2f usec',
+                 elapsed_serialize / num * 1e6, elapsed_render / num * 1e6,
+                 elapsed_lldp_serialize / num * 1e6,
+                 elapsed_lldp_render / num * 1e6)
@@ -0,0 +1,141 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import array
+import logging
+import random
+import socket
+import struct
+import time
+import unittest
+
+from nose.tools import eq_
+
+from ryu.lib.packet import ipv4
+from ryu.lib.packet import packet_utils
+from ryu.tests import test_lib
+
+LOG = logging.getLogger(__name__)
+
+
+def _reference_checksum(data):
+    # The former implementation of packet_utils.checksum()
+    data = bytes(data)
+    if len(data) % 2:
+        data += b'\x00'
+    s = sum(array.array('H', data))
+    s = (s & 0xffff) + (s >> 16)
+    s += (s >> 16)
+    return socket.ntohs(~s & 0xffff)
+
+
+def _random_bytes(rand, length):
+    return bytes(bytearray(rand.randint(0, 255) for _ in range(length)))
+
+
+class Test_checksum(unittest.TestCase):
+
+    def setUp(self):
+        self.rand = random.Random(1)
+        self.buffers = [_random_bytes(self.rand, length)
+                        for length in (0, 1, 2, 3, 20, 21, 64, 1499, 1500,
+                                       1501, 4000)]
+        self.buffers += [b'\x00' * 10, b'\xff' * 10, b'\x00' * 11,
+                         b'\xff\xff\x00\x00' * 300]
+
+    def test_checksum(self):
+        for buf in self.buffers:
+            expected = _reference_checksum(buf)
+            eq_(expected, packet_utils.checksum(buf))
+            eq_(expected, packet_utils.checksum(bytearray(buf)))
+            eq_(expected, packet_utils.checksum(memoryview(buf)))
+
+    def test_checksum_without_numpy(self):
+        numpy = packet_utils.numpy
+        packet_utils.numpy = None
+        try:
+            self.test_checksum()
+            self.test_checksum_batch()
+        finally:
+            packet_utils.numpy = numpy
+
+    def test_checksum_ip(self):
+        ip = ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2', proto=17)
+        for buf in self.buffers:
+            header = struct.pack('!4s4sxBH', socket.inet_aton('10.0.0.1'),
+                                 socket.inet_aton('10.0.0.2'), 17, len(buf))
+            eq_(_reference_checksum(header + buf),
+                packet_utils.checksum_ip(ip, len(buf), buf))
+
+    def test_checksum_update(self):
+        hdr = bytearray(ipv4.ipv4(src='10.0.0.1', dst='10.0.0.2',
+                                  ttl=64).serialize(bytearray(), None))
+        csum = struct.unpack_from('!H', hdr, 10)[0]
+        eq_(0, packet_utils.checksum(hdr))
+
+        # ttl 64 -> 63
+        old = struct.unpack_from('!H', hdr, 8)[0]
+        hdr[8] = 63
+        new = struct.unpack_from('!H', hdr, 8)[0]
+        csum = packet_utils.checksum_update(csum, old, new)
+        struct.pack_into('!H', hdr, 10, csum)
+        eq_(0, packet_utils.checksum(hdr))
+
+        # destination address
+        new = socket.inet_aton('192.168.100.200')
+        csum = packet_utils.checksum_update(csum, bytes(hdr[16:20]), new)
+        hdr[16:20] = new
+        struct.pack_into('!H', hdr, 10, 0)
+        eq_(packet_utils.checksum(hdr), csum)
+
+        for _ in range(100):
+            buf = bytearray(_random_bytes(self.rand, 40))
+            csum = packet_utils.checksum(buf)
+            offset = self.rand.randrange(0, 37, 2)
+            new = _random_bytes(self.rand, 4)
+            csum = packet_utils.checksum_update(
+                csum, bytes(buf[offset:offset + 4]), new)
+            buf[offset:offset + 4] = new
+            eq_(packet_utils.checksum(buf), csum)
+
+    def test_checksum_batch(self):
+        eq_([_reference_checksum(buf) for buf in self.buffers],
+            packet_utils.checksum_batch(self.buffers))
+        eq_([0xffff, 0xffff], packet_utils.checksum_batch([b'', b'']))
+        eq_([], packet_utils.checksum_batch([]))
+
+    @test_lib.benchmark
+    def test_checksum_benchmark(self):
+        num = 2000
+        buffers = [_random_bytes(self.rand, length)
+                   for length in (20, 64, 1500)]
+        for buf in buffers:
+            elapsed = []
+            for func in (_reference_checksum, packet_utils.checksum):
+                start = time.time()
+                for _ in range(num):
+                    func(buf)
+                elapsed.append(time.time() - start)
+            LOG.info('checksum of %d bytes: former %.2f usec, '
+                     'now %.2f usec', len(buf),
+                     elapsed[0] / num * 1e6, elapsed[1] / num * 1e6)
+
+        buffers = [buffers[1]] * 1000
+        start = time.time()
+        result = packet_utils.checksum_batch(buffers)
+        elapsed = time.time() - start
+        eq_([packet_utils.checksum(buffers[0])] * 1000, result)
+        LOG.info('checksum_batch of 1000 x 64 bytes: %.2f usec/buffer',
+                 elapsed / 1000 * 1e6)
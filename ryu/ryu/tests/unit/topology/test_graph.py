@@ -0,0 +1,148 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import time
+import unittest
+
+from nose.tools import eq_, ok_, raises
+
+from ryu.tests import test_lib
+from ryu.topology import graph
+
+LOG = logging.getLogger(__name__)
+
+_Port = collections.namedtuple('_Port', ['dpid', 'port_no'])
+_Link = collections.namedtuple('_Link', ['src', 'dst'])
+
+
+def _link(src_dpid, src_port_no, dst_dpid, dst_port_no):
+    return _Link(_Port(src_dpid, src_port_no), _Port(dst_dpid, dst_port_no))
+
+
+class Test_TopologyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = graph.TopologyGraph()
+
+    def test_empty(self):
+        topo = self.graph.snapshot()
+        eq_(0, topo.version)
+        eq_((), topo.dpids)
+        eq_((0, ), topo.offsets)
+        eq_(0, len(topo))
+
+    def test_snapshot(self):
+        g = self.graph
+        for dpid in (3, 1, 2):
+            g.add_switch(dpid)
+        g.add_link(_link(1, 1, 2, 1))
+        g.add_link(_link(2, 1, 1, 1))
+        g.add_link(_link(1, 2, 3, 1))
+        topo = g.snapshot()
+        eq_(6, topo.version)
+        eq_((1, 2, 3), topo.dpids)
+        eq_(1, topo.index[2])
+        eq_((0, 2, 3, 3), topo.offsets)
+        eq_((1, 2, 0), topo.targets)
+        eq_((2, 3), topo.neighbors(1))
+        eq_((), topo.neighbors(3))
+        eq_(2, topo.port(1, 3))
+        eq_(None, topo.port(3, 1))
+        eq_((1, 1), topo.ports[(2, 1)])
+        eq_([(1, 2), (1, 3), (2, 1)], topo.edges())
+        ok_(3 in topo)
+        ok_(4 not in topo)
+
+    def test_version(self):
+        g = self.graph
+        g.add_switch(1)
+        topo = g.snapshot()
+        # the same snapshot while unchanged
+        ok_(topo is g.snapshot())
+        g.add_switch(1)
+        g.remove_switch(2)
+        g.remove_link(_link(1, 1, 2, 1))
+        eq_(1, g.version)
+        ok_(topo is g.snapshot())
+
+        link = _link(1, 1, 2, 1)
+        g.add_link(link)
+        g.add_link(link)
+        eq_(2, g.version)
+        new = g.snapshot()
+        eq_(2, new.version)
+        # the former snapshot is not modified
+        eq_((1, ), topo.dpids)
+        eq_((1, 2), new.dpids)
+
+    def test_parallel_links(self):
+        g = self.graph
+        g.add_link(_link(1, 5, 2, 5))
+        g.add_link(_link(1, 3, 2, 3))
+        eq_(3, g.snapshot().port(1, 2))
+        eq_((2, ), g.snapshot().neighbors(1))
+        # a link of another dst port is another link
+        g.remove_link(_link(1, 3, 2, 4))
+        eq_(3, g.snapshot().port(1, 2))
+        g.remove_link(_link(1, 3, 2, 3))
+        eq_(5, g.snapshot().port(1, 2))
+        g.remove_link(_link(1, 5, 2, 5))
+        eq_((), g.snapshot().neighbors(1))
+        eq_((1, 2), g.snapshot().dpids)
+
+    def test_remove_switch(self):
+        g = self.graph
+        g.add_link(_link(1, 1, 2, 1))
+        g.add_link(_link(2, 1, 1, 1))
+        g.add_link(_link(2, 2, 3, 1))
+        g.remove_switch(1)
+        topo = g.snapshot()
+        eq_((2, 3), topo.dpids)
+        eq_([(2, 3)], topo.edges())
+
+    @raises(AttributeError)
+    def test_immutable(self):
+        self.graph.snapshot().version = 10
+
+    @test_lib.benchmark
+    def test_snapshot_benchmark(self):
+        # a leaf-spine fabric, links of both directions
+        num_spines = 16
+        num_leaves = 240
+        g = self.graph
+        start = time.time()
+        for spine in range(1, num_spines + 1):
+            for leaf in range(num_spines + 1, num_spines + num_leaves + 1):
+                g.add_link(_link(spine, leaf, leaf, spine))
+                g.add_link(_link(leaf, spine, spine, leaf))
+        elapsed_add = time.time() - start
+
+        start = time.time()
+        topo = g.snapshot()
+        elapsed_build = time.time() - start
+        eq_(num_spines + num_leaves, len(topo))
+        eq_(num_spines * num_leaves * 2, len(topo.targets))
+
+        requests = 1000
+        start = time.time()
+        for _ in range(requests):
+            ok_(g.snapshot() is topo)
+        elapsed_get = (time.time() - start) / requests
+
+        LOG.info('%d links: added in %.2f msec, snapshot built in %.2f msec,'
+                 ' unchanged snapshot %.2f usec', len(topo.targets),
+                 elapsed_add * 1e3, elapsed_build * 1e3, elapsed_get * 1e6)
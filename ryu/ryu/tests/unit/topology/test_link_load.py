@@ -0,0 +1,193 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import time
+import unittest
+
+from nose.tools import eq_, ok_, raises
+
+from ryu.ofproto import ofproto_v1_3
+from ryu.ofproto import ofproto_v1_3_parser
+from ryu.tests import test_lib
+from ryu.topology import link_load
+from ryu.topology.graph import TopologySnapshot
+
+try:
+    import numpy
+    from ryu.lib import stats_batch
+except ImportError:
+    numpy = None
+
+LOG = logging.getLogger(__name__)
+
+MBPS = 1e6
+
+
+def _port(port_no, curr_speed):
+    return ofproto_v1_3_parser.OFPPort(
+        port_no=port_no, hw_addr='00:00:00:00:00:01', name=b'eth',
+        config=0, state=0, curr=0, advertised=0, supported=0, peer=0,
+        curr_speed=curr_speed, max_speed=curr_speed)
+
+
+def _stats(port_no, tx_bytes):
+    return ofproto_v1_3_parser.OFPPortStats(
+        port_no=port_no, rx_packets=0, tx_packets=0, rx_bytes=0,
+        tx_bytes=tx_bytes, rx_dropped=0, tx_dropped=0, rx_errors=0,
+        tx_errors=0, rx_frame_err=0, rx_over_err=0, rx_crc_err=0,
+        collisions=0, duration_sec=0, duration_nsec=0)
+
+
+class Test_LinkLoad(unittest.TestCase):
+
+    def setUp(self):
+        # leaf 4 port 1 -> spine 1 port 4, and back
+        self.topo = TopologySnapshot(1, (1, 4), {(4, 1): (1, 4),
+                                                 (1, 4): (4, 1)})
+        self.load = link_load.LinkLoad(alpha=.5, window=4, percentile=50,
+                                       capacity=100 * MBPS)
+        self.load.update_topology(self.topo)
+
+    def _poll(self, dpid, port_no, mbytes, now):
+        self.load.update_port_stats(dpid, [_stats(port_no, mbytes * 1e6)],
+                                    now)
+
+    def test_capacity(self):
+        load = self.load
+        eq_(100 * MBPS, load.capacity(4, 1))
+        load.update_port_desc(4, [_port(1, 10000)])  # 10 Mbps
+        eq_(10 * MBPS, load.capacity(4, 1))
+        load.set_capacity(4, 1, 20 * MBPS)
+        eq_(20 * MBPS, load.capacity(4, 1))
+        load.update_port_desc(4, [_port(1, 1000)])
+        eq_(20 * MBPS, load.capacity(4, 1))
+        load.set_capacity(4, 1, None)
+        eq_(1 * MBPS, load.capacity(4, 1))
+        eq_(100 * MBPS, load.capacity(1, 4))
+
+    def test_rate_and_cost(self):
+        load = self.load
+        eq_(1, load.cost(4, 1))
+        self._poll(4, 1, 0, 1000.)
+        eq_(0, load.rate(4, 1))
+        # 40 Mbps for a second
+        self._poll(4, 1, 5, 1001.)
+        eq_(40 * MBPS, load.rate(4, 1))
+        eq_(.4, load.utilization(4, 1))
+        eq_(round(1 / .6, 2), load.cost(4, 1))
+        # 0 Mbps: the ewma is 20 Mbps, the median 40 Mbps
+        self._poll(4, 1, 5, 1002.)
+        eq_(40 * MBPS, load.rate(4, 1))
+        self._poll(4, 1, 5, 1003.)
+        self._poll(4, 1, 5, 1004.)
+        # ewma 5 Mbps, median 0 Mbps
+        eq_(5 * MBPS, load.rate(4, 1))
+        # the counter is reset
+        self._poll(4, 1, 0, 1005.)
+        eq_(5 * MBPS, load.rate(4, 1))
+        # beyond the capacity
+        self._poll(4, 1, 100, 1006.)
+        eq_(100, load.cost(4, 1))
+
+        eq_({(4, 1): load.cost(4, 1), (1, 4): 1}, load.link_costs())
+        eq_(0, load.rate(1, 4))
+
+    @raises(KeyError)
+    def test_unknown_link(self):
+        self.load.cost(4, 5)
+
+    def test_topology(self):
+        load = self.load
+        self._poll(4, 1, 0, 1000.)
+        self._poll(4, 1, 5, 1001.)
+        self._poll(4, 2, 0, 1000.)
+        # the link moved to port 2
+        load.update_topology(TopologySnapshot(2, (1, 4), {(4, 1): (2, 4)}))
+        eq_(0, load.rate(4, 1))
+        eq_([(4, 1)], list(load.link_costs()))
+
+    def test_cost_func(self):
+        load = link_load.LinkLoad(
+            cost_func=lambda rate, capacity: capacity - rate, capacity=10.)
+        load.update_topology(self.topo)
+        eq_(10, load.cost(4, 1))
+
+    def test_poll_schedule(self):
+        load = link_load.LinkLoad(poll_interval=1.)
+        now = 1000.
+        for dpid in range(1, 9):
+            load.add_datapath(dpid, now)
+        # the polls are spread over the interval
+        polled = []
+        for i in range(11):
+            dpids = load.poll_due(now + i / 10.)
+            ok_(len(dpids) <= 2)
+            polled += dpids
+        eq_(list(range(1, 9)), sorted(polled))
+        # and keep their phases
+        load.remove_datapath(3)
+        for i in range(11, 21):
+            t = now + i / 10.
+            dpids = load.poll_due(t)
+            ok_(len(dpids) <= 2)
+            for dpid in dpids:
+                polled.remove(dpid)
+        eq_([3], polled)
+        ok_(load.poll_timeout(t) <= 1.)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_stats_batch(self):
+        stats = numpy.zeros(1, dtype=stats_batch.PORT_STATS_DTYPE)
+        stats['port_no'] = 1
+        self.load.update_port_stats(4, stats, 1000.)
+        stats['tx_bytes'] = 1e6
+        self.load.update_port_stats(4, stats, 1001.)
+        eq_(8 * MBPS, self.load.rate(4, 1))
+
+    @test_lib.benchmark
+    def test_link_load_benchmark(self):
+        # a leaf-spine fabric, links of both directions
+        num_spines = 16
+        num_leaves = 240
+        edges = {}
+        for spine in range(1, num_spines + 1):
+            for leaf in range(num_spines + 1, num_spines + num_leaves + 1):
+                edges[(spine, leaf)] = (leaf, spine)
+                edges[(leaf, spine)] = (spine, leaf)
+        dpids = range(1, num_spines + num_leaves + 1)
+        load = link_load.LinkLoad()
+        load.update_topology(TopologySnapshot(1, dpids, edges))
+        bodies = {}
+        for (src, dst), (port_no, _) in edges.items():
+            bodies.setdefault(src, []).append(_stats(port_no, 0))
+
+        start = time.time()
+        for now in (1000., 1001.):
+            for dpid, body in bodies.items():
+                load.update_port_stats(dpid, body, now)
+        elapsed = (time.time() - start) / 2
+
+        lookups = 0
+        start = time.time()
+        for src, dst in edges:
+            load.cost(src, dst)
+            lookups += 1
+        elapsed_cost = (time.time() - start) / lookups
+        eq_(len(edges), len(load.link_costs()))
+
+        LOG.info('%d ports: port stats of all the switches %.1f msec, '
+                 'cost lookup %.2f usec', len(edges), elapsed * 1e3,
+                 elapsed_cost * 1e6)
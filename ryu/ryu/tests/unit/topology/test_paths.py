@@ -0,0 +1,202 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import random
+import time
+import unittest
+
+from nose.tools import eq_, ok_, raises
+
+from ryu.tests import test_lib
+from ryu.topology import graph
+from ryu.topology import paths
+from ryu.topology.graph import TopologySnapshot
+
+LOG = logging.getLogger(__name__)
+
+
+def _snapshot(version, edges):
+    dpids = set()
+    for src, dst in edges:
+        dpids.update((src, dst))
+    return TopologySnapshot(version, dpids,
+                            dict((edge, (1, 1)) for edge in edges))
+
+
+def _leaf_spine(num_spines, num_leaves, version=1):
+    edges = []
+    for spine in range(1, num_spines + 1):
+        for leaf in range(num_spines + 1, num_spines + num_leaves + 1):
+            edges += [(spine, leaf), (leaf, spine)]
+    return _snapshot(version, edges)
+
+
+def _all_paths(edges, src, dst, cost):
+    # every simple path by DFS, sorted by the cost
+    adj = {}
+    for u, v in edges:
+        adj.setdefault(u, []).append(v)
+    result = []
+
+    def _dfs(path):
+        u = path[-1]
+        if u == dst:
+            result.append(tuple(path))
+            return
+        for v in adj.get(u, ()):
+            if v not in path:
+                _dfs(path + [v])
+    _dfs([src])
+    return sorted(result, key=cost)
+
+
+class Test_KShortestPaths(unittest.TestCase):
+
+    def setUp(self):
+        self.ksp = paths.KShortestPaths()
+
+    def test_leaf_spine(self):
+        ksp = self.ksp
+        ksp.update_topology(_leaf_spine(3, 2))
+        eq_(((4, 1, 5), (4, 2, 5), (4, 3, 5)), ksp.k_shortest_paths(4, 5, 3))
+        eq_(((4, 1, 5), ), ksp.k_shortest_paths(4, 5, 1))
+        # all the paths if fewer than k
+        eq_(3, len(ksp.k_shortest_paths(4, 5, 5)))
+        eq_(((4, ), ), ksp.k_shortest_paths(4, 4, 3))
+        eq_((), ksp.k_shortest_paths(4, 99, 3))
+
+        ksp.set_cost(4, 1, 10)
+        eq_(((4, 2, 5), (4, 3, 5)), ksp.k_shortest_paths(4, 5, 2))
+        eq_(11, ksp.path_cost((4, 1, 5)))
+        ksp.set_costs({(2, 5): 5, (3, 5): 2})
+        eq_(((4, 3, 5), (4, 2, 5), (4, 1, 5)), ksp.k_shortest_paths(4, 5, 3))
+
+    def test_cache(self):
+        ksp = self.ksp
+        ksp.update_topology(_leaf_spine(3, 3))
+        result = ksp.k_shortest_paths(4, 5, 2)
+        other = ksp.k_shortest_paths(4, 6, 2)
+        ok_(ksp.k_shortest_paths(4, 5, 2) is result)
+
+        # a link not on the paths gets more expensive
+        version = ksp.cost_version
+        ksp.set_cost(3, 5, 10)
+        eq_(version + 1, ksp.cost_version)
+        ok_(ksp.k_shortest_paths(4, 5, 2) is result)
+        # the same cost is not a change
+        ksp.set_cost(3, 5, 10)
+        eq_(version + 1, ksp.cost_version)
+
+        # a link on the paths
+        ksp.set_cost(4, 1, 3)
+        ok_(ksp.k_shortest_paths(4, 6, 2) is not other)
+        eq_(((4, 2, 5), (4, 1, 5)), ksp.k_shortest_paths(4, 5, 2))
+        # paths longer than 2 hops
+        eq_(5, len(ksp.k_shortest_paths(4, 5, 5)))
+
+        # a new topology version clears the cache
+        result = ksp.k_shortest_paths(4, 5, 2)
+        ksp.update_topology(_leaf_spine(3, 3, version=1))
+        ok_(ksp.k_shortest_paths(4, 5, 2) is result)
+        ksp.update_topology(_leaf_spine(3, 3, version=2))
+        ok_(ksp.k_shortest_paths(4, 5, 2) is not result)
+
+    def test_max_entries(self):
+        ksp = paths.KShortestPaths(max_entries=2)
+        ksp.update_topology(_leaf_spine(2, 3))
+        first = ksp.k_shortest_paths(3, 4, 2)
+        ksp.k_shortest_paths(3, 5, 2)
+        ksp.k_shortest_paths(4, 5, 2)
+        eq_(2, len(ksp._cache))
+        ok_(ksp.k_shortest_paths(3, 4, 2) is not first)
+
+    def test_topology_graph(self):
+        g = graph.TopologyGraph()
+
+        class _Port(object):
+            def __init__(self, dpid, port_no):
+                self.dpid = dpid
+                self.port_no = port_no
+
+        class _Link(object):
+            def __init__(self, src, dst):
+                self.src = _Port(*src)
+                self.dst = _Port(*dst)
+
+        g.add_link(_Link((1, 1), (2, 1)))
+        g.add_link(_Link((2, 2), (3, 1)))
+        self.ksp.update_topology(g.snapshot())
+        eq_(((1, 2, 3), ), self.ksp.k_shortest_paths(1, 3, 2))
+        eq_((), self.ksp.k_shortest_paths(3, 1, 2))
+
+    @raises(ValueError)
+    def test_negative_cost(self):
+        self.ksp.set_cost(1, 2, -1)
+
+    def test_random(self):
+        rand = random.Random(1)
+        for version in range(1, 21):
+            nodes = list(range(1, 8))
+            edges = [(u, v) for u in nodes for v in nodes
+                     if u != v and rand.random() < .4]
+            costs = dict((edge, rand.randint(1, 5)) for edge in edges)
+            ksp = self.ksp
+            ksp.update_topology(_snapshot(version, edges))
+            ksp.set_costs(costs)
+            for _ in range(10):
+                src, dst = rand.sample(nodes, 2)
+                k = rand.randint(1, 6)
+                if rand.random() < .5:
+                    # a cost changes between the requests
+                    edge = rand.choice(edges)
+                    ksp.set_cost(edge[0], edge[1], rand.randint(1, 5))
+                expected = _all_paths(edges, src, dst, ksp.path_cost)[:k]
+                result = ksp.k_shortest_paths(src, dst, k)
+                eq_([ksp.path_cost(p) for p in expected],
+                    [ksp.path_cost(p) for p in result])
+                eq_(len(result), len(set(result)))
+
+    @test_lib.benchmark
+    def test_ksp_benchmark(self):
+        ksp = self.ksp
+        num_spines = 8
+        num_leaves = 32
+        ksp.update_topology(_leaf_spine(num_spines, num_leaves))
+        leaves = list(range(num_spines + 1, num_spines + num_leaves + 1))
+        pairs = [(src, dst) for src in leaves for dst in leaves
+                 if src != dst]
+
+        start = time.time()
+        for src, dst in pairs:
+            eq_(3, len(ksp.k_shortest_paths(src, dst, 3)))
+        elapsed = (time.time() - start) / len(pairs)
+
+        start = time.time()
+        for src, dst in pairs:
+            ksp.k_shortest_paths(src, dst, 3)
+        elapsed_cached = (time.time() - start) / len(pairs)
+
+        # a link of a spine gets busier
+        start = time.time()
+        ksp.set_cost(1, leaves[0], 5)
+        for src, dst in pairs:
+            ksp.k_shortest_paths(src, dst, 3)
+        elapsed_update = time.time() - start
+
+        LOG.info('%d leaf pairs: 3 shortest paths %.2f msec, cached %.2f '
+                 'usec, recomputed after a cost change %.1f msec in total',
+                 len(pairs), elapsed * 1e3, elapsed_cached * 1e6,
+                 elapsed_update * 1e3)
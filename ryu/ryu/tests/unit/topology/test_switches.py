@@ -0,0 +1,517 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    import mock  # Python 2
+except ImportError:
+    from unittest import mock  # Python 3
+
+import logging
+import time
+import unittest
+
+import msgpack
+from nose.tools import eq_, ok_
+
+from ryu.base import app_manager
+from ryu.controller import ofp_event
+from ryu.controller import worker_channel
+from ryu.lib import hub
+from ryu.lib.packet import arp
+from ryu.lib.packet import ether_types
+from ryu.lib.packet import ethernet
+from ryu.lib.packet import packet
+from ryu.ofproto import ofproto_protocol
+from ryu.ofproto import ofproto_v1_0
+from ryu.ofproto import ofproto_v1_3
+from ryu.tests import test_lib
+from ryu.topology import event
+from ryu.topology import switches
+
+LOG = logging.getLogger(__name__)
+
+
+class DummyDatapath(ofproto_protocol.ProtocolDesc):
+
+    def __init__(self, version, dpid, num_ports):
+        super(DummyDatapath, self).__init__(version)
+        self.id = dpid
+        self.xid = 0
+        self.sent = []  # list of lists of messages sent at once
+        self.ports = {}
+        for port_no in range(1, num_ports + 1):
+            kw = {'port_no': port_no, 'hw_addr': '00:00:00:00:00:%02x'
+                  % (port_no & 0xff), 'name': b'eth%d' % port_no,
+                  'config': 0, 'state': 0, 'curr': 0, 'advertised': 0,
+                  'supported': 0, 'peer': 0}
+            if version == ofproto_v1_0.OFP_VERSION:
+                port = self.ofproto_parser.OFPPhyPort(**kw)
+            else:
+                port = self.ofproto_parser.OFPPort(curr_speed=0, max_speed=0,
+                                                   **kw)
+            self.ports[port_no] = port
+
+    def set_xid(self, msg):
+        self.xid += 1
+        msg.set_xid(self.xid)
+        return self.xid
+
+    def send_msgs(self, msgs):
+        for msg in msgs:
+            if msg.xid is None:
+                self.set_xid(msg)
+            msg.serialize()
+        self.sent.append(msgs)
+        return True
+
+
+class Test_Switches(unittest.TestCase):
+
+    def setUp(self):
+        # test_manager reloads app_manager, while Switches still derives
+        # from the former RyuApp, which RyuApp.__init__ refers to
+        patcher = mock.patch.object(app_manager, 'RyuApp',
+                                    switches.Switches.__bases__[0])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _switches(self, datapaths):
+        app = switches.Switches()
+        for dp in datapaths:
+            app._register(dp)
+            app.graph.add_switch(dp.id)
+            for port in app._get_switch(dp.id).ports:
+                app._port_added(port)
+        return app
+
+    def _lldp_round(self, app, now):
+        ports = app.ports.lldp_due(now)
+        app.send_lldp_packets(ports)
+        return ports
+
+    def _packet_out(self, dp, port_no, xid):
+        # The LLDP packet-out as the former send_lldp_packet() built it
+        data = switches.LLDPPacket.lldp_packet(
+            dp.id, port_no, dp.ports[port_no].hw_addr,
+            switches.Switches.DEFAULT_TTL)
+        actions = [dp.ofproto_parser.OFPActionOutput(port_no)]
+        if dp.ofproto.OFP_VERSION == ofproto_v1_0.OFP_VERSION:
+            out = dp.ofproto_parser.OFPPacketOut(
+                dp, 0xffffffff, dp.ofproto.OFPP_NONE, actions, data)
+        else:
+            out = dp.ofproto_parser.OFPPacketOut(
+                datapath=dp, in_port=dp.ofproto.OFPP_CONTROLLER,
+                buffer_id=dp.ofproto.OFP_NO_BUFFER, actions=actions,
+                data=data)
+        out.set_xid(xid)
+        out.serialize()
+        return out.buf
+
+    def _check_sent(self, dp):
+        # An LLDP packet-out to each port, sent at once
+        eq_(1, len(dp.sent))
+        port_nos = []
+        for msg in dp.sent[0]:
+            data = bytes(msg.buf[-switches.Switches.LLDP_PACKET_LEN:])
+            dpid, port_no = switches.LLDPPacket.lldp_parse(data)
+            eq_(dp.id, dpid)
+            eq_(self._packet_out(dp, port_no, msg.xid), msg.buf)
+            port_nos.append(port_no)
+        eq_(sorted(dp.ports), sorted(port_nos))
+        eq_(len(port_nos), len(set(msg.xid for msg in dp.sent[0])))
+
+    def test_lldp_batch(self):
+        dps = [DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 4),
+               DummyDatapath(ofproto_v1_0.OFP_VERSION, 2, 3)]
+        app = self._switches(dps)
+        eq_(7, len(self._lldp_round(app, time.time())))
+        for dp in dps:
+            self._check_sent(dp)
+
+        # not due until the period passes
+        eq_([], self._lldp_round(app, time.time()))
+        timeout = app.ports.lldp_timeout(time.time())
+        ok_(0 < timeout <= app.LLDP_SEND_PERIOD_PER_PORT)
+
+    def test_lldp_burst(self):
+        dp = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 10)
+        app = self._switches([dp])
+        now = time.time()
+        eq_(4, len(app.ports.lldp_due(now, limit=4)))
+        eq_(6, len(app.ports.lldp_due(now, limit=8)))
+
+    def test_lldp_period(self):
+        dp = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 1)
+        app = self._switches([dp])
+        port = app._get_port(1, 1)
+        port_data = app.ports[port]
+        wheel = app.ports._wheel
+
+        def _period():
+            # rounded as the timestamps are large
+            return round(wheel.deadline(port) - port_data.timestamp, 3)
+
+        periods = []
+        for _ in range(5):
+            app.send_lldp_packet(port)
+            periods.append(_period())
+        p = app.LLDP_SEND_PERIOD_PER_PORT
+        eq_([p, p * 2, app.LLDP_SEND_PERIOD_MAX, app.LLDP_SEND_PERIOD_MAX,
+             app.LLDP_SEND_PERIOD_MAX], periods)
+        eq_(5, len(dp.sent))
+
+        # a change of the port resets the period and sends at once
+        app.ports.move_front(port)
+        eq_([port], self._lldp_round(app, time.time()))
+        eq_(p, _period())
+
+    def test_lldp_port_down_and_deleted(self):
+        dp = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 2)
+        app = self._switches([dp])
+        port1 = app._get_port(1, 1)
+        port2 = app._get_port(1, 2)
+        app.ports[port1].set_down(True)
+        app.ports.del_port(port2)
+        eq_([port1], self._lldp_round(app, time.time()))
+        eq_([], dp.sent)
+        ok_(port2 not in app.ports._wheel)
+
+    def test_link_expiry(self):
+        dps = [DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 1),
+               DummyDatapath(ofproto_v1_3.OFP_VERSION, 2, 1)]
+        app = self._switches(dps)
+        links = app.links
+        src = app._get_port(1, 1)
+        dst = app._get_port(2, 1)
+        ok_(not links.update_link(src, dst))
+        ok_(links.update_link(dst, src))
+        link = switches.Link(src, dst)
+        timeout = app.LINK_TIMEOUT
+
+        now = time.time()
+        eq_([], links.expired_links(now))
+        ok_(timeout - 1 < links.expiry_timeout(now) <= timeout)
+
+        # a refreshed link is scheduled again
+        links[link] = now + 5
+        eq_([switches.Link(dst, src)],
+            links.expired_links(now + timeout + 1))
+        eq_([], links.expired_links(now + timeout + 2))
+        eq_([link], links.expired_links(now + timeout + 6))
+
+        links.link_down(link)
+        ok_(link not in links._wheel)
+        eq_(None, links.expiry_timeout(now))
+
+    def test_graph_link_down(self):
+        dps = [DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 1),
+               DummyDatapath(ofproto_v1_3.OFP_VERSION, 2, 1)]
+        app = self._switches(dps)
+        src = app._get_port(1, 1)
+        dst = app._get_port(2, 1)
+        for link in (switches.Link(src, dst), switches.Link(dst, src)):
+            app.links.update_link(link.src, link.dst)
+            app.graph.add_link(link)
+        topo = app.graph.snapshot()
+        eq_([(1, 2), (2, 1)], topo.edges())
+
+        app._link_down(src)
+        eq_([], app.graph.snapshot().edges())
+        ok_(app.graph.version > topo.version)
+
+    def _arp_packet_in(self, dp, port_no):
+        # An ARP request of 00:00:00:00:01:01 (10.0.0.1)
+        pkt = packet.Packet()
+        pkt.add_protocol(ethernet.ethernet(
+            'ff:ff:ff:ff:ff:ff', '00:00:00:00:01:01',
+            ether_types.ETH_TYPE_ARP))
+        pkt.add_protocol(arp.arp(src_mac='00:00:00:00:01:01',
+                                 src_ip='10.0.0.1', dst_ip='10.0.0.2'))
+        pkt.serialize()
+        parser = dp.ofproto_parser
+        return ofp_event.EventOFPPacketIn(parser.OFPPacketIn(
+            dp, match=parser.OFPMatch(in_port=port_no),
+            data=bytes(pkt.data)))
+
+    def test_host_events(self):
+        dp = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 2)
+        app = self._switches([dp])
+        events = []
+        app.send_event_to_observers = lambda ev, state=None: \
+            events.append(ev)
+
+        def packet_in(port_no):
+            return self._arp_packet_in(dp, port_no)
+
+        # The events carry the address of the packet
+        app.host_discovery_packet_in_handler(packet_in(1))
+        eq_([event.EventHostAdd], [ev.__class__ for ev in events])
+        eq_(['10.0.0.1'], events[0].host.ipv4)
+
+        del events[:]
+        app.host_discovery_packet_in_handler(packet_in(2))
+        eq_([event.EventHostMove], [ev.__class__ for ev in events])
+        eq_(2, events[0].dst.port.port_no)
+        eq_(['10.0.0.1'], events[0].dst.ipv4)
+
+    def test_host_timeout(self):
+        dp = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 2)
+        app = self._switches([dp])
+        events = []
+        app.send_event_to_observers = lambda ev, state=None: \
+            events.append(ev)
+        replies = []
+        app.reply_to_request = lambda req, rep: replies.append(rep)
+        eq_(None, app.hosts.host_timeout)
+
+        # A host seen only once is kept, since the aging is disabled
+        app.host_discovery_packet_in_handler(self._arp_packet_in(dp, 1))
+        later = time.time() + 3600
+        with mock.patch('time.time', return_value=later):
+            app.host_request_handler(event.EventHostRequest(ip='10.0.0.1'))
+        eq_(['00:00:00:00:01:01'], [host.mac for host in replies[0].hosts])
+        eq_([event.EventHostAdd], [ev.__class__ for ev in events])
+
+        # and deleted with --host-timeout
+        app.hosts.host_timeout = 300.
+        with mock.patch('time.time', return_value=later):
+            app.host_request_handler(event.EventHostRequest(ip='10.0.0.1'))
+        eq_([], replies[1].hosts)
+        eq_(event.EventHostDelete, events[-1].__class__)
+
+    def _relay(self, app, src, ev):
+        # ev relayed from the worker src as WorkerChannel does
+        buf = msgpack.packb(
+            [ev.__class__.__name__,
+             (getattr(ev, 'switch', None) or ev.link).to_dict()],
+            use_bin_type=True)
+        app._worker_message_handler(worker_channel.EventWorkerMessage(
+            src, worker_channel.TOPIC_TOPOLOGY,
+            msgpack.unpackb(buf, raw=False)))
+
+    def _request(self, app, req):
+        replies = []
+        app.reply_to_request = lambda req, rep: replies.append(rep)
+        req.src = 'test'
+        if isinstance(req, event.EventSwitchRequest):
+            app.switch_request_handler(req)
+        else:
+            app.link_request_handler(req)
+        return replies[0]
+
+    def test_remote_topology(self):
+        dp1 = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 2)
+        dp2 = DummyDatapath(ofproto_v1_3.OFP_VERSION, 2, 2)
+        # dp1 is connected to the worker 0 and dp2 to the worker 1
+        app0 = self._switches([dp1])
+        app1 = self._switches([dp2])
+        events = []
+        app1.send_event_to_observers = lambda ev, state=None: \
+            events.append(ev)
+        app1.link_discovery = True
+        app1.explicit_drop = False
+        app1.lldp_event = hub.Event()
+        app1.link_event = hub.Event()
+
+        self._relay(app1, 0, event.EventSwitchEnter(app0._get_switch(1)))
+        self._relay(app0, 1, event.EventSwitchEnter(app1._get_switch(2)))
+        eq_((1, 2), app0.graph.snapshot().dpids)
+        eq_((1, 2), app1.graph.snapshot().dpids)
+        switches_ = self._request(app0, event.EventSwitchRequest()).switches
+        eq_([1, 2], sorted(switch.dp.id for switch in switches_))
+        remote = self._request(app0, event.EventSwitchRequest(2)).switches
+        eq_(1, remote[0].dp.worker_id)
+        eq_(app1._get_switch(2).to_dict(), remote[0].to_dict())
+
+        # The LLDP packet of dp1 is received by the worker 1
+        parser = dp2.ofproto_parser
+        data = switches.LLDPPacket.lldp_packet(
+            1, 2, dp1.ports[2].hw_addr, switches.Switches.DEFAULT_TTL)
+        app1.lldp_packet_in_handler(ofp_event.EventOFPPacketIn(
+            parser.OFPPacketIn(dp2, match=parser.OFPMatch(in_port=1),
+                               data=data)))
+        eq_([event.EventLinkAdd], [ev.__class__ for ev in events])
+        link = events[0].link
+        eq_((1, 2, 2, 1), (link.src.dpid, link.src.port_no,
+                           link.dst.dpid, link.dst.port_no))
+        eq_([(1, 2)], app1.graph.snapshot().edges())
+
+        self._relay(app0, 1, events[0])
+        eq_([(1, 2)], app0.graph.snapshot().edges())
+        eq_([link], self._request(app0, event.EventLinkRequest(1)).links)
+        eq_([], self._request(app0, event.EventLinkRequest(2)).links)
+
+        # dp1 leaves the worker 0
+        self._relay(app1, 0, event.EventSwitchLeave(app0._get_switch(1)))
+        eq_(event.EventLinkDelete, events[-1].__class__)
+        eq_([], list(app1.links))
+        eq_((2, ), app1.graph.snapshot().dpids)
+        self._relay(app0, 1, events[-1])
+        eq_([], app0.graph.snapshot().edges())
+
+    @test_lib.benchmark
+    def test_discovery_benchmark(self):
+        num_dps = 100
+        num_ports = 48
+        dps = [DummyDatapath(ofproto_v1_3.OFP_VERSION, dpid, num_ports)
+               for dpid in range(1, num_dps + 1)]
+        app = self._switches(dps)
+        num = num_dps * num_ports
+
+        # A discovery round sending LLDP to every port.  The former loop
+        # slept LLDP_SEND_GUARD after each port.
+        now = time.time()
+        start = time.time()
+        count = 0
+        while count < num:
+            ports = app.ports.lldp_due(now, app.LLDP_SEND_BURST)
+            ok_(ports)
+            app.send_lldp_packets(ports)
+            count += len(ports)
+        elapsed = time.time() - start
+        eq_(num, count)
+        eq_([], app.ports.lldp_due(now))
+        for dp in dps:
+            # a batch per datapath, split by LLDP_SEND_BURST at most once
+            eq_(num_ports, sum(len(msgs) for msgs in dp.sent))
+            ok_(len(dp.sent) <= 2)
+
+        # Links between port pairs, all of which expire at once.
+        for dp in dps:
+            for port_no in range(1, num_ports, 2):
+                app.links.update_link(app._get_port(dp.id, port_no),
+                                      app._get_port(dp.id, port_no + 1))
+        checks = 1000
+        start = time.time()
+        for _ in range(checks):
+            eq_([], app.links.expired_links(time.time()))
+        elapsed_check = (time.time() - start) / checks
+        expired = app.links.expired_links(time.time() + app.LINK_TIMEOUT)
+        eq_(num // 2, len(expired))
+
+        LOG.info('%d ports: LLDP to every port %.2f msec (former loop '
+                 '%.1f sec), idle link expiry check %.2f usec',
+                 num, elapsed * 1e3, num * app.LLDP_SEND_GUARD,
+                 elapsed_check * 1e6)
+
+
+class Test_HostState(unittest.TestCase):
+
+    def setUp(self):
+        self.dp = DummyDatapath(ofproto_v1_3.OFP_VERSION, 1, 4)
+
+    def _host(self, mac, port_no, dpid=1):
+        port = switches.Port(dpid, self.dp.ofproto, self.dp.ports[port_no])
+        return switches.Host(mac, port)
+
+    def test_index(self):
+        hosts = switches.HostState()
+        h1 = self._host('00:00:00:00:00:01', 1)
+        h2 = self._host('00:00:00:00:00:02', 1)
+        h3 = self._host('00:00:00:00:00:03', 2, dpid=2)
+        for host in (h1, h2, h3):
+            eq_([], hosts.add(host))
+        # a known mac address is not replaced
+        hosts.add(self._host('00:00:00:00:00:01', 3))
+        eq_(1, hosts[h1.mac].port.port_no)
+
+        hosts.update_ip(h1, ip_v4='10.0.0.1')
+        hosts.update_ip(h1, ip_v6='2001:db8::1')
+        hosts.update_ip(h2, ip_v4='10.0.0.2')
+        hosts.update_ip(h1, ip_v4='10.0.0.11')
+        hosts.update_ip(h1, ip_v4='10.0.0.1')
+        eq_(['10.0.0.11', '10.0.0.1'], h1.ipv4)
+        ok_(hosts.get_by_ip('10.0.0.1') is h1)
+        ok_(hosts.get_by_ip('2001:db8:0::1') is h1)
+        ok_(hosts.get_by_ip('10.0.0.2') is h2)
+        eq_(None, hosts.get_by_ip('10.0.0.3'))
+        eq_(None, hosts.get_by_ip('::zz'))
+
+        eq_([h1.mac, h2.mac], [h.mac for h in hosts.get_by_dpid(1)])
+        eq_([h3], hosts.get_by_dpid(2))
+        eq_([h1, h2], hosts.get_by_port(1, 1))
+        eq_([], hosts.get_by_port(1, 2))
+
+        # an address moved to another host
+        hosts.update_ip(h2, ip_v4='10.0.0.1')
+        ok_(hosts.get_by_ip('10.0.0.1') is h2)
+        eq_(['10.0.0.11'], h1.ipv4)
+
+        # a host moved to another port
+        moved = self._host(h1.mac, 3)
+        hosts[h1.mac] = moved
+        eq_([h2], hosts.get_by_port(1, 1))
+        eq_([moved], hosts.get_by_port(1, 3))
+        eq_(None, hosts.get_by_ip('10.0.0.11'))
+
+        del hosts[h2.mac]
+        eq_(None, hosts.get_by_ip('10.0.0.1'))
+        eq_([moved], hosts.get_by_dpid(1))
+        eq_(h3, hosts.pop(h3.mac))
+        eq_(None, hosts.pop(h3.mac, None))
+        eq_([], hosts.get_by_dpid(2))
+
+    def test_expire(self):
+        hosts = switches.HostState(host_timeout=10)
+        h1 = self._host('00:00:00:00:00:01', 1)
+        h2 = self._host('00:00:00:00:00:02', 2)
+        hosts.add(h1)
+        hosts.add(h2)
+        hosts.update_ip(h2, ip_v4='10.0.0.2')
+        now = time.time()
+        hosts.touch(h1.mac, now + 5)
+        eq_([], hosts.expire(now + 9))
+        eq_([h2], hosts.expire(now + 10))
+        eq_(None, hosts.get_by_ip('10.0.0.2'))
+        eq_([h1], hosts.expire(now + 15))
+        eq_(0, len(hosts))
+
+    def test_max_hosts(self):
+        hosts = switches.HostState(max_hosts=2)
+        h1 = self._host('00:00:00:00:00:01', 1)
+        h2 = self._host('00:00:00:00:00:02', 2)
+        h3 = self._host('00:00:00:00:00:03', 3)
+        hosts.add(h1)
+        hosts.add(h2)
+        hosts.touch(h1.mac)
+        eq_([h2], hosts.add(h3))
+        eq_(sorted([h1.mac, h3.mac]), sorted(hosts))
+        eq_([], hosts.get_by_port(1, 2))
+
+    @test_lib.benchmark
+    def test_host_benchmark(self):
+        num = 50000
+        hosts = switches.HostState(max_hosts=num)
+        port = switches.Port(1, self.dp.ofproto, self.dp.ports[1])
+        start = time.time()
+        for i in range(num):
+            host = switches.Host('02:00:00:%02x:%02x:%02x' % (
+                i >> 16, (i >> 8) & 0xff, i & 0xff), port)
+            hosts.add(host)
+            hosts.update_ip(host, ip_v4='10.%d.%d.%d' % (
+                i >> 16, (i >> 8) & 0xff, i & 0xff))
+        elapsed_add = time.time() - start
+
+        lookups = 10000
+        start = time.time()
+        for i in range(0, num, num // lookups):
+            host = hosts.get_by_ip('10.%d.%d.%d' % (
+                i >> 16, (i >> 8) & 0xff, i & 0xff))
+            eq_(i & 0xff, int(host.mac[-2:], 16))
+        elapsed_ip = (time.time() - start) / lookups
+        eq_(num, len(hosts.get_by_dpid(1)))
+
+        LOG.info('%d hosts: added in %.1f msec, lookup by IP %.2f usec',
+                 num, elapsed_add * 1e3, elapsed_ip * 1e6)
@@ -35,6 +35,14 @@ def get_all_link(app):
     return get_link(app)
 
 
+def get_topology(app):
+    """
+    Returns the TopologySnapshot of the switches and the links.
+    """
+    rep = app.send_request(event.EventTopologyRequest())
+    return rep.topology
+
+
 def get_host(app, dpid=None):
     rep = app.send_request(event.EventHostRequest(dpid))
     return rep.hosts
@@ -44,4 +52,12 @@ def get_all_host(app):
     return get_host(app)
 
 
+def get_host_by_ip(app, ip):
+    """
+    Returns the Host of the IPv4/IPv6 address, or None.
+    """
+    rep = app.send_request(event.EventHostRequest(ip=ip))
+    return rep.hosts[0] if rep.hosts else None
+
+
 app_manager.require_app('ryu.topology.switches', api_style=True)
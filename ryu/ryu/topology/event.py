@@ -21,6 +21,8 @@ LOG = logging.getLogger(__name__)
 
 
 class EventSwitchBase(event.EventBase):
+    PRIORITY = event.EVENT_PRIORITY_CONTROL
+
     def __init__(self, switch):
         super(EventSwitchBase, self).__init__()
         self.switch = switch
@@ -47,6 +49,8 @@ class EventSwitchReconnected(EventSwitchBase):
 
 
 class EventPortBase(event.EventBase):
+    PRIORITY = event.EVENT_PRIORITY_CONTROL
+
     def __init__(self, port):
         super(EventPortBase, self).__init__()
         self.port = port
@@ -93,6 +97,8 @@ class EventSwitchReply(event.EventReplyBase):
 
 
 class EventLinkBase(event.EventBase):
+    PRIORITY = event.EVENT_PRIORITY_CONTROL
+
     def __init__(self, link):
         super(EventLinkBase, self).__init__()
         self.link = link
@@ -134,16 +140,36 @@ class EventLinkReply(event.EventReplyBase):
             (self.dst, self.dpid, len(self.links))
 
 
+class EventTopologyRequest(event.EventRequestBase):
+    def __init__(self):
+        super(EventTopologyRequest, self).__init__()
+        self.dst = 'switches'
+
+    def __str__(self):
+        return 'EventTopologyRequest<src=%s>' % self.src
+
+
+class EventTopologyReply(event.EventReplyBase):
+    def __init__(self, dst, topology):
+        super(EventTopologyReply, self).__init__(dst)
+        self.topology = topology  # TopologySnapshot
+
+    def __str__(self):
+        return 'EventTopologyReply<dst=%s, %s>' % (self.dst, self.topology)
+
+
 class EventHostRequest(event.EventRequestBase):
     # if dpid is None, replay all hosts
-    def __init__(self, dpid=None):
+    # if ip is given, reply the host of the IPv4/IPv6 address
+    def __init__(self, dpid=None, ip=None):
         super(EventHostRequest, self).__init__()
         self.dst = 'switches'
         self.dpid = dpid
+        self.ip = ip
 
     def __str__(self):
-        return 'EventHostRequest<src=%s, dpid=%s>' % \
-            (self.src, self.dpid)
+        return 'EventHostRequest<src=%s, dpid=%s, ip=%s>' % \
+            (self.src, self.dpid, self.ip)
 
 
 class EventHostReply(event.EventReplyBase):
@@ -171,9 +197,9 @@ class EventHostAdd(EventHostBase):
         super(EventHostAdd, self).__init__(host)
 
 
-# Note: Currently, EventHostDelete will never be raised, because we have no
-# appropriate way to detect the disconnection of hosts. Just defined for
-# future use.
+# Note: EventHostDelete is raised when a host is evicted to keep
+# Switches.MAX_HOSTS or, if --host-timeout is given, not seen for it,
+# because we have no appropriate way to detect the disconnection of hosts.
 class EventHostDelete(EventHostBase):
     def __init__(self, host):
         super(EventHostDelete, self).__init__(host)
@@ -0,0 +1,180 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Versioned topology graph.
+
+The switches app keeps a TopologyGraph of the switches and the links
+between them, updated as it raises EventSwitchEnter/Leave and
+EventLinkAdd/Delete.  Every change increments its version.
+
+ryu.topology.api.get_topology() returns an immutable TopologySnapshot,
+which is built once per version.  Path computations can be cached by
+the version instead of rebuilding a graph from get_switch() and
+get_link() periodically::
+
+    topo = get_topology(self)
+    if topo.version != self.topo_version:
+        self.topo_version = topo.version
+        self.paths.clear()
+"""
+
+import types
+
+
+class TopologySnapshot(object):
+    """
+    Immutable directed graph of the switches.
+
+    ============ ========================================================
+    Attribute    Description
+    ============ ========================================================
+    version      Version of the topology
+    dpids        Tuple of the datapath IDs in ascending order
+    index        Mapping of datapath ID -> index in dpids
+    offsets      Tuple of len(dpids) + 1 offsets into targets
+    targets      Tuple of the indices of the neighbors; the neighbors
+                 of dpids[i] are targets[offsets[i]:offsets[i + 1]]
+    ports        Mapping of (src dpid, dst dpid) ->
+                 (src port_no, dst port_no) of the link between them.
+                 Of parallel links, the one of the lowest src port_no
+    ============ ========================================================
+    """
+
+    __slots__ = ('version', 'dpids', 'index', 'offsets', 'targets',
+                 'ports')
+
+    def __init__(self, version, dpids, edges):
+        # edges: {(src dpid, dst dpid): (src port_no, dst port_no)}
+        dpids = tuple(sorted(dpids))
+        index = dict((dpid, i) for i, dpid in enumerate(dpids))
+        neighbors = [[] for _ in dpids]
+        for src, dst in edges:
+            neighbors[index[src]].append(index[dst])
+        offsets = [0]
+        targets = []
+        for nbrs in neighbors:
+            targets.extend(sorted(nbrs))
+            offsets.append(len(targets))
+
+        setattr_ = super(TopologySnapshot, self).__setattr__
+        setattr_('version', version)
+        setattr_('dpids', dpids)
+        setattr_('index', types.MappingProxyType(index))
+        setattr_('offsets', tuple(offsets))
+        setattr_('targets', tuple(targets))
+        setattr_('ports', types.MappingProxyType(dict(edges)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TopologySnapshot is immutable')
+
+    def __contains__(self, dpid):
+        return dpid in self.index
+
+    def __len__(self):
+        return len(self.dpids)
+
+    def neighbors(self, dpid):
+        """
+        Returns the tuple of the dpids linked from the given dpid.
+        """
+        i = self.index[dpid]
+        dpids = self.dpids
+        return tuple(dpids[j] for j
+                     in self.targets[self.offsets[i]:self.offsets[i + 1]])
+
+    def port(self, src, dst):
+        """
+        Returns the port_no of src linked to dst, or None.
+        """
+        ports = self.ports.get((src, dst))
+        return ports[0] if ports else None
+
+    def edges(self):
+        """
+        Returns the list of (src dpid, dst dpid) of the links.
+        """
+        return sorted(self.ports)
+
+    def __str__(self):
+        return 'TopologySnapshot<version=%d, %d switches, %d links>' % (
+            self.version, len(self.dpids), len(self.ports))
+
+
+class TopologyGraph(object):
+    """
+    Mutable topology which hands out snapshots.
+
+    The links are directed like ryu.topology.switches.Link.  A link may
+    be added before its switches enter; the switches are added with it.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._dpids = set()
+        # (src dpid, dst dpid) -> {src port_no: dst port_no}
+        self._links = {}
+        self._snapshot = None
+
+    def _changed(self):
+        self.version += 1
+        self._snapshot = None
+
+    def add_switch(self, dpid):
+        if dpid not in self._dpids:
+            self._dpids.add(dpid)
+            self._changed()
+
+    def remove_switch(self, dpid):
+        """
+        Removes the switch and its links.
+        """
+        if dpid not in self._dpids:
+            return
+        self._dpids.discard(dpid)
+        for key in [key for key in self._links if dpid in key]:
+            del self._links[key]
+        self._changed()
+
+    def add_link(self, link):
+        src, dst = link.src, link.dst
+        ports = self._links.setdefault((src.dpid, dst.dpid), {})
+        if ports.get(src.port_no) == dst.port_no:
+            return
+        ports[src.port_no] = dst.port_no
+        self._dpids.update((src.dpid, dst.dpid))
+        self._changed()
+
+    def remove_link(self, link):
+        src, dst = link.src, link.dst
+        key = (src.dpid, dst.dpid)
+        ports = self._links.get(key)
+        if not ports or ports.get(src.port_no) != dst.port_no:
+            return
+        del ports[src.port_no]
+        if not ports:
+            del self._links[key]
+        self._changed()
+
+    def snapshot(self):
+        """
+        Returns the TopologySnapshot of the current version.
+        """
+        if self._snapshot is None:
+            edges = dict((key, min(ports.items()))
+                         for key, ports in self._links.items())
+            self._snapshot = TopologySnapshot(self.version, self._dpids,
+                                              edges)
+        return self._snapshot
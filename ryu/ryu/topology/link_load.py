@@ -0,0 +1,286 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Link utilization measured by port statistics.
+
+LinkLoad computes the transmit rate of every switch port from the
+OFPPortStatsReply bodies and the cost of every link of a
+TopologySnapshot from the rate and the capacity of its source port.
+The capacities are the curr_speed of the ports (OpenFlow 1.3 or later)
+unless set explicitly.
+
+The rate of a port is smoothed in two ways: an exponentially weighted
+moving average, and a percentile of the last samples.  The larger one
+is the load of the port, so a bursty link is not costed by its mean.
+The state of the ports is kept in arrays and the cost of each port is
+updated with its statistics, so cost() is a couple of dict lookups::
+
+    load = link_load.LinkLoad()
+    load.update_topology(get_topology(self))
+    load.update_port_desc(dp.id, dp.ports.values())
+    load.add_datapath(dp.id)
+    ...
+    # in a thread
+    for dpid in load.poll_due(time.time()):
+        send OFPPortStatsRequest to dpid
+    ...
+    # in the EventOFPPortStatsReply handler
+    load.update_port_stats(ev.msg.datapath.id, ev.msg.body)
+    ...
+    cost = load.cost(src_dpid, dst_dpid)
+
+poll_due() staggers the polls of the datapaths over poll_interval, so
+the replies do not arrive all at once.
+"""
+
+import array
+import time
+
+from ryu.lib import timer_wheel
+from ryu.topology.graph import TopologySnapshot
+
+
+def utilization_cost(rate, capacity):
+    """
+    The default cost function.  1 for an idle link, growing as the link
+    fills up.
+    """
+    return round(1. / max(1. - rate / capacity, .01), 2)
+
+
+class LinkLoad(object):
+    """
+    Port rates and link costs from port statistics.
+
+    ============== ======================================================
+    Argument       Description
+    ============== ======================================================
+    poll_interval  Seconds between the port stats polls of a datapath
+    alpha          Weight of a new sample in the moving average
+    window         Number of the samples for the percentile
+    percentile     Percentile of the samples, 0 to 100
+    cost_func      Function of (rate, capacity) in bit/s to a link cost
+    capacity       Capacity in bit/s of the ports of unknown speed
+    ============== ======================================================
+    """
+
+    def __init__(self, poll_interval=1., alpha=.3, window=16,
+                 percentile=90, cost_func=utilization_cost,
+                 capacity=1e9):
+        self.poll_interval = poll_interval
+        self.alpha = alpha
+        self.window = window
+        self.percentile = percentile
+        self.cost_func = cost_func
+        self.default_capacity = capacity
+        self.topology = TopologySnapshot(0, (), {})
+
+        # (dpid, port_no) -> index of the port in the arrays below
+        self._slots = {}
+        self._keys = []  # slot -> (dpid, port_no)
+        self._tx_bytes = array.array('d')
+        self._time = array.array('d')   # of the last sample
+        self._ewma = array.array('d')
+        self._load = array.array('d')   # max(ewma, percentile)
+        self._capacity = array.array('d')
+        self._speed = array.array('d')  # curr_speed, bit/s
+        self._samples = array.array('l')
+        # the last window rates of each port
+        self._history = array.array('d')
+        self._cost = array.array('d')
+        # capacities set explicitly, (dpid, port_no) -> bit/s
+        self._capacities = {}
+        # (src dpid, dst dpid) -> slot of the source port
+        self._links = {}
+
+        self._polls = timer_wheel.TimerWheel(min(poll_interval / 8, .05))
+        self._poll_deadlines = {}  # dpid -> deadline of the next poll
+        self._poll_phase = 0.
+
+    def _slot(self, dpid, port_no):
+        key = (dpid, port_no)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[key] = slot
+            self._keys.append(key)
+            for column in (self._tx_bytes, self._time, self._ewma,
+                           self._load, self._speed):
+                column.append(0.)
+            self._capacity.append(self._capacities.get(
+                key, self.default_capacity))
+            self._samples.append(0)
+            self._history.extend([0.] * self.window)
+            self._cost.append(self.cost_func(0., self._capacity[slot]))
+        return slot
+
+    def update_topology(self, topology):
+        """
+        Sets the TopologySnapshot whose links are costed.
+        """
+        if topology.version == self.topology.version:
+            return
+        self.topology = topology
+        self._links = dict(
+            (link, self._slot(link[0], ports[0]))
+            for link, ports in topology.ports.items())
+
+    def _set_capacity(self, slot):
+        capacity = (self._capacities.get(self._keys[slot]) or
+                    self._speed[slot] or self.default_capacity)
+        self._capacity[slot] = capacity
+        self._cost[slot] = self.cost_func(
+            min(self._load[slot], capacity), capacity)
+
+    def set_capacity(self, dpid, port_no, capacity):
+        """
+        Sets the capacity in bit/s of the port instead of its curr_speed.
+        None resets it.
+        """
+        if capacity is None:
+            self._capacities.pop((dpid, port_no), None)
+        else:
+            self._capacities[(dpid, port_no)] = capacity
+        self._set_capacity(self._slot(dpid, port_no))
+
+    def update_port_desc(self, dpid, ports):
+        """
+        Updates the capacities of the ports by their curr_speed.
+        ports is an iterable of OFPPort, e.g. Datapath.ports.values() or
+        the body of OFPPortDescStatsReply.
+        """
+        for port in ports:
+            # kbps
+            speed = getattr(port, 'curr_speed', 0) * 1000.
+            slot = self._slot(dpid, port.port_no)
+            if speed != self._speed[slot]:
+                self._speed[slot] = speed
+                self._set_capacity(slot)
+
+    def update_port_stats(self, dpid, stats, now=None):
+        """
+        Updates the rates by the body of OFPPortStatsReply, a list of
+        OFPPortStats or a structured array of ryu.lib.stats_batch.
+        """
+        if now is None:
+            now = time.time()
+        if hasattr(stats, 'dtype'):
+            entries = zip(stats['port_no'].tolist(),
+                          stats['tx_bytes'].tolist())
+        else:
+            entries = ((stat.port_no, stat.tx_bytes) for stat in stats)
+        for port_no, tx_bytes in entries:
+            self._update_port(self._slot(dpid, port_no), tx_bytes, now)
+
+    def _update_port(self, slot, tx_bytes, now):
+        last_bytes = self._tx_bytes[slot]
+        last_time = self._time[slot]
+        self._tx_bytes[slot] = tx_bytes
+        self._time[slot] = now
+        elapsed = now - last_time
+        if not last_time or elapsed <= 0 or tx_bytes < last_bytes:
+            # the first sample, or the counter is reset
+            return
+        rate = (tx_bytes - last_bytes) * 8 / elapsed
+
+        samples = self._samples[slot]
+        if samples:
+            self._ewma[slot] += self.alpha * (rate - self._ewma[slot])
+        else:
+            self._ewma[slot] = rate
+        window = self.window
+        base = slot * window
+        self._history[base + samples % window] = rate
+        samples += 1
+        self._samples[slot] = samples
+
+        n = min(samples, window)
+        history = sorted(self._history[base:base + n])
+        p = history[min(n - 1, int(n * self.percentile / 100.))]
+        load = max(self._ewma[slot], p)
+        self._load[slot] = load
+        capacity = self._capacity[slot]
+        self._cost[slot] = self.cost_func(min(load, capacity), capacity)
+
+    def _link_slot(self, src, dst):
+        slot = self._links.get((src, dst))
+        if slot is None:
+            raise KeyError('No link from %s to %s' % (src, dst))
+        return slot
+
+    def cost(self, src, dst):
+        """
+        Returns the cost of the link from src to dst.
+        """
+        return self._cost[self._link_slot(src, dst)]
+
+    def rate(self, src, dst):
+        """
+        Returns the smoothed rate in bit/s of the link from src to dst.
+        """
+        return self._load[self._link_slot(src, dst)]
+
+    def capacity(self, src, dst):
+        return self._capacity[self._link_slot(src, dst)]
+
+    def utilization(self, src, dst):
+        slot = self._link_slot(src, dst)
+        return self._load[slot] / self._capacity[slot]
+
+    def link_costs(self):
+        """
+        Returns the dict {(src dpid, dst dpid): cost} of all the links.
+        """
+        cost = self._cost
+        return dict((link, cost[slot]) for link, slot in self._links.items())
+
+    def add_datapath(self, dpid, now=None):
+        """
+        Schedules the port stats polls of the datapath.  The first polls
+        of the datapaths are spread over poll_interval.
+        """
+        if now is None:
+            now = time.time()
+        # golden ratio steps spread the phases evenly
+        self._poll_phase = (self._poll_phase + 0.618033988749895) % 1.
+        deadline = now + self._poll_phase * self.poll_interval
+        self._poll_deadlines[dpid] = deadline
+        self._polls.schedule(dpid, deadline)
+
+    def remove_datapath(self, dpid):
+        self._poll_deadlines.pop(dpid, None)
+        self._polls.cancel(dpid)
+
+    def poll_due(self, now):
+        """
+        Returns the list of the dpids to poll now and schedules their
+        next polls.
+        """
+        dpids = self._polls.expire(now)
+        for dpid in dpids:
+            # keep the phase of the datapath unless it is late
+            deadline = self._poll_deadlines[dpid] + self.poll_interval
+            if deadline <= now:
+                deadline = now + self.poll_interval
+            self._poll_deadlines[dpid] = deadline
+            self._polls.schedule(dpid, deadline)
+        return dpids
+
+    def poll_timeout(self, now):
+        """
+        Returns the seconds until the next poll, or None.
+        """
+        return self._polls.timeout(now)
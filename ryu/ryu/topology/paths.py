@@ -0,0 +1,237 @@
+# Copyright (C) 2026 Nippon Telegraph and Telephone Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+K shortest paths over the topology snapshots.
+
+KShortestPaths computes the k shortest loopless paths between switches
+by Yen's algorithm, which stops after the k-th path instead of
+enumerating every simple path.  The results are cached until the
+topology version changes.  When link costs change, only the cached
+results which the changed links can affect are recomputed::
+
+    ksp = paths.KShortestPaths()
+    ...
+    ksp.update_topology(get_topology(self))
+    ksp.set_costs(link_costs)  # {(src dpid, dst dpid): cost}
+    for path in ksp.k_shortest_paths(src_dpid, dst_dpid, 3):
+        ...
+
+The cost of a link is 1 unless set.  Costs must not be negative.
+"""
+
+import heapq
+from collections import OrderedDict, defaultdict
+
+from ryu.topology.graph import TopologySnapshot
+
+
+class KShortestPaths(object):
+    """
+    Cached K shortest paths engine.
+
+    ============ ========================================================
+    Attribute    Description
+    ============ ========================================================
+    topology     TopologySnapshot the paths are computed on
+    cost_version Incremented whenever a link cost changes
+    max_entries  Maximum number of the cached (src, dst, k) results
+    ============ ========================================================
+    """
+
+    DEFAULT_COST = 1
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.topology = TopologySnapshot(0, (), {})
+        self.cost_version = 0
+        self._costs = {}  # (src dpid, dst dpid) -> cost
+        # Cost of each link, in the order of topology.targets
+        self._weights = []
+        self._edge_pos = {}  # (src index, dst index) -> index in targets
+        # (src, dst, k) -> ([(cost, path)], tuple of paths)
+        self._cache = OrderedDict()
+        # link -> set of the cache keys whose paths use it
+        self._users = defaultdict(set)
+
+    def update_topology(self, topology):
+        """
+        Sets the TopologySnapshot.  The cache is cleared if its version
+        differs from the current one.
+        """
+        if topology.version == self.topology.version:
+            return
+        self.topology = topology
+        self._edge_pos = {}
+        self._weights = []
+        dpids = topology.dpids
+        offsets = topology.offsets
+        for i in range(len(dpids)):
+            for pos in range(offsets[i], offsets[i + 1]):
+                j = topology.targets[pos]
+                self._edge_pos[(i, j)] = pos
+                self._weights.append(self._costs.get((dpids[i], dpids[j]),
+                                                     self.DEFAULT_COST))
+        self._cache.clear()
+        self._users.clear()
+
+    def cost(self, src, dst):
+        return self._costs.get((src, dst), self.DEFAULT_COST)
+
+    def set_cost(self, src, dst, cost):
+        """
+        Sets the cost of the link from src to dst.
+        """
+        link = (src, dst)
+        old = self._costs.get(link, self.DEFAULT_COST)
+        if cost == old:
+            return
+        if cost < 0:
+            raise ValueError('Negative cost %r of %s' % (cost, link))
+        self._costs[link] = cost
+        self.cost_version += 1
+
+        index = self.topology.index
+        pos = self._edge_pos.get((index.get(src), index.get(dst)))
+        if pos is None:
+            return
+        self._weights[pos] = cost
+
+        stale = set(self._users.get(link, ()))
+        if cost < old:
+            # A path via the link costs cost at least, which may be
+            # cheaper than the k-th path found
+            for key, (found, _paths) in self._cache.items():
+                if len(found) == key[2] and found[-1][0] > cost:
+                    stale.add(key)
+        for key in stale:
+            self._invalidate(key)
+
+    def set_costs(self, costs):
+        """
+        Sets the costs of the links of a dict {(src, dst): cost}.
+        """
+        for (src, dst), cost in costs.items():
+            self.set_cost(src, dst, cost)
+
+    def path_cost(self, path):
+        """
+        Returns the sum of the link costs of the path.
+        """
+        return sum(self.cost(path[i], path[i + 1])
+                   for i in range(len(path) - 1))
+
+    def _invalidate(self, key):
+        found, paths = self._cache.pop(key)
+        for path in paths:
+            for i in range(len(path) - 1):
+                users = self._users.get((path[i], path[i + 1]))
+                if users is not None:
+                    users.discard(key)
+
+    def k_shortest_paths(self, src, dst, k):
+        """
+        Returns the tuple of at most k shortest loopless paths from src
+        to dst in the ascending order of their costs.  A path is a tuple
+        of dpids.
+        """
+        key = (src, dst, k)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            return entry[1]
+
+        index = self.topology.index
+        if src not in index or dst not in index or k < 1:
+            return ()
+        dpids = self.topology.dpids
+        found = [(cost, tuple(dpids[i] for i in path)) for cost, path
+                 in self._yen(index[src], index[dst], k)]
+        paths = tuple(path for _cost, path in found)
+
+        if len(self._cache) >= self.max_entries:
+            self._invalidate(next(iter(self._cache)))
+        self._cache[key] = (found, paths)
+        for path in paths:
+            for i in range(len(path) - 1):
+                self._users[(path[i], path[i + 1])].add(key)
+        return paths
+
+    def _dijkstra(self, src, dst, removed_nodes, removed_edges):
+        # Returns (cost, path of indices) or None
+        offsets = self.topology.offsets
+        targets = self.topology.targets
+        weights = self._weights
+        dist = {src: 0}
+        prev = {}
+        heap = [(0, src)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == dst:
+                path = [u]
+                while u != src:
+                    u = prev[u]
+                    path.append(u)
+                path.reverse()
+                return d, path
+            if d > dist[u]:
+                continue
+            for pos in range(offsets[u], offsets[u + 1]):
+                v = targets[pos]
+                if v in removed_nodes or pos in removed_edges:
+                    continue
+                nd = d + weights[pos]
+                if nd < dist.get(v, nd + 1):
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return None
+
+    def _yen(self, src, dst, k):
+        if src == dst:
+            return [(0, [src])]
+        first = self._dijkstra(src, dst, (), ())
+        if first is None:
+            return []
+        found = [first]
+        candidates = []
+        seen = set([tuple(first[1])])
+        weights = self._weights
+        edge_pos = self._edge_pos
+        while len(found) < k:
+            _cost, prev_path = found[-1]
+            root_cost = 0
+            for i in range(len(prev_path) - 1):
+                spur = prev_path[i]
+                root = prev_path[:i + 1]
+                removed_edges = set()
+                for _c, path in found:
+                    if path[:i + 1] == root:
+                        removed_edges.add(edge_pos[(path[i], path[i + 1])])
+                spur_path = self._dijkstra(spur, dst, set(root[:-1]),
+                                           removed_edges)
+                if spur_path is not None:
+                    path = root[:-1] + spur_path[1]
+                    t = tuple(path)
+                    if t not in seen:
+                        seen.add(t)
+                        heapq.heappush(candidates,
+                                       (root_cost + spur_path[0], t))
+                root_cost += weights[edge_pos[(spur, prev_path[i + 1])]]
+            if not candidates:
+                break
+            cost, path = heapq.heappop(candidates)
+            found.append((cost, list(path)))
+        return found
@@ -19,22 +19,28 @@ import struct
 import time
 from ryu import cfg
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from ryu.topology import event
 from ryu.base import app_manager
 from ryu.controller import ofp_event
+from ryu.controller import worker
+from ryu.controller import worker_channel
 from ryu.controller.handler import set_ev_cls
 from ryu.controller.handler import MAIN_DISPATCHER, DEAD_DISPATCHER
 from ryu.exception import RyuException
 from ryu.lib import addrconv, hub
 from ryu.lib.mac import DONTCARE_STR
 from ryu.lib.dpid import dpid_to_str, str_to_dpid
-from ryu.lib.port_no import port_no_to_str
+from ryu.lib.port_no import port_no_to_str, str_to_port_no
 from ryu.lib.packet import packet, ethernet
 from ryu.lib.packet import lldp, ether_types
+from ryu.lib.packet import packet_template
+from ryu.lib import timer_wheel
+from ryu.topology.graph import TopologyGraph
 from ryu.ofproto.ether import ETH_TYPE_LLDP
 from ryu.ofproto.ether import ETH_TYPE_CFM
 from ryu.ofproto import nx_match
+from ryu.ofproto import ofproto_parser
 from ryu.ofproto import ofproto_v1_0
 from ryu.ofproto import ofproto_v1_2
 from ryu.ofproto import ofproto_v1_3
@@ -53,7 +59,11 @@ CONF.register_cli_opts([
                 help='link discovery: explicitly install flow entry '
                      'to send lldp packet to controller'),
     cfg.BoolOpt('explicit-drop', default=True,
-                help='link discovery: explicitly drop lldp packet in')
+                help='link discovery: explicitly drop lldp packet in'),
+    cfg.FloatOpt('host-timeout', default=0, min=0,
+                 help='host discovery: delete the hosts not seen for the '
+                      'given seconds; a host is seen only by its packet-in. '
+                      '0 disables the aging (default 0)')
 ])
 
 
@@ -105,6 +115,27 @@ class Port(object):
             (self.dpid, self.port_no, LIVE_MSG[self.is_live()])
 
 
+class RemotePort(Port):
+    # Port of a switch connected to another worker process, made of
+    # Port.to_dict() relayed by ryu.controller.worker_channel.
+    # The reserved ports are not relayed and the port state is not known.
+    def __init__(self, port):
+        self.dpid = str_to_dpid(port['dpid'])
+        self._ofproto = None
+        self._config = 0
+        self._state = 0
+
+        self.port_no = str_to_port_no(port['port_no'])
+        self.hw_addr = port['hw_addr']
+        self.name = port['name'].encode('utf-8')
+
+    def is_reserved(self):
+        return False
+
+    def is_down(self):
+        return False
+
+
 class Switch(object):
     # This is data class passed by EventSwitchXXX
     def __init__(self, dp):
@@ -135,6 +166,19 @@ class Switch(object):
         return msg
 
 
+class RemoteDatapath(object):
+    # Switch.dp of a switch connected to another worker process.
+    # Messages cannot be sent to it from this process.
+    def __init__(self, dpid, worker_id):
+        super(RemoteDatapath, self).__init__()
+        self.id = dpid
+        self.worker_id = worker_id
+
+    def __str__(self):
+        return 'RemoteDatapath<dpid=%s, worker=%s>' % (self.id,
+                                                       self.worker_id)
+
+
 class Link(object):
     # This is data class passed by EventLinkXXX
     def __init__(self, src, dst):
@@ -190,12 +234,109 @@ class Host(object):
 
 class HostState(dict):
     # mac address -> Host class
-    def __init__(self):
+    # The hosts are also indexed by their IP addresses, datapaths and
+    # ports.  If host_timeout is given, expire() removes the hosts not
+    # seen for it.  If max_hosts is given, add() evicts the least
+    # recently seen hosts to keep the size.
+    def __init__(self, max_hosts=None, host_timeout=None):
         super(HostState, self).__init__()
+        self.max_hosts = max_hosts
+        self.host_timeout = host_timeout
+        self._ips = {}                  # ip address -> mac address
+        self._dpids = defaultdict(dict)  # dpid -> {mac address: Host}
+        # (dpid, port_no) -> {mac address: Host}
+        self._ports = defaultdict(dict)
+        self._seen = OrderedDict()      # mac address -> timestamp
+
+    def _index(self, host):
+        mac = host.mac
+        port = host.port
+        self._dpids[port.dpid][mac] = host
+        self._ports[(port.dpid, port.port_no)][mac] = host
+        for ip in host.ipv4 + host.ipv6:
+            self._ips[ip] = mac
+
+    def _unindex(self, host):
+        mac = host.mac
+        port = host.port
+        for index, key in ((self._dpids, port.dpid),
+                           (self._ports, (port.dpid, port.port_no))):
+            hosts = index.get(key)
+            if hosts is not None:
+                hosts.pop(mac, None)
+                if not hosts:
+                    del index[key]
+        for ip in host.ipv4 + host.ipv6:
+            if self._ips.get(ip) == mac:
+                del self._ips[ip]
+
+    def __setitem__(self, mac, host):
+        old = self.get(mac)
+        if old is not None:
+            self._unindex(old)
+        super(HostState, self).__setitem__(mac, host)
+        self._index(host)
+        self.touch(mac)
+
+    def __delitem__(self, mac):
+        host = self[mac]
+        super(HostState, self).__delitem__(mac)
+        self._unindex(host)
+        self._seen.pop(mac, None)
+
+    def pop(self, mac, *args):
+        if mac not in self:
+            return super(HostState, self).pop(mac, *args)
+        host = self[mac]
+        del self[mac]
+        return host
+
+    def clear(self):
+        super(HostState, self).clear()
+        self._ips.clear()
+        self._dpids.clear()
+        self._ports.clear()
+        self._seen.clear()
 
     def add(self, host):
+        """
+        Adds the host unless its mac address is known.  Returns the list
+        of the hosts evicted for it.
+        """
         mac = host.mac
-        self.setdefault(mac, host)
+        if mac in self:
+            return []
+        evicted = []
+        if self.max_hosts is not None:
+            while self and len(self) >= self.max_hosts:
+                evicted.append(self.pop(next(iter(self._seen))))
+        self[mac] = host
+        return evicted
+
+    def touch(self, mac, now=None):
+        """
+        Records that the host of the mac address is seen.
+        """
+        if mac in self:
+            self._seen[mac] = time.time() if now is None else now
+            self._seen.move_to_end(mac)
+
+    def expire(self, now):
+        """
+        Removes and returns the list of the hosts not seen for
+        host_timeout.
+        """
+        expired = []
+        if self.host_timeout is None:
+            return expired
+        deadline = now - self.host_timeout
+        seen = self._seen
+        while seen:
+            mac, timestamp = next(iter(seen.items()))
+            if timestamp > deadline:
+                break
+            expired.append(self.pop(mac))
+        return expired
 
     def update_ip(self, host, ip_v4=None, ip_v6=None):
         mac = host.mac
@@ -206,25 +347,41 @@ class HostState(dict):
         if not host:
             return
 
-        if ip_v4 is not None:
-            if ip_v4 in host.ipv4:
-                host.ipv4.remove(ip_v4)
-            host.ipv4.append(ip_v4)
-
-        if ip_v6 is not None:
-            if ip_v6 in host.ipv6:
-                host.ipv6.remove(ip_v6)
-            host.ipv6.append(ip_v6)
+        for ip, ips in ((ip_v4, host.ipv4), (ip_v6, host.ipv6)):
+            if ip is None:
+                continue
+            # the latest address is the last
+            if ips and ips[-1] == ip:
+                continue
+            if ip in ips:
+                ips.remove(ip)
+            ips.append(ip)
+
+            owner = self._ips.get(ip)
+            if owner is not None and owner != mac:
+                # the address is moved from another host
+                other = self[owner]
+                for other_ips in (other.ipv4, other.ipv6):
+                    if ip in other_ips:
+                        other_ips.remove(ip)
+            self._ips[ip] = mac
+
+    def get_by_ip(self, ip):
+        mac = self._ips.get(ip)
+        if mac is None and ':' in ip:
+            # IPv6 address not in the canonical form
+            try:
+                ip = addrconv.ipv6.bin_to_text(addrconv.ipv6.text_to_bin(ip))
+            except Exception:
+                return None
+            mac = self._ips.get(ip)
+        return self.get(mac) if mac is not None else None
 
     def get_by_dpid(self, dpid):
-        result = []
-
-        for mac in self:
-            host = self[mac]
-            if host.port.dpid == dpid:
-                result.append(host)
+        return list(self._dpids.get(dpid, {}).values())
 
-        return result
+    def get_by_port(self, dpid, port_no):
+        return list(self._ports.get((dpid, port_no), {}).values())
 
 
 class PortState(dict):
@@ -250,6 +407,8 @@ class PortData(object):
         self.lldp_data = lldp_data
         self.timestamp = None
         self.sent = 0
+        self.period = None          # LLDP send period
+        self.lldp_template = None   # MsgTemplate of the LLDP packet-out
 
     def lldp_sent(self):
         self.timestamp = time.time()
@@ -268,22 +427,28 @@ class PortData(object):
         self.is_down = is_down
 
     def __str__(self):
-        return 'PortData<live=%s, timestamp=%s, sent=%d>' \
-            % (not self.is_down, self.timestamp, self.sent)
+        return 'PortData<live=%s, timestamp=%s, sent=%d, period=%s>' \
+            % (not self.is_down, self.timestamp, self.sent, self.period)
 
 
 class PortDataState(dict):
     # dict: Port class -> PortData class
     # slimed down version of OrderedDict as python 2.6 doesn't support it.
+    # The LLDP sends are scheduled in a timer wheel.  The send period of a
+    # port starts at period and doubles after each send up to max_period,
+    # until the port or its links change.
     _PREV = 0
     _NEXT = 1
     _KEY = 2
 
-    def __init__(self):
+    def __init__(self, period=.9, max_period=None, tick=.05):
         super(PortDataState, self).__init__()
         self._root = root = []  # sentinel node
         root[:] = [root, root, None]  # [_PREV, _NEXT, _KEY] doubly linked list
         self._map = {}
+        self.period = period
+        self.max_period = period if max_period is None else max_period
+        self._wheel = timer_wheel.TimerWheel(tick)
 
     def _remove_key(self, key):
         link_prev, link_next, key = self._map.pop(key)
@@ -310,10 +475,15 @@ class PortDataState(dict):
         self._remove_key(key)
         self._prepend_key(key)
 
+    def _schedule_now(self, port, port_data):
+        port_data.period = self.period
+        self._wheel.schedule(port, time.time())
+
     def add_port(self, port, lldp_data):
         if port not in self:
             self._prepend_key(port)
-            self[port] = PortData(port.is_down(), lldp_data)
+            self[port] = port_data = PortData(port.is_down(), lldp_data)
+            self._schedule_now(port, port_data)
         else:
             self[port].is_down = port.is_down()
 
@@ -321,6 +491,8 @@ class PortDataState(dict):
         port_data = self[port]
         port_data.lldp_sent()
         self._move_last_key(port)
+        self._wheel.schedule(port, port_data.timestamp + port_data.period)
+        port_data.period = min(port_data.period * 2, self.max_period)
         return port_data
 
     def lldp_received(self, port):
@@ -331,6 +503,7 @@ class PortDataState(dict):
         if port_data is not None:
             port_data.clear_timestamp()
             self._move_front_key(port)
+            self._schedule_now(port, port_data)
 
     def set_down(self, port):
         is_down = port.is_down()
@@ -339,14 +512,29 @@ class PortDataState(dict):
         port_data.clear_timestamp()
         if not is_down:
             self._move_front_key(port)
+            self._schedule_now(port, port_data)
         return is_down
 
+    def lldp_due(self, now, limit=None):
+        """
+        Returns the list of up to limit ports whose LLDP send is due.
+        They are not scheduled again until lldp_sent() is called.
+        """
+        return self._wheel.expire(now, limit)
+
+    def lldp_timeout(self, now):
+        """
+        Returns the seconds until the next LLDP send, or None.
+        """
+        return self._wheel.timeout(now)
+
     def get_port(self, port):
         return self[port]
 
     def del_port(self, port):
         del self[port]
         self._remove_key(port)
+        self._wheel.cancel(port)
 
     def __iter__(self):
         root = self._root
@@ -361,6 +549,7 @@ class PortDataState(dict):
         root = self._root
         root[:] = [root, root, None]
         self._map.clear()
+        self._wheel.clear()
         dict.clear(self)
 
     def items(self):
@@ -375,9 +564,18 @@ class PortDataState(dict):
 
 class LinkState(dict):
     # dict: Link class -> timestamp
-    def __init__(self):
+    # If link_timeout is given, the expiry of the links is scheduled in
+    # a timer wheel.  A link refreshed by update_link() stays in the wheel
+    # and is scheduled again when its old deadline comes.
+    def __init__(self, link_timeout=None, tick=.05):
         super(LinkState, self).__init__()
         self._map = defaultdict(lambda: defaultdict(lambda: None))
+        self.link_timeout = link_timeout
+        self._wheel = timer_wheel.TimerWheel(tick)
+
+    def _schedule(self, link, timestamp):
+        if self.link_timeout is not None:
+            self._wheel.schedule(link, timestamp + self.link_timeout)
 
     def get_peers(self, src):
         return self._map[src].keys()
@@ -385,7 +583,10 @@ class LinkState(dict):
     def update_link(self, src, dst):
         link = Link(src, dst)
 
-        self[link] = time.time()
+        now = time.time()
+        if link not in self._wheel:
+            self._schedule(link, now)
+        self[link] = now
         self._map[src][dst] = link
 
         # return if the reverse link is also up or not
@@ -395,11 +596,13 @@ class LinkState(dict):
     def link_down(self, link):
         del self[link]
         del self._map[link.src][link.dst]
+        self._wheel.cancel(link)
 
     def rev_link_set_timestamp(self, rev_link, timestamp):
         # rev_link may or may not in LinkSet
         if rev_link in self:
             self[rev_link] = timestamp
+            self._schedule(rev_link, timestamp)
 
     def port_deleted(self, src):
         dsts = self.get_peers(src)
@@ -409,7 +612,9 @@ class LinkState(dict):
             link = Link(src, dst)
             rev_link = Link(dst, src)
             del self[link]
+            self._wheel.cancel(link)
             self.pop(rev_link, None)
+            self._wheel.cancel(rev_link)
             if src in self._map[dst]:
                 del self._map[dst][src]
                 rev_link_dsts.append(dst)
@@ -417,6 +622,28 @@ class LinkState(dict):
         del self._map[src]
         return dsts, rev_link_dsts
 
+    def expired_links(self, now):
+        """
+        Returns the list of the links not updated for link_timeout.
+        They are not deleted by this method.
+        """
+        expired = []
+        for link in self._wheel.expire(now):
+            timestamp = self.get(link)
+            if timestamp is None:
+                continue
+            if timestamp + self.link_timeout <= now:
+                expired.append(link)
+            else:
+                self._schedule(link, timestamp)
+        return expired
+
+    def expiry_timeout(self, now):
+        """
+        Returns the seconds until the next link may expire, or None.
+        """
+        return self._wheel.timeout(now)
+
 
 class LLDPPacket(object):
     # make a LLDP packet for link discovery.
@@ -431,8 +658,11 @@ class LLDPPacket(object):
     class LLDPUnknownFormat(RyuException):
         message = '%(msg)s'
 
+    # The packet serialized once, patched per port by lldp_packet()
+    _template = None
+
     @staticmethod
-    def lldp_packet(dpid, port_no, dl_addr, ttl):
+    def _lldp_packet(dpid, port_no, dl_addr, ttl):
         pkt = packet.Packet()
 
         dst = lldp.LLDP_MAC_NEAREST_BRIDGE
@@ -457,9 +687,20 @@ class LLDPPacket(object):
         tlvs = (tlv_chassis_id, tlv_port_id, tlv_ttl, tlv_end)
         lldp_pkt = lldp.lldp(tlvs)
         pkt.add_protocol(lldp_pkt)
+        return pkt
 
-        pkt.serialize()
-        return pkt.data
+    @staticmethod
+    def lldp_packet(dpid, port_no, dl_addr, ttl):
+        tmpl = LLDPPacket._template
+        if tmpl is None:
+            tmpl = LLDPPacket._template = packet_template.PacketTemplate(
+                LLDPPacket._lldp_packet(0, 0, DONTCARE_STR, 0))
+        chassis_id = (LLDPPacket.CHASSIS_ID_FMT %
+                      dpid_to_str(dpid)).encode('ascii')
+        return tmpl.render(
+            eth_src=dl_addr, lldp_chassis_id=chassis_id,
+            lldp_port_id=struct.pack(LLDPPacket.PORT_ID_STR, port_no),
+            lldp_ttl=ttl)
 
     @staticmethod
     def lldp_parse(data):
@@ -503,15 +744,25 @@ class Switches(app_manager.RyuApp):
                event.EventPortAdd, event.EventPortDelete,
                event.EventPortModify,
                event.EventLinkAdd, event.EventLinkDelete,
-               event.EventHostAdd]
+               event.EventHostAdd, event.EventHostDelete]
 
     DEFAULT_TTL = 120  # unused. ignored.
     LLDP_PACKET_LEN = len(LLDPPacket.lldp_packet(0, 0, DONTCARE_STR, 0))
 
+    # The LLDP sends and the link expiry are scheduled in timer wheels
+    # of LLDP_SEND_GUARD ticks.  Up to LLDP_SEND_BURST ports are sent
+    # LLDP packets in a tick, in a message batch per datapath.
     LLDP_SEND_GUARD = .05
+    LLDP_SEND_BURST = 256
     LLDP_SEND_PERIOD_PER_PORT = .9
     TIMEOUT_CHECK_PERIOD = 5.
     LINK_TIMEOUT = TIMEOUT_CHECK_PERIOD * 2
+    # The LLDP send period of a port doubles up to LLDP_SEND_PERIOD_MAX
+    # while the port and its links do not change.
+    LLDP_SEND_PERIOD_MAX = LINK_TIMEOUT / 4
+    # The least recently seen hosts are deleted to keep MAX_HOSTS.
+    # The hosts not seen for --host-timeout are deleted, if it is given.
+    MAX_HOSTS = 65536
 
     def __init__(self, *args, **kwargs):
         super(Switches, self).__init__(*args, **kwargs)
@@ -519,9 +770,22 @@ class Switches(app_manager.RyuApp):
         self.name = 'switches'
         self.dps = {}                 # datapath_id => Datapath class
         self.port_state = {}          # datapath_id => ports
-        self.ports = PortDataState()  # Port class -> PortData class
-        self.links = LinkState()      # Link class -> timestamp
-        self.hosts = HostState()      # mac address -> Host class list
+        # Port class -> PortData class
+        self.ports = PortDataState(self.LLDP_SEND_PERIOD_PER_PORT,
+                                   self.LLDP_SEND_PERIOD_MAX,
+                                   self.LLDP_SEND_GUARD)
+        # Link class -> timestamp
+        self.links = LinkState(self.LINK_TIMEOUT, self.LLDP_SEND_GUARD)
+        # mac address -> Host class
+        self.hosts = HostState(self.MAX_HOSTS,
+                               self.CONF.host_timeout or None)
+        # switches and links, versioned for get_topology()
+        self.graph = TopologyGraph()
+        # The switches of the other worker processes and the links found
+        # by them, merged from ryu.controller.worker_channel.
+        # datapath_id => Switch class of RemoteDatapath
+        self.remote_switches = {}
+        self.remote_links = set()  # Link class of RemotePort
         self.is_active = True
 
         self.link_discovery = self.CONF.observe_links
@@ -533,6 +797,10 @@ class Switches(app_manager.RyuApp):
             self.threads.append(hub.spawn(self.lldp_loop))
             self.threads.append(hub.spawn(self.link_loop))
 
+    def start(self):
+        super(Switches, self).start()
+        self._observe_workers()
+
     def close(self):
         self.is_active = False
         if self.link_discovery:
@@ -569,6 +837,13 @@ class Switches(app_manager.RyuApp):
                 if p.port_no == port_no:
                     return p
 
+    def _get_remote_port(self, dpid, port_no):
+        switch = self.remote_switches.get(dpid)
+        if switch:
+            for p in switch.ports:
+                if p.port_no == port_no:
+                    return p
+
     def _port_added(self, port):
         lldp_data = LLDPPacket.lldp_packet(
             port.dpid, port.port_no, port.hw_addr, self.DEFAULT_TTL)
@@ -585,9 +860,11 @@ class Switches(app_manager.RyuApp):
             return
         for dst in dsts:
             link = Link(port, dst)
+            self.graph.remove_link(link)
             self.send_event_to_observers(event.EventLinkDelete(link))
         for rev_link_dst in rev_link_dsts:
             rev_link = Link(rev_link_dst, port)
+            self.graph.remove_link(rev_link)
             self.send_event_to_observers(event.EventLinkDelete(rev_link))
             self.ports.move_front(rev_link_dst)
 
@@ -615,6 +892,7 @@ class Switches(app_manager.RyuApp):
             self._register(dp)
             switch = self._get_switch(dp.id)
             LOG.debug('register %s', switch)
+            self.graph.add_switch(dp.id)
 
             if not dp_multiple_conns:
                 self.send_event_to_observers(event.EventSwitchEnter(switch))
@@ -680,6 +958,7 @@ class Switches(app_manager.RyuApp):
                 if switch.dp is dp:
                     self._unregister(dp)
                     LOG.debug('unregister %s', switch)
+                    self.graph.remove_switch(dp.id)
                     evt = event.EventSwitchLeave(switch)
                     self.send_event_to_observers(evt)
 
@@ -789,7 +1068,9 @@ class Switches(app_manager.RyuApp):
             LOG.error('cannot accept LLDP. unsupported version. %x',
                       msg.datapath.ofproto.OFP_VERSION)
 
-        src = self._get_port(src_dpid, src_port_no)
+        # The source switch may be connected to another worker process
+        src = (self._get_port(src_dpid, src_port_no) or
+               self._get_remote_port(src_dpid, src_port_no))
         if not src or src.dpid == dst_dpid:
             return
         try:
@@ -811,16 +1092,15 @@ class Switches(app_manager.RyuApp):
 
         link = Link(src, dst)
         if link not in self.links:
+            self.graph.add_link(link)
             self.send_event_to_observers(event.EventLinkAdd(link))
+            # wake up link_loop to schedule the expiry
+            self.link_event.set()
 
             # remove hosts if it's not attached to edge port
-            host_to_del = []
-            for host in self.hosts.values():
-                if not self._is_edge_port(host.port):
-                    host_to_del.append(host.mac)
-
-            for host_mac in host_to_del:
-                del self.hosts[host_mac]
+            for port in (src, dst):
+                for host in self.hosts.get_by_port(port.dpid, port.port_no):
+                    del self.hosts[host.mac]
 
         if not self.links.update_link(src, dst):
             # reverse link is not detected yet.
@@ -860,15 +1140,19 @@ class Switches(app_manager.RyuApp):
         host_mac = eth.src
         host = Host(host_mac, port)
 
+        self._expire_hosts()
+        events = []
         if host_mac not in self.hosts:
-            self.hosts.add(host)
-            ev = event.EventHostAdd(host)
-            self.send_event_to_observers(ev)
+            for evicted in self.hosts.add(host):
+                self.send_event_to_observers(event.EventHostDelete(evicted))
+            events.append(event.EventHostAdd(host))
         elif self.hosts[host_mac].port != port:
             # assumes the host is moved to another port
-            ev = event.EventHostMove(src=self.hosts[host_mac], dst=host)
+            events.append(event.EventHostMove(src=self.hosts[host_mac],
+                                              dst=host))
             self.hosts[host_mac] = host
-            self.send_event_to_observers(ev)
+        else:
+            self.hosts.touch(host_mac)
 
         # arp packet, update ip address
         if eth.ethertype == ether_types.ETH_TYPE_ARP:
@@ -886,66 +1170,78 @@ class Switches(app_manager.RyuApp):
             ipv6_pkt, _, _ = pkt_type.parser(pkt_data)
             self.hosts.update_ip(host, ip_v6=ipv6_pkt.src)
 
-    def send_lldp_packet(self, port):
+        # raised after the update, so the host carries the address of
+        # the packet which revealed it
+        for ev in events:
+            self.send_event_to_observers(ev)
+
+    def _expire_hosts(self):
+        for host in self.hosts.expire(time.time()):
+            self.send_event_to_observers(event.EventHostDelete(host))
+
+    def _lldp_packet_out(self, port):
+        # Returns the LLDP packet-out message to send from the port.
         try:
             port_data = self.ports.lldp_sent(port)
         except KeyError:
             # ports can be modified during our sleep in self.lldp_loop()
             # LOG.debug('send_lld error', exc_info=True)
-            return
+            return None
         if port_data.is_down:
-            return
+            return None
 
         dp = self.dps.get(port.dpid, None)
         if dp is None:
             # datapath was already deleted
-            return
+            return None
 
         # LOG.debug('lldp sent dpid=%s, port_no=%d', dp.id, port.port_no)
-        # TODO:XXX
-        if dp.ofproto.OFP_VERSION == ofproto_v1_0.OFP_VERSION:
-            actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
-            dp.send_packet_out(actions=actions, data=port_data.lldp_data)
-        elif dp.ofproto.OFP_VERSION >= ofproto_v1_2.OFP_VERSION:
-            actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
-            out = dp.ofproto_parser.OFPPacketOut(
-                datapath=dp, in_port=dp.ofproto.OFPP_CONTROLLER,
-                buffer_id=dp.ofproto.OFP_NO_BUFFER, actions=actions,
-                data=port_data.lldp_data)
-            dp.send_msg(out)
-        else:
-            LOG.error('cannot send lldp packet. unsupported version. %x',
-                      dp.ofproto.OFP_VERSION)
+        template = port_data.lldp_template
+        if template is None or template.datapath is not dp:
+            # TODO:XXX
+            if dp.ofproto.OFP_VERSION == ofproto_v1_0.OFP_VERSION:
+                actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
+                out = dp.ofproto_parser.OFPPacketOut(
+                    dp, 0xffffffff, dp.ofproto.OFPP_NONE, actions,
+                    port_data.lldp_data)
+            elif dp.ofproto.OFP_VERSION >= ofproto_v1_2.OFP_VERSION:
+                actions = [dp.ofproto_parser.OFPActionOutput(port.port_no)]
+                out = dp.ofproto_parser.OFPPacketOut(
+                    datapath=dp, in_port=dp.ofproto.OFPP_CONTROLLER,
+                    buffer_id=dp.ofproto.OFP_NO_BUFFER, actions=actions,
+                    data=port_data.lldp_data)
+            else:
+                LOG.error('cannot send lldp packet. unsupported version. %x',
+                          dp.ofproto.OFP_VERSION)
+                return None
+            template = ofproto_parser.MsgTemplate(out)
+            port_data.lldp_template = template
+        return template()
+
+    def send_lldp_packets(self, ports):
+        # The packet-outs to a datapath are sent at once.
+        msgs = defaultdict(list)
+        for port in ports:
+            msg = self._lldp_packet_out(port)
+            if msg is not None:
+                msgs[msg.datapath].append(msg)
+        for dp, dp_msgs in msgs.items():
+            dp.send_msgs(dp_msgs)
+
+    def send_lldp_packet(self, port):
+        self.send_lldp_packets([port])
 
     def lldp_loop(self):
         while self.is_active:
             self.lldp_event.clear()
 
-            now = time.time()
-            timeout = None
-            ports_now = []
-            ports = []
-            for (key, data) in self.ports.items():
-                if data.timestamp is None:
-                    ports_now.append(key)
-                    continue
-
-                expire = data.timestamp + self.LLDP_SEND_PERIOD_PER_PORT
-                if expire <= now:
-                    ports.append(key)
-                    continue
-
-                timeout = expire - now
-                break
-
-            for port in ports_now:
-                self.send_lldp_packet(port)
-            for port in ports:
-                self.send_lldp_packet(port)
-                hub.sleep(self.LLDP_SEND_GUARD)      # don't burst
+            ports = self.ports.lldp_due(time.time(), self.LLDP_SEND_BURST)
+            self.send_lldp_packets(ports)
 
-            if timeout is not None and ports:
-                timeout = 0     # We have already slept
+            timeout = self.ports.lldp_timeout(time.time())
+            if len(ports) >= self.LLDP_SEND_BURST:
+                # don't burst
+                timeout = max(timeout or 0, self.LLDP_SEND_GUARD)
             # LOG.debug('lldp sleep %s', timeout)
             self.lldp_event.wait(timeout=timeout)
 
@@ -954,14 +1250,10 @@ class Switches(app_manager.RyuApp):
             self.link_event.clear()
 
             now = time.time()
-            deleted = []
-            for (link, timestamp) in self.links.items():
-                # LOG.debug('%s timestamp %d (now %d)', link, timestamp, now)
-                if timestamp + self.LINK_TIMEOUT < now:
-                    deleted.append(link)
-
+            deleted = self.links.expired_links(now)
             for link in deleted:
                 self.links.link_down(link)
+                self.graph.remove_link(link)
                 # LOG.debug('delete %s', link)
                 self.send_event_to_observers(event.EventLinkDelete(link))
 
@@ -969,14 +1261,17 @@ class Switches(app_manager.RyuApp):
                 rev_link = Link(dst, link.src)
                 if rev_link not in deleted:
                     # It is very likely that the reverse link is also
-                    # disconnected. Check it early.
-                    expire = now - self.LINK_TIMEOUT
+                    # disconnected. Check it early: it expires in
+                    # TIMEOUT_CHECK_PERIOD unless LLDP is received.
+                    expire = (now - self.LINK_TIMEOUT +
+                              self.TIMEOUT_CHECK_PERIOD)
                     self.links.rev_link_set_timestamp(rev_link, expire)
                     if dst in self.ports:
                         self.ports.move_front(dst)
                         self.lldp_event.set()
 
-            self.link_event.wait(timeout=self.TIMEOUT_CHECK_PERIOD)
+            timeout = self.links.expiry_timeout(time.time())
+            self.link_event.wait(timeout=timeout)
 
     @set_ev_cls(event.EventSwitchRequest)
     def switch_request_handler(self, req):
@@ -988,8 +1283,13 @@ class Switches(app_manager.RyuApp):
             # reply all list
             for dp in self.dps.values():
                 switches.append(self._get_switch(dp.id))
+            for remote_dpid, switch in self.remote_switches.items():
+                if remote_dpid not in self.dps:
+                    switches.append(switch)
         elif dpid in self.dps:
             switches.append(self._get_switch(dpid))
+        elif dpid in self.remote_switches:
+            switches.append(self.remote_switches[dpid])
 
         rep = event.EventSwitchReply(req.src, switches)
         self.reply_to_request(req, rep)
@@ -999,18 +1299,98 @@ class Switches(app_manager.RyuApp):
         # LOG.debug(req)
         dpid = req.dpid
 
-        if dpid is None:
-            links = self.links
-        else:
-            links = [link for link in self.links if link.src.dpid == dpid]
+        links = list(self.links) + list(self.remote_links)
+        if dpid is not None:
+            links = [link for link in links if link.src.dpid == dpid]
         rep = event.EventLinkReply(req.src, dpid, links)
         self.reply_to_request(req, rep)
 
+    @set_ev_cls(event.EventTopologyRequest)
+    def topology_request_handler(self, req):
+        rep = event.EventTopologyReply(req.src, self.graph.snapshot())
+        self.reply_to_request(req, rep)
+
+    # Merge the topology events relayed from the other worker processes.
+    # They update the state and the graph, but are not sent to the
+    # observers, which see the EventWorkerMessage instead.
+    # The handler is registered dynamically in order not to make the
+    # worker_channel service a dependency of a single process controller.
+    def _observe_workers(self):
+        if worker.get_channel() is None:
+            return
+        self.register_handler(worker_channel.EventWorkerMessage,
+                              self._worker_message_handler)
+        self.observe_event(worker_channel.EventWorkerMessage)
+
+    def _worker_message_handler(self, ev):
+        if ev.topic != worker_channel.TOPIC_TOPOLOGY:
+            return
+        name, data = ev.data
+        if name == 'EventSwitchEnter':
+            self._remote_switch_enter(ev.src, data)
+        elif name == 'EventSwitchLeave':
+            self._remote_switch_leave(str_to_dpid(data['dpid']))
+        elif name == 'EventPortAdd':
+            self._remote_port_add(RemotePort(data))
+        elif name == 'EventPortDelete':
+            self._remote_port_delete(RemotePort(data))
+        elif name == 'EventLinkAdd':
+            link = Link(RemotePort(data['src']), RemotePort(data['dst']))
+            self.remote_links.add(link)
+            self.graph.add_link(link)
+        elif name == 'EventLinkDelete':
+            link = Link(RemotePort(data['src']), RemotePort(data['dst']))
+            self.remote_links.discard(link)
+            self.graph.remove_link(link)
+
+    def _remote_switch_enter(self, worker_id, data):
+        dpid = str_to_dpid(data['dpid'])
+        switch = Switch(RemoteDatapath(dpid, worker_id))
+        switch.ports = [RemotePort(port) for port in data['ports']]
+        self.remote_switches[dpid] = switch
+        self.graph.add_switch(dpid)
+
+    def _remote_switch_leave(self, dpid):
+        switch = self.remote_switches.pop(dpid, None)
+        if switch is None:
+            return
+        for port in switch.ports:
+            self._remote_links_down(port)
+        if dpid in self.dps:
+            # reconnected to this worker
+            return
+        self.graph.remove_switch(dpid)
+
+    def _remote_port_add(self, port):
+        switch = self.remote_switches.get(port.dpid)
+        if switch is not None and port not in switch.ports:
+            switch.ports.append(port)
+
+    def _remote_port_delete(self, port):
+        switch = self.remote_switches.get(port.dpid)
+        if switch is not None and port in switch.ports:
+            switch.ports.remove(port)
+            self._remote_links_down(port)
+
+    def _remote_links_down(self, port):
+        for link in [link for link in self.remote_links
+                     if port in (link.src, link.dst)]:
+            self.remote_links.discard(link)
+            self.graph.remove_link(link)
+        # the links found by this worker from the port
+        if self.link_discovery:
+            self._link_down(port)
+
     @set_ev_cls(event.EventHostRequest)
     def host_request_handler(self, req):
+        self._expire_hosts()
         dpid = req.dpid
         hosts = []
-        if dpid is None:
+        if req.ip is not None:
+            host = self.hosts.get_by_ip(req.ip)
+            if host is not None and dpid in (None, host.port.dpid):
+                hosts.append(host)
+        elif dpid is None:
             for mac in self.hosts:
                 hosts.append(self.hosts[mac])
         else: